@@ -0,0 +1,111 @@
+"""
+In-process cache for the Chicken Feeding Management System reference data
+
+Growth stages, food types, schedule templates and formulations change rarely
+but are read on almost every request. Cached entries belong to a version
+number that is stored in the database. Writers bump that version in the same
+transaction as their change. Each uvicorn worker compares its local version
+with the database at most once per check interval and drops its entries
+when the database has moved on.
+
+Loaders return the version they read together with the data, from the same
+transaction. An entry is stored under that version, and only if it is the
+cache's current version. A loader whose snapshot predates a concurrent bump
+therefore serves its own caller but never fills the cache with stale data.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# How stale another worker's write may look here, in seconds
+REFERENCE_CACHE_CHECK_SECONDS = float(os.getenv("REFERENCE_CACHE_CHECK_SECONDS", "2"))
+
+class VersionedCache:
+    """Read-through cache whose entries are dropped whenever the shared version changes"""
+
+    def __init__(self, check_interval: float = REFERENCE_CACHE_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._entries: Dict[str, Tuple[int, Any]] = {}
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.version_checks = 0
+        self.stale_loads = 0
+
+    def _set_version(self, version: int):
+        if self._entries:
+            self.invalidations += 1
+            self._entries.clear()
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def sync(self, read_version: Callable[[], int]):
+        """Compare with the database version, at most once per check interval
+
+        Versions only move forward; a reader on an older snapshot cannot take the cache back.
+        """
+        if self._version is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return
+        version = read_version()
+        self.version_checks += 1
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._set_version(version)
+            else:
+                self._checked_at = time.monotonic()
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def invalidate(self, version: int):
+        """Drop every entry after a local write has bumped the version"""
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._set_version(version)
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == self._version:
+            self.hits += 1
+            return entry[1]
+        return None
+
+    def get(self, key: str, loader: Callable[[], Tuple[int, Any]]) -> Any:
+        """Cached value for key; loader returns (version it read, value) from one transaction"""
+        value = self._lookup(key)
+        if value is not None:
+            return value
+
+        # One loader at a time, so a cold cache is filled once rather than per thread
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            self.misses += 1
+            version, value = loader()
+            if self._version is None or version > self._version:
+                self._set_version(version)
+            if version == self._version:
+                self._entries[key] = (version, value)
+            else:
+                self.stale_loads += 1
+            return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "version": self._version,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+            "version_checks": self.version_checks,
+            "stale_loads": self.stale_loads,
+            "check_interval_seconds": self.check_interval,
+        }
@@ -0,0 +1,37 @@
+"""
+HTTP validators and Cache-Control policies for the read endpoints
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Cache-Control per resource class
+CACHE_POLICIES = {
+    # Growth stages, food types: the same for everyone and rarely changed
+    "reference": "public, max-age=60",
+    # Per-user data: browsers keep a copy but revalidate it on every use
+    "private": "private, no-cache",
+}
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from the values that identify a representation (ids, versions, timestamps)"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as GET requests allow
+    return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+def conditional_response(request: Request, response: Response, etag: str, policy: str) -> Optional[Response]:
+    """Attach validators; return a bodyless 304 when the client's copy is still current"""
+    headers = {"ETag": etag, "Cache-Control": CACHE_POLICIES[policy]}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,22 +1,53 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, ForeignKey, Table, DateTime, Boolean, Date
+from fastapi.responses import ORJSONResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, Table, DateTime, Boolean, Date, JSON, Index, insert, update, bindparam, case
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import BigInteger, FetchedValue, and_, delete, func, or_, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session, relationship
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
-from datetime import datetime, date
+from pydantic import BaseModel, EmailStr, TypeAdapter, ValidationError
+from typing import Any, Dict, List, Optional, Tuple, Type
+from datetime import datetime, date, timedelta
+from bisect import bisect_right
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import secrets
+import anyio
+import numpy as np
 import uvicorn
-from passlib.context import CryptContext
+
+from database import (
+    SQLALCHEMY_DATABASE_URL, API_THREADPOOL_SIZE, RUN_MIGRATIONS_ON_STARTUP,
+    create_db_engine, create_async_db_engine, run_migrations
+)
+from passwords import password_hasher
+from cache import VersionedCache
+from http_cache import conditional_response, make_etag
+
+logger = logging.getLogger(__name__)
 
 # Database setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///./chicken_feeding.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_db_engine(SQLALCHEMY_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Session tokens issued at login, so clients stop resending the password
+SESSION_TTL_MINUTES = int(os.getenv("SESSION_TTL_MINUTES", "30"))
+SESSION_REFRESH_TTL_HOURS = int(os.getenv("SESSION_REFRESH_TTL_HOURS", "168"))
+
+# How often each worker moves groups into the stage matching their age (0 disables)
+STAGE_ADVANCE_INTERVAL_MINUTES = int(os.getenv("STAGE_ADVANCE_INTERVAL_MINUTES", "60"))
 
 # Association table for many-to-many relationship between feed formulations and ingredients
 formulation_ingredients = Table(
@@ -90,6 +121,7 @@ class ChickenGroup(Base):
     quantity = Column(Integer, nullable=False)
     current_quantity = Column(Integer, nullable=False)  # Updated when mortality occurs
     avg_weight_kg = Column(Float, nullable=False)
+    weight_date = Column(Date, nullable=True)  # tracking_date of the measurement behind avg_weight_kg
     start_date = Column(Date, nullable=False)
     current_stage_id = Column(Integer, ForeignKey('growth_stages.id'), nullable=False)
     is_active = Column(Boolean, default=True)
@@ -270,6 +302,125 @@ class ChickenProfile(Base):
     # Relationships
     user = relationship("User")
 
+class UserSession(Base):
+    __tablename__ = "user_sessions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256 of the access token
+    refresh_token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    refresh_expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    user = relationship("User")
+
+class ReferenceDataVersion(Base):
+    __tablename__ = "reference_data_version"
+
+    id = Column(Integer, primary_key=True)  # single row, id = 1
+    version = Column(Integer, nullable=False, default=0)  # bumped on every reference-data change
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class InventoryMovement(Base):
+    __tablename__ = "inventory_movements"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    food_type_id = Column(Integer, ForeignKey('food_types.id'), nullable=False, index=True)
+    movement_type = Column(String(20), nullable=False)  # "purchase", "consumption" or "adjustment"
+    movement_date = Column(Date, nullable=False)
+    quantity_kg = Column(Float, nullable=False)  # signed: stock in is positive, stock out negative
+    unit_cost = Column(Float, nullable=True)
+    group_id = Column(Integer, ForeignKey('chicken_groups.id'), nullable=True)
+    feeding_record_id = Column(Integer, ForeignKey('group_feeding_records.id'), nullable=True)  # set for derived consumption
+    notes = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class InventoryBalance(Base):
+    __tablename__ = "inventory_balances"
+
+    # Running total of inventory_movements per user and food type, kept in step on every write
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    food_type_id = Column(Integer, ForeignKey('food_types.id'), primary_key=True)
+    quantity_kg = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class GroupDashboardSummary(Base):
+    __tablename__ = "group_dashboard_summaries"
+
+    # One row per group, rewritten whenever the group's feeding, growth or stage data changes
+    group_id = Column(Integer, ForeignKey('chicken_groups.id'), primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    batch_number = Column(String(50), nullable=False)
+    breed = Column(String(100), nullable=False)
+    is_active = Column(Boolean, default=True)
+    quantity = Column(Integer, nullable=False)
+    current_quantity = Column(Integer, nullable=False)
+    stage_id = Column(Integer, ForeignKey('growth_stages.id'), nullable=True)
+    stage_name = Column(String(100), nullable=True)
+    age_days = Column(Integer, nullable=False)
+    last_weight_kg = Column(Float, nullable=True)
+    last_weight_date = Column(Date, nullable=True)
+    feed_7d_kg = Column(Float, nullable=False, default=0)
+    cost_7d = Column(Float, nullable=False, default=0)
+    total_feed_kg = Column(Float, nullable=False, default=0)
+    total_feed_cost = Column(Float, nullable=False, default=0)
+    mortality_count = Column(Integer, nullable=False, default=0)
+    feed_conversion_ratio = Column(Float, nullable=True)
+    as_of_date = Column(Date, nullable=False)  # the 7-day window and stage are relative to this day
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DomainEvent(Base):
+    __tablename__ = "domain_events"
+    __table_args__ = (
+        Index("ix_domain_events_aggregate", "aggregate_type", "aggregate_id"),
+        Index("ix_domain_events_position", "transaction_id", "id"),
+    )
+
+    # Append-only; written in the same transaction as the change it describes
+    id = Column(Integer, primary_key=True)
+    # Writing transaction, set by the database: txid_current() on PostgreSQL, 0 on SQLite
+    transaction_id = Column(BigInteger, nullable=False, server_default=FetchedValue())
+    event_type = Column(String(50), nullable=False)  # e.g. FeedingRecorded, MortalityRecorded
+    aggregate_type = Column(String(30), nullable=False)  # group or profile
+    aggregate_id = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=False)
+    occurred_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class GroupRollup(Base):
+    __tablename__ = "group_rollups"
+    __table_args__ = (Index("ix_group_rollups_user_bucket", "user_id", "granularity", "bucket_start"),)
+
+    # Feeding and growth totals per group and day, week (from Monday) or calendar month
+    group_id = Column(Integer, ForeignKey('chicken_groups.id'), primary_key=True)
+    granularity = Column(String(10), primary_key=True)
+    bucket_start = Column(Date, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    feed_kg = Column(Float, nullable=False, default=0)
+    feed_cost = Column(Float, nullable=False, default=0)
+    feeding_count = Column(Integer, nullable=False, default=0)
+    mortality = Column(Integer, nullable=False, default=0)
+    # Kept as sum and count so coarser buckets and ranges average exactly
+    weight_sum_kg = Column(Float, nullable=False, default=0)
+    weight_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ProjectionCheckpoint(Base):
+    __tablename__ = "projection_checkpoints"
+
+    # How far each projection has read the event log, as a (transaction_id, id) position
+    name = Column(String(50), primary_key=True)
+    last_transaction_id = Column(BigInteger, nullable=False, default=0, server_default="0")
+    last_event_id = Column(Integer, nullable=False, default=0)
+    # The event the projection is stuck on, and events it gave up on
+    failed_event_id = Column(Integer, nullable=True)
+    failed_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    parked_event_ids = Column(JSON, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 # Pydantic Models
 class UserBase(BaseModel):
     username: str
@@ -286,6 +437,9 @@ class UserLogin(BaseModel):
 class UsernameCheck(BaseModel):
     identifier: str
 
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
 class UserResponse(UserBase):
     id: int
     is_active: bool
@@ -438,6 +592,27 @@ class FeedFormulationResponse(FeedFormulationBase):
     class Config:
         from_attributes = True
 
+class GroupFeedingScheduleTemplateResponse(BaseModel):
+    id: int
+    growth_stage_id: int
+    formulation_id: int
+    feed_percentage: float
+    feeding_frequency: int
+    is_active: bool
+    
+    class Config:
+        from_attributes = True
+
+class FormulationIngredientResponse(BaseModel):
+    food_type_id: int
+    name: str
+    category: str
+    cost_per_kg: float
+    percentage: float
+
+class GroupFormulationResponse(FeedFormulationResponse):
+    ingredients: List[FormulationIngredientResponse]
+
 class GroupFeedingRecordBase(BaseModel):
     group_id: int
     feeding_date: date
@@ -539,6 +714,134 @@ class ChickenProfileUpdate(BaseModel):
     molting: Optional[str] = None
     vaccination: Optional[str] = None
 
+class GroupInventoryConsumptionBase(BaseModel):
+    group_id: int
+    food_type_id: int
+    consumption_date: date
+    quantity_kg: float
+    cost: float
+
+class GroupInventoryConsumptionCreate(GroupInventoryConsumptionBase):
+    pass
+
+class GroupInventoryConsumptionResponse(GroupInventoryConsumptionBase):
+    id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class InventoryMovementBase(BaseModel):
+    food_type_id: int
+    movement_type: str  # "purchase", "consumption" or "adjustment"
+    movement_date: date
+    quantity_kg: float  # purchases and consumption are positive; adjustments are signed
+    unit_cost: Optional[float] = None
+    notes: Optional[str] = None
+
+class InventoryMovementCreate(InventoryMovementBase):
+    pass
+
+class InventoryMovementResponse(InventoryMovementBase):
+    id: int
+    user_id: int
+    group_id: Optional[int] = None
+    feeding_record_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class InventoryBalanceResponse(BaseModel):
+    food_type_id: int
+    name: Optional[str] = None
+    quantity_kg: float
+    updated_at: Optional[datetime] = None
+
+class GroupDashboardSummaryResponse(BaseModel):
+    group_id: int
+    batch_number: str
+    breed: str
+    is_active: bool
+    quantity: int
+    current_quantity: int
+    stage_id: Optional[int] = None
+    stage_name: Optional[str] = None
+    age_days: int
+    last_weight_kg: Optional[float] = None
+    last_weight_date: Optional[date] = None
+    feed_7d_kg: float
+    cost_7d: float
+    total_feed_kg: float
+    total_feed_cost: float
+    mortality_count: int
+    feed_conversion_ratio: Optional[float] = None
+    as_of_date: date
+
+    class Config:
+        from_attributes = True
+
+class DashboardTotals(BaseModel):
+    active_groups: int
+    birds: int
+    feed_7d_kg: float
+    cost_7d: float
+
+class DashboardResponse(BaseModel):
+    user_id: int
+    as_of_date: date
+    totals: DashboardTotals
+    groups: List[GroupDashboardSummaryResponse]
+
+class AnalyticsPoint(BaseModel):
+    bucket_start: date
+    feed_kg: float
+    feed_cost: float
+    mortality: int
+    avg_weight_kg: Optional[float] = None
+
+class AnalyticsTotals(BaseModel):
+    feed_kg: float
+    feed_cost: float
+    mortality: int
+    avg_weight_kg: Optional[float] = None
+
+class AnalyticsResponse(BaseModel):
+    scope: str
+    scope_id: int
+    start_date: date
+    end_date: date
+    granularity: str
+    series: List[AnalyticsPoint]
+    totals: AnalyticsTotals
+    rows_read: int
+
+class BulkIngestRowError(BaseModel):
+    index: int
+    errors: List[str]
+
+class BulkIngestResponse(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: List[BulkIngestRowError]
+
+class WeeklyRecipeRequest(BaseModel):
+    breed: str = "leghorn"
+    age: int = 20
+    weight: float = 1.5
+    quantity: int = 10
+    environment: str = "free_range"
+    season: str = "summer"
+    purpose: str = "eggs"
+    stress_level: str = "low"
+    molting: str = "no"
+    start_date: Optional[date] = None
+
+class WeeklyRecipeBatchRequest(BaseModel):
+    profile_ids: List[int]
+    start_date: Optional[date] = None
+
 # Create tables - moved to after all models are defined
 
 # FastAPI app
@@ -568,6 +871,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def configure_threadpool():
+    """Match the sync handler thread pool to the database pool size"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+
+@app.on_event("startup")
+async def apply_migrations():
+    """Bring the schema up to date with Alembic before serving requests"""
+    if RUN_MIGRATIONS_ON_STARTUP:
+        await run_in_threadpool(run_migrations, SQLALCHEMY_DATABASE_URL, Base.metadata)
+        await run_in_threadpool(run_summary_backfill)
+
+@app.on_event("startup")
+async def start_password_hasher():
+    await password_hasher.start()
+
+@app.on_event("startup")
+async def start_stage_advance():
+    if STAGE_ADVANCE_INTERVAL_MINUTES > 0:
+        app.state.stage_advance_task = asyncio.create_task(run_stage_advance_loop())
+
+@app.on_event("startup")
+async def start_projections():
+    if PROJECTION_POLL_SECONDS > 0:
+        app.state.projection_task = asyncio.create_task(run_projection_loop())
+
+@app.on_event("shutdown")
+async def dispose_engines():
+    for name in ("stage_advance_task", "projection_task"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    engine.dispose()
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
@@ -576,30 +915,88 @@ def get_db():
     finally:
         db.close()
 
-# Authentication helper functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# Dependency to get async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+# HTTP validators
+def collection_version_query(model, *criteria):
+    """Row count, highest id and latest update of a filtered table; changes whenever any row does"""
+    return select(func.count(model.id), func.max(model.id), func.max(model.updated_at)).where(*criteria)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
+# Fast list serialization
+def response_columns(model, schema: Type[BaseModel]) -> list:
+    """The table columns behind a response schema, to select plain rows instead of ORM objects"""
+    return [model.__table__.c[name] for name in schema.model_fields]
+
+def fast_json(rows, response: Optional[Response] = None) -> ORJSONResponse:
+    """Encode selected rows straight to JSON with orjson
+
+    This skips the ORM -> Pydantic -> dict round trip. The endpoint's
+    response_model still documents the shape in OpenAPI.
+    """
+    return ORJSONResponse([dict(row) for row in rows], headers=dict(response.headers) if response is not None else None)
+
+# Authentication helper functions
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await db.scalar(select(User).where(User.username == username))
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash:
+        # Stored hash is below the configured work factor; upgrade it in place
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
+def hash_session_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def issue_session_tokens(session: UserSession) -> dict:
+    """Assign fresh access and refresh tokens to a session row"""
+    access_token = secrets.token_urlsafe(32)
+    refresh_token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    session.token_hash = hash_session_token(access_token)
+    session.refresh_token_hash = hash_session_token(refresh_token)
+    session.expires_at = now + timedelta(minutes=SESSION_TTL_MINUTES)
+    session.refresh_expires_at = now + timedelta(hours=SESSION_REFRESH_TTL_HOURS)
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": SESSION_TTL_MINUTES * 60
+    }
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+async def get_current_session(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserSession:
+    """Resolve the bearer token to a live session"""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    session = await db.scalar(select(UserSession).where(UserSession.token_hash == hash_session_token(credentials.credentials)))
+    if not session or session.expires_at < datetime.utcnow():
+        raise HTTPException(status_code=401, detail="Session expired or invalid", headers={"WWW-Authenticate": "Bearer"})
+    return session
+
 def get_user(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
 
-def create_user_settings(db: Session, user_id: int):
+async def get_user_async(db: AsyncSession, user_id: int):
+    return await db.get(User, user_id)
+
+async def create_user_settings(db: AsyncSession, user_id: int):
     """Create default user settings for a new user"""
     user_settings = UserSettings(user_id=user_id)
     db.add(user_settings)
-    db.commit()
-    db.refresh(user_settings)
+    await db.commit()
+    await db.refresh(user_settings)
     return user_settings
 
 # Key Functions Implementation
@@ -607,17 +1004,158 @@ def calculate_group_daily_feed_kg(quantity: int, avg_weight: float, feed_percent
     """Calculate daily feed requirements for a group"""
     return quantity * avg_weight * (feed_percentage / 100)
 
-def generate_group_daily_schedule(group_id: int, schedule_date: date, db: Session):
-    """Generate complete daily feeding schedule for a group"""
-    group = db.query(ChickenGroup).filter(ChickenGroup.id == group_id).first()
+# Reference data
+reference_cache = VersionedCache()
+
+class StageIndex:
+    """Interval index over the active growth stages' age ranges
+
+    Stages are sorted by min_age_days so the stage for an age is found with
+    a binary search instead of a scan.
+    """
+
+    def __init__(self, stages: List[GrowthStageResponse]):
+        self.stages = sorted((stage for stage in stages if stage.is_active), key=lambda stage: (stage.min_age_days, stage.id))
+        self.starts = [stage.min_age_days for stage in self.stages]
+
+    def lookup(self, age_days: int) -> Optional[GrowthStageResponse]:
+        """The latest-starting active stage a group of this age has reached"""
+        position = bisect_right(self.starts, age_days) - 1
+        return self.stages[position] if position >= 0 else None
+
+    def next_after(self, stage: GrowthStageResponse) -> Optional[GrowthStageResponse]:
+        position = bisect_right(self.starts, stage.min_age_days)
+        return self.stages[position] if position < len(self.stages) else None
+
+    def resolve(self, current: Optional[GrowthStageResponse], age_days: int) -> Optional[GrowthStageResponse]:
+        """Stage for a group of this age; groups only move forward, once they outgrow their current stage"""
+        if current is None:
+            return self.lookup(age_days)
+        if age_days <= current.max_age_days:
+            return current
+        candidate = self.lookup(age_days)
+        if candidate is None or candidate.min_age_days <= current.min_age_days:
+            return current
+        return candidate
+
+def read_reference_version(db: Session) -> int:
+    return db.execute(select(ReferenceDataVersion.version).where(ReferenceDataVersion.id == 1)).scalar() or 0
+
+def commit_reference_change(db: Session) -> int:
+    """Commit a change to reference data and bump the shared version so every worker reloads"""
+    result = db.execute(
+        update(ReferenceDataVersion)
+        .where(ReferenceDataVersion.id == 1)
+        .values(version=ReferenceDataVersion.version + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        db.add(ReferenceDataVersion(id=1, version=1))
+        db.flush()
+    version = read_reference_version(db)
+    db.commit()
+    reference_cache.invalidate(version)
+    return version
+
+def load_reference_data(db: Session) -> Dict[str, Any]:
+    """Snapshot stages, templates, formulations, ingredients, food types and nutrition data"""
+    stages = [GrowthStageResponse.model_validate(stage) for stage in db.execute(select(GrowthStage).order_by(GrowthStage.id)).scalars()]
+
+    templates_by_stage: Dict[int, List[GroupFeedingScheduleTemplateResponse]] = {}
+    for template in db.execute(
+        select(GroupFeedingScheduleTemplate)
+        .where(GroupFeedingScheduleTemplate.is_active == True)
+        .order_by(GroupFeedingScheduleTemplate.id)
+    ).scalars():
+        templates_by_stage.setdefault(template.growth_stage_id, []).append(GroupFeedingScheduleTemplateResponse.model_validate(template))
+
+    formulations_by_stage: Dict[int, List[FeedFormulationResponse]] = {}
+    for formulation in db.execute(
+        select(FeedFormulation).where(FeedFormulation.is_active == True).order_by(FeedFormulation.id)
+    ).scalars():
+        formulations_by_stage.setdefault(formulation.growth_stage_id, []).append(FeedFormulationResponse.model_validate(formulation))
+
+    # Percentages live on the association table, so read them alongside the food types
+    ingredients_by_formulation: Dict[int, List[Dict[str, Any]]] = {}
+    for row in db.execute(
+        select(formulation_ingredients.c.formulation_id, FoodType.id, FoodType.name, FoodType.category,
+               FoodType.cost_per_kg, formulation_ingredients.c.percentage)
+        .join(formulation_ingredients, formulation_ingredients.c.food_type_id == FoodType.id)
+        .order_by(formulation_ingredients.c.formulation_id, formulation_ingredients.c.percentage.desc())
+    ):
+        ingredients_by_formulation.setdefault(row.formulation_id, []).append(
+            {"food_type_id": row.id, "name": row.name, "category": row.category, "cost_per_kg": row.cost_per_kg, "percentage": row.percentage}
+        )
+
+    nutrition_facts_by_food_type: Dict[int, List[NutritionFactsResponse]] = {}
+    for facts in db.execute(select(NutritionFacts).order_by(NutritionFacts.id)).scalars():
+        nutrition_facts_by_food_type.setdefault(facts.food_type_id, []).append(NutritionFactsResponse.model_validate(facts))
+
+    requirements_by_stage: Dict[int, List[StageNutritionRequirementResponse]] = {}
+    for requirement in db.execute(select(StageNutritionRequirement).order_by(StageNutritionRequirement.id)).scalars():
+        requirements_by_stage.setdefault(requirement.growth_stage_id, []).append(StageNutritionRequirementResponse.model_validate(requirement))
+
+    return {
+        "stages": stages,
+        "stages_by_id": {stage.id: stage for stage in stages},
+        "stage_index": StageIndex(stages),
+        "templates_by_stage": templates_by_stage,
+        "formulations_by_stage": formulations_by_stage,
+        "ingredients_by_formulation": ingredients_by_formulation,
+        "food_types": [FoodTypeResponse.model_validate(food_type) for food_type in db.execute(select(FoodType).order_by(FoodType.id)).scalars()],
+        "nutrition_facts_by_food_type": nutrition_facts_by_food_type,
+        "nutrition_requirements_by_stage": requirements_by_stage,
+    }
+
+def load_versioned_reference_data() -> Tuple[int, Dict[str, Any]]:
+    """The reference version and the data, read in one fresh transaction
+
+    The request's own session may hold a snapshot older than the version the
+    cache has seen, so the load never runs on it. The version is read first:
+    the data is then at least as new as the version it is stored under.
+    """
+    with SessionLocal() as db, db.begin():
+        version = read_reference_version(db)
+        return version, {**load_reference_data(db), "version": version}
+
+def get_reference_data(db: Session) -> Dict[str, Any]:
+    """Cached reference data; the database is only read after a version change"""
+    reference_cache.sync(lambda: read_reference_version(db))
+    return reference_cache.get("reference_data", load_versioned_reference_data)
+
+def resolve_group_stage(group: ChickenGroup, reference: Dict[str, Any], as_of: date) -> Optional[GrowthStageResponse]:
+    """The stage a group is in on a given day, even if the batch job has not advanced it yet"""
+    current = reference["stages_by_id"].get(group.current_stage_id)
+    return reference["stage_index"].resolve(current, (as_of - group.start_date).days)
+
+def load_group_context(group_id: int, db: Session, as_of: Optional[date] = None) -> Dict[str, Any]:
+    """Load a group with its stage, active schedule template and active formulation
+
+    Only the group itself comes from the database. The stage, template,
+    formulation and ingredients come from the reference data cache.
+    """
+    group = db.execute(select(ChickenGroup).where(ChickenGroup.id == group_id)).scalar_one_or_none()
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
-    
-    # Get feeding schedule template for current stage
-    schedule_template = db.query(GroupFeedingScheduleTemplate).filter(
-        GroupFeedingScheduleTemplate.growth_stage_id == group.current_stage_id,
-        GroupFeedingScheduleTemplate.is_active == True
-    ).first()
+
+    reference = get_reference_data(db)
+    stage = resolve_group_stage(group, reference, as_of or date.today())
+    stage_id = stage.id if stage else group.current_stage_id
+    templates = reference["templates_by_stage"].get(stage_id, [])
+    formulations = reference["formulations_by_stage"].get(stage_id, [])
+    formulation = formulations[0] if formulations else None
+    return {
+        "group": group,
+        "stage": stage,
+        "schedule_template": templates[0] if templates else None,
+        "formulation": formulation,
+        "ingredients": reference["ingredients_by_formulation"].get(formulation.id, []) if formulation else [],
+    }
+
+def generate_group_daily_schedule(group_id: int, schedule_date: date, db: Session):
+    """Generate complete daily feeding schedule for a group"""
+    context = load_group_context(group_id, db, as_of=schedule_date)
+    group = context["group"]
+    schedule_template = context["schedule_template"]
     
     if not schedule_template:
         raise HTTPException(status_code=404, detail="No feeding schedule found for current stage")
@@ -632,6 +1170,7 @@ def generate_group_daily_schedule(group_id: int, schedule_date: date, db: Sessio
     return {
         "group_id": group_id,
         "date": schedule_date,
+        "stage_id": schedule_template.growth_stage_id,
         "daily_feed_kg": daily_feed_kg,
         "feeding_frequency": schedule_template.feeding_frequency,
         "feed_per_meal_kg": daily_feed_kg / schedule_template.feeding_frequency,
@@ -640,25 +1179,891 @@ def generate_group_daily_schedule(group_id: int, schedule_date: date, db: Sessio
 
 def get_group_optimal_formulation(group_id: int, db: Session):
     """Get optimal formulation for current stage of a group"""
-    group = db.query(ChickenGroup).filter(ChickenGroup.id == group_id).first()
-    if not group:
-        raise HTTPException(status_code=404, detail="Group not found")
-    
-    formulation = db.query(FeedFormulation).filter(
-        FeedFormulation.growth_stage_id == group.current_stage_id,
-        FeedFormulation.is_active == True
-    ).first()
+    context = load_group_context(group_id, db)
+    formulation = context["formulation"]
     
     if not formulation:
         raise HTTPException(status_code=404, detail="No formulation found for current stage")
     
-    return formulation
+    return GroupFormulationResponse(**formulation.dict(), ingredients=context["ingredients"])
+
+# Recent history used to project weight gain and mortality in feeding plans
+FEEDING_PLAN_TREND_DAYS = 14
+FEEDING_PLAN_MAX_DAYS = 366
+
+def load_feeding_plan_inputs(user_id: int, db: Session, today: date) -> Dict[str, Any]:
+    """Load a user's active groups, every stage with its active templates, and recent tracking"""
+    groups = db.execute(
+        select(ChickenGroup)
+        .where(ChickenGroup.user_id == user_id, ChickenGroup.is_active == True)
+        .order_by(ChickenGroup.id)
+    ).scalars().all()
+    reference = get_reference_data(db)
+    stages = sorted(reference["stages"], key=lambda stage: (stage.min_age_days, stage.id))
+
+    trends = []
+    if groups:
+        trends = db.execute(
+            select(GroupGrowthTracking.group_id, GroupGrowthTracking.tracking_date,
+                   GroupGrowthTracking.avg_weight_kg, GroupGrowthTracking.mortality_count)
+            .where(
+                GroupGrowthTracking.group_id.in_([group.id for group in groups]),
+                GroupGrowthTracking.tracking_date > today - timedelta(days=FEEDING_PLAN_TREND_DAYS),
+                GroupGrowthTracking.tracking_date <= today
+            )
+        ).all()
+    return {"groups": groups, "stages": stages, "templates_by_stage": reference["templates_by_stage"], "trends": trends}
+
+def estimate_group_trends(groups: List[ChickenGroup], trends: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Daily weight gain (kg) and daily mortality rate per group from recent tracking"""
+    by_group: Dict[int, List[Any]] = {}
+    for row in trends:
+        by_group.setdefault(row.group_id, []).append(row)
+
+    daily_gain = np.zeros(len(groups))
+    mortality_rate = np.zeros(len(groups))
+    for i, group in enumerate(groups):
+        rows = by_group.get(group.id, [])
+        ordinals = np.array([row.tracking_date.toordinal() for row in rows], dtype=float)
+        if len(np.unique(ordinals)) >= 2:
+            slope = np.polyfit(ordinals, [row.avg_weight_kg for row in rows], 1)[0]
+            daily_gain[i] = max(0.0, slope)
+        if group.current_quantity > 0:
+            deaths = sum(row.mortality_count or 0 for row in rows)
+            mortality_rate[i] = min(1.0, deaths / (FEEDING_PLAN_TREND_DAYS * group.current_quantity))
+    return daily_gain, mortality_rate
+
+def compute_feeding_plan(groups: List[ChickenGroup], stages: List[GrowthStageResponse],
+                         templates_by_stage: Dict[int, List[GroupFeedingScheduleTemplateResponse]],
+                         trends: List[Any], start_date: date, days: int, today: date) -> Optional[Dict[str, np.ndarray]]:
+    """Project day x group matrices of stage, weight, headcount and feed, moving groups through stages as they age
+
+    A group stays on its current stage until it is older than that stage's
+    max_age_days, then follows the active stage whose min_age_days it has
+    reached. Weight grows by the recent daily gain and the flock shrinks by
+    the recent daily mortality rate. Returns None when there is nothing to plan.
+    """
+    if not groups or not stages:
+        return None
+
+    stage_position = {stage.id: i for i, stage in enumerate(stages)}
+    templates = [(templates_by_stage.get(stage.id) or [None])[0] for stage in stages]
+    stage_ids = np.array([stage.id for stage in stages])
+    min_age = np.array([stage.min_age_days for stage in stages])
+    max_age = np.array([stage.max_age_days for stage in stages])
+    feed_percentage = np.array([t.feed_percentage if t else np.nan for t in templates])
+    feeding_frequency = np.array([t.feeding_frequency if t else 1 for t in templates])
+    formulation_ids = np.array([t.formulation_id if t else -1 for t in templates])
+
+    offsets = np.arange(days)[:, None]
+    ages = offsets + np.array([(start_date - group.start_date).days for group in groups])[None, :]
+    current = np.array([stage_position[group.current_stage_id] for group in groups])
+
+    active = np.flatnonzero([stage.is_active for stage in stages])
+    if len(active):
+        next_stage = active[np.clip(np.searchsorted(min_age[active], ages, side="right") - 1, 0, None)]
+    else:
+        next_stage = np.broadcast_to(current, ages.shape)
+    stage_index = np.where(ages <= max_age[current], current, next_stage)
+
+    daily_gain, mortality_rate = estimate_group_trends(groups, trends)
+    elapsed = np.clip(offsets + (start_date - today).days, 0, None)
+    weights = np.array([group.avg_weight_kg for group in groups]) + daily_gain * elapsed
+    quantities = np.floor(np.array([group.current_quantity for group in groups]) * (1 - mortality_rate) ** elapsed)
+
+    scheduled = ~np.isnan(feed_percentage[stage_index])
+    daily_feed = np.where(scheduled, calculate_group_daily_feed_kg(quantities, weights, np.nan_to_num(feed_percentage[stage_index])), 0.0)
+
+    return {
+        "daily_gain": daily_gain,
+        "mortality_rate": mortality_rate,
+        "stage_ids": stage_ids[stage_index],
+        "formulation_ids": np.where(scheduled, formulation_ids[stage_index], -1),
+        "scheduled": scheduled,
+        "quantities": quantities,
+        "weights": weights,
+        "feeding_frequency": feeding_frequency[stage_index],
+        "daily_feed": daily_feed,
+    }
+
+def project_feeding_plan(groups: List[ChickenGroup], stages: List[GrowthStageResponse],
+                         templates_by_stage: Dict[int, List[GroupFeedingScheduleTemplateResponse]],
+                         trends: List[Any], start_date: date, days: int, today: date) -> Dict[str, Any]:
+    """The feeding plan as JSON-ready lists indexed [day][group]"""
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+    plan = compute_feeding_plan(groups, stages, templates_by_stage, trends, start_date, days, today)
+    if plan is None:
+        return {"dates": dates, "groups": [], "daily_feed_kg": [[] for _ in dates], "total_feed_kg": [0.0] * days, "groups_without_schedule": []}
+
+    daily_feed = plan["daily_feed"]
+    return {
+        "dates": dates,
+        "groups": [
+            {
+                "group_id": group.id,
+                "batch_number": group.batch_number,
+                "daily_gain_kg": round(float(plan["daily_gain"][i]), 4),
+                "daily_mortality_rate": round(float(plan["mortality_rate"][i]), 6),
+            }
+            for i, group in enumerate(groups)
+        ],
+        "stage_ids": plan["stage_ids"].tolist(),
+        "formulation_ids": np.where(plan["scheduled"], plan["formulation_ids"], None).tolist(),
+        "projected_quantity": plan["quantities"].astype(int).tolist(),
+        "projected_weight_kg": plan["weights"].round(3).tolist(),
+        "feeding_frequency": plan["feeding_frequency"].tolist(),
+        "daily_feed_kg": daily_feed.round(3).tolist(),
+        "feed_per_meal_kg": (daily_feed / plan["feeding_frequency"]).round(3).tolist(),
+        "total_feed_kg": daily_feed.sum(axis=1).round(3).tolist(),
+        "groups_without_schedule": [groups[i].id for i in np.flatnonzero(~plan["scheduled"].all(axis=0))],
+    }
+
+def advance_group_stages(db: Session, as_of: date) -> int:
+    """Move every active group that has outgrown its stage, in one UPDATE
+
+    Ages are turned into start-date cut-offs, so the statement needs no
+    dialect-specific date arithmetic.
+    """
+    reference = get_reference_data(db)
+    index: StageIndex = reference["stage_index"]
+
+    outgrown = []
+    for stage in reference["stages"]:
+        next_stage = index.next_after(stage)
+        if next_stage is None:
+            continue
+        age_days = max(stage.max_age_days + 1, next_stage.min_age_days)
+        outgrown.append(and_(
+            ChickenGroup.current_stage_id == stage.id,
+            ChickenGroup.start_date <= as_of - timedelta(days=age_days)
+        ))
+    if not outgrown:
+        return 0
+
+    target_stage = case(
+        *[(ChickenGroup.start_date <= as_of - timedelta(days=stage.min_age_days), stage.id) for stage in reversed(index.stages)],
+        else_=ChickenGroup.current_stage_id
+    )
+    result = db.execute(
+        update(ChickenGroup)
+        .where(ChickenGroup.is_active == True, or_(*outgrown))
+        .values(current_stage_id=target_stage, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+def run_stage_advance(as_of: Optional[date] = None) -> int:
+    db = SessionLocal()
+    try:
+        return advance_group_stages(db, as_of or date.today())
+    finally:
+        db.close()
+
+async def run_stage_advance_loop():
+    while True:
+        try:
+            await run_in_threadpool(run_stage_advance)
+        except Exception:
+            # Any failure is retried on the next tick rather than ending the loop
+            logger.exception("Stage advance failed")
+        await asyncio.sleep(STAGE_ADVANCE_INTERVAL_MINUTES * 60)
+
+# Inventory ledger
+INVENTORY_MOVEMENT_TYPES = ("purchase", "consumption", "adjustment")
+
+def feed_formulation_id(reference: Dict[str, Any], stage_id: int) -> Optional[int]:
+    """The formulation fed in a stage: the schedule template's, else the stage's active one"""
+    templates = reference["templates_by_stage"].get(stage_id)
+    if templates:
+        return templates[0].formulation_id
+    formulations = reference["formulations_by_stage"].get(stage_id)
+    return formulations[0].id if formulations else None
+
+def upsert_insert(db: Session, table: Table):
+    """An INSERT that supports on_conflict_do_update on the session's backend"""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(table)
+
+def upsert_inventory_balances(db: Session, deltas: Dict[Tuple[int, int], float]):
+    """Add movement totals to the materialized balances with INSERT .. ON CONFLICT DO UPDATE"""
+    if not deltas:
+        return
+    balances = InventoryBalance.__table__
+    stmt = upsert_insert(db, balances)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[balances.c.user_id, balances.c.food_type_id],
+        set_={"quantity_kg": balances.c.quantity_kg + stmt.excluded.quantity_kg, "updated_at": stmt.excluded.updated_at}
+    )
+    now = datetime.utcnow()
+    db.execute(stmt, [
+        {"user_id": user_id, "food_type_id": food_type_id, "quantity_kg": quantity, "updated_at": now}
+        for (user_id, food_type_id), quantity in deltas.items()
+    ])
+
+def append_inventory_movements(db: Session, movements: List[Dict[str, Any]]):
+    """Append movements to the ledger and apply them to the balances; the caller commits"""
+    if not movements:
+        return
+    db.execute(insert(InventoryMovement), movements)
+    deltas: Dict[Tuple[int, int], float] = {}
+    for movement in movements:
+        key = (movement["user_id"], movement["food_type_id"])
+        deltas[key] = deltas.get(key, 0.0) + movement["quantity_kg"]
+    upsert_inventory_balances(db, deltas)
+
+def record_feed_consumption(db: Session, records: List[Dict[str, Any]]) -> int:
+    """Book the ingredients of each feeding record's formulation as consumption
+
+    Each record needs group_id, feeding_date, feed_quantity_kg and optionally
+    id. The formulation is the one scheduled for the group's stage on the
+    feeding date, split by its ingredient percentages. The caller commits.
+    """
+    if not records:
+        return 0
+    group_ids = {record["group_id"] for record in records}
+    groups = {group.id: group for group in db.execute(select(ChickenGroup).where(ChickenGroup.id.in_(group_ids))).scalars()}
+    reference = get_reference_data(db)
+
+    consumption, movements = [], []
+    for record in records:
+        group = groups.get(record["group_id"])
+        if group is None:
+            continue
+        stage = resolve_group_stage(group, reference, record["feeding_date"])
+        formulation_id = feed_formulation_id(reference, stage.id if stage else group.current_stage_id)
+        for ingredient in reference["ingredients_by_formulation"].get(formulation_id, []):
+            quantity = record["feed_quantity_kg"] * ingredient["percentage"] / 100
+            consumption.append({
+                "group_id": group.id, "food_type_id": ingredient["food_type_id"], "consumption_date": record["feeding_date"],
+                "quantity_kg": quantity, "cost": quantity * ingredient["cost_per_kg"], "created_at": datetime.utcnow()
+            })
+            movements.append({
+                "user_id": group.user_id, "food_type_id": ingredient["food_type_id"], "movement_type": "consumption",
+                "movement_date": record["feeding_date"], "quantity_kg": -quantity, "unit_cost": ingredient["cost_per_kg"],
+                "group_id": group.id, "feeding_record_id": record.get("id"), "notes": None, "created_at": datetime.utcnow()
+            })
+    if consumption:
+        db.execute(insert(GroupInventoryConsumption), consumption)
+    append_inventory_movements(db, movements)
+    return len(movements)
+
+def record_direct_consumption(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """Book consumption rows written directly, not derived from a feeding, in the ledger and balances
+
+    The rows themselves are already inserted; this adds one consumption
+    movement per row for the owner of its group. The caller commits.
+    """
+    group_ids = {row["group_id"] for row in rows}
+    if not group_ids:
+        return 0
+    owners = dict(db.execute(select(ChickenGroup.id, ChickenGroup.user_id).where(ChickenGroup.id.in_(group_ids))).all())
+    movements = [
+        {
+            "user_id": owners[row["group_id"]], "food_type_id": row["food_type_id"], "movement_type": "consumption",
+            "movement_date": row["consumption_date"], "quantity_kg": -row["quantity_kg"],
+            "unit_cost": row["cost"] / row["quantity_kg"] if row["quantity_kg"] else None,
+            "group_id": row["group_id"], "feeding_record_id": None, "notes": None, "created_at": datetime.utcnow()
+        }
+        for row in rows if row["group_id"] in owners
+    ]
+    append_inventory_movements(db, movements)
+    return len(movements)
+
+def forecast_ingredient_stock(plan: Optional[Dict[str, np.ndarray]], reference: Dict[str, Any],
+                              balances: List[InventoryBalance], start_date: date, days: int) -> List[Dict[str, Any]]:
+    """Days of stock left per ingredient, from the planned day x group feed matrix
+
+    The plan's feed is split into ingredients through a formulation x food type
+    share matrix, giving a day x ingredient usage matrix whose running total
+    is compared with the current balances.
+    """
+    stock = {balance.food_type_id: balance.quantity_kg for balance in balances}
+    ingredients_by_formulation = reference["ingredients_by_formulation"]
+
+    planned_formulations = np.array([], dtype=int)
+    if plan is not None:
+        planned_formulations = np.unique(plan["formulation_ids"][plan["formulation_ids"] >= 0])
+    food_type_ids = sorted(set(stock) | {
+        ingredient["food_type_id"] for formulation_id in planned_formulations.tolist()
+        for ingredient in ingredients_by_formulation.get(formulation_id, [])
+    })
+    if not food_type_ids:
+        return []
+    column = {food_type_id: j for j, food_type_id in enumerate(food_type_ids)}
+
+    # One row per planned formulation plus a zero row for unscheduled days
+    shares = np.zeros((len(planned_formulations) + 1, len(food_type_ids)))
+    for row, formulation_id in enumerate(planned_formulations.tolist()):
+        for ingredient in ingredients_by_formulation.get(formulation_id, []):
+            shares[row, column[ingredient["food_type_id"]]] += ingredient["percentage"] / 100
+
+    if plan is not None:
+        formulation_ids = plan["formulation_ids"]
+        rows = np.where(formulation_ids >= 0, np.searchsorted(planned_formulations, formulation_ids), len(planned_formulations))
+        daily_use = np.einsum("dg,dgi->di", plan["daily_feed"], shares[rows])
+    else:
+        daily_use = np.zeros((days, len(food_type_ids)))
+
+    on_hand = np.array([stock.get(food_type_id, 0.0) for food_type_id in food_type_ids])
+    short = daily_use.cumsum(axis=0) > on_hand + 1e-9
+    runs_out = short.any(axis=0)
+    first_short_day = short.argmax(axis=0)
+    planned_use = daily_use.sum(axis=0)
+
+    names = {food_type.id: food_type.name for food_type in reference["food_types"]}
+    return [
+        {
+            "food_type_id": food_type_id,
+            "name": names.get(food_type_id),
+            "stock_kg": round(float(on_hand[j]), 3),
+            "planned_use_kg": round(float(planned_use[j]), 3),
+            "avg_daily_use_kg": round(float(planned_use[j]) / days, 3),
+            "days_of_stock": int(first_short_day[j]) if runs_out[j] else None,
+            "stockout_date": start_date + timedelta(days=int(first_short_day[j])) if runs_out[j] else None,
+        }
+        for j, food_type_id in enumerate(food_type_ids)
+    ]
+
+# Dashboard summaries
+DASHBOARD_FEED_WINDOW_DAYS = 7
+
+def upsert_group_summaries(db: Session, group_ids: List[int], as_of: Optional[date] = None):
+    """Recompute the dashboard rows of the given groups, without committing
+
+    Runs a fixed number of grouped queries however many groups are refreshed,
+    so a projection batch costs the same for one group or hundreds.
+    """
+    group_ids = sorted(set(group_ids))
+    if not group_ids:
+        return
+    as_of = as_of or date.today()
+    groups = db.execute(select(ChickenGroup).where(ChickenGroup.id.in_(group_ids))).scalars().all()
+    if not groups:
+        return
+
+    window_start = as_of - timedelta(days=DASHBOARD_FEED_WINDOW_DAYS - 1)
+    in_window = and_(GroupFeedingRecord.feeding_date >= window_start, GroupFeedingRecord.feeding_date <= as_of)
+    feed = {
+        row.group_id: row for row in db.execute(
+            select(
+                GroupFeedingRecord.group_id,
+                func.sum(GroupFeedingRecord.feed_quantity_kg).label("total_kg"),
+                func.sum(GroupFeedingRecord.total_cost).label("total_cost"),
+                func.sum(case((in_window, GroupFeedingRecord.feed_quantity_kg), else_=0)).label("window_kg"),
+                func.sum(case((in_window, GroupFeedingRecord.total_cost), else_=0)).label("window_cost"),
+            )
+            .where(GroupFeedingRecord.group_id.in_(group_ids))
+            .group_by(GroupFeedingRecord.group_id)
+        )
+    }
+
+    # First and last weight per group, for the latest weight and the weight gain behind FCR
+    bounds = (
+        select(
+            GroupGrowthTracking.group_id,
+            func.min(GroupGrowthTracking.tracking_date).label("first_date"),
+            func.max(GroupGrowthTracking.tracking_date).label("last_date"),
+            func.sum(GroupGrowthTracking.mortality_count).label("mortality"),
+        )
+        .where(GroupGrowthTracking.group_id.in_(group_ids))
+        .group_by(GroupGrowthTracking.group_id)
+        .subquery()
+    )
+    growth: Dict[int, Dict[str, Any]] = {}
+    for row in db.execute(
+        select(bounds.c.group_id, bounds.c.first_date, bounds.c.last_date, bounds.c.mortality,
+               GroupGrowthTracking.tracking_date, GroupGrowthTracking.avg_weight_kg, GroupGrowthTracking.id)
+        .join(GroupGrowthTracking, and_(
+            GroupGrowthTracking.group_id == bounds.c.group_id,
+            GroupGrowthTracking.tracking_date.in_([bounds.c.first_date, bounds.c.last_date])
+        ))
+        .order_by(GroupGrowthTracking.id)
+    ):
+        entry = growth.setdefault(row.group_id, {"mortality": row.mortality or 0, "last_date": row.last_date})
+        # Later rows on the same date win, like the bulk ingest's latest-weight rule
+        if row.tracking_date == row.first_date:
+            entry.setdefault("first_weight", row.avg_weight_kg)
+        if row.tracking_date == row.last_date:
+            entry["last_weight"] = row.avg_weight_kg
+
+    reference = get_reference_data(db)
+    now = datetime.utcnow()
+    rows = []
+    for group in groups:
+        stage = resolve_group_stage(group, reference, as_of)
+        totals = feed.get(group.id)
+        history = growth.get(group.id, {})
+        total_feed_kg = float(totals.total_kg or 0) if totals else 0.0
+        weight_gain = history.get("last_weight", 0) - history.get("first_weight", 0)
+        rows.append({
+            "group_id": group.id,
+            "user_id": group.user_id,
+            "batch_number": group.batch_number,
+            "breed": group.breed,
+            "is_active": group.is_active,
+            "quantity": group.quantity,
+            "current_quantity": group.current_quantity,
+            "stage_id": stage.id if stage else group.current_stage_id,
+            "stage_name": stage.name if stage else None,
+            "age_days": (as_of - group.start_date).days,
+            "last_weight_kg": history.get("last_weight"),
+            "last_weight_date": history.get("last_date"),
+            "feed_7d_kg": float(totals.window_kg or 0) if totals else 0.0,
+            "cost_7d": float(totals.window_cost or 0) if totals else 0.0,
+            "total_feed_kg": total_feed_kg,
+            "total_feed_cost": float(totals.total_cost or 0) if totals else 0.0,
+            "mortality_count": int(history.get("mortality", 0)),
+            # Same definition as calculate_group_performance
+            "feed_conversion_ratio": total_feed_kg / (weight_gain * group.current_quantity) if weight_gain > 0 and group.current_quantity > 0 else None,
+            "as_of_date": as_of,
+            "updated_at": now,
+        })
+
+    summaries = GroupDashboardSummary.__table__
+    stmt = upsert_insert(db, summaries)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[summaries.c.group_id],
+        set_={column: stmt.excluded[column] for column in rows[0] if column != "group_id"}
+    )
+    db.execute(stmt, rows)
+
+def refresh_group_summaries(db: Session, group_ids: List[int], as_of: Optional[date] = None):
+    """Recompute the dashboard rows of the given groups and commit"""
+    upsert_group_summaries(db, group_ids, as_of)
+    db.commit()
+
+def backfill_group_summaries(db: Session) -> int:
+    """Create dashboard rows for groups that have none yet, e.g. after upgrading"""
+    missing = db.execute(
+        select(ChickenGroup.id)
+        .outerjoin(GroupDashboardSummary, GroupDashboardSummary.group_id == ChickenGroup.id)
+        .where(GroupDashboardSummary.group_id.is_(None))
+    ).scalars().all()
+    for start in range(0, len(missing), BULK_INGEST_CHUNK_SIZE):
+        refresh_group_summaries(db, missing[start:start + BULK_INGEST_CHUNK_SIZE])
+    return len(missing)
+
+def run_summary_backfill():
+    db = SessionLocal()
+    try:
+        backfill_group_summaries(db)
+        backfill_group_rollups(db)
+    finally:
+        db.close()
+
+# Analytics rollups
+ROLLUP_GRANULARITIES = ("day", "week", "month")
+
+# Chart granularity picked by range length when the caller asks for "auto"
+ANALYTICS_AUTO_GRANULARITY = ((31, "day"), (183, "week"))
+ANALYTICS_MAX_DAYS = 3660
+
+def rollup_bucket_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+def rollup_bucket_end(start: date, granularity: str) -> date:
+    """The first day after the bucket"""
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+def replace_rollups(db: Session, granularity: str, group_ids: List[int], first: date, last: date, rows: List[Dict[str, Any]]):
+    """Swap the rollup rows of the given groups in [first, last] for freshly computed ones"""
+    db.execute(
+        delete(GroupRollup)
+        .where(GroupRollup.group_id.in_(group_ids), GroupRollup.granularity == granularity,
+               GroupRollup.bucket_start >= first, GroupRollup.bucket_start <= last)
+        .execution_options(synchronize_session=False)
+    )
+    if rows:
+        db.execute(insert(GroupRollup), rows)
+
+def rebuild_group_rollups(db: Session, group_ids: List[int], first_day: date, last_day: date):
+    """Recompute every rollup bucket of the given groups that overlaps [first_day, last_day], without committing
+
+    Day buckets are aggregated from the raw feeding and growth rows. Week and
+    month buckets are then summed from the day buckets.
+    """
+    group_ids = sorted(set(group_ids))
+    users = dict(db.execute(select(ChickenGroup.id, ChickenGroup.user_id).where(ChickenGroup.id.in_(group_ids))).all())
+    group_ids = [group_id for group_id in group_ids if group_id in users]
+    if not group_ids:
+        return
+    now = datetime.utcnow()
+
+    def empty_bucket(group_id: int, granularity: str, start: date) -> Dict[str, Any]:
+        return {
+            "group_id": group_id, "granularity": granularity, "bucket_start": start, "user_id": users[group_id],
+            "feed_kg": 0.0, "feed_cost": 0.0, "feeding_count": 0, "mortality": 0,
+            "weight_sum_kg": 0.0, "weight_count": 0, "updated_at": now,
+        }
+
+    days: Dict[Tuple[int, date], Dict[str, Any]] = {}
+    for row in db.execute(
+        select(GroupFeedingRecord.group_id, GroupFeedingRecord.feeding_date,
+               func.sum(GroupFeedingRecord.feed_quantity_kg), func.sum(GroupFeedingRecord.total_cost), func.count())
+        .where(GroupFeedingRecord.group_id.in_(group_ids), GroupFeedingRecord.feeding_date.between(first_day, last_day))
+        .group_by(GroupFeedingRecord.group_id, GroupFeedingRecord.feeding_date)
+    ):
+        bucket = days.setdefault((row[0], row[1]), empty_bucket(row[0], "day", row[1]))
+        bucket.update(feed_kg=float(row[2] or 0), feed_cost=float(row[3] or 0), feeding_count=row[4])
+    for row in db.execute(
+        select(GroupGrowthTracking.group_id, GroupGrowthTracking.tracking_date,
+               func.sum(GroupGrowthTracking.mortality_count), func.sum(GroupGrowthTracking.avg_weight_kg), func.count())
+        .where(GroupGrowthTracking.group_id.in_(group_ids), GroupGrowthTracking.tracking_date.between(first_day, last_day))
+        .group_by(GroupGrowthTracking.group_id, GroupGrowthTracking.tracking_date)
+    ):
+        bucket = days.setdefault((row[0], row[1]), empty_bucket(row[0], "day", row[1]))
+        bucket.update(mortality=int(row[2] or 0), weight_sum_kg=float(row[3] or 0), weight_count=row[4])
+    replace_rollups(db, "day", group_ids, first_day, last_day, list(days.values()))
+
+    for granularity in ("week", "month"):
+        first = rollup_bucket_start(first_day, granularity)
+        last = rollup_bucket_start(last_day, granularity)
+        buckets: Dict[Tuple[int, date], Dict[str, Any]] = {}
+        for row in db.execute(
+            select(GroupRollup)
+            .where(GroupRollup.group_id.in_(group_ids), GroupRollup.granularity == "day",
+                   GroupRollup.bucket_start >= first, GroupRollup.bucket_start < rollup_bucket_end(last, granularity))
+        ).scalars():
+            start = rollup_bucket_start(row.bucket_start, granularity)
+            bucket = buckets.setdefault((row.group_id, start), empty_bucket(row.group_id, granularity, start))
+            for field in ("feed_kg", "feed_cost", "feeding_count", "mortality", "weight_sum_kg", "weight_count"):
+                bucket[field] += getattr(row, field)
+        replace_rollups(db, granularity, group_ids, first, last, list(buckets.values()))
+
+def backfill_group_rollups(db: Session) -> int:
+    """Build rollups for groups that have feeding or growth rows but none yet, e.g. after upgrading"""
+    spans = {}
+    for model, column in ((GroupFeedingRecord, GroupFeedingRecord.feeding_date), (GroupGrowthTracking, GroupGrowthTracking.tracking_date)):
+        for group_id, first, last in db.execute(
+            select(model.group_id, func.min(column), func.max(column))
+            .where(~select(GroupRollup.group_id).where(GroupRollup.group_id == model.group_id).exists())
+            .group_by(model.group_id)
+        ):
+            known = spans.get(group_id, (first, last))
+            spans[group_id] = (min(known[0], first), max(known[1], last))
+    for group_id, (first, last) in spans.items():
+        rebuild_group_rollups(db, [group_id], first, last)
+        db.commit()
+    return len(spans)
+
+def rollup_segments(start: date, end: date) -> List[Tuple[str, date]]:
+    """Cover [start, end] with whole buckets, taking the coarsest one that fits at each step"""
+    segments = []
+    day = start
+    while day <= end:
+        for granularity in ("month", "week", "day"):
+            if rollup_bucket_start(day, granularity) == day and rollup_bucket_end(day, granularity) <= end + timedelta(days=1):
+                segments.append((granularity, day))
+                day = rollup_bucket_end(day, granularity)
+                break
+    return segments
+
+def analytics_granularity(start: date, end: date, granularity: str) -> str:
+    if granularity != "auto":
+        return granularity
+    span = (end - start).days + 1
+    for max_days, choice in ANALYTICS_AUTO_GRANULARITY:
+        if span <= max_days:
+            return choice
+    return "month"
+
+def query_rollup_analytics(db: Session, scope_column, scope_id: int, start: date, end: date, granularity: str) -> Dict[str, Any]:
+    """Chart series and range totals for a group or user, read from the rollup tables"""
+    if end < start:
+        raise HTTPException(status_code=422, detail="end_date must not be before start_date")
+    if (end - start).days >= ANALYTICS_MAX_DAYS:
+        raise HTTPException(status_code=422, detail=f"Ranges are limited to {ANALYTICS_MAX_DAYS} days")
+    granularity = analytics_granularity(start, end, granularity)
+
+    measures = (
+        func.coalesce(func.sum(GroupRollup.feed_kg), 0),
+        func.coalesce(func.sum(GroupRollup.feed_cost), 0),
+        func.coalesce(func.sum(GroupRollup.mortality), 0),
+        func.coalesce(func.sum(GroupRollup.weight_sum_kg), 0),
+        func.coalesce(func.sum(GroupRollup.weight_count), 0),
+        func.count(),
+    )
+
+    def measure_values(row) -> Dict[str, Any]:
+        return {
+            "feed_kg": float(row[0]),
+            "feed_cost": float(row[1]),
+            "mortality": int(row[2]),
+            "avg_weight_kg": float(row[3]) / row[4] if row[4] else None,
+        }
+
+    # Edge buckets of the series are whole buckets, which may reach outside the range
+    series_rows = db.execute(
+        select(GroupRollup.bucket_start, *measures)
+        .where(scope_column == scope_id, GroupRollup.granularity == granularity,
+               GroupRollup.bucket_start >= rollup_bucket_start(start, granularity), GroupRollup.bucket_start <= end)
+        .group_by(GroupRollup.bucket_start)
+        .order_by(GroupRollup.bucket_start)
+    ).all()
+
+    # Totals are exact: the range is covered by whole months, then weeks, then days
+    segments: Dict[str, List[date]] = {}
+    for segment_granularity, bucket in rollup_segments(start, end):
+        segments.setdefault(segment_granularity, []).append(bucket)
+    totals = db.execute(
+        select(*measures).where(scope_column == scope_id, or_(*(
+            and_(GroupRollup.granularity == segment_granularity, GroupRollup.bucket_start.in_(buckets))
+            for segment_granularity, buckets in segments.items()
+        )))
+    ).one()
+
+    return {
+        "start_date": start,
+        "end_date": end,
+        "granularity": granularity,
+        "series": [{"bucket_start": row[0], **measure_values(row[1:])} for row in series_rows],
+        "totals": measure_values(totals),
+        "rows_read": sum(row[6] for row in series_rows) + totals[5],
+    }
+
+# Domain events
+# Mutating endpoints append events in the same transaction as their change.
+# Projections read the log in commit order and keep derived tables up to date
+# off the request path (see run_projections).
+PROJECTION_POLL_SECONDS = float(os.getenv("PROJECTION_POLL_SECONDS", "1"))
+PROJECTION_BATCH_SIZE = int(os.getenv("PROJECTION_BATCH_SIZE", "500"))
+# Failed runs of one event before the projection parks it and moves on
+PROJECTION_MAX_ATTEMPTS = int(os.getenv("PROJECTION_MAX_ATTEMPTS", "3"))
+
+def domain_event(event_type: str, aggregate_type: str, aggregate_id: int, **payload) -> Dict[str, Any]:
+    return {
+        "event_type": event_type,
+        "aggregate_type": aggregate_type,
+        "aggregate_id": aggregate_id,
+        "payload": jsonable_encoder(payload),
+        "occurred_at": datetime.utcnow(),
+    }
+
+def record_event(db, event_type: str, aggregate_type: str, aggregate_id: int, **payload):
+    """Add one event to the session; works with both Session and AsyncSession"""
+    db.add(DomainEvent(**domain_event(event_type, aggregate_type, aggregate_id, **payload)))
+
+def append_events(db: Session, events: List[Dict[str, Any]]):
+    """Insert many events with one executemany"""
+    if events:
+        db.execute(insert(DomainEvent), events)
+
+def feeding_recorded_event(row: Dict[str, Any]) -> Dict[str, Any]:
+    return domain_event(
+        "FeedingRecorded", "group", row["group_id"], feeding_record_id=row["id"], feeding_date=row["feeding_date"],
+        feed_quantity_kg=row["feed_quantity_kg"], total_cost=row["total_cost"]
+    )
+
+def weight_measured_event(row: Dict[str, Any]) -> Dict[str, Any]:
+    return domain_event(
+        "WeightMeasured", "group", row["group_id"], growth_tracking_id=row["id"], tracking_date=row["tracking_date"],
+        avg_weight_kg=row["avg_weight_kg"], mortality_count=row["mortality_count"]
+    )
+
+# Bulk-ingested rows append these events in the same chunk transaction
+BULK_ROW_EVENTS = {
+    GroupFeedingRecord: feeding_recorded_event,
+    GroupGrowthTracking: weight_measured_event,
+}
+
+# Projections
+# Event type -> the payload date its change falls on
+ROLLUP_EVENT_DATES = {
+    "FeedingRecorded": "feeding_date",
+    "WeightMeasured": "tracking_date",
+    "MortalityRecorded": "death_date",
+}
+
+def project_group_rollups(db: Session, events: List[DomainEvent]):
+    """Day, week and month rollups for the dates touched by the batch"""
+    spans: Dict[int, Tuple[date, date]] = {}
+    for event in events:
+        field = ROLLUP_EVENT_DATES.get(event.event_type)
+        if field is None:
+            continue
+        day = date.fromisoformat(event.payload[field])
+        first, last = spans.get(event.aggregate_id, (day, day))
+        spans[event.aggregate_id] = (min(first, day), max(last, day))
+
+    # Groups written over the same dates, as in a bulk ingest, are rebuilt together
+    groups_by_span: Dict[Tuple[date, date], List[int]] = {}
+    for group_id, span in spans.items():
+        groups_by_span.setdefault(span, []).append(group_id)
+    for (first, last), group_ids in groups_by_span.items():
+        rebuild_group_rollups(db, group_ids, first, last)
+
+def project_group_summaries(db: Session, events: List[DomainEvent]):
+    """Dashboard rows (totals, FCR, mortality) for every group touched by the batch"""
+    upsert_group_summaries(db, [event.aggregate_id for event in events if event.aggregate_type == "group"])
+
+# Projection name -> handler. Handlers recompute from the source tables, so
+# replaying an event is harmless, and must not commit.
+PROJECTIONS: Dict[str, Any] = {
+    "group_summaries": project_group_summaries,
+    "group_rollups": project_group_rollups,
+}
+
+def projection_horizon(db: Session) -> Optional[int]:
+    """Events written by transactions below this id are final; None when every committed event is
+
+    Event ids are taken before commit, so on PostgreSQL a slow transaction can
+    commit a lower id after a higher one has been read. The oldest transaction
+    still running is the horizon: everything below it has committed or rolled
+    back. SQLite has a single writer, so ids already arrive in commit order.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    return db.scalar(select(func.txid_snapshot_xmin(func.txid_current_snapshot())))
+
+def checkpoint_position(checkpoint) -> Tuple[int, int]:
+    return checkpoint.last_transaction_id, checkpoint.last_event_id
+
+def advance_checkpoint(db: Session, name: str, position: Tuple[int, int], event: DomainEvent, **values) -> bool:
+    """Move the checkpoint past event if it is still at position; the caller commits"""
+    checkpoints = ProjectionCheckpoint.__table__
+    return bool(db.execute(
+        update(checkpoints)
+        .where(checkpoints.c.name == name, checkpoints.c.last_transaction_id == position[0], checkpoints.c.last_event_id == position[1])
+        .values(last_transaction_id=event.transaction_id, last_event_id=event.id, updated_at=datetime.utcnow(), **values)
+    ).rowcount)
+
+def record_projection_failure(db: Session, name: str, position: Tuple[int, int], event: DomainEvent, error: Exception) -> bool:
+    """Count a failed run of event; park it and move past once it has failed PROJECTION_MAX_ATTEMPTS times
+
+    Returns True when the event was parked. Its id stays in parked_event_ids
+    and the error in last_error, so /metrics/projections keeps showing it.
+    """
+    checkpoint = db.get(ProjectionCheckpoint, name, populate_existing=True)
+    attempts = checkpoint.failed_attempts + 1 if checkpoint.failed_event_id == event.id else 1
+    message = f"{event.event_type} {event.id}: {error.__class__.__name__}: {error}"
+    if attempts < PROJECTION_MAX_ATTEMPTS:
+        checkpoints = ProjectionCheckpoint.__table__
+        db.execute(
+            update(checkpoints)
+            .where(checkpoints.c.name == name)
+            .values(failed_event_id=event.id, failed_attempts=attempts, last_error=message, updated_at=datetime.utcnow())
+        )
+        db.commit()
+        return False
+
+    parked = advance_checkpoint(
+        db, name, position, event,
+        failed_event_id=None, failed_attempts=0, last_error=message,
+        parked_event_ids=(checkpoint.parked_event_ids or []) + [event.id],
+    )
+    db.commit()
+    if parked:
+        logger.error(f"Projection {name} parked event {message} after {attempts} attempts")
+    return parked
+
+def apply_events_one_by_one(db: Session, name: str, handler, position: Tuple[int, int], events: List[DomainEvent]) -> int:
+    """Apply a batch that failed as a whole one event at a time, up to the event that fails"""
+    applied = 0
+    for event in events:
+        try:
+            handler(db, [event])
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Projection {name} failed on event {event.id}")
+            return applied + record_projection_failure(db, name, position, event, e)
+        if not advance_checkpoint(db, name, position, event, failed_event_id=None, failed_attempts=0):
+            db.rollback()
+            return applied
+        db.commit()
+        position = (event.transaction_id, event.id)
+        applied += 1
+    return applied
+
+def run_projection(db: Session, name: str, handler, batch_size: int = PROJECTION_BATCH_SIZE) -> int:
+    """Apply the next batch of events to one projection and advance its checkpoint
+
+    Events are read in (transaction_id, id) order, only from transactions
+    below the horizon, so no event can commit behind the checkpoint. The
+    projection's writes and the checkpoint commit together. The checkpoint
+    only moves from the position this run started at, so when several
+    workers poll at once, only one of them applies a given batch.
+
+    A batch whose handler raises is retried one event at a time. The event
+    that fails is retried on later runs and parked after
+    PROJECTION_MAX_ATTEMPTS failures. Database errors are not counted
+    against the event; they propagate and the batch is retried as a whole.
+    """
+    checkpoints = ProjectionCheckpoint.__table__
+    # Committed on its own, so a failed batch that rolls back still has a checkpoint to record on
+    db.execute(upsert_insert(db, checkpoints).values(name=name, last_event_id=0, updated_at=datetime.utcnow()).on_conflict_do_nothing())
+    db.commit()
+    horizon = projection_horizon(db)
+    position = checkpoint_position(db.execute(select(checkpoints).where(checkpoints.c.name == name)).one())
+
+    query = select(DomainEvent).where(tuple_(DomainEvent.transaction_id, DomainEvent.id) > tuple_(*position))
+    if horizon is not None:
+        query = query.where(DomainEvent.transaction_id < horizon)
+    events = db.execute(query.order_by(DomainEvent.transaction_id, DomainEvent.id).limit(batch_size)).scalars().all()
+    if not events:
+        db.commit()
+        return 0
+
+    try:
+        handler(db, events)
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+    except Exception:
+        db.rollback()
+        logger.exception(f"Projection {name} failed on a batch of {len(events)} events, retrying them one at a time")
+        return apply_events_one_by_one(db, name, handler, position, events)
+    if not advance_checkpoint(db, name, position, events[-1], failed_event_id=None, failed_attempts=0):
+        db.rollback()
+        return 0
+    db.commit()
+    return len(events)
+
+def run_projections(max_batches: int = 20) -> Dict[str, int]:
+    """Catch every projection up with the event log; returns events applied per projection
+
+    A projection that fails is logged and left for the next poll; the others still run.
+    """
+    applied = {}
+    db = SessionLocal()
+    try:
+        for name, handler in PROJECTIONS.items():
+            applied[name] = 0
+            try:
+                for _ in range(max_batches):
+                    count = run_projection(db, name, handler)
+                    applied[name] += count
+                    if count < PROJECTION_BATCH_SIZE:
+                        break
+            except Exception:
+                db.rollback()
+                logger.exception(f"Projection {name} failed")
+    finally:
+        db.close()
+    return applied
+
+async def run_projection_loop():
+    while True:
+        try:
+            await run_in_threadpool(run_projections)
+        except Exception:
+            logger.exception("Projection run failed")
+        await asyncio.sleep(PROJECTION_POLL_SECONDS)
 
 def update_group_mortality(group_id: int, new_deaths: int, death_date: date, db: Session):
     """Update mortality and adjust quantities"""
-    group = db.query(ChickenGroup).filter(ChickenGroup.id == group_id).first()
-    if not group:
-        raise HTTPException(status_code=404, detail="Group not found")
+    group = load_group_context(group_id, db)["group"]
     
     # Update current quantity
     group.current_quantity = max(0, group.current_quantity - new_deaths)
@@ -673,15 +2078,16 @@ def update_group_mortality(group_id: int, new_deaths: int, death_date: date, db:
         health_notes=f"Mortality update: {new_deaths} deaths"
     )
     db.add(growth_record)
+    db.flush()
+    record_event(db, "MortalityRecorded", "group", group_id, growth_tracking_id=growth_record.id,
+                 deaths=new_deaths, death_date=death_date, current_quantity=group.current_quantity)
     db.commit()
     
     return {"message": f"Updated mortality: {new_deaths} deaths recorded", "current_quantity": group.current_quantity}
 
 def calculate_group_performance(group_id: int, calc_date: date, db: Session):
     """Calculate performance metrics for a group"""
-    group = db.query(ChickenGroup).filter(ChickenGroup.id == group_id).first()
-    if not group:
-        raise HTTPException(status_code=404, detail="Group not found")
+    group = load_group_context(group_id, db)["group"]
     
     # Get feeding records for the period
     feeding_records = db.query(GroupFeedingRecord).filter(
@@ -731,9 +2137,175 @@ def calculate_group_performance(group_id: int, calc_date: date, db: Session):
     )
     db.add(performance_metrics)
     db.commit()
-    
+
     return performance_metrics
 
+# Bulk ingest helpers
+BULK_INGEST_CHUNK_SIZE = 500
+
+BULK_INGEST_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+            "application/x-ndjson": {"schema": {"type": "string"}},
+        },
+    }
+}
+
+async def read_bulk_payload(request: Request) -> Tuple[List[Any], Dict[int, List[str]]]:
+    """Read a bulk request body sent as a JSON array or as an NDJSON stream"""
+    content_type = request.headers.get("content-type", "")
+    rows: List[Any] = []
+    errors: Dict[int, List[str]] = {}
+
+    def add_line(line: bytes):
+        try:
+            rows.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            errors[len(rows)] = [f"Invalid JSON: {e.msg}"]
+            rows.append(None)
+
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    add_line(line)
+        if buffer.strip():
+            add_line(buffer)
+        return rows, errors
+
+    try:
+        payload = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e.msg}")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Bulk ingest expects a JSON array of records")
+    return payload, errors
+
+def validate_bulk_rows(schema: Type[BaseModel], rows: List[Any], errors: Dict[int, List[str]]) -> Tuple[List[int], List[Dict[str, Any]]]:
+    """Validate a whole batch in one pass and collect errors per row index"""
+    indices = [i for i in range(len(rows)) if i not in errors]
+    adapter = TypeAdapter(List[schema])
+    try:
+        models = adapter.validate_python([rows[i] for i in indices])
+    except ValidationError as e:
+        for error in e.errors():
+            index = indices[error["loc"][0]]
+            field = ".".join(str(part) for part in error["loc"][1:]) or "row"
+            errors.setdefault(index, []).append(f"{field}: {error['msg']}")
+        indices = [i for i in indices if i not in errors]
+        models = adapter.validate_python([rows[i] for i in indices])
+    return indices, [model.dict() for model in models]
+
+def check_bulk_columns(indices: List[int], values: List[Dict[str, Any]], non_negative: List[str], errors: Dict[int, List[str]]):
+    """Run column-wise range checks over the validated rows"""
+    if not values:
+        return
+    for field in non_negative:
+        column = np.fromiter((row[field] for row in values), dtype=float, count=len(values))
+        for position in np.flatnonzero(column < 0):
+            errors.setdefault(indices[position], []).append(f"{field}: must be non-negative")
+
+def check_bulk_references(db: Session, model, field: str, indices: List[int], values: List[Dict[str, Any]], errors: Dict[int, List[str]]):
+    """Check that every referenced id exists with a single IN query"""
+    referenced = {row[field] for row in values}
+    if not referenced:
+        return
+    known = {row_id for (row_id,) in db.query(model.id).filter(model.id.in_(referenced))}
+    for index, row in zip(indices, values):
+        if row[field] not in known:
+            errors.setdefault(index, []).append(f"{field}: {row[field]} not found")
+
+def bulk_insert_rows(db: Session, model, rows: List[Tuple[int, Dict[str, Any]]], errors: Dict[int, List[str]]) -> List[Tuple[int, Dict[str, Any]]]:
+    """Insert rows with executemany, committing once per chunk along with the rows' events and effects"""
+    inserted = []
+    for start in range(0, len(rows), BULK_INGEST_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_INGEST_CHUNK_SIZE]
+        try:
+            result = db.execute(insert(model).returning(model.id, sort_by_parameter_order=True), [values for _, values in chunk])
+            for (_, values), row_id in zip(chunk, result.scalars()):
+                values["id"] = row_id
+            row_event = BULK_ROW_EVENTS.get(model)
+            if row_event:
+                append_events(db, [row_event(values) for _, values in chunk])
+            effect = BULK_CHUNK_EFFECTS.get(model)
+            if effect:
+                effect(db, [values for _, values in chunk])
+            db.commit()
+            inserted.extend(chunk)
+        except Exception as e:
+            # The chunk's rows, events and effects roll back together
+            logger.exception("Bulk insert chunk failed")
+            db.rollback()
+            for index, _ in chunk:
+                errors.setdefault(index, []).append(f"Insert failed: {e.__class__.__name__}")
+    return inserted
+
+def apply_growth_tracking(db: Session, rows: List[Dict[str, Any]]):
+    """Apply growth rows to their groups: subtract mortality and take the latest weight
+
+    Single and bulk rows go through here, once per group per call. The weight
+    only moves to a measurement dated after the one the group already holds,
+    so older rows arriving late never overwrite a newer weight. Does not commit.
+    """
+    per_group: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        aggregate = per_group.setdefault(row["group_id"], {"deaths": 0, "date": None, "weight": None})
+        aggregate["deaths"] += row["mortality_count"]
+        if aggregate["date"] is None or row["tracking_date"] >= aggregate["date"]:
+            aggregate["date"] = row["tracking_date"]
+            aggregate["weight"] = row["avg_weight_kg"]
+    if not per_group:
+        return
+
+    groups = ChickenGroup.__table__
+    deaths = bindparam("b_deaths")
+    weight_date = bindparam("b_date", type_=Date)
+    newer = or_(groups.c.weight_date.is_(None), groups.c.weight_date < weight_date)
+    stmt = (
+        update(groups)
+        .where(groups.c.id == bindparam("b_group_id"))
+        .values(
+            current_quantity=case((groups.c.current_quantity > deaths, groups.c.current_quantity - deaths), else_=0),
+            avg_weight_kg=case((newer, bindparam("b_weight")), else_=groups.c.avg_weight_kg),
+            weight_date=case((newer, weight_date), else_=groups.c.weight_date),
+            updated_at=bindparam("b_updated_at"),
+        )
+    )
+    now = datetime.utcnow()
+    db.execute(stmt, [
+        {"b_group_id": group_id, "b_deaths": aggregate["deaths"], "b_date": aggregate["date"], "b_weight": aggregate["weight"], "b_updated_at": now}
+        for group_id, aggregate in per_group.items()
+    ])
+
+# Bulk-ingested rows apply these side effects in the same chunk transaction
+BULK_CHUNK_EFFECTS = {
+    GroupGrowthTracking: apply_growth_tracking,
+    GroupFeedingRecord: record_feed_consumption,
+    GroupInventoryConsumption: record_direct_consumption,
+}
+
+def bulk_ingest(db: Session, schema: Type[BaseModel], model, rows: List[Any], errors: Dict[int, List[str]], non_negative: List[str], references: Dict[str, Any]):
+    """Validate, insert and report on a batch of rows for the given table"""
+    indices, values = validate_bulk_rows(schema, rows, errors)
+    check_bulk_columns(indices, values, non_negative, errors)
+    for field, referenced_model in references.items():
+        check_bulk_references(db, referenced_model, field, indices, values, errors)
+
+    valid_rows = [(index, row) for index, row in zip(indices, values) if index not in errors]
+    inserted = bulk_insert_rows(db, model, valid_rows, errors)
+
+    return {
+        "received": len(rows),
+        "inserted": len(inserted),
+        "failed": len(errors),
+        "errors": [{"index": index, "errors": messages} for index, messages in sorted(errors.items())]
+    }
+
 # API Endpoints
 
 # Root endpoint
@@ -754,19 +2326,19 @@ def health_check():
 
 # User Management
 @app.post("/users/register", response_model=UserResponse)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if username already exists
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await db.scalar(select(User).where(User.username == user.username))
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
     # Check if email already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    # Create new user
-    hashed_password = get_password_hash(user.password)
+    # Create new user (bcrypt runs on the password process pool)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -774,55 +2346,121 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     # Create default user settings
-    create_user_settings(db, db_user.id)
+    await create_user_settings(db, db_user.id)
     
     return db_user
 
 @app.post("/users/login")
-def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+async def login_user(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user(db, user_credentials.username, user_credentials.password)
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return {"message": "Login successful", "user_id": user.id, "username": user.username}
+
+    # Drop this user's expired sessions and open a new one
+    await db.execute(delete(UserSession).where(
+        UserSession.user_id == user.id,
+        UserSession.refresh_expires_at < datetime.utcnow()
+    ))
+    session = UserSession(user_id=user.id)
+    tokens = issue_session_tokens(session)
+    db.add(session)
+    await db.commit()
+    return {"message": "Login successful", "user_id": user.id, "username": user.username, **tokens}
+
+# Session tokens
+@app.post("/auth/refresh")
+async def refresh_session(request: TokenRefresh, db: AsyncSession = Depends(get_async_db)):
+    """Exchange a refresh token for a new token pair without the password"""
+    session = await db.scalar(select(UserSession).where(UserSession.refresh_token_hash == hash_session_token(request.refresh_token)))
+    if not session or session.refresh_expires_at < datetime.utcnow():
+        raise HTTPException(status_code=401, detail="Refresh token expired or invalid")
+    tokens = issue_session_tokens(session)
+    await db.commit()
+    return {"user_id": session.user_id, **tokens}
+
+@app.get("/auth/session")
+async def read_session(session: UserSession = Depends(get_current_session), db: AsyncSession = Depends(get_async_db)):
+    user = await get_user_async(db, session.user_id)
+    return {"user_id": session.user_id, "username": user.username, "expires_at": session.expires_at}
+
+@app.post("/auth/logout")
+async def logout(session: UserSession = Depends(get_current_session), db: AsyncSession = Depends(get_async_db)):
+    await db.execute(delete(UserSession).where(UserSession.id == session.id))
+    await db.commit()
+    return {"message": "Logged out"}
+
+@app.get("/metrics/password-hashing")
+async def password_hashing_metrics():
+    """Queue depth, throughput and latency of the password process pool"""
+    return password_hasher.stats()
+
+@app.get("/metrics/reference-cache")
+def reference_cache_metrics():
+    """Hit rate and invalidations of the in-process reference data cache"""
+    return reference_cache.stats()
+
+@app.get("/metrics/projections")
+def projection_metrics(db: Session = Depends(get_db)):
+    """How far each projection is behind the domain event log"""
+    head = db.scalar(select(func.max(DomainEvent.id))) or 0
+    checkpoints = {checkpoint.name: checkpoint for checkpoint in db.scalars(select(ProjectionCheckpoint))}
+    projections = []
+    for name in PROJECTIONS:
+        checkpoint = checkpoints.get(name)
+        position = checkpoint_position(checkpoint) if checkpoint else (0, 0)
+        lag = db.scalar(select(func.count()).where(tuple_(DomainEvent.transaction_id, DomainEvent.id) > tuple_(*position)))
+        projections.append({
+            "name": name,
+            "last_event_id": position[1],
+            "lag_events": lag,
+            "failed_event_id": checkpoint.failed_event_id if checkpoint else None,
+            "failed_attempts": checkpoint.failed_attempts if checkpoint else 0,
+            "last_error": checkpoint.last_error if checkpoint else None,
+            "parked_event_ids": (checkpoint.parked_event_ids if checkpoint else None) or [],
+            "updated_at": checkpoint.updated_at if checkpoint else None,
+        })
+    return {"head_event_id": head, "projections": projections}
 
 @app.get("/users/{user_id}", response_model=UserResponse)
-def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
-    user = get_user(db, user_id)
+async def get_user_by_id(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    user = await get_user_async(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    not_modified = conditional_response(request, response, make_etag("user", user.id, user.updated_at), "private")
+    return not_modified or user
 
 @app.post("/users/check-username")
-def check_username(request: UsernameCheck, db: Session = Depends(get_db)):
+async def check_username(request: UsernameCheck, db: AsyncSession = Depends(get_async_db)):
     """Check if username is available for registration"""
-    user = db.query(User).filter(User.username == request.identifier).first()
+    user = await db.scalar(select(User).where(User.username == request.identifier))
     if user:
         return {"available": False, "message": "Username already taken"}
     return {"available": True, "message": "Username is available"}
 
 
 @app.get("/users/", response_model=List[UserResponse])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+async def get_users(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    query = select(*response_columns(User, UserResponse))
+    return fast_json((await db.execute(query.offset(skip).limit(limit))).mappings())
 
 # User Settings
 @app.get("/users/{user_id}/settings", response_model=UserSettingsResponse)
-def get_user_settings(user_id: int, db: Session = Depends(get_db)):
-    user_settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
+async def get_user_settings(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    user_settings = await db.scalar(select(UserSettings).where(UserSettings.user_id == user_id))
     if not user_settings:
         raise HTTPException(status_code=404, detail="User settings not found")
-    return user_settings
+    etag = make_etag("settings", user_settings.id, user_settings.updated_at)
+    return conditional_response(request, response, etag, "private") or user_settings
 
 @app.put("/users/{user_id}/settings", response_model=UserSettingsResponse)
-def update_user_settings(user_id: int, settings_update: UserSettingsUpdate, db: Session = Depends(get_db)):
-    user_settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
+async def update_user_settings(user_id: int, settings_update: UserSettingsUpdate, db: AsyncSession = Depends(get_async_db)):
+    user_settings = await db.scalar(select(UserSettings).where(UserSettings.user_id == user_id))
     if not user_settings:
         raise HTTPException(status_code=404, detail="User settings not found")
     
@@ -832,8 +2470,8 @@ def update_user_settings(user_id: int, settings_update: UserSettingsUpdate, db:
         setattr(user_settings, field, value)
     
     user_settings.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(user_settings)
+    await db.commit()
+    await db.refresh(user_settings)
     return user_settings
 
 # Growth Stages
@@ -841,14 +2479,21 @@ def update_user_settings(user_id: int, settings_update: UserSettingsUpdate, db:
 def create_growth_stage(stage: GrowthStageCreate, db: Session = Depends(get_db)):
     db_stage = GrowthStage(**stage.dict())
     db.add(db_stage)
-    db.commit()
+    commit_reference_change(db)
     db.refresh(db_stage)
     return db_stage
 
 @app.get("/growth-stages/", response_model=List[GrowthStageResponse])
-def read_growth_stages(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    stages = db.query(GrowthStage).offset(skip).limit(limit).all()
-    return stages
+def read_growth_stages(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    reference = get_reference_data(db)
+    etag = make_etag("growth-stages", reference["version"], skip, limit)
+    return conditional_response(request, response, etag, "reference") or reference["stages"][skip:skip + limit]
+
+@app.post("/growth-stages/advance-groups")
+def advance_groups_endpoint(as_of: Optional[date] = None, db: Session = Depends(get_db)):
+    """Move groups that have outgrown their stage now, instead of waiting for the next run"""
+    as_of = as_of or date.today()
+    return {"as_of": as_of, "advanced": advance_group_stages(db, as_of)}
 
 # Chicken Groups
 @app.post("/chicken-groups/", response_model=ChickenGroupResponse)
@@ -861,50 +2506,140 @@ def create_chicken_group(group: ChickenGroupCreate, db: Session = Depends(get_db
     db_group = ChickenGroup(**group.dict())
     db_group.current_quantity = group.quantity  # Initialize current quantity
     db.add(db_group)
+    db.flush()
+    record_event(db, "GroupCreated", "group", db_group.id,
+                 user_id=db_group.user_id, quantity=db_group.quantity, start_date=db_group.start_date)
     db.commit()
     db.refresh(db_group)
     return db_group
 
 @app.get("/chicken-groups/", response_model=List[ChickenGroupResponse])
-def read_chicken_groups(user_id: Optional[int] = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    query = db.query(ChickenGroup)
-    if user_id:
-        query = query.filter(ChickenGroup.user_id == user_id)
-    groups = query.offset(skip).limit(limit).all()
-    return groups
+def read_chicken_groups(request: Request, response: Response, user_id: Optional[int] = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    criteria = [ChickenGroup.user_id == user_id] if user_id else []
+    etag = make_etag("chicken-groups", user_id, skip, limit, *db.execute(collection_version_query(ChickenGroup, *criteria)).one())
+    not_modified = conditional_response(request, response, etag, "private")
+    if not_modified:
+        return not_modified
+
+    query = select(*response_columns(ChickenGroup, ChickenGroupResponse)).where(*criteria)
+    return fast_json(db.execute(query.offset(skip).limit(limit)).mappings(), response)
 
 @app.get("/users/{user_id}/chicken-groups/", response_model=List[ChickenGroupResponse])
-def read_user_chicken_groups(user_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_user_chicken_groups(user_id: int, request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     # Verify user exists
     user = get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    groups = db.query(ChickenGroup).filter(ChickenGroup.user_id == user_id).offset(skip).limit(limit).all()
-    return groups
+    version = db.execute(collection_version_query(ChickenGroup, ChickenGroup.user_id == user_id)).one()
+    not_modified = conditional_response(request, response, make_etag("user-chicken-groups", user_id, skip, limit, *version), "private")
+    if not_modified:
+        return not_modified
+
+    query = select(*response_columns(ChickenGroup, ChickenGroupResponse)).where(ChickenGroup.user_id == user_id)
+    return fast_json(db.execute(query.offset(skip).limit(limit)).mappings(), response)
 
 # Food Types
 @app.post("/food-types/", response_model=FoodTypeResponse)
 def create_food_type(food_type: FoodTypeCreate, db: Session = Depends(get_db)):
     db_food_type = FoodType(**food_type.dict())
     db.add(db_food_type)
-    db.commit()
+    commit_reference_change(db)
     db.refresh(db_food_type)
     return db_food_type
 
 @app.get("/food-types/", response_model=List[FoodTypeResponse])
-def read_food_types(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    food_types = db.query(FoodType).offset(skip).limit(limit).all()
-    return food_types
+def read_food_types(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    reference = get_reference_data(db)
+    etag = make_etag("food-types", reference["version"], skip, limit)
+    return conditional_response(request, response, etag, "reference") or reference["food_types"][skip:skip + limit]
 
 # Key Function Endpoints
 @app.get("/groups/{group_id}/daily-schedule/{schedule_date}")
 def get_group_daily_schedule(group_id: int, schedule_date: date, db: Session = Depends(get_db)):
     return generate_group_daily_schedule(group_id, schedule_date, db)
 
-@app.get("/groups/{group_id}/optimal-formulation")
-def get_group_optimal_formulation_endpoint(group_id: int, db: Session = Depends(get_db)):
-    return get_group_optimal_formulation(group_id, db)
+@app.get("/groups/{group_id}/optimal-formulation", response_model=GroupFormulationResponse)
+def get_group_optimal_formulation_endpoint(group_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    formulation = get_group_optimal_formulation(group_id, db)
+    etag = make_etag("optimal-formulation", formulation.id, get_reference_data(db)["version"])
+    return conditional_response(request, response, etag, "private") or formulation
+
+@app.get("/users/{user_id}/feeding-plan")
+def get_user_feeding_plan(user_id: int, start_date: Optional[date] = None,
+                          days: int = Query(30, ge=1, le=FEEDING_PLAN_MAX_DAYS), db: Session = Depends(get_db)):
+    """Feed plan for all of a user's active groups over the coming days"""
+    if not get_user(db, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    today = date.today()
+    start_date = start_date or today
+    inputs = load_feeding_plan_inputs(user_id, db, today)
+    plan = project_feeding_plan(
+        inputs["groups"], inputs["stages"], inputs["templates_by_stage"], inputs["trends"], start_date, days, today
+    )
+    return {"user_id": user_id, "start_date": start_date, "days": days, **plan}
+
+@app.get("/users/{user_id}/dashboard", response_model=DashboardResponse)
+def get_user_dashboard(user_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    """Per-group dashboard for a user, read from the materialized summaries"""
+    today = date.today()
+    summaries = db.execute(
+        select(GroupDashboardSummary).where(GroupDashboardSummary.user_id == user_id).order_by(GroupDashboardSummary.group_id)
+    ).scalars().all()
+
+    # Rows computed on an earlier day have a shifted 7-day window and possibly an outdated stage
+    stale = [summary.group_id for summary in summaries if summary.as_of_date < today]
+    if stale:
+        refresh_group_summaries(db, stale, today)
+        summaries = db.execute(
+            select(GroupDashboardSummary).where(GroupDashboardSummary.user_id == user_id).order_by(GroupDashboardSummary.group_id)
+        ).scalars().all()
+    if not summaries and not get_user(db, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    etag = make_etag("dashboard", user_id, today, len(summaries), max((summary.updated_at for summary in summaries), default=None))
+    not_modified = conditional_response(request, response, etag, "private")
+    if not_modified:
+        return not_modified
+
+    active = [summary for summary in summaries if summary.is_active]
+    return {
+        "user_id": user_id,
+        "as_of_date": today,
+        "totals": {
+            "active_groups": len(active),
+            "birds": sum(summary.current_quantity for summary in active),
+            "feed_7d_kg": sum(summary.feed_7d_kg for summary in active),
+            "cost_7d": sum(summary.cost_7d for summary in active),
+        },
+        "groups": summaries,
+    }
+
+# Analytics
+ANALYTICS_GRANULARITY_PATTERN = "^(auto|day|week|month)$"
+
+def analytics_range(start_date: Optional[date], end_date: Optional[date]) -> Tuple[date, date]:
+    end = end_date or date.today()
+    return start_date or end - timedelta(days=29), end
+
+@app.get("/groups/{group_id}/analytics", response_model=AnalyticsResponse)
+def get_group_analytics(group_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                        granularity: str = Query("auto", pattern=ANALYTICS_GRANULARITY_PATTERN), db: Session = Depends(get_db)):
+    """Feed, cost, mortality and weight over time for one group"""
+    if not db.get(ChickenGroup, group_id):
+        raise HTTPException(status_code=404, detail="Group not found")
+    start, end = analytics_range(start_date, end_date)
+    return {"scope": "group", "scope_id": group_id, **query_rollup_analytics(db, GroupRollup.group_id, group_id, start, end, granularity)}
+
+@app.get("/users/{user_id}/analytics", response_model=AnalyticsResponse)
+def get_user_analytics(user_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                       granularity: str = Query("auto", pattern=ANALYTICS_GRANULARITY_PATTERN), db: Session = Depends(get_db)):
+    """Feed, cost, mortality and weight over time across all of a user's groups"""
+    if not get_user(db, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    start, end = analytics_range(start_date, end_date)
+    return {"scope": "user", "scope_id": user_id, **query_rollup_analytics(db, GroupRollup.user_id, user_id, start, end, granularity)}
 
 @app.post("/groups/{group_id}/update-mortality")
 def update_group_mortality_endpoint(group_id: int, new_deaths: int, death_date: date, db: Session = Depends(get_db)):
@@ -919,77 +2654,181 @@ def calculate_group_performance_endpoint(group_id: int, calc_date: date, db: Ses
 def create_feeding_record(record: GroupFeedingRecordCreate, db: Session = Depends(get_db)):
     db_record = GroupFeedingRecord(**record.dict())
     db.add(db_record)
+    db.flush()
+    record_feed_consumption(db, [{
+        "id": db_record.id, "group_id": db_record.group_id,
+        "feeding_date": db_record.feeding_date, "feed_quantity_kg": db_record.feed_quantity_kg
+    }])
+    append_events(db, [feeding_recorded_event({**record.dict(), "id": db_record.id})])
     db.commit()
     db.refresh(db_record)
     return db_record
 
 @app.get("/feeding-records/", response_model=List[GroupFeedingRecordResponse])
 def read_feeding_records(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    records = db.query(GroupFeedingRecord).offset(skip).limit(limit).all()
-    return records
+    query = select(*response_columns(GroupFeedingRecord, GroupFeedingRecordResponse))
+    return fast_json(db.execute(query.offset(skip).limit(limit)).mappings())
 
 # Growth Tracking
 @app.post("/growth-tracking/", response_model=GroupGrowthTrackingResponse)
 def create_growth_tracking(tracking: GroupGrowthTrackingCreate, db: Session = Depends(get_db)):
     db_tracking = GroupGrowthTracking(**tracking.dict())
     db.add(db_tracking)
+    db.flush()
+    apply_growth_tracking(db, [tracking.dict()])
+    append_events(db, [weight_measured_event({**tracking.dict(), "id": db_tracking.id})])
     db.commit()
     db.refresh(db_tracking)
     return db_tracking
 
 @app.get("/growth-tracking/", response_model=List[GroupGrowthTrackingResponse])
 def read_growth_tracking(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    tracking = db.query(GroupGrowthTracking).offset(skip).limit(limit).all()
-    return tracking
+    query = select(*response_columns(GroupGrowthTracking, GroupGrowthTrackingResponse))
+    return fast_json(db.execute(query.offset(skip).limit(limit)).mappings())
+
+# Bulk Ingest (JSON array or NDJSON stream)
+@app.post("/feeding-records/bulk", response_model=BulkIngestResponse, openapi_extra=BULK_INGEST_OPENAPI)
+async def bulk_create_feeding_records(request: Request, db: Session = Depends(get_db)):
+    rows, errors = await read_bulk_payload(request)
+    return await run_in_threadpool(
+        bulk_ingest, db, GroupFeedingRecordCreate, GroupFeedingRecord, rows, errors,
+        ["feed_quantity_kg", "total_cost"], {"group_id": ChickenGroup}
+    )
+
+@app.post("/growth-tracking/bulk", response_model=BulkIngestResponse, openapi_extra=BULK_INGEST_OPENAPI)
+async def bulk_create_growth_tracking(request: Request, db: Session = Depends(get_db)):
+    rows, errors = await read_bulk_payload(request)
+    return await run_in_threadpool(
+        bulk_ingest, db, GroupGrowthTrackingCreate, GroupGrowthTracking, rows, errors,
+        ["avg_weight_kg", "mortality_count"], {"group_id": ChickenGroup}
+    )
+
+@app.post("/inventory-consumption/bulk", response_model=BulkIngestResponse, openapi_extra=BULK_INGEST_OPENAPI)
+async def bulk_create_inventory_consumption(request: Request, db: Session = Depends(get_db)):
+    rows, errors = await read_bulk_payload(request)
+    return await run_in_threadpool(
+        bulk_ingest, db, GroupInventoryConsumptionCreate, GroupInventoryConsumption, rows, errors,
+        ["quantity_kg", "cost"], {"group_id": ChickenGroup, "food_type_id": FoodType}
+    )
+
+# Inventory
+@app.post("/users/{user_id}/inventory/movements", response_model=InventoryMovementResponse)
+def create_inventory_movement(user_id: int, movement: InventoryMovementCreate, db: Session = Depends(get_db)):
+    if not get_user(db, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    if movement.movement_type not in INVENTORY_MOVEMENT_TYPES:
+        raise HTTPException(status_code=400, detail=f"movement_type must be one of {', '.join(INVENTORY_MOVEMENT_TYPES)}")
+    if movement.movement_type != "adjustment" and movement.quantity_kg <= 0:
+        raise HTTPException(status_code=400, detail="quantity_kg must be positive")
+    if movement.food_type_id not in {food_type.id for food_type in get_reference_data(db)["food_types"]}:
+        raise HTTPException(status_code=404, detail="Food type not found")
+
+    values = movement.dict()
+    if movement.movement_type == "consumption":
+        values["quantity_kg"] = -movement.quantity_kg
+    db_movement = InventoryMovement(user_id=user_id, **values)
+    db.add(db_movement)
+    db.flush()
+    upsert_inventory_balances(db, {(user_id, movement.food_type_id): db_movement.quantity_kg})
+    db.commit()
+    db.refresh(db_movement)
+    return db_movement
+
+@app.get("/users/{user_id}/inventory/movements", response_model=List[InventoryMovementResponse])
+def read_inventory_movements(user_id: int, food_type_id: Optional[int] = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    query = select(*response_columns(InventoryMovement, InventoryMovementResponse)).where(InventoryMovement.user_id == user_id)
+    if food_type_id:
+        query = query.where(InventoryMovement.food_type_id == food_type_id)
+    return fast_json(db.execute(query.order_by(InventoryMovement.id.desc()).offset(skip).limit(limit)).mappings())
+
+@app.get("/users/{user_id}/inventory", response_model=List[InventoryBalanceResponse])
+def read_inventory_balances(user_id: int, db: Session = Depends(get_db)):
+    """Current stock per food type, read from the materialized balances"""
+    names = {food_type.id: food_type.name for food_type in get_reference_data(db)["food_types"]}
+    balances = db.execute(
+        select(InventoryBalance).where(InventoryBalance.user_id == user_id).order_by(InventoryBalance.food_type_id)
+    ).scalars().all()
+    return [
+        {"food_type_id": balance.food_type_id, "name": names.get(balance.food_type_id), "quantity_kg": balance.quantity_kg, "updated_at": balance.updated_at}
+        for balance in balances
+    ]
+
+@app.get("/users/{user_id}/inventory/forecast")
+def forecast_inventory(user_id: int, days: int = Query(30, ge=1, le=FEEDING_PLAN_MAX_DAYS), db: Session = Depends(get_db)):
+    """Days of stock left per ingredient, given the planned feeding of all active groups"""
+    if not get_user(db, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    today = date.today()
+    inputs = load_feeding_plan_inputs(user_id, db, today)
+    plan = compute_feeding_plan(inputs["groups"], inputs["stages"], inputs["templates_by_stage"], inputs["trends"], today, days, today)
+    balances = db.execute(select(InventoryBalance).where(InventoryBalance.user_id == user_id)).scalars().all()
+    return {
+        "user_id": user_id,
+        "start_date": today,
+        "days": days,
+        "ingredients": forecast_ingredient_stock(plan, get_reference_data(db), balances, today, days),
+    }
 
 # Performance Metrics
 @app.get("/performance-metrics/", response_model=List[GroupPerformanceMetricsResponse])
 def read_performance_metrics(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    metrics = db.query(GroupPerformanceMetrics).offset(skip).limit(limit).all()
-    return metrics
+    query = select(*response_columns(GroupPerformanceMetrics, GroupPerformanceMetricsResponse))
+    return fast_json(db.execute(query.offset(skip).limit(limit)).mappings())
 
 # Chicken Profiles
 @app.post("/chicken-profiles/", response_model=ChickenProfileResponse)
-def create_chicken_profile(profile: ChickenProfileCreate, db: Session = Depends(get_db)):
+async def create_chicken_profile(profile: ChickenProfileCreate, db: AsyncSession = Depends(get_async_db)):
     # Verify user exists
-    user = get_user(db, profile.user_id)
+    user = await get_user_async(db, profile.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     db_profile = ChickenProfile(**profile.dict())
     db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
+    await db.flush()
+    record_event(db, "ProfileCreated", "profile", db_profile.id, **profile.dict())
+    await db.commit()
+    await db.refresh(db_profile)
     return db_profile
 
 @app.get("/chicken-profiles/", response_model=List[ChickenProfileResponse])
-def read_chicken_profiles(user_id: Optional[int] = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    query = db.query(ChickenProfile)
-    if user_id:
-        query = query.filter(ChickenProfile.user_id == user_id)
-    profiles = query.offset(skip).limit(limit).all()
-    return profiles
+async def read_chicken_profiles(request: Request, response: Response, user_id: Optional[int] = None, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    criteria = [ChickenProfile.user_id == user_id] if user_id else []
+    version = (await db.execute(collection_version_query(ChickenProfile, *criteria))).one()
+    not_modified = conditional_response(request, response, make_etag("chicken-profiles", user_id, skip, limit, *version), "private")
+    if not_modified:
+        return not_modified
+
+    query = select(*response_columns(ChickenProfile, ChickenProfileResponse)).where(*criteria)
+    return fast_json((await db.execute(query.offset(skip).limit(limit))).mappings(), response)
 
 @app.get("/users/{user_id}/chicken-profiles/", response_model=List[ChickenProfileResponse])
-def read_user_chicken_profiles(user_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_user_chicken_profiles(user_id: int, request: Request, response: Response, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
     # Verify user exists
-    user = get_user(db, user_id)
+    user = await get_user_async(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    profiles = db.query(ChickenProfile).filter(ChickenProfile.user_id == user_id).offset(skip).limit(limit).all()
-    return profiles
+    version = (await db.execute(collection_version_query(ChickenProfile, ChickenProfile.user_id == user_id))).one()
+    not_modified = conditional_response(request, response, make_etag("user-chicken-profiles", user_id, skip, limit, *version), "private")
+    if not_modified:
+        return not_modified
+
+    query = select(*response_columns(ChickenProfile, ChickenProfileResponse)).where(ChickenProfile.user_id == user_id)
+    return fast_json((await db.execute(query.offset(skip).limit(limit))).mappings(), response)
 
 @app.get("/chicken-profiles/{profile_id}", response_model=ChickenProfileResponse)
-def read_chicken_profile(profile_id: int, db: Session = Depends(get_db)):
-    profile = db.query(ChickenProfile).filter(ChickenProfile.id == profile_id).first()
+async def read_chicken_profile(profile_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    profile = await db.get(ChickenProfile, profile_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
-    return profile
+    etag = make_etag("chicken-profile", profile.id, profile.updated_at)
+    return conditional_response(request, response, etag, "private") or profile
 
 @app.put("/chicken-profiles/{profile_id}", response_model=ChickenProfileResponse)
-def update_chicken_profile(profile_id: int, profile_update: ChickenProfileUpdate, db: Session = Depends(get_db)):
-    profile = db.query(ChickenProfile).filter(ChickenProfile.id == profile_id).first()
+async def update_chicken_profile(profile_id: int, profile_update: ChickenProfileUpdate, db: AsyncSession = Depends(get_async_db)):
+    profile = await db.get(ChickenProfile, profile_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
@@ -999,18 +2838,20 @@ def update_chicken_profile(profile_id: int, profile_update: ChickenProfileUpdate
         setattr(profile, field, value)
     
     profile.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(profile)
+    record_event(db, "ProfileUpdated", "profile", profile.id, **update_data)
+    await db.commit()
+    await db.refresh(profile)
     return profile
 
 @app.delete("/chicken-profiles/{profile_id}")
-def delete_chicken_profile(profile_id: int, db: Session = Depends(get_db)):
-    profile = db.query(ChickenProfile).filter(ChickenProfile.id == profile_id).first()
+async def delete_chicken_profile(profile_id: int, db: AsyncSession = Depends(get_async_db)):
+    profile = await db.get(ChickenProfile, profile_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    db.delete(profile)
-    db.commit()
+    await db.delete(profile)
+    record_event(db, "ProfileDeleted", "profile", profile_id, user_id=profile.user_id)
+    await db.commit()
     return {"message": "Profile deleted successfully"}
 
 # Bedrock AI API endpoints (fallback implementation)
@@ -1025,124 +2866,170 @@ def get_seasons():
         "current_season": "summer"
     }
 
-@app.post("/weekly-recipes")
-def get_weekly_recipes(request: dict):
-    """Generate weekly feeding recipes based on chicken profile"""
-    try:
-        # Extract chicken data from request
-        breed = request.get("breed", "leghorn")
-        age = request.get("age", 20)
-        weight = request.get("weight", 1.5)
-        quantity = request.get("quantity", 10)
-        environment = request.get("environment", "free_range")
-        season = request.get("season", "summer")
-        purpose = request.get("purpose", "eggs")
-        stress_level = request.get("stress_level", "low")
-        molting = request.get("molting", "no")
-        
-        # Generate sample weekly recipes
-        recipes = []
-        for day in range(7):
-            day_name = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"][day]
-            
-            # Calculate base feed amount
-            base_feed = 0.12 * weight  # 120g per kg of body weight
-            if age < 18:
-                base_feed *= 0.8  # Less feed for younger chickens
-            elif age > 50:
-                base_feed *= 0.9  # Slightly less for older chickens
-            
-            # Adjust for season
-            if season == "winter":
-                base_feed *= 1.1  # More feed in winter
-            elif season == "summer":
-                base_feed *= 0.95  # Less feed in summer
-            
-            # Adjust for stress level
-            if stress_level == "high":
-                base_feed *= 1.15
-            elif stress_level == "medium":
-                base_feed *= 1.05
-            
-            # Adjust for molting
-            if molting == "yes":
-                base_feed *= 1.2  # More protein during molting
-            
-            total_feed = base_feed * quantity
-            
-            recipe = {
-                "day": day_name,
-                "date": f"2024-01-{15 + day:02d}",
+# Weekly recipes
+RECIPE_FEED_KG_PER_KG_WEIGHT = 0.12
+RECIPE_WATER_L_PER_KG_FEED = 2
+RECIPE_MAX_PROFILES = 1000
+
+# Age bands in weeks: under 18, 18-50, over 50
+RECIPE_AGE_BAND_EDGES = np.array([18, 51])
+RECIPE_AGE_FACTORS = np.array([0.8, 1.0, 0.9])
+
+# Feed adjustments by category; anything not listed keeps a factor of 1
+RECIPE_SEASON_FACTORS = {"winter": 1.1, "summer": 0.95}
+RECIPE_STRESS_FACTORS = {"high": 1.15, "medium": 1.05}
+RECIPE_MOLTING_FACTORS = {"yes": 1.2}
+
+def recipe_factor_axis(factors: Dict[str, float]) -> Tuple[Dict[str, int], np.ndarray]:
+    """Category codes and their factors, with code 0 as the neutral factor"""
+    return {name: code for code, name in enumerate(factors, start=1)}, np.array([1.0, *factors.values()])
+
+RECIPE_SEASON_CODES, _season_factors = recipe_factor_axis(RECIPE_SEASON_FACTORS)
+RECIPE_STRESS_CODES, _stress_factors = recipe_factor_axis(RECIPE_STRESS_FACTORS)
+RECIPE_MOLTING_CODES, _molting_factors = recipe_factor_axis(RECIPE_MOLTING_FACTORS)
+
+# Combined multiplier for every [age band, season, stress, molting] combination
+RECIPE_MULTIPLIERS = np.einsum("a,s,t,m->astm", RECIPE_AGE_FACTORS, _season_factors, _stress_factors, _molting_factors)
+
+RECIPE_MEALS = (
+    {
+        "time": "06:00", "type": "morning", "share": 0.4,
+        "ingredients": [
+            {"name": "Corn", "percentage": 60},
+            {"name": "Soybean meal", "percentage": 25},
+            {"name": "Wheat bran", "percentage": 10},
+            {"name": "Calcium carbonate", "percentage": 5}
+        ],
+        "notes": "High energy for morning activity"
+    },
+    {
+        "time": "14:00", "type": "afternoon", "share": 0.35,
+        "ingredients": [
+            {"name": "Corn", "percentage": 55},
+            {"name": "Soybean meal", "percentage": 30},
+            {"name": "Wheat bran", "percentage": 10},
+            {"name": "Calcium carbonate", "percentage": 5}
+        ],
+        "notes": "Balanced nutrition for afternoon"
+    },
+    {
+        "time": "18:00", "type": "evening", "share": 0.25,
+        "ingredients": [
+            {"name": "Corn", "percentage": 50},
+            {"name": "Soybean meal", "percentage": 35},
+            {"name": "Wheat bran", "percentage": 10},
+            {"name": "Calcium carbonate", "percentage": 5}
+        ],
+        "notes": "Protein-rich for overnight"
+    },
+)
+RECIPE_MEAL_SHARES = np.array([meal["share"] for meal in RECIPE_MEALS])
+
+RECIPE_SPECIAL_NOTES = [
+    "Ensure fresh water is always available",
+    "Monitor feed consumption daily",
+    "Adjust amounts based on actual consumption"
+]
+
+WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+def recipe_week_start(start_date: Optional[date] = None) -> date:
+    """The requested start date, or the Monday of the current week"""
+    if start_date is not None:
+        return start_date
+    today = date.today()
+    return today - timedelta(days=today.weekday())
+
+def generate_weekly_recipes(profiles: List[Dict[str, Any]], start_date: date) -> List[Dict[str, Any]]:
+    """Seven days of recipes for each profile, computed for all profiles at once
+
+    Each profile needs breed, age, weight, quantity, season, stress_level and
+    molting. Adjustments are looked up in RECIPE_MULTIPLIERS and meal amounts
+    come from one (profiles, days, meals) array.
+    """
+    ages = np.array([profile["age"] for profile in profiles], dtype=float)
+    weights = np.array([profile["weight"] for profile in profiles], dtype=float)
+    quantities = np.array([profile["quantity"] for profile in profiles], dtype=float)
+    multipliers = RECIPE_MULTIPLIERS[
+        np.digitize(ages, RECIPE_AGE_BAND_EDGES),
+        [RECIPE_SEASON_CODES.get(profile["season"], 0) for profile in profiles],
+        [RECIPE_STRESS_CODES.get(profile["stress_level"], 0) for profile in profiles],
+        [RECIPE_MOLTING_CODES.get(profile["molting"], 0) for profile in profiles],
+    ]
+
+    daily_kg = np.broadcast_to((RECIPE_FEED_KG_PER_KG_WEIGHT * weights * multipliers * quantities)[:, None], (len(profiles), 7))
+    meal_kg = np.round(daily_kg[:, :, None] * RECIPE_MEAL_SHARES, 3).tolist()
+    water_l = np.round(daily_kg * RECIPE_WATER_L_PER_KG_FEED, 1).tolist()
+    daily_rounded = np.round(daily_kg, 3)
+    weekly_kg = daily_rounded.sum(axis=1).tolist()
+    daily_rounded = daily_rounded.tolist()
+
+    days = [start_date + timedelta(days=offset) for offset in range(7)]
+    results = []
+    for p, profile in enumerate(profiles):
+        feed_type = "starter" if profile["age"] < 18 else "layer"
+        recipes = [
+            {
+                "day": WEEKDAY_NAMES[day.weekday()],
+                "date": day.isoformat(),
                 "meals": [
                     {
-                        "time": "06:00",
-                        "type": "morning",
-                        "feed_type": "starter" if age < 18 else "layer",
-                        "amount_kg": round(total_feed * 0.4, 3),
-                        "ingredients": [
-                            {"name": "Corn", "percentage": 60},
-                            {"name": "Soybean meal", "percentage": 25},
-                            {"name": "Wheat bran", "percentage": 10},
-                            {"name": "Calcium carbonate", "percentage": 5}
-                        ],
-                        "notes": "High energy for morning activity"
-                    },
-                    {
-                        "time": "14:00",
-                        "type": "afternoon",
-                        "feed_type": "starter" if age < 18 else "layer",
-                        "amount_kg": round(total_feed * 0.35, 3),
-                        "ingredients": [
-                            {"name": "Corn", "percentage": 55},
-                            {"name": "Soybean meal", "percentage": 30},
-                            {"name": "Wheat bran", "percentage": 10},
-                            {"name": "Calcium carbonate", "percentage": 5}
-                        ],
-                        "notes": "Balanced nutrition for afternoon"
-                    },
-                    {
-                        "time": "18:00",
-                        "type": "evening",
-                        "feed_type": "starter" if age < 18 else "layer",
-                        "amount_kg": round(total_feed * 0.25, 3),
-                        "ingredients": [
-                            {"name": "Corn", "percentage": 50},
-                            {"name": "Soybean meal", "percentage": 35},
-                            {"name": "Wheat bran", "percentage": 10},
-                            {"name": "Calcium carbonate", "percentage": 5}
-                        ],
-                        "notes": "Protein-rich for overnight"
+                        "time": meal["time"],
+                        "type": meal["type"],
+                        "feed_type": feed_type,
+                        "amount_kg": meal_kg[p][d][m],
+                        "ingredients": meal["ingredients"],
+                        "notes": meal["notes"]
                     }
+                    for m, meal in enumerate(RECIPE_MEALS)
                 ],
-                "total_daily_feed_kg": round(total_feed, 3),
-                "water_requirement_l": round(total_feed * 2, 1),  # 2L water per kg feed
-                "special_notes": [
-                    "Ensure fresh water is always available",
-                    "Monitor feed consumption daily",
-                    "Adjust amounts based on actual consumption"
-                ]
+                "total_daily_feed_kg": daily_rounded[p][d],
+                "water_requirement_l": water_l[p][d],
+                "special_notes": RECIPE_SPECIAL_NOTES
             }
-            
-            recipes.append(recipe)
-        
-        return {
-            "success": True,
+            for d, day in enumerate(days)
+        ]
+        results.append({
             "recipes": recipes,
             "summary": {
-                "total_weekly_feed_kg": round(sum(r["total_daily_feed_kg"] for r in recipes), 2),
-                "avg_daily_feed_kg": round(sum(r["total_daily_feed_kg"] for r in recipes) / 7, 2),
-                "breed": breed,
-                "age_weeks": age,
-                "season": season
+                "total_weekly_feed_kg": round(weekly_kg[p], 2),
+                "avg_daily_feed_kg": round(weekly_kg[p] / 7, 2),
+                "breed": profile["breed"],
+                "age_weeks": profile["age"],
+                "season": profile["season"]
             }
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "error": f"Failed to generate recipes: {str(e)}",
-            "recipes": []
-        }
+        })
+    return results
+
+@app.post("/weekly-recipes")
+def get_weekly_recipes(request: WeeklyRecipeRequest):
+    """Generate weekly feeding recipes based on chicken profile"""
+    result = generate_weekly_recipes([request.model_dump()], recipe_week_start(request.start_date))[0]
+    return {"success": True, **result}
+
+@app.post("/weekly-recipes/batch")
+async def get_weekly_recipes_batch(request: WeeklyRecipeBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """Generate weekly recipes for several chicken profiles in one call"""
+    profile_ids = list(dict.fromkeys(request.profile_ids))
+    if not profile_ids or len(profile_ids) > RECIPE_MAX_PROFILES:
+        raise HTTPException(status_code=422, detail=f"Send between 1 and {RECIPE_MAX_PROFILES} profile ids")
+
+    rows = (await db.execute(
+        select(ChickenProfile.id, ChickenProfile.breed, ChickenProfile.age, ChickenProfile.weight, ChickenProfile.quantity,
+               ChickenProfile.season, ChickenProfile.stress_level, ChickenProfile.molting)
+        .where(ChickenProfile.id.in_(profile_ids))
+    )).mappings().all()
+    by_id = {row["id"]: row for row in rows}
+    missing = [profile_id for profile_id in profile_ids if profile_id not in by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Chicken profiles not found: {missing}")
+
+    profiles = [by_id[profile_id] for profile_id in profile_ids]
+    results = generate_weekly_recipes(profiles, recipe_week_start(request.start_date))
+    return ORJSONResponse({
+        "success": True,
+        "profiles": [{"profile_id": profile_id, **result} for profile_id, result in zip(profile_ids, results)]
+    })
 
 @app.post("/recommend-feed")
 def recommend_feed(request: dict):
@@ -1183,12 +3070,5 @@ def recommend_feed(request: dict):
             "error": f"Failed to recommend feed: {str(e)}"
         }
 
-# Create tables after all models are defined
-try:
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully")
-except Exception as e:
-    print(f"Error creating database tables: {e}")
-
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Alembic environment for the Chicken Feeding Management System API
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from database import SQLALCHEMY_DATABASE_URL, create_db_engine
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+# The app passes its metadata in when it migrates on startup; the alembic CLI
+# imports the models itself (needed for --autogenerate).
+target_metadata = config.attributes.get("target_metadata")
+if target_metadata is None:
+    from main import Base
+    target_metadata = Base.metadata
+
+def get_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or SQLALCHEMY_DATABASE_URL
+
+def run_migrations_offline():
+    """Emit SQL to stdout without a database connection"""
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    """Run migrations against a live connection"""
+    engine = create_db_engine(get_url())
+    try:
+        with engine.connect() as connection:
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                render_as_batch=connection.dialect.name == "sqlite",
+            )
+            with context.begin_transaction():
+                context.run_migrations()
+    finally:
+        engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
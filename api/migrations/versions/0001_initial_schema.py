@@ -0,0 +1,291 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 15:34:36.565061
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the baseline schema.
+
+    Databases created before migrations existed (via Base.metadata.create_all)
+    already have these tables, so each one is only created when missing.
+    """
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'food_types' not in existing:
+        op.create_table('food_types',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('cost_per_kg', sa.Float(), nullable=False),
+        sa.Column('unit', sa.String(length=20), nullable=True),
+        sa.Column('supplier', sa.String(length=100), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_food_types_id'), 'food_types', ['id'], unique=False)
+        op.create_index(op.f('ix_food_types_name'), 'food_types', ['name'], unique=True)
+
+    if 'growth_stages' not in existing:
+        op.create_table('growth_stages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('min_age_days', sa.Integer(), nullable=False),
+        sa.Column('max_age_days', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_growth_stages_id'), 'growth_stages', ['id'], unique=False)
+        op.create_index(op.f('ix_growth_stages_name'), 'growth_stages', ['name'], unique=True)
+
+    if 'users' not in existing:
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=50), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=False),
+        sa.Column('hashed_password', sa.String(length=255), nullable=False),
+        sa.Column('full_name', sa.String(length=100), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+        op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+        op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+
+    if 'chicken_groups' not in existing:
+        op.create_table('chicken_groups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('batch_number', sa.String(length=50), nullable=False),
+        sa.Column('breed', sa.String(length=100), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('current_quantity', sa.Integer(), nullable=False),
+        sa.Column('avg_weight_kg', sa.Float(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('current_stage_id', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['current_stage_id'], ['growth_stages.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_chicken_groups_batch_number'), 'chicken_groups', ['batch_number'], unique=False)
+        op.create_index(op.f('ix_chicken_groups_id'), 'chicken_groups', ['id'], unique=False)
+
+    if 'chicken_profiles' not in existing:
+        op.create_table('chicken_profiles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('breed', sa.String(length=100), nullable=False),
+        sa.Column('age', sa.Integer(), nullable=False),
+        sa.Column('weight', sa.Float(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('environment', sa.String(length=50), nullable=False),
+        sa.Column('season', sa.String(length=20), nullable=False),
+        sa.Column('purpose', sa.String(length=50), nullable=False),
+        sa.Column('egg_purpose', sa.String(length=50), nullable=True),
+        sa.Column('stress_level', sa.String(length=20), nullable=False),
+        sa.Column('feed_type', sa.String(length=50), nullable=False),
+        sa.Column('feed_brand', sa.String(length=100), nullable=True),
+        sa.Column('feed_cost', sa.Float(), nullable=False),
+        sa.Column('egg_price', sa.Float(), nullable=False),
+        sa.Column('molting', sa.String(length=10), nullable=False),
+        sa.Column('vaccination', sa.String(length=50), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_chicken_profiles_id'), 'chicken_profiles', ['id'], unique=False)
+
+    if 'feed_formulations' not in existing:
+        op.create_table('feed_formulations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('growth_stage_id', sa.Integer(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('total_cost_per_kg', sa.Float(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['growth_stage_id'], ['growth_stages.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_feed_formulations_id'), 'feed_formulations', ['id'], unique=False)
+
+    if 'nutrition_facts' not in existing:
+        op.create_table('nutrition_facts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('food_type_id', sa.Integer(), nullable=False),
+        sa.Column('protein_percent', sa.Float(), nullable=False),
+        sa.Column('fat_percent', sa.Float(), nullable=False),
+        sa.Column('fiber_percent', sa.Float(), nullable=False),
+        sa.Column('ash_percent', sa.Float(), nullable=False),
+        sa.Column('moisture_percent', sa.Float(), nullable=False),
+        sa.Column('calcium_percent', sa.Float(), nullable=False),
+        sa.Column('phosphorus_percent', sa.Float(), nullable=False),
+        sa.Column('energy_kcal_per_kg', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['food_type_id'], ['food_types.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_nutrition_facts_id'), 'nutrition_facts', ['id'], unique=False)
+
+    if 'stage_nutrition_requirements' not in existing:
+        op.create_table('stage_nutrition_requirements',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('growth_stage_id', sa.Integer(), nullable=False),
+        sa.Column('protein_percent', sa.Float(), nullable=False),
+        sa.Column('fat_percent', sa.Float(), nullable=False),
+        sa.Column('fiber_percent', sa.Float(), nullable=False),
+        sa.Column('calcium_percent', sa.Float(), nullable=False),
+        sa.Column('phosphorus_percent', sa.Float(), nullable=False),
+        sa.Column('energy_kcal_per_kg', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['growth_stage_id'], ['growth_stages.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_stage_nutrition_requirements_id'), 'stage_nutrition_requirements', ['id'], unique=False)
+
+    if 'user_settings' not in existing:
+        op.create_table('user_settings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('language', sa.String(length=10), nullable=True),
+        sa.Column('timezone', sa.String(length=50), nullable=True),
+        sa.Column('currency', sa.String(length=3), nullable=True),
+        sa.Column('measurement_unit', sa.String(length=10), nullable=True),
+        sa.Column('notifications_enabled', sa.Boolean(), nullable=True),
+        sa.Column('email_notifications', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id')
+        )
+        op.create_index(op.f('ix_user_settings_id'), 'user_settings', ['id'], unique=False)
+
+    if 'formulation_ingredients' not in existing:
+        op.create_table('formulation_ingredients',
+        sa.Column('formulation_id', sa.Integer(), nullable=False),
+        sa.Column('food_type_id', sa.Integer(), nullable=False),
+        sa.Column('percentage', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['food_type_id'], ['food_types.id'], ),
+        sa.ForeignKeyConstraint(['formulation_id'], ['feed_formulations.id'], ),
+        sa.PrimaryKeyConstraint('formulation_id', 'food_type_id')
+        )
+
+    if 'group_feeding_records' not in existing:
+        op.create_table('group_feeding_records',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('feeding_date', sa.Date(), nullable=False),
+        sa.Column('feed_quantity_kg', sa.Float(), nullable=False),
+        sa.Column('total_cost', sa.Float(), nullable=False),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['group_id'], ['chicken_groups.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_group_feeding_records_id'), 'group_feeding_records', ['id'], unique=False)
+
+    if 'group_feeding_schedule_templates' not in existing:
+        op.create_table('group_feeding_schedule_templates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('growth_stage_id', sa.Integer(), nullable=False),
+        sa.Column('formulation_id', sa.Integer(), nullable=False),
+        sa.Column('feed_percentage', sa.Float(), nullable=False),
+        sa.Column('feeding_frequency', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['formulation_id'], ['feed_formulations.id'], ),
+        sa.ForeignKeyConstraint(['growth_stage_id'], ['growth_stages.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_group_feeding_schedule_templates_id'), 'group_feeding_schedule_templates', ['id'], unique=False)
+
+    if 'group_growth_tracking' not in existing:
+        op.create_table('group_growth_tracking',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('tracking_date', sa.Date(), nullable=False),
+        sa.Column('avg_weight_kg', sa.Float(), nullable=False),
+        sa.Column('mortality_count', sa.Integer(), nullable=True),
+        sa.Column('health_notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['group_id'], ['chicken_groups.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_group_growth_tracking_id'), 'group_growth_tracking', ['id'], unique=False)
+
+    if 'group_inventory_consumption' not in existing:
+        op.create_table('group_inventory_consumption',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('food_type_id', sa.Integer(), nullable=False),
+        sa.Column('consumption_date', sa.Date(), nullable=False),
+        sa.Column('quantity_kg', sa.Float(), nullable=False),
+        sa.Column('cost', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['food_type_id'], ['food_types.id'], ),
+        sa.ForeignKeyConstraint(['group_id'], ['chicken_groups.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_group_inventory_consumption_id'), 'group_inventory_consumption', ['id'], unique=False)
+
+    if 'group_performance_metrics' not in existing:
+        op.create_table('group_performance_metrics',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('calculation_date', sa.Date(), nullable=False),
+        sa.Column('feed_conversion_ratio', sa.Float(), nullable=False),
+        sa.Column('total_feed_cost', sa.Float(), nullable=False),
+        sa.Column('cost_per_kg_weight_gain', sa.Float(), nullable=False),
+        sa.Column('mortality_rate', sa.Float(), nullable=False),
+        sa.Column('avg_daily_gain', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['group_id'], ['chicken_groups.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_group_performance_metrics_id'), 'group_performance_metrics', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop the baseline schema."""
+    op.drop_table('group_performance_metrics')
+    op.drop_table('group_inventory_consumption')
+    op.drop_table('group_growth_tracking')
+    op.drop_table('group_feeding_schedule_templates')
+    op.drop_table('group_feeding_records')
+    op.drop_table('formulation_ingredients')
+    op.drop_table('user_settings')
+    op.drop_table('stage_nutrition_requirements')
+    op.drop_table('nutrition_facts')
+    op.drop_table('feed_formulations')
+    op.drop_table('chicken_profiles')
+    op.drop_table('chicken_groups')
+    op.drop_table('users')
+    op.drop_table('growth_stages')
+    op.drop_table('food_types')
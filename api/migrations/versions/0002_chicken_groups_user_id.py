@@ -0,0 +1,43 @@
+"""Add chicken_groups.user_id to pre-user databases
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 15:52:10.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Bring chicken_groups created before per-user groups up to the current model.
+
+    Those databases have no user_id column and a unique index on batch_number.
+    """
+    bind = op.get_bind()
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('chicken_groups')}
+    if 'user_id' in columns:
+        return
+
+    if bind.execute(sa.text('SELECT COUNT(*) FROM chicken_groups')).scalar():
+        raise RuntimeError("chicken_groups has rows without an owner; assign them a user_id before upgrading")
+
+    with op.batch_alter_table('chicken_groups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=False))
+        batch_op.create_foreign_key('fk_chicken_groups_user_id_users', 'users', ['user_id'], ['id'])
+        batch_op.drop_index('ix_chicken_groups_batch_number')
+        batch_op.create_index('ix_chicken_groups_batch_number', ['batch_number'], unique=False)
+
+
+def downgrade() -> None:
+    """Leave the column in place; 0001 owns the current chicken_groups layout."""
+    pass
@@ -0,0 +1,61 @@
+"""Add inventory ledger and materialized balances
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 15:46:51.197976
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('inventory_balances',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('food_type_id', sa.Integer(), nullable=False),
+    sa.Column('quantity_kg', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['food_type_id'], ['food_types.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'food_type_id')
+    )
+    op.create_table('inventory_movements',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('food_type_id', sa.Integer(), nullable=False),
+    sa.Column('movement_type', sa.String(length=20), nullable=False),
+    sa.Column('movement_date', sa.Date(), nullable=False),
+    sa.Column('quantity_kg', sa.Float(), nullable=False),
+    sa.Column('unit_cost', sa.Float(), nullable=True),
+    sa.Column('group_id', sa.Integer(), nullable=True),
+    sa.Column('feeding_record_id', sa.Integer(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['feeding_record_id'], ['group_feeding_records.id'], ),
+    sa.ForeignKeyConstraint(['food_type_id'], ['food_types.id'], ),
+    sa.ForeignKeyConstraint(['group_id'], ['chicken_groups.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_inventory_movements_food_type_id'), 'inventory_movements', ['food_type_id'], unique=False)
+    op.create_index(op.f('ix_inventory_movements_id'), 'inventory_movements', ['id'], unique=False)
+    op.create_index(op.f('ix_inventory_movements_user_id'), 'inventory_movements', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_inventory_movements_user_id'), table_name='inventory_movements')
+    op.drop_index(op.f('ix_inventory_movements_id'), table_name='inventory_movements')
+    op.drop_index(op.f('ix_inventory_movements_food_type_id'), table_name='inventory_movements')
+    op.drop_table('inventory_movements')
+    op.drop_table('inventory_balances')
@@ -0,0 +1,55 @@
+"""Add materialized group_dashboard_summaries
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 15:48:17.118970
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('group_dashboard_summaries',
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('batch_number', sa.String(length=50), nullable=False),
+    sa.Column('breed', sa.String(length=100), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('current_quantity', sa.Integer(), nullable=False),
+    sa.Column('stage_id', sa.Integer(), nullable=True),
+    sa.Column('stage_name', sa.String(length=100), nullable=True),
+    sa.Column('age_days', sa.Integer(), nullable=False),
+    sa.Column('last_weight_kg', sa.Float(), nullable=True),
+    sa.Column('last_weight_date', sa.Date(), nullable=True),
+    sa.Column('feed_7d_kg', sa.Float(), nullable=False),
+    sa.Column('cost_7d', sa.Float(), nullable=False),
+    sa.Column('total_feed_kg', sa.Float(), nullable=False),
+    sa.Column('total_feed_cost', sa.Float(), nullable=False),
+    sa.Column('mortality_count', sa.Integer(), nullable=False),
+    sa.Column('feed_conversion_ratio', sa.Float(), nullable=True),
+    sa.Column('as_of_date', sa.Date(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['chicken_groups.id'], ),
+    sa.ForeignKeyConstraint(['stage_id'], ['growth_stages.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('group_id')
+    )
+    op.create_index(op.f('ix_group_dashboard_summaries_user_id'), 'group_dashboard_summaries', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_group_dashboard_summaries_user_id'), table_name='group_dashboard_summaries')
+    op.drop_table('group_dashboard_summaries')
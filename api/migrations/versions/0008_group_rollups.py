@@ -0,0 +1,45 @@
+"""Time-bucketed feeding and growth rollups
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 15:59:19.580769
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('group_rollups',
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('feed_kg', sa.Float(), nullable=False),
+    sa.Column('feed_cost', sa.Float(), nullable=False),
+    sa.Column('feeding_count', sa.Integer(), nullable=False),
+    sa.Column('mortality', sa.Integer(), nullable=False),
+    sa.Column('weight_sum_kg', sa.Float(), nullable=False),
+    sa.Column('weight_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['chicken_groups.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('group_id', 'granularity', 'bucket_start')
+    )
+    op.create_index('ix_group_rollups_user_bucket', 'group_rollups', ['user_id', 'granularity', 'bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_group_rollups_user_bucket', table_name='group_rollups')
+    op.drop_table('group_rollups')
@@ -0,0 +1,34 @@
+"""Date of the measurement behind chicken_groups.avg_weight_kg
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 17:12:40.318522
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add weight_date and fill it from each group's latest growth tracking row."""
+    with op.batch_alter_table('chicken_groups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('weight_date', sa.Date(), nullable=True))
+    op.execute(
+        "UPDATE chicken_groups SET weight_date = "
+        "(SELECT MAX(tracking_date) FROM group_growth_tracking WHERE group_growth_tracking.group_id = chicken_groups.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('chicken_groups', schema=None) as batch_op:
+        batch_op.drop_column('weight_date')
@@ -0,0 +1,52 @@
+"""Commit-ordered event positions and failure tracking for projections
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 17:48:05.624190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, Sequence[str], None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add domain_events.transaction_id and the checkpoint's position and failure columns.
+
+    Existing events get transaction 0, so checkpoints at (0, last_event_id)
+    stay where they are. New events on PostgreSQL record their writing
+    transaction; SQLite has a single writer and keeps 0.
+    """
+    with op.batch_alter_table('domain_events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('transaction_id', sa.BigInteger(), nullable=False, server_default='0'))
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column('domain_events', 'transaction_id', server_default=sa.text('txid_current()'))
+    op.create_index('ix_domain_events_position', 'domain_events', ['transaction_id', 'id'], unique=False)
+
+    with op.batch_alter_table('projection_checkpoints', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_transaction_id', sa.BigInteger(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('failed_event_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('failed_attempts', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('last_error', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('parked_event_ids', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('projection_checkpoints', schema=None) as batch_op:
+        batch_op.drop_column('parked_event_ids')
+        batch_op.drop_column('last_error')
+        batch_op.drop_column('failed_attempts')
+        batch_op.drop_column('failed_event_id')
+        batch_op.drop_column('last_transaction_id')
+    op.drop_index('ix_domain_events_position', table_name='domain_events')
+    with op.batch_alter_table('domain_events', schema=None) as batch_op:
+        batch_op.drop_column('transaction_id')
@@ -0,0 +1,116 @@
+"""
+Password hashing for the Chicken Feeding Management System API
+
+bcrypt costs 100-300 ms of CPU per call, so hashing and verification run on
+a dedicated, bounded process pool instead of the request threads.
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+# bcrypt work factor for new hashes. Stored hashes below it are re-hashed on
+# the next successful login (see verify_and_update).
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Pool sizing. Jobs beyond workers + max queue are rejected with 503 so a
+# login storm fails fast instead of stalling every other request.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def verify_and_update_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash when the stored one is outdated"""
+    return pwd_context.verify_and_update(password, hashed_password)
+
+def _warm_up() -> int:
+    return os.getpid()
+
+class PasswordHasher:
+    """Runs bcrypt jobs on a process pool and tracks queue depth and latency"""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._latencies = deque(maxlen=1024)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: the server process has threads, which fork does not copy safely
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def start(self):
+        """Start the worker processes ahead of the first login"""
+        executor = self._get_executor()
+        await asyncio.gather(*(asyncio.wrap_future(executor.submit(_warm_up)) for _ in range(self.workers)))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        if self._in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Authentication is busy, please retry", headers={"Retry-After": "1"})
+
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            self._in_flight -= 1
+            self.completed += 1
+            self._latencies.append(time.perf_counter() - started)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker"""
+        return max(0, self._in_flight - self.workers)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "workers": self.workers,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_ms": {"p50": percentile(0.50), "p99": percentile(0.99)},
+        }
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for the list endpoints
+
+Encodes the same chicken profile rows two ways and reports the cost per row:
+- orm: load ORM objects, validate them into ChickenProfileResponse models,
+  run jsonable_encoder and json.dumps, which is FastAPI's default path.
+- fast: select only the response columns as rows and encode them with orjson,
+  which is what the list endpoints do now (see fast_json in main.py).
+
+Usage:
+    python scripts/benchmark_serialization.py --rows 5000 --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+
+tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'serialization.db')}"
+os.environ.setdefault("RUN_MIGRATIONS_ON_STARTUP", "false")
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+
+import main
+from main import ChickenProfile, ChickenProfileResponse, SessionLocal, response_columns
+
+def seed(rows: int):
+    """Create the schema with one user and the given number of profiles"""
+    main.Base.metadata.create_all(main.engine)
+    now = datetime.utcnow()
+    with main.engine.begin() as conn:
+        user_id = conn.execute(insert(main.User).values(
+            username="bench", email="bench@example.com", hashed_password="x", created_at=now, updated_at=now
+        ).returning(main.User.id)).scalar_one()
+        conn.execute(insert(ChickenProfile), [
+            {
+                "user_id": user_id, "name": f"Flock {i}", "breed": "Rhode Island Red", "age": 20 + i % 40,
+                "weight": 1.8 + (i % 10) / 10, "quantity": 100 + i, "environment": "free-range",
+                "season": "summer", "purpose": "eggs", "egg_purpose": "commercial", "stress_level": "low",
+                "feed_type": "layer", "feed_brand": None, "feed_cost": 0.45, "egg_price": 0.2,
+                "molting": "no", "vaccination": "complete", "created_at": now, "updated_at": now,
+            }
+            for i in range(rows)
+        ])
+
+adapter = TypeAdapter(List[ChickenProfileResponse])
+
+def orm_path(db) -> bytes:
+    profiles = db.scalars(select(ChickenProfile)).all()
+    models = adapter.validate_python(profiles, from_attributes=True)
+    return json.dumps(jsonable_encoder(models)).encode()
+
+def fast_path(db) -> bytes:
+    rows = db.execute(select(*response_columns(ChickenProfile, ChickenProfileResponse))).mappings()
+    return orjson.dumps([dict(row) for row in rows])
+
+def measure(name: str, fn, rows: int, repeat: int) -> float:
+    """Best run of `repeat`, in microseconds per row, with a fresh session each time"""
+    best = float("inf")
+    for _ in range(repeat):
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            body = fn(db)
+            best = min(best, time.perf_counter() - started)
+    per_row = best / rows * 1e6
+    print(f"{name:>5}: {per_row:8.2f} us/row  {best * 1000:8.1f} ms total  {len(body) / 1024:8.1f} KiB")
+    return per_row
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    with SessionLocal() as db:
+        if json.loads(orm_path(db)) != json.loads(fast_path(db)):
+            sys.exit("The two paths produced different JSON")
+
+    print(f"🐔 Serialization benchmark: {args.rows} chicken profiles, best of {args.repeat}")
+    baseline = measure("orm", orm_path, args.rows, args.repeat)
+    fast = measure("fast", fast_path, args.rows, args.repeat)
+    print(f"Speedup: {baseline / fast:.2f}x")
+    main.engine.dispose()
+    tmp.cleanup()
+
+if __name__ == "__main__":
+    main_()
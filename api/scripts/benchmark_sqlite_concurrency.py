@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the SQLite engine profiles
+
+Runs the same mixed read/write workload against a throwaway database twice:
+once with SQLAlchemy's stock SQLite setup (rollback journal, default pool)
+and once with the tuned profile from database.py (WAL, pragmas, sized pool).
+
+Usage:
+    python scripts/benchmark_sqlite_concurrency.py --threads 16 --seconds 10 --write-ratio 0.2
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import Column, Date, Float, Integer, MetaData, Table, create_engine, func, insert, select
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import create_db_engine
+
+metadata = MetaData()
+
+feeding_records = Table(
+    "group_feeding_records",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("group_id", Integer, nullable=False, index=True),
+    Column("feeding_date", Date, nullable=False),
+    Column("feed_quantity_kg", Float, nullable=False),
+    Column("total_cost", Float, nullable=False),
+)
+
+GROUPS = 40
+
+def seed(engine, rows: int):
+    """Create the table and fill it with some history to read from"""
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(feeding_records), [
+            {"group_id": i % GROUPS, "feeding_date": date(2025, 1, 1), "feed_quantity_kg": 10.0, "total_cost": 4.5}
+            for i in range(rows)
+        ])
+
+def worker(engine, deadline: float, write_ratio: float, counts: dict, lock: threading.Lock):
+    """Issue reads and writes until the deadline, tallying outcomes"""
+    reads = writes = errors = 0
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        group_id = rng.randrange(GROUPS)
+        try:
+            if rng.random() < write_ratio:
+                with engine.begin() as conn:
+                    conn.execute(insert(feeding_records), {
+                        "group_id": group_id, "feeding_date": date(2025, 1, 2),
+                        "feed_quantity_kg": rng.uniform(5, 15), "total_cost": rng.uniform(2, 6)
+                    })
+                writes += 1
+            else:
+                with engine.connect() as conn:
+                    conn.execute(
+                        select(func.count(), func.sum(feeding_records.c.feed_quantity_kg))
+                        .where(feeding_records.c.group_id == group_id)
+                    ).one()
+                reads += 1
+        except Exception:
+            errors += 1
+    with lock:
+        counts["reads"] += reads
+        counts["writes"] += writes
+        counts["errors"] += errors
+
+def run_profile(name: str, engine, threads: int, seconds: float, write_ratio: float, seed_rows: int) -> float:
+    seed(engine, seed_rows)
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    pool = [threading.Thread(target=worker, args=(engine, deadline, write_ratio, counts, lock)) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    engine.dispose()
+
+    ops = counts["reads"] + counts["writes"]
+    throughput = ops / seconds
+    print(f"{name:>8}: {throughput:10.1f} ops/s  reads={counts['reads']} writes={counts['writes']} errors={counts['errors']}")
+    return throughput
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--seed-rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"🐔 SQLite concurrency benchmark: {args.threads} threads, {args.seconds}s, {args.write_ratio:.0%} writes")
+    with tempfile.TemporaryDirectory() as tmp:
+        default_url = f"sqlite:///{os.path.join(tmp, 'default.db')}"
+        tuned_url = f"sqlite:///{os.path.join(tmp, 'tuned.db')}"
+        baseline = run_profile(
+            "default", create_engine(default_url, connect_args={"check_same_thread": False}),
+            args.threads, args.seconds, args.write_ratio, args.seed_rows
+        )
+        tuned = run_profile(
+            "tuned", create_db_engine(tuned_url),
+            args.threads, args.seconds, args.write_ratio, args.seed_rows
+        )
+    print(f"Speedup: {tuned / baseline:.2f}x" if baseline else "Speedup: n/a")
+
+if __name__ == "__main__":
+    main()
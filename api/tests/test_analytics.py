@@ -0,0 +1,116 @@
+"""
+Tests for the day/week/month rollups and the analytics API
+"""
+from datetime import date, timedelta
+
+import pytest
+
+import main
+
+YEAR_START = date(2025, 1, 1)
+
+def year_group(create_group):
+    return create_group(max_age_days=900, quantity=1000, current_quantity=1000, start_date=(YEAR_START - timedelta(days=10)).isoformat())
+
+def feeding(group_id, day):
+    return {"group_id": group_id, "feeding_date": day.isoformat(), "feed_quantity_kg": 10 + day.day % 5, "total_cost": 4.0}
+
+def tracking(group_id, day):
+    return {"group_id": group_id, "tracking_date": day.isoformat(), "avg_weight_kg": 1 + day.timetuple().tm_yday / 100, "mortality_count": 1}
+
+def raw_totals(start, end):
+    """Expected totals for one group seeded by seed_year, computed from the seeding rules"""
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    weights = [1 + day.timetuple().tm_yday / 100 for day in days if day.weekday() == 0]
+    return {
+        "feed_kg": sum(10 + day.day % 5 for day in days),
+        "feed_cost": 4.0 * len(days),
+        "mortality": len(weights),
+        "avg_weight_kg": sum(weights) / len(weights) if weights else None,
+    }
+
+@pytest.fixture
+def seeded(client, create_group):
+    """A group with a feeding record every day of 2025 and a weighing every Monday"""
+    group = year_group(create_group)
+    days = [YEAR_START + timedelta(days=i) for i in range(365)]
+    assert client.post("/feeding-records/bulk", json=[feeding(group["id"], day) for day in days]).json()["inserted"] == 365
+    mondays = [day for day in days if day.weekday() == 0]
+    assert client.post("/growth-tracking/bulk", json=[tracking(group["id"], day) for day in mondays]).json()["inserted"] == len(mondays)
+    main.run_projections()
+    return group
+
+def totals(response):
+    return {key: pytest.approx(value) for key, value in response["totals"].items()}
+
+class TestSegments:
+    """Test how ranges are covered by buckets"""
+
+    def test_coarsest_first(self):
+        assert main.rollup_segments(date(2025, 1, 1), date(2025, 12, 31)) == [("month", date(2025, m, 1)) for m in range(1, 13)]
+        # Wed 5 Feb -> Mon 10 Feb: days, then a whole week, then March, then days
+        segments = main.rollup_segments(date(2025, 2, 5), date(2025, 3, 3))
+        assert segments[:5] == [("day", date(2025, 2, d)) for d in (5, 6, 7, 8, 9)]
+        assert ("week", date(2025, 2, 10)) in segments
+        assert segments[-1] == ("day", date(2025, 3, 3))
+
+    def test_bucket_bounds(self):
+        assert main.rollup_bucket_start(date(2025, 2, 13), "week") == date(2025, 2, 10)
+        assert main.rollup_bucket_end(date(2025, 12, 1), "month") == date(2026, 1, 1)
+
+class TestAnalytics:
+    """Test rollup contents and the analytics queries"""
+
+    def test_year_reads_few_rows(self, client, seeded):
+        response = client.get(f"/groups/{seeded['id']}/analytics", params={"start_date": "2025-01-01", "end_date": "2025-12-31"}).json()
+        assert response["granularity"] == "month"
+        assert len(response["series"]) == 12
+        assert response["rows_read"] == 24
+        assert totals(response) == raw_totals(date(2025, 1, 1), date(2025, 12, 31))
+        march = response["series"][2]
+        assert march["bucket_start"] == "2025-03-01"
+        assert march["feed_kg"] == pytest.approx(raw_totals(date(2025, 3, 1), date(2025, 3, 31))["feed_kg"])
+
+    def test_unaligned_range_is_exact(self, client, seeded):
+        start, end = date(2025, 2, 12), date(2025, 5, 17)
+        response = client.get(f"/groups/{seeded['id']}/analytics", params={"start_date": start, "end_date": end, "granularity": "week"}).json()
+        assert totals(response) == raw_totals(start, end)
+        assert response["series"][0]["bucket_start"] == "2025-02-10"
+        assert response["rows_read"] < 40
+
+    def test_user_scope_sums_groups(self, client, user, create_group, seeded):
+        other = year_group(create_group)
+        client.post("/feeding-records/", json=feeding(other["id"], date(2025, 6, 2)))
+        main.run_projections()
+
+        params = {"start_date": "2025-06-01", "end_date": "2025-06-30", "granularity": "day"}
+        response = client.get(f"/users/{user['id']}/analytics", params=params).json()
+        expected = raw_totals(date(2025, 6, 1), date(2025, 6, 30))
+        assert response["totals"]["feed_kg"] == pytest.approx(expected["feed_kg"] + feeding(0, date(2025, 6, 2))["feed_quantity_kg"])
+        june_2 = next(point for point in response["series"] if point["bucket_start"] == "2025-06-02")
+        assert june_2["feed_kg"] == pytest.approx(2 * (10 + 2 % 5))
+
+    def test_incremental_update(self, client, db, seeded):
+        client.post("/feeding-records/", json={"group_id": seeded["id"], "feeding_date": "2025-07-15", "feed_quantity_kg": 100, "total_cost": 50})
+        client.post(f"/groups/{seeded['id']}/update-mortality", params={"new_deaths": 7, "death_date": "2025-07-16"})
+        main.run_projections()
+
+        month = db.get(main.GroupRollup, (seeded["id"], "month", date(2025, 7, 1)))
+        db.refresh(month)
+        expected = raw_totals(date(2025, 7, 1), date(2025, 7, 31))
+        assert month.feed_kg == pytest.approx(expected["feed_kg"] + 100)
+        assert month.feeding_count == 32
+        assert month.mortality == expected["mortality"] + 7
+
+    def test_backfill(self, db, seeded):
+        db.query(main.GroupRollup).filter_by(group_id=seeded["id"]).delete()
+        db.commit()
+        assert main.backfill_group_rollups(db) >= 1
+        week = db.get(main.GroupRollup, (seeded["id"], "week", date(2025, 3, 10)))
+        assert week.feeding_count == 7
+
+    def test_invalid_range(self, client, seeded):
+        url = f"/groups/{seeded['id']}/analytics"
+        assert client.get(url, params={"start_date": "2025-02-01", "end_date": "2025-01-01"}).status_code == 422
+        assert client.get(url, params={"granularity": "hour"}).status_code == 422
+        assert client.get("/groups/999999/analytics").status_code == 404
@@ -0,0 +1,63 @@
+"""
+Tests for password hashing, login sessions and token refresh
+"""
+import main
+from passwords import password_hasher, pwd_context
+
+def login(client, user):
+    return client.post("/users/login", json={"username": user["username"], "password": "securepassword123"})
+
+class TestLoginSessions:
+    """Test the session tokens issued at login"""
+
+    def test_login_issues_tokens(self, client, user):
+        data = login(client, user).json()
+        assert data["token_type"] == "bearer"
+        assert data["access_token"] and data["refresh_token"]
+        assert data["expires_in"] == main.SESSION_TTL_MINUTES * 60
+
+    def test_session_resolves_without_password(self, client, user):
+        token = login(client, user).json()["access_token"]
+        response = client.get("/auth/session", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json()["user_id"] == user["id"]
+
+    def test_invalid_token_rejected(self, client):
+        response = client.get("/auth/session", headers={"Authorization": "Bearer not-a-token"})
+        assert response.status_code == 401
+
+    def test_refresh_rotates_tokens(self, client, user):
+        tokens = login(client, user).json()
+        response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == 200
+        refreshed = response.json()
+        assert refreshed["access_token"] != tokens["access_token"]
+        assert client.get("/auth/session", headers={"Authorization": f"Bearer {tokens['access_token']}"}).status_code == 401
+        assert client.get("/auth/session", headers={"Authorization": f"Bearer {refreshed['access_token']}"}).status_code == 200
+        assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    def test_logout_revokes_session(self, client, user):
+        token = login(client, user).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.post("/auth/logout", headers=headers).status_code == 200
+        assert client.get("/auth/session", headers=headers).status_code == 401
+
+class TestPasswordHashing:
+    """Test the password process pool"""
+
+    def test_login_upgrades_weak_hash(self, client, user, db):
+        db_user = main.get_user(db, user["id"])
+        db_user.hashed_password = pwd_context.hash("securepassword123", rounds=4)
+        db.commit()
+
+        assert login(client, user).status_code == 200
+        db.expire_all()
+        assert pwd_context.identify(main.get_user(db, user["id"]).hashed_password) == "bcrypt"
+        assert not pwd_context.needs_update(main.get_user(db, user["id"]).hashed_password)
+
+    def test_metrics(self, client, user):
+        login(client, user)
+        stats = client.get("/metrics/password-hashing").json()
+        assert stats["workers"] == password_hasher.workers
+        assert stats["completed"] >= 1
+        assert stats["queue_depth"] == 0
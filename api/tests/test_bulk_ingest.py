@@ -0,0 +1,133 @@
+"""
+Tests for bulk ingest and its agreement with the single-record endpoints
+"""
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+import main
+
+def days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+def growth_row(group, days, weight, deaths=0):
+    return {"group_id": group["id"], "tracking_date": days_ago(days), "avg_weight_kg": weight, "mortality_count": deaths}
+
+def group_state(db, group):
+    db.expire_all()
+    row = db.get(main.ChickenGroup, group["id"])
+    return row.current_quantity, row.avg_weight_kg, row.weight_date
+
+class TestGrowthTracking:
+    """Test that single and bulk growth rows change the group the same way"""
+
+    def test_single_and_bulk_agree(self, client, db, group, create_group):
+        other = create_group()
+        rows = [growth_row(group, 5, 1.4, 2), growth_row(group, 2, 1.7, 3)]
+        for row in rows:
+            assert client.post("/growth-tracking/", json=row).status_code == 200
+        assert client.post("/growth-tracking/bulk", json=[{**row, "group_id": other["id"]} for row in rows]).json()["inserted"] == 2
+
+        assert group_state(db, group) == (95, pytest.approx(1.7), date.today() - timedelta(days=2))
+        assert group_state(db, other) == group_state(db, group)
+
+    def test_older_rows_keep_the_newer_weight(self, client, db, group):
+        client.post("/growth-tracking/", json=growth_row(group, 1, 1.9))
+        client.post("/growth-tracking/bulk", json=[growth_row(group, 6, 1.3, 1), growth_row(group, 4, 1.5)])
+        client.post("/growth-tracking/", json=growth_row(group, 3, 1.6))
+
+        # Mortality always counts; the weight stays at the newest measurement
+        assert group_state(db, group) == (99, pytest.approx(1.9), date.today() - timedelta(days=1))
+
+    def test_latest_row_in_batch_wins(self, client, db, group):
+        rows = [growth_row(group, 1, 1.8), growth_row(group, 7, 1.2), growth_row(group, 3, 1.5)]
+        client.post("/growth-tracking/bulk", json=rows)
+        assert group_state(db, group)[1:] == (pytest.approx(1.8), date.today() - timedelta(days=1))
+
+def feeding_row(group, days, quantity=10, cost=4):
+    return {"group_id": group["id"], "feeding_date": days_ago(days), "feed_quantity_kg": quantity, "total_cost": cost}
+
+def errors_by_index(response):
+    return {error["index"]: error["errors"] for error in response.json()["errors"]}
+
+def growth_rows_stored(db, group):
+    return db.scalar(select(func.count()).select_from(main.GroupGrowthTracking).where(main.GroupGrowthTracking.group_id == group["id"]))
+
+def events_stored(db, group, event_type):
+    return db.scalar(select(func.count()).select_from(main.DomainEvent).where(
+        main.DomainEvent.aggregate_type == "group", main.DomainEvent.aggregate_id == group["id"], main.DomainEvent.event_type == event_type
+    ))
+
+class TestBulkPayload:
+    """Test reading and validating bulk bodies, with errors reported per row"""
+
+    def test_ndjson_body(self, client, group):
+        lines = [json.dumps(feeding_row(group, 3)), "", '{"group_id": ', json.dumps(feeding_row(group, 2))]
+        response = client.post("/feeding-records/bulk", content="\n".join(lines) + "\n", headers={"content-type": "application/x-ndjson"})
+        assert response.status_code == 200
+        body = response.json()
+        # Blank lines are skipped, so the malformed line is row 1
+        assert (body["received"], body["inserted"], body["failed"]) == (3, 2, 1)
+        assert errors_by_index(response)[1][0].startswith("Invalid JSON")
+
+    def test_non_array_body_rejected(self, client, group):
+        response = client.post("/feeding-records/bulk", json=feeding_row(group, 1))
+        assert response.status_code == 400
+        assert "JSON array" in response.json()["detail"]
+
+    def test_non_object_rows(self, client, group):
+        response = client.post("/feeding-records/bulk", json=[feeding_row(group, 1), 42, "row"])
+        assert response.json()["inserted"] == 1
+        errors = errors_by_index(response)
+        assert sorted(errors) == [1, 2]
+        assert all(message.startswith("row:") for messages in errors.values() for message in messages)
+
+    def test_range_and_reference_errors_together(self, client, group):
+        response = client.post("/feeding-records/bulk", json=[feeding_row(group, 1), {**feeding_row(group, 1, quantity=-5), "group_id": 999999999}])
+        assert response.json()["inserted"] == 1
+        assert errors_by_index(response) == {1: ["feed_quantity_kg: must be non-negative", "group_id: 999999999 not found"]}
+
+class TestBulkChunks:
+    """Test that each chunk commits or rolls back with its events and effects"""
+
+    def test_batch_larger_than_a_chunk(self, client, db, group, monkeypatch):
+        monkeypatch.setattr(main, "BULK_INGEST_CHUNK_SIZE", 3)
+        chunks = []
+        monkeypatch.setitem(main.BULK_CHUNK_EFFECTS, main.GroupGrowthTracking, lambda session, rows: chunks.append(len(rows)) or main.apply_growth_tracking(session, rows))
+        rows = [growth_row(group, days, 1.0 + days / 10, 1) for days in range(7)]
+        assert client.post("/growth-tracking/bulk", json=rows).json()["inserted"] == 7
+
+        assert chunks == [3, 3, 1]
+        assert growth_rows_stored(db, group) == 7
+        assert events_stored(db, group, "WeightMeasured") == 7
+        assert group_state(db, group) == (93, pytest.approx(1.0), date.today())
+
+    def test_failed_chunk_rolls_back(self, client, db, group, monkeypatch):
+        monkeypatch.setattr(main, "BULK_INGEST_CHUNK_SIZE", 2)
+
+        def failing(session, rows):
+            main.apply_growth_tracking(session, rows)
+            if any(row["mortality_count"] == 7 for row in rows):
+                raise RuntimeError("effect failed")
+
+        monkeypatch.setitem(main.BULK_CHUNK_EFFECTS, main.GroupGrowthTracking, failing)
+        rows = [growth_row(group, 6, 1.2, 1), growth_row(group, 5, 1.3, 2), growth_row(group, 2, 1.6, 7), growth_row(group, 1, 1.7, 3)]
+        response = client.post("/growth-tracking/bulk", json=rows)
+
+        assert response.json()["inserted"] == 2
+        assert errors_by_index(response) == {2: ["Insert failed: RuntimeError"], 3: ["Insert failed: RuntimeError"]}
+        # Only the first chunk's rows, events and group changes remain
+        assert growth_rows_stored(db, group) == 2
+        assert events_stored(db, group, "WeightMeasured") == 2
+        assert group_state(db, group) == (97, pytest.approx(1.3), date.today() - timedelta(days=5))
+
+class TestMortalityUpdate:
+    """update-mortality writes its own growth row, which must not count the deaths twice"""
+
+    def test_deaths_counted_once(self, client, db, group):
+        response = client.post(f"/groups/{group['id']}/update-mortality", params={"new_deaths": 4, "death_date": days_ago(0)})
+        assert response.json()["current_quantity"] == 96
+        assert group_state(db, group) == (96, pytest.approx(1.0), None)
+        assert growth_rows_stored(db, group) == 1
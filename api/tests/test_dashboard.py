@@ -0,0 +1,64 @@
+"""
+Tests for the materialized per-user dashboard
+
+Summary rows are written by the group_summaries projection, so tests run
+main.run_projections() after their writes.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+import main
+
+def days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+@pytest.fixture
+def group(group):
+    """The shared group, with its summary row projected"""
+    main.run_projections()
+    return group
+
+class TestDashboard:
+    """Test summary contents, incremental refresh and read cost"""
+
+    def test_summary_tracks_writes(self, client, user, group):
+        client.post("/feeding-records/", json={"group_id": group["id"], "feeding_date": days_ago(10), "feed_quantity_kg": 50, "total_cost": 20})
+        client.post("/feeding-records/", json={"group_id": group["id"], "feeding_date": days_ago(2), "feed_quantity_kg": 30, "total_cost": 12})
+        client.post("/growth-tracking/", json={"group_id": group["id"], "tracking_date": days_ago(10), "avg_weight_kg": 1.0, "mortality_count": 0})
+        client.post("/growth-tracking/bulk", json=[{"group_id": group["id"], "tracking_date": days_ago(1), "avg_weight_kg": 1.8, "mortality_count": 20}])
+
+        main.run_projections()
+        dashboard = client.get(f"/users/{user['id']}/dashboard").json()
+        summary = dashboard["groups"][0]
+        assert summary["current_quantity"] == 80
+        assert summary["feed_7d_kg"] == pytest.approx(30)
+        assert summary["cost_7d"] == pytest.approx(12)
+        assert summary["total_feed_kg"] == pytest.approx(80)
+        assert summary["last_weight_kg"] == pytest.approx(1.8)
+        assert summary["mortality_count"] == 20
+        assert summary["feed_conversion_ratio"] == pytest.approx(80 / (0.8 * 80))
+        assert dashboard["totals"] == {"active_groups": 1, "birds": 80, "feed_7d_kg": pytest.approx(30), "cost_7d": pytest.approx(12)}
+
+    def test_single_read(self, client, user, group, count_queries):
+        with count_queries() as queries:
+            assert client.get(f"/users/{user['id']}/dashboard").status_code == 200
+        assert queries.count == 1
+
+    def test_stale_rows_refreshed(self, client, db, user, group):
+        client.post("/feeding-records/", json={"group_id": group["id"], "feeding_date": days_ago(0), "feed_quantity_kg": 30, "total_cost": 12})
+        # Pretend the row was last computed a week ago, when today's feeding was outside the window
+        db.query(main.GroupDashboardSummary).filter_by(group_id=group["id"]).update({"as_of_date": date.today() - timedelta(days=7), "feed_7d_kg": 0})
+        db.commit()
+        summary = client.get(f"/users/{user['id']}/dashboard").json()["groups"][0]
+        assert summary["as_of_date"] == date.today().isoformat()
+        assert summary["feed_7d_kg"] == pytest.approx(30)
+
+    def test_backfill(self, db, user, group):
+        db.query(main.GroupDashboardSummary).filter_by(group_id=group["id"]).delete()
+        db.commit()
+        assert main.backfill_group_summaries(db) >= 1
+        assert db.get(main.GroupDashboardSummary, group["id"]) is not None
+
+    def test_unknown_user(self, client):
+        assert client.get("/users/999999/dashboard").status_code == 404
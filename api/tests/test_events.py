@@ -0,0 +1,164 @@
+"""
+Tests for the domain event log and the projection workers
+"""
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, select, update
+
+import main
+
+def today(offset=0):
+    return (date.today() - timedelta(days=offset)).isoformat()
+
+@contextmanager
+def test_events(db, *transaction_ids):
+    """Events outside any aggregate the real projections touch, written by the given transactions"""
+    events = [
+        main.DomainEvent(event_type="Test", aggregate_type="test", aggregate_id=0, payload={}, occurred_at=datetime.utcnow(), transaction_id=transaction_id)
+        for transaction_id in transaction_ids
+    ]
+    db.add_all(events)
+    db.commit()
+    try:
+        yield [event.id for event in events]
+    finally:
+        db.execute(delete(main.DomainEvent).where(main.DomainEvent.id.in_([event.id for event in events])))
+        db.commit()
+
+def run_to_end(db, name, handler, runs=20):
+    for _ in range(runs):
+        if not main.run_projection(db, name, handler):
+            break
+
+def events_for(db, aggregate_type, aggregate_id):
+    return db.execute(
+        select(main.DomainEvent)
+        .where(main.DomainEvent.aggregate_type == aggregate_type, main.DomainEvent.aggregate_id == aggregate_id)
+        .order_by(main.DomainEvent.id)
+    ).scalars().all()
+
+class TestEventLog:
+    """Test that writes append events alongside their change"""
+
+    def test_group_writes(self, client, db, group):
+        client.post("/feeding-records/", json={"group_id": group["id"], "feeding_date": today(1), "feed_quantity_kg": 40, "total_cost": 16})
+        client.post("/growth-tracking/", json={"group_id": group["id"], "tracking_date": today(1), "avg_weight_kg": 1.4, "mortality_count": 2})
+        client.post(f"/groups/{group['id']}/update-mortality", params={"new_deaths": 3, "death_date": today()})
+
+        events = events_for(db, "group", group["id"])
+        assert [event.event_type for event in events] == ["GroupCreated", "FeedingRecorded", "WeightMeasured", "MortalityRecorded"]
+        assert events[1].payload["feed_quantity_kg"] == 40
+        assert events[1].payload["feeding_date"] == today(1)
+        assert events[3].payload["current_quantity"] == 95
+
+    def test_bulk_rows(self, client, db, group):
+        rows = [{"group_id": group["id"], "feeding_date": today(day), "feed_quantity_kg": 10, "total_cost": 4} for day in range(5)]
+        rows.append({"group_id": group["id"], "feeding_date": today(), "feed_quantity_kg": -1, "total_cost": 4})
+        assert client.post("/feeding-records/bulk", json=rows).json()["inserted"] == 5
+
+        events = events_for(db, "group", group["id"])
+        recorded = [event for event in events if event.event_type == "FeedingRecorded"]
+        assert len(recorded) == 5
+        record_ids = {row_id for (row_id,) in db.query(main.GroupFeedingRecord.id).filter_by(group_id=group["id"])}
+        assert {event.payload["feeding_record_id"] for event in recorded} == record_ids
+
+    def test_profile_writes(self, client, db, user):
+        profile = client.post("/chicken-profiles/", json={
+            "user_id": user["id"], "name": "Coop", "breed": "Leghorn", "age": 20, "weight": 1.5, "quantity": 30,
+            "environment": "free-range", "season": "summer", "purpose": "eggs", "stress_level": "low",
+            "feed_type": "layer", "feed_cost": 0.5, "egg_price": 0.2, "molting": "no", "vaccination": "yes"
+        }).json()
+        client.put(f"/chicken-profiles/{profile['id']}", json={"quantity": 28})
+
+        events = events_for(db, "profile", profile["id"])
+        assert [event.event_type for event in events] == ["ProfileCreated", "ProfileUpdated"]
+        assert events[1].payload == {"quantity": 28}
+
+class TestProjections:
+    """Test that projections apply events off the request path"""
+
+    def test_summary_follows_projection(self, client, db, group):
+        main.run_projections()
+        client.post("/feeding-records/", json={"group_id": group["id"], "feeding_date": today(), "feed_quantity_kg": 25, "total_cost": 10})
+
+        # The write itself leaves the dashboard row alone
+        assert db.get(main.GroupDashboardSummary, group["id"]).total_feed_kg == 0
+        assert main.run_projections()["group_summaries"] >= 1
+        db.expire_all()
+        assert db.get(main.GroupDashboardSummary, group["id"]).total_feed_kg == 25
+
+        metrics = client.get("/metrics/projections").json()
+        assert [projection["name"] for projection in metrics["projections"]] == list(main.PROJECTIONS)
+        for projection in metrics["projections"]:
+            assert projection["last_event_id"] == metrics["head_event_id"]
+            assert projection["lag_events"] == 0
+
+    def test_checkpoint_claimed_once(self, client, db, group):
+        head = db.scalar(select(func.max(main.DomainEvent.id)))
+        checkpoints = main.ProjectionCheckpoint.__table__
+
+        def racing_handler(session, events):
+            # Another worker advances the checkpoint while this batch is being applied
+            session.execute(update(checkpoints).where(checkpoints.c.name == "race").values(last_event_id=events[-1].id))
+
+        assert main.run_projection(db, "race", racing_handler) == 0
+        assert main.run_projection(db, "race", lambda session, events: None) >= 1
+        while main.run_projection(db, "race", lambda session, events: None):
+            pass
+        assert db.scalar(select(checkpoints.c.last_event_id).where(checkpoints.c.name == "race")) == head
+
+    def test_late_commit_not_skipped(self, client, db, monkeypatch):
+        """An event that commits after a higher id was read is still applied"""
+        horizon = [101]
+        monkeypatch.setattr(main, "projection_horizon", lambda session: horizon[0])
+        name = f"late-{uuid.uuid4().hex[:8]}"
+        seen = []
+
+        def handler(session, events):
+            seen.extend(event.id for event in events if event.aggregate_type == "test")
+
+        # Transaction 101 took the lower id but is still running; 100 has committed
+        with test_events(db, 101, 100) as (slow, fast):
+            run_to_end(db, name, handler)
+            assert seen == [fast]
+            horizon[0] = 102
+            run_to_end(db, name, handler)
+            assert seen == [fast, slow]
+
+    def test_failing_event_parked(self, client, db):
+        name = f"poison-{uuid.uuid4().hex[:8]}"
+        applied = []
+        with test_events(db, 0, 0, 0) as (before, poison, after):
+            def handler(session, events):
+                if any(event.id == poison for event in events):
+                    raise KeyError("feeding_date")
+                applied.extend(event.id for event in events if event.aggregate_type == "test")
+
+            checkpoint = lambda: db.get(main.ProjectionCheckpoint, name, populate_existing=True)
+            run_to_end(db, name, handler)
+            # Stuck on the bad event, with everything before it applied
+            assert applied == [before]
+            assert checkpoint().failed_event_id == poison
+            assert "KeyError" in checkpoint().last_error
+
+            for _ in range(main.PROJECTION_MAX_ATTEMPTS):
+                if checkpoint().failed_event_id != poison:
+                    break
+                assert applied == [before]
+                main.run_projection(db, name, handler)
+            run_to_end(db, name, handler)
+            assert applied == [before, after]
+            assert checkpoint().parked_event_ids == [poison]
+            assert (checkpoint().failed_event_id, checkpoint().failed_attempts) == (None, 0)
+
+    def test_failing_projection_does_not_stop_others(self, client, db, monkeypatch):
+        def broken(session, events):
+            raise ValueError("bad payload")
+
+        seen = []
+        monkeypatch.setattr(main, "PROJECTIONS", {f"broken-{uuid.uuid4().hex[:8]}": broken, f"ok-{uuid.uuid4().hex[:8]}": lambda session, events: seen.extend(events)})
+        with test_events(db, 0):
+            applied = main.run_projections()
+        assert list(applied.values())[1] > 0 and seen
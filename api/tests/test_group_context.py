@@ -0,0 +1,130 @@
+"""
+Tests for the group context and feeding plan endpoints
+"""
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+import main
+
+def make_group(client, db, user, ingredient_count: int):
+    """A group whose stage has an active schedule and a formulation with N ingredients"""
+    suffix = uuid.uuid4().hex[:8]
+    stage = client.post("/growth-stages/", json={"name": f"Grower {suffix}", "min_age_days": 0, "max_age_days": 60}).json()
+    group = client.post("/chicken-groups/", json={
+        "user_id": user["id"], "batch_number": f"B-{suffix}", "breed": "Ross 308",
+        "quantity": 1000, "current_quantity": 1000, "avg_weight_kg": 1.5,
+        "start_date": (date.today() - timedelta(days=10)).isoformat(), "current_stage_id": stage["id"]
+    }).json()
+
+    formulation = main.FeedFormulation(name=f"Mix {suffix}", growth_stage_id=stage["id"], total_cost_per_kg=0.45)
+    db.add(formulation)
+    db.flush()
+    for i in range(ingredient_count):
+        food = main.FoodType(name=f"Food {suffix} {i}", category="grain", cost_per_kg=0.3 + i / 100)
+        db.add(food)
+        db.flush()
+        db.execute(main.formulation_ingredients.insert().values(
+            formulation_id=formulation.id, food_type_id=food.id, percentage=100 / ingredient_count
+        ))
+    db.add(main.GroupFeedingScheduleTemplate(
+        growth_stage_id=stage["id"], formulation_id=formulation.id, feed_percentage=10, feeding_frequency=2
+    ))
+    main.commit_reference_change(db)
+    return group
+
+class TestGroupContext:
+    """Test query counts and payloads of the group endpoints"""
+
+    @pytest.mark.parametrize("endpoint", ["optimal-formulation", "daily-schedule/" + date.today().isoformat()])
+    def test_query_count_independent_of_ingredients(self, client, db, user, count_queries, endpoint):
+        counts = []
+        for ingredient_count in (2, 12):
+            group = make_group(client, db, user, ingredient_count)
+            client.get(f"/groups/{group['id']}/{endpoint}")  # warm the reference cache
+            with count_queries() as queries:
+                assert client.get(f"/groups/{group['id']}/{endpoint}").status_code == 200
+            counts.append(queries.count)
+        # Only the group row itself; stage, template and formulation are cached
+        assert counts == [1, 1], counts
+
+    def test_formulation_includes_ingredient_percentages(self, client, db, user):
+        group = make_group(client, db, user, 4)
+        data = client.get(f"/groups/{group['id']}/optimal-formulation").json()
+        assert len(data["ingredients"]) == 4
+        assert sum(i["percentage"] for i in data["ingredients"]) == pytest.approx(100)
+
+    def test_daily_schedule(self, client, db, user):
+        group = make_group(client, db, user, 2)
+        data = client.get(f"/groups/{group['id']}/daily-schedule/{date.today()}").json()
+        assert data["daily_feed_kg"] == pytest.approx(150)
+        assert data["feed_per_meal_kg"] == pytest.approx(75)
+
+    def test_missing_group(self, client):
+        assert client.get("/groups/999999/optimal-formulation").status_code == 404
+
+def make_stage(client, db, min_age: int, max_age: int, feed_percentage: float):
+    """An active stage with a schedule template feeding the given % of body weight"""
+    suffix = uuid.uuid4().hex[:8]
+    stage = client.post("/growth-stages/", json={"name": f"Stage {suffix}", "min_age_days": min_age, "max_age_days": max_age}).json()
+    formulation = main.FeedFormulation(name=f"Mix {suffix}", growth_stage_id=stage["id"], total_cost_per_kg=0.45)
+    db.add(formulation)
+    db.flush()
+    db.add(main.GroupFeedingScheduleTemplate(
+        growth_stage_id=stage["id"], formulation_id=formulation.id, feed_percentage=feed_percentage, feeding_frequency=2
+    ))
+    main.commit_reference_change(db)
+    return stage
+
+class TestFeedingPlan:
+    """Test the multi-day, multi-group feeding planner"""
+
+    def add_group(self, client, user, stage, age_days: int):
+        return client.post("/chicken-groups/", json={
+            "user_id": user["id"], "batch_number": f"P-{uuid.uuid4().hex[:8]}", "breed": "Ross 308",
+            "quantity": 100, "current_quantity": 100, "avg_weight_kg": 1.0,
+            "start_date": (date.today() - timedelta(days=age_days)).isoformat(), "current_stage_id": stage["id"]
+        }).json()
+
+    def test_plan_follows_stage_transitions(self, client, db, user):
+        starter = make_stage(client, db, 0, 20, 10)
+        finisher = make_stage(client, db, 21, 60, 5)
+        group = self.add_group(client, user, starter, age_days=10)
+
+        plan = client.get(f"/users/{user['id']}/feeding-plan", params={"days": 20}).json()
+        assert [g["group_id"] for g in plan["groups"]] == [group["id"]]
+        assert len(plan["daily_feed_kg"]) == 20
+        assert plan["stage_ids"][10] == [starter["id"]]
+        assert plan["stage_ids"][11] == [finisher["id"]]
+        assert plan["daily_feed_kg"][0] == [pytest.approx(10)]
+        assert plan["daily_feed_kg"][11] == [pytest.approx(5)]
+        assert plan["total_feed_kg"][11] == pytest.approx(5)
+
+    def test_plan_projects_recent_trends(self, client, db, user):
+        stage = make_stage(client, db, 0, 60, 10)
+        group = self.add_group(client, user, stage, age_days=10)
+        for days_ago, weight in ((4, 0.8), (0, 1.0)):
+            client.post("/growth-tracking/", json={
+                "group_id": group["id"], "tracking_date": (date.today() - timedelta(days=days_ago)).isoformat(),
+                "avg_weight_kg": weight, "mortality_count": 0
+            })
+
+        plan = client.get(f"/users/{user['id']}/feeding-plan", params={"days": 3}).json()
+        assert plan["groups"][0]["daily_gain_kg"] == pytest.approx(0.05)
+        assert plan["projected_weight_kg"][2] == [pytest.approx(1.1)]
+
+    def test_query_count_independent_of_groups(self, client, db, user, count_queries):
+        stage = make_stage(client, db, 0, 60, 10)
+        counts = []
+        for _ in range(2):
+            self.add_group(client, user, stage, age_days=5)
+            self.add_group(client, user, stage, age_days=5)
+            client.get(f"/users/{user['id']}/feeding-plan")  # warm the reference cache
+            with count_queries() as queries:
+                assert client.get(f"/users/{user['id']}/feeding-plan").status_code == 200
+            counts.append(queries.count)
+        assert counts[0] == counts[1]
+
+    def test_days_limit(self, client, user):
+        assert client.get(f"/users/{user['id']}/feeding-plan", params={"days": 1000}).status_code == 422
@@ -0,0 +1,71 @@
+"""
+Tests for ETags, conditional GETs and Cache-Control
+"""
+import uuid
+
+from http_cache import etag_matches, make_etag
+
+class FakeRequest:
+    def __init__(self, if_none_match=None):
+        self.headers = {"if-none-match": if_none_match} if if_none_match else {}
+
+def revalidate(client, url):
+    """Fetch, then fetch again with the returned ETag"""
+    first = client.get(url)
+    assert first.status_code == 200
+    return first, client.get(url, headers={"If-None-Match": first.headers["etag"]})
+
+class TestValidators:
+    """Test ETag generation and matching"""
+
+    def test_make_etag_is_stable(self):
+        assert make_etag("a", 1) == make_etag("a", 1)
+        assert make_etag("a", 1) != make_etag("a", 2)
+        assert make_etag("a").startswith('W/"')
+
+    def test_etag_matches(self):
+        etag = make_etag("a")
+        assert etag_matches(FakeRequest(etag), etag)
+        assert etag_matches(FakeRequest(f'"other", {etag.removeprefix("W/")}'), etag)
+        assert etag_matches(FakeRequest("*"), etag)
+        assert not etag_matches(FakeRequest('"other"'), etag)
+        assert not etag_matches(FakeRequest(), etag)
+
+class TestConditionalGets:
+    """Test 304 responses and invalidation on write"""
+
+    def test_reference_data(self, client):
+        first, second = revalidate(client, "/food-types/")
+        assert first.headers["cache-control"] == "public, max-age=60"
+        assert second.status_code == 304
+        assert second.content == b""
+
+        client.post("/food-types/", json={"name": f"Barley {uuid.uuid4().hex[:8]}", "category": "grain", "cost_per_kg": 0.25})
+        assert client.get("/food-types/", headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+
+    def test_user_settings(self, client, user):
+        url = f"/users/{user['id']}/settings"
+        first, second = revalidate(client, url)
+        assert first.headers["cache-control"] == "private, no-cache"
+        assert second.status_code == 304
+
+        client.put(url, json={"language": "pt"})
+        changed = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+        assert changed.status_code == 200
+        assert changed.json()["language"] == "pt"
+
+    def test_profile_list(self, client, user):
+        url = f"/users/{user['id']}/chicken-profiles/"
+        first, second = revalidate(client, url)
+        assert second.status_code == 304
+
+        client.post("/chicken-profiles/", json={
+            "user_id": user["id"], "name": "Coop A", "breed": "Leghorn", "age": 20, "weight": 1.5, "quantity": 30,
+            "environment": "free-range", "season": "summer", "purpose": "eggs", "stress_level": "low",
+            "feed_type": "layer", "feed_cost": 0.5, "egg_price": 0.2, "molting": "no", "vaccination": "yes"
+        })
+        assert client.get(url, headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+
+    def test_dashboard(self, client, user):
+        _, second = revalidate(client, f"/users/{user['id']}/dashboard")
+        assert second.status_code == 304
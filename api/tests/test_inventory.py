@@ -0,0 +1,127 @@
+"""
+Tests for the inventory ledger, derived consumption and stock forecast
+"""
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+import main
+
+@pytest.fixture
+def farm(client, db, user):
+    """A 100-bird group fed 10% of body weight from a 60/40 two-ingredient formulation"""
+    suffix = uuid.uuid4().hex[:8]
+    corn = client.post("/food-types/", json={"name": f"Corn {suffix}", "category": "grain", "cost_per_kg": 0.3}).json()
+    soy = client.post("/food-types/", json={"name": f"Soy {suffix}", "category": "protein", "cost_per_kg": 0.6}).json()
+    stage = client.post("/growth-stages/", json={"name": f"Stage {suffix}", "min_age_days": 0, "max_age_days": 400}).json()
+
+    formulation = main.FeedFormulation(name=f"Mix {suffix}", growth_stage_id=stage["id"], total_cost_per_kg=0.42)
+    db.add(formulation)
+    db.flush()
+    db.execute(main.formulation_ingredients.insert(), [
+        {"formulation_id": formulation.id, "food_type_id": corn["id"], "percentage": 60},
+        {"formulation_id": formulation.id, "food_type_id": soy["id"], "percentage": 40},
+    ])
+    db.add(main.GroupFeedingScheduleTemplate(
+        growth_stage_id=stage["id"], formulation_id=formulation.id, feed_percentage=10, feeding_frequency=2
+    ))
+    main.commit_reference_change(db)
+
+    group = client.post("/chicken-groups/", json={
+        "user_id": user["id"], "batch_number": f"I-{suffix}", "breed": "Ross 308",
+        "quantity": 100, "current_quantity": 100, "avg_weight_kg": 1.0,
+        "start_date": (date.today() - timedelta(days=10)).isoformat(), "current_stage_id": stage["id"]
+    }).json()
+    return {"user": user, "group": group, "corn": corn, "soy": soy}
+
+def purchase(client, user_id, food_type_id, quantity):
+    return client.post(f"/users/{user_id}/inventory/movements", json={
+        "food_type_id": food_type_id, "movement_type": "purchase",
+        "movement_date": date.today().isoformat(), "quantity_kg": quantity, "unit_cost": 0.3
+    })
+
+def balances(client, user_id):
+    return {b["food_type_id"]: b["quantity_kg"] for b in client.get(f"/users/{user_id}/inventory").json()}
+
+class TestInventoryLedger:
+    """Test movements, balances and consumption derived from feeding"""
+
+    def test_purchase_updates_balance(self, client, farm):
+        user_id = farm["user"]["id"]
+        assert purchase(client, user_id, farm["corn"]["id"], 500).status_code == 200
+        assert purchase(client, user_id, farm["corn"]["id"], 250).status_code == 200
+        assert balances(client, user_id)[farm["corn"]["id"]] == pytest.approx(750)
+
+    def test_feeding_record_books_consumption(self, client, db, farm):
+        user_id, group_id = farm["user"]["id"], farm["group"]["id"]
+        purchase(client, user_id, farm["corn"]["id"], 1000)
+        purchase(client, user_id, farm["soy"]["id"], 100)
+
+        client.post("/feeding-records/", json={"group_id": group_id, "feeding_date": date.today().isoformat(), "feed_quantity_kg": 100, "total_cost": 42})
+        client.post("/feeding-records/bulk", json=[
+            {"group_id": group_id, "feeding_date": date.today().isoformat(), "feed_quantity_kg": 10, "total_cost": 4.2}
+            for _ in range(2)
+        ])
+
+        stock = balances(client, user_id)
+        assert stock[farm["corn"]["id"]] == pytest.approx(1000 - 72)
+        assert stock[farm["soy"]["id"]] == pytest.approx(100 - 48)
+
+        consumption = db.query(main.GroupInventoryConsumption).filter(main.GroupInventoryConsumption.group_id == group_id).all()
+        assert len(consumption) == 6
+        movements = client.get(f"/users/{user_id}/inventory/movements", params={"food_type_id": farm["soy"]["id"]}).json()
+        assert sum(m["quantity_kg"] for m in movements) == pytest.approx(stock[farm["soy"]["id"]])
+        assert all(m["feeding_record_id"] for m in movements if m["movement_type"] == "consumption")
+
+    def test_bulk_consumption_books_ledger(self, client, farm):
+        user_id, group_id = farm["user"]["id"], farm["group"]["id"]
+        purchase(client, user_id, farm["corn"]["id"], 100)
+        response = client.post("/inventory-consumption/bulk", json=[
+            {"group_id": group_id, "food_type_id": farm["corn"]["id"], "consumption_date": date.today().isoformat(), "quantity_kg": 15, "cost": 4.5}
+            for _ in range(2)
+        ])
+        assert response.json()["inserted"] == 2
+
+        assert balances(client, user_id)[farm["corn"]["id"]] == pytest.approx(70)
+        movements = client.get(f"/users/{user_id}/inventory/movements", params={"food_type_id": farm["corn"]["id"]}).json()
+        consumed = [m for m in movements if m["movement_type"] == "consumption"]
+        assert [m["quantity_kg"] for m in consumed] == [pytest.approx(-15)] * 2
+        assert consumed[0]["unit_cost"] == pytest.approx(0.3)
+
+    def test_failed_booking_rolls_back_the_chunk(self, client, db, farm, monkeypatch):
+        group_id = farm["group"]["id"]
+
+        def failing_booking(db, rows):
+            raise RuntimeError("ledger unavailable")
+
+        monkeypatch.setitem(main.BULK_CHUNK_EFFECTS, main.GroupFeedingRecord, failing_booking)
+        response = client.post("/feeding-records/bulk", json=[
+            {"group_id": group_id, "feeding_date": date.today().isoformat(), "feed_quantity_kg": 10, "total_cost": 4.2}
+        ])
+        assert response.status_code == 200
+        assert response.json()["inserted"] == 0 and response.json()["failed"] == 1
+        # No feeding record without its consumption
+        assert db.query(main.GroupFeedingRecord).filter_by(group_id=group_id).count() == 0
+
+    def test_invalid_movements(self, client, farm):
+        user_id = farm["user"]["id"]
+        movement = {"food_type_id": farm["corn"]["id"], "movement_type": "gift", "movement_date": date.today().isoformat(), "quantity_kg": 1}
+        assert client.post(f"/users/{user_id}/inventory/movements", json=movement).status_code == 400
+        movement.update(movement_type="purchase", quantity_kg=-5)
+        assert client.post(f"/users/{user_id}/inventory/movements", json=movement).status_code == 400
+
+class TestInventoryForecast:
+    """Test days of stock left from the feeding plan"""
+
+    def test_days_of_stock(self, client, farm):
+        user_id = farm["user"]["id"]
+        purchase(client, user_id, farm["corn"]["id"], 1000)
+        purchase(client, user_id, farm["soy"]["id"], 52)
+
+        forecast = {i["food_type_id"]: i for i in client.get(f"/users/{user_id}/inventory/forecast").json()["ingredients"]}
+        soy, corn = forecast[farm["soy"]["id"]], forecast[farm["corn"]["id"]]
+        assert soy["avg_daily_use_kg"] == pytest.approx(4)
+        assert soy["days_of_stock"] == 13
+        assert soy["stockout_date"] == (date.today() + timedelta(days=13)).isoformat()
+        assert corn["days_of_stock"] is None
@@ -0,0 +1,100 @@
+"""
+Tests for the versioned reference data cache
+"""
+import uuid
+
+import main
+from cache import VersionedCache
+
+class TestVersionedCache:
+    """Test read-through caching and version checks"""
+
+    def test_read_through(self):
+        cache = VersionedCache(check_interval=60)
+        cache.sync(lambda: 1)
+        loads = []
+        for _ in range(3):
+            assert cache.get("key", lambda: loads.append(1) or (1, "value")) == "value"
+        assert len(loads) == 1
+        assert cache.stats()["hit_rate"] == round(2 / 3, 4)
+
+    def test_version_change_drops_entries(self):
+        cache = VersionedCache(check_interval=0)
+        version = [1]
+        cache.sync(lambda: version[0])
+        cache.get("key", lambda: (1, "old"))
+        version[0] = 2
+        cache.sync(lambda: version[0])
+        assert cache.get("key", lambda: (2, "new")) == "new"
+        assert cache.stats()["invalidations"] == 1
+
+    def test_stale_load_not_stored(self):
+        """A loader that read before a concurrent bump serves its caller but is not cached"""
+        cache = VersionedCache(check_interval=60)
+        cache.sync(lambda: 1)
+
+        def stale_loader():
+            # Another thread commits a change while this load is running
+            cache._set_version(2)
+            return 1, "old"
+
+        assert cache.get("key", stale_loader) == "old"
+        assert cache.get("key", lambda: (2, "new")) == "new"
+        assert cache.get("key", lambda: (2, "unused")) == "new"
+        assert cache.stats()["stale_loads"] == 1
+
+    def test_newer_load_moves_the_version(self):
+        cache = VersionedCache(check_interval=60)
+        cache.sync(lambda: 1)
+        assert cache.get("key", lambda: (3, "newer")) == "newer"
+        assert cache.version == 3
+        assert cache.get("key", lambda: (3, "unused")) == "newer"
+
+    def test_older_version_ignored(self):
+        cache = VersionedCache(check_interval=0)
+        cache.sync(lambda: 2)
+        cache.get("key", lambda: (2, "value"))
+        cache.sync(lambda: 1)
+        cache.invalidate(1)
+        assert cache.version == 2
+        assert cache.get("key", lambda: (2, "unused")) == "value"
+
+    def test_version_checked_at_most_once_per_interval(self):
+        cache = VersionedCache(check_interval=60)
+        for _ in range(5):
+            cache.sync(lambda: 1)
+        assert cache.stats()["version_checks"] == 1
+
+class TestReferenceEndpoints:
+    """Test that the reference endpoints read from the cache"""
+
+    def test_list_served_from_cache(self, client, count_queries):
+        client.get("/growth-stages/")
+        with count_queries() as queries:
+            assert client.get("/growth-stages/").status_code == 200
+            assert client.get("/food-types/").status_code == 200
+        assert queries.count == 0
+
+    def test_create_invalidates(self, client):
+        client.get("/food-types/", params={"limit": 10000})
+        name = f"Corn {uuid.uuid4().hex[:8]}"
+        client.post("/food-types/", json={"name": name, "category": "grain", "cost_per_kg": 0.3})
+        names = [food["name"] for food in client.get("/food-types/", params={"limit": 10000}).json()]
+        assert name in names
+
+    def test_other_worker_write_is_seen(self, client, db):
+        """A second worker's cache notices a version bump made elsewhere"""
+        other_worker = VersionedCache(check_interval=0)
+        other_worker.sync(lambda: main.read_reference_version(db))
+        other_worker.get("reference_data", main.load_versioned_reference_data)
+
+        stage = client.post("/growth-stages/", json={"name": f"Stage {uuid.uuid4().hex[:8]}", "min_age_days": 0, "max_age_days": 10}).json()
+        db.expire_all()
+        other_worker.sync(lambda: main.read_reference_version(db))
+        reference = other_worker.get("reference_data", main.load_versioned_reference_data)
+        assert stage["id"] in reference["stages_by_id"]
+
+    def test_metrics(self, client):
+        stats = client.get("/metrics/reference-cache").json()
+        assert stats["hits"] > 0
+        assert stats["version"] >= 1
@@ -0,0 +1,35 @@
+"""
+Tests for the column-select orjson path of the list endpoints
+"""
+
+from fastapi.encoders import jsonable_encoder
+
+import main
+
+class TestFastLists:
+    """Test that the fast path matches the Pydantic output and keeps headers and schema"""
+
+    def test_matches_pydantic_output(self, client, db, user, create_group):
+        create_group(avg_weight_kg=1.25)
+        create_group(avg_weight_kg=1.25)
+
+        response = client.get(f"/users/{user['id']}/chicken-groups/")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["etag"]
+        assert response.headers["cache-control"] == "private, no-cache"
+
+        groups = db.query(main.ChickenGroup).filter(main.ChickenGroup.user_id == user["id"]).all()
+        expected = jsonable_encoder([main.ChickenGroupResponse.model_validate(group) for group in groups])
+        assert response.json() == expected
+
+    def test_selects_only_response_columns(self, client, user, group, count_queries):
+        with count_queries() as counter:
+            client.get(f"/chicken-groups/?user_id={user['id']}")
+        select_list = counter.statements[-1].split(" FROM ")[0]
+        assert select_list.count(",") == len(main.ChickenGroupResponse.model_fields) - 1
+
+    def test_openapi_schema_kept(self, client):
+        schema = client.get("/openapi.json").json()
+        ok = schema["paths"]["/feeding-records/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert ok["items"]["$ref"].endswith("/GroupFeedingRecordResponse")
@@ -0,0 +1,111 @@
+"""
+Tests for the stage-transition engine
+"""
+import asyncio
+import itertools
+import uuid
+from datetime import date, datetime, timedelta
+
+import main
+
+_stage_ages = itertools.count(5000, 100)
+
+def stage(id, min_age, max_age, is_active=True):
+    return main.GrowthStageResponse(
+        id=id, name=f"stage {id}", min_age_days=min_age, max_age_days=max_age, is_active=is_active, created_at=datetime.utcnow()
+    )
+
+class TestStageIndex:
+    """Test interval lookups over stage age ranges"""
+
+    def setup_method(self):
+        self.chick, self.grower, self.layer = stage(1, 0, 20), stage(2, 21, 60), stage(3, 61, 500)
+        self.index = main.StageIndex([self.layer, self.chick, self.grower, stage(4, 30, 40, is_active=False)])
+
+    def test_lookup(self):
+        assert self.index.lookup(0) is self.chick
+        assert self.index.lookup(21) is self.grower
+        assert self.index.lookup(35) is self.grower
+        assert self.index.lookup(900) is self.layer
+
+    def test_resolve_keeps_current_stage_within_range(self):
+        assert self.index.resolve(self.grower, 25) is self.grower
+
+    def test_resolve_moves_forward_only(self):
+        assert self.index.resolve(self.chick, 70) is self.layer
+        assert self.index.resolve(self.layer, 10) is self.layer
+
+    def test_next_after(self):
+        assert self.index.next_after(self.grower) is self.layer
+        assert self.index.next_after(self.layer) is None
+
+class TestAdvanceGroups:
+    """Test the set-based stage advance job and the on-read resolver"""
+
+    def make_stages(self, client):
+        # Ages far above any other test's stages, so these are the latest-starting ones
+        base = next(_stage_ages)
+        return [
+            client.post("/growth-stages/", json={"name": f"Stage {uuid.uuid4().hex[:8]}", "min_age_days": base + low, "max_age_days": base + high}).json()
+            for low, high in ((0, 10), (11, 20), (21, 90))
+        ], base
+
+    def add_group(self, client, user, stage, age_days):
+        return client.post("/chicken-groups/", json={
+            "user_id": user["id"], "batch_number": f"S-{uuid.uuid4().hex[:8]}", "breed": "Ross 308",
+            "quantity": 100, "current_quantity": 100, "avg_weight_kg": 1.0,
+            "start_date": (date.today() - timedelta(days=age_days)).isoformat(), "current_stage_id": stage["id"]
+        }).json()
+
+    def test_batch_advance(self, client, db, user):
+        (first, second, third), base = self.make_stages(client)
+        young = self.add_group(client, user, first, base + 5)
+        crossed = self.add_group(client, user, first, base + 15)
+        skipped = self.add_group(client, user, first, base + 50)
+
+        response = client.post("/growth-stages/advance-groups")
+        assert response.status_code == 200
+        assert response.json()["advanced"] >= 2
+
+        stages = {g.id: g.current_stage_id for g in db.query(main.ChickenGroup).filter(main.ChickenGroup.user_id == user["id"])}
+        assert stages[young["id"]] == first["id"]
+        assert stages[crossed["id"]] == second["id"]
+        assert stages[skipped["id"]] == third["id"]
+
+    def test_batch_advance_is_idempotent(self, client, user):
+        (first, _, _), base = self.make_stages(client)
+        self.add_group(client, user, first, base + 15)
+        client.post("/growth-stages/advance-groups")
+        assert client.post("/growth-stages/advance-groups").json()["advanced"] == 0
+
+    def test_resolver_on_read(self, client, db, user):
+        (first, second, _), base = self.make_stages(client)
+        group = self.add_group(client, user, first, base + 15)
+        context = main.load_group_context(group["id"], db)
+        assert context["group"].current_stage_id == first["id"]
+        assert context["stage"].id == second["id"]
+
+class TestStageAdvanceLoop:
+    """Test that the background loop survives failed runs"""
+
+    def test_keeps_running_after_an_error(self, monkeypatch):
+        calls = []
+
+        def flaky_advance():
+            calls.append(1)
+            if len(calls) == 1:
+                raise KeyError("stage")
+            return 0
+
+        monkeypatch.setattr(main, "run_stage_advance", flaky_advance)
+        monkeypatch.setattr(main, "STAGE_ADVANCE_INTERVAL_MINUTES", 0)
+
+        async def run_briefly():
+            task = asyncio.create_task(main.run_stage_advance_loop())
+            while len(calls) < 3 and not task.done():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            return task.done()
+
+        assert asyncio.run(run_briefly()) is False
+        assert len(calls) >= 3
@@ -0,0 +1,68 @@
+"""
+Tests for the table-driven weekly recipe generator
+"""
+import pytest
+
+import main
+
+PROFILE = {
+    "name": "Coop", "breed": "Leghorn", "environment": "free-range", "purpose": "eggs",
+    "feed_type": "layer", "feed_cost": 0.5, "egg_price": 0.2, "vaccination": "yes"
+}
+
+def create_profile(client, user, **fields):
+    payload = {**PROFILE, "user_id": user["id"], "age": 20, "weight": 1.5, "quantity": 10,
+               "season": "summer", "stress_level": "low", "molting": "no", **fields}
+    response = client.post("/chicken-profiles/", json=payload)
+    assert response.status_code == 200
+    return response.json()
+
+class TestWeeklyRecipes:
+    """Test multipliers, meal splits and the batch endpoint"""
+
+    def test_multiplier_table(self):
+        assert main.RECIPE_MULTIPLIERS.shape == (3, 3, 3, 2)
+        # Under 18 weeks, winter, high stress, molting
+        assert main.RECIPE_MULTIPLIERS[0, 1, 1, 1] == pytest.approx(0.8 * 1.1 * 1.15 * 1.2)
+        # Unknown categories are neutral
+        assert main.RECIPE_MULTIPLIERS[1, 0, 0, 0] == 1.0
+
+    def test_single_profile(self, client):
+        response = client.post("/weekly-recipes", json={
+            "age": 10, "weight": 2.0, "quantity": 10, "season": "winter", "stress_level": "high",
+            "molting": "yes", "start_date": "2024-01-15"
+        })
+        assert response.status_code == 200
+        body = response.json()
+        daily = 0.12 * 2.0 * 0.8 * 1.1 * 1.15 * 1.2 * 10
+
+        assert body["success"] is True
+        assert [recipe["day"] for recipe in body["recipes"]][:2] == ["Monday", "Tuesday"]
+        assert body["recipes"][6]["date"] == "2024-01-21"
+        monday = body["recipes"][0]
+        assert monday["total_daily_feed_kg"] == pytest.approx(daily, abs=1e-3)
+        assert [meal["amount_kg"] for meal in monday["meals"]] == pytest.approx([daily * 0.4, daily * 0.35, daily * 0.25], abs=1e-3)
+        assert {meal["feed_type"] for meal in monday["meals"]} == {"starter"}
+        assert body["summary"]["total_weekly_feed_kg"] == pytest.approx(7 * round(daily, 3), abs=1e-2)
+
+    def test_batch_matches_single(self, client, user):
+        young = create_profile(client, user, age=12, season="winter", molting="yes")
+        old = create_profile(client, user, age=60, weight=2.2, quantity=40, stress_level="medium")
+
+        response = client.post("/weekly-recipes/batch", json={"profile_ids": [old["id"], young["id"], old["id"]], "start_date": "2024-01-15"})
+        assert response.status_code == 200
+        profiles = response.json()["profiles"]
+        assert [entry["profile_id"] for entry in profiles] == [old["id"], young["id"]]
+
+        for entry, profile in zip(profiles, (old, young)):
+            single = client.post("/weekly-recipes", json={**profile, "start_date": "2024-01-15"}).json()
+            assert entry["recipes"] == single["recipes"]
+            assert entry["summary"] == single["summary"]
+
+    def test_batch_missing_profile(self, client, user):
+        profile = create_profile(client, user)
+        response = client.post("/weekly-recipes/batch", json={"profile_ids": [profile["id"], 987654321]})
+        assert response.status_code == 404
+        assert "987654321" in response.json()["detail"]
+
+        assert client.post("/weekly-recipes/batch", json={"profile_ids": []}).status_code == 422
@@ -1,13 +1,19 @@
 """
 API routes for the Chicken Feed Nutritional Advisor
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Callable, Dict, Any
+import asyncio
 import logging
 
 from app.models.chicken import ChickenInfo, FeedCalculationResponse, WeeklyRecipeResponse, ChickenDiseaseInfo, DiseaseRecoveryRecommendation
 from app.services.bedrock_service import BedrockService
+from app.services.deadline import Deadline
+from app.services.scheduler import BATCH, INTERACTIVE, LANES, Caller
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -15,8 +21,58 @@ logger = logging.getLogger(__name__)
 # Initialize router
 router = APIRouter()
 
-# Initialize Bedrock service
-bedrock_service = BedrockService()
+@lru_cache(maxsize=None)
+def get_bedrock_service() -> BedrockService:
+    """The shared Bedrock service, created on first use rather than at import"""
+    return BedrockService()
+
+def deadline_from_request(request: Request) -> Deadline:
+    """The request's deadline: its timeout header in seconds, capped, or the default"""
+    header = request.headers.get(settings.REQUEST_TIMEOUT_HEADER)
+    if header is None:
+        return Deadline(settings.REQUEST_TIMEOUT_SECONDS)
+    try:
+        seconds = float(header)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{settings.REQUEST_TIMEOUT_HEADER} must be a number of seconds")
+    if seconds <= 0:
+        raise HTTPException(status_code=400, detail=f"{settings.REQUEST_TIMEOUT_HEADER} must be positive")
+    return Deadline(min(seconds, settings.REQUEST_TIMEOUT_MAX_SECONDS))
+
+def caller_from_request(request: Request) -> Caller:
+    """The tenant and lane the request's model calls are scheduled under
+    
+    Only configured tenants are taken from the tenant header; anyone else is
+    "anonymous", so a made-up tenant per request cannot claim a fresh fair
+    share. Tenants listed in BATCH_TENANTS always take the batch lane, everyone
+    else may choose and defaults to interactive.
+    """
+    tenant = request.headers.get(settings.TENANT_HEADER, "").strip()
+    if tenant not in {*settings.TENANTS, *settings.TENANT_WEIGHTS, *settings.BATCH_TENANTS}:
+        tenant = "anonymous"
+    lane = request.headers.get(settings.PRIORITY_HEADER, "").strip().lower() or INTERACTIVE
+    if lane not in LANES:
+        raise HTTPException(status_code=400, detail=f"{settings.PRIORITY_HEADER} must be one of: {', '.join(LANES)}")
+    if tenant in settings.BATCH_TENANTS:
+        lane = BATCH
+    return Caller(tenant, lane)
+
+async def run_with_deadline(request: Request, generate: Callable[..., Dict[str, Any]], *args: Any) -> Dict[str, Any]:
+    """Run a generation call on a worker thread inside the request's deadline, as the request's caller
+    
+    The deadline is cancelled when the client disconnects, so the pipeline
+    stops starting model calls for an answer nobody will read.
+    """
+    deadline = deadline_from_request(request)
+    caller = caller_from_request(request)
+    task = asyncio.ensure_future(run_in_threadpool(deadline.run, caller.run, generate, *args))
+    while not task.done():
+        done, _ = await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_SECONDS)
+        if not done and await request.is_disconnected():
+            logger.info(f"Client disconnected from {request.url.path}, abandoning the request")
+            deadline.cancel("client disconnected")
+            break
+    return await task
 
 @router.get("/")
 async def root():
@@ -60,14 +116,51 @@ async def health_check():
     return {
         "status": "healthy", 
         "timestamp": datetime.now().isoformat(),
-        "service": "chicken-feed-advisor"
+        "service": "chicken-feed-advisor",
+        "model_backend": get_bedrock_service().breaker.state
+    }
+
+@router.get("/ready")
+async def readiness_check():
+    """Readiness: 503 once the background credential check finds the bearer token missing or rejected"""
+    credentials = get_bedrock_service().credential_check.stats()
+    body = {
+        "ready": credentials["ready"],
+        "credentials": credentials,
+        "model_backend": get_bedrock_service().breaker.state,
+        "timestamp": datetime.now().isoformat()
+    }
+    return JSONResponse(body, status_code=200 if credentials["ready"] else 503)
+
+@router.get("/metrics/pipeline")
+async def pipeline_metrics():
+    """Per-stage counters and timings of the generation pipelines, and speculation hit rates"""
+    return {
+        **get_bedrock_service().pipeline_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@router.get("/metrics/scheduler")
+async def scheduler_metrics():
+    """Model call slots, queue lengths and queue times against their SLOs per lane, and per-tenant counters"""
+    return {
+        **get_bedrock_service().scheduler_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@router.get("/metrics/models")
+async def model_metrics():
+    """Calls, latency, tokens and cost per model tier, fallbacks to the standard model, hedging, circuit breaker state and degraded responses"""
+    return {
+        **get_bedrock_service().model_stats(),
+        "timestamp": datetime.now().isoformat()
     }
 
 @router.get("/seasons")
 async def get_current_season():
     """Get the current season based on date"""
     return {
-        "current_season": bedrock_service.get_current_season(),
+        "current_season": get_bedrock_service().get_current_season(),
         "date": datetime.now().isoformat()
     }
 
@@ -75,7 +168,7 @@ async def get_current_season():
 async def get_auth_info():
     """Get authentication information for debugging"""
     try:
-        auth_info = bedrock_service.get_auth_info()
+        auth_info = get_bedrock_service().get_auth_info()
         return {
             "status": "success",
             "auth_info": auth_info,
@@ -89,7 +182,8 @@ async def get_auth_info():
 async def validate_credentials():
     """Validate current AWS credentials"""
     try:
-        is_valid = bedrock_service.validate_credentials()
+        # A real model call, so it runs off the event loop
+        is_valid = await run_in_threadpool(get_bedrock_service().validate_credentials)
         return {
             "status": "success",
             "credentials_valid": is_valid,
@@ -105,7 +199,7 @@ async def validate_credentials():
         }
 
 @router.post("/recommend-feed", response_model=Dict[str, Any])
-async def recommend_feed(chicken_info: ChickenInfo):
+async def recommend_feed(chicken_info: ChickenInfo, request: Request):
     """
     Generate nutritional feed recommendations for chickens using AWS Bedrock Nova Pro
     
@@ -121,7 +215,7 @@ async def recommend_feed(chicken_info: ChickenInfo):
         logger.info(f"Processing feed recommendation request for {chicken_info.count} {chicken_info.breed}")
         
         # Generate recommendation
-        recommendation = bedrock_service.generate_feed_recommendation(chicken_info)
+        recommendation = await run_with_deadline(request, get_bedrock_service().generate_feed_recommendation, chicken_info)
         
         logger.info("Feed recommendation generated successfully")
         return recommendation
@@ -133,7 +227,7 @@ async def recommend_feed(chicken_info: ChickenInfo):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.post("/calculate-feed", response_model=Dict[str, Any])
-async def calculate_feed(chicken_info: ChickenInfo):
+async def calculate_feed(chicken_info: ChickenInfo, request: Request):
     """
     Generate detailed feed calculations including quantities per day, per chicken, per meal, and feeding schedule
     
@@ -158,7 +252,7 @@ async def calculate_feed(chicken_info: ChickenInfo):
         logger.info(f"Processing feed calculation request for {chicken_info.count} {chicken_info.breed}")
         
         # Generate detailed feed calculations
-        calculation = bedrock_service.generate_feed_calculation(chicken_info)
+        calculation = await run_with_deadline(request, get_bedrock_service().generate_feed_calculation, chicken_info)
         
         logger.info("Feed calculation generated successfully")
         return calculation
@@ -170,7 +264,7 @@ async def calculate_feed(chicken_info: ChickenInfo):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.post("/weekly-recipes", response_model=Dict[str, Any])
-async def generate_weekly_recipes(chicken_info: ChickenInfo):
+async def generate_weekly_recipes(chicken_info: ChickenInfo, request: Request):
     """
     Generate weekly feed recipe calendar with daily recipes based on feed composition
     
@@ -212,7 +306,7 @@ async def generate_weekly_recipes(chicken_info: ChickenInfo):
         logger.info(f"Processing weekly recipe request for {chicken_info.count} {chicken_info.breed}")
         
         # Generate weekly recipes
-        recipes = bedrock_service.generate_weekly_recipes(chicken_info)
+        recipes = await run_with_deadline(request, get_bedrock_service().generate_weekly_recipes, chicken_info)
         
         logger.info("Weekly recipes generated successfully")
         return recipes
@@ -224,7 +318,7 @@ async def generate_weekly_recipes(chicken_info: ChickenInfo):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.post("/disease-recovery", response_model=Dict[str, Any])
-async def generate_disease_recovery_recommendation(disease_info: ChickenDiseaseInfo):
+async def generate_disease_recovery_recommendation(disease_info: ChickenDiseaseInfo, request: Request):
     """
     Generate disease recovery feed recommendations for diseased chickens
     
@@ -245,7 +339,7 @@ async def generate_disease_recovery_recommendation(disease_info: ChickenDiseaseI
         logger.info(f"Processing disease recovery request for {disease_info.count} {disease_info.breed} chickens with {disease_info.disease}")
         
         # Generate disease recovery recommendation
-        recommendation = bedrock_service.generate_disease_recovery_recommendation(disease_info)
+        recommendation = await run_with_deadline(request, get_bedrock_service().generate_disease_recovery_recommendation, disease_info)
         
         logger.info("Disease recovery recommendation generated successfully")
         return recommendation
@@ -257,7 +351,7 @@ async def generate_disease_recovery_recommendation(disease_info: ChickenDiseaseI
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.post("/disease-weekly-recipes", response_model=Dict[str, Any])
-async def generate_disease_weekly_recipes(disease_info: ChickenDiseaseInfo):
+async def generate_disease_weekly_recipes(disease_info: ChickenDiseaseInfo, request: Request):
     """
     Generate weekly feed recipes for disease recovery
     
@@ -277,7 +371,7 @@ async def generate_disease_weekly_recipes(disease_info: ChickenDiseaseInfo):
         logger.info(f"Processing disease weekly recipes request for {disease_info.count} {disease_info.breed} chickens with {disease_info.disease}")
         
         # Generate weekly recovery recipes
-        recipes = bedrock_service.generate_disease_weekly_recipes(disease_info)
+        recipes = await run_with_deadline(request, get_bedrock_service().generate_disease_weekly_recipes, disease_info)
         
         logger.info("Disease weekly recipes generated successfully")
         return recipes
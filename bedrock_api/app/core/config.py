@@ -2,12 +2,21 @@
 Configuration settings for the Chicken Feed Nutritional Advisor API
 """
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+def parse_weights(value: str) -> Dict[str, float]:
+    """Parse "tenant:weight,tenant:weight" into a dict"""
+    weights = {}
+    for item in value.split(","):
+        if item.strip():
+            tenant, _, weight = item.partition(":")
+            weights[tenant.strip()] = float(weight or 1)
+    return weights
+
 class Settings:
     """Application settings"""
     
@@ -22,6 +31,15 @@ class Settings:
     AWS_BEARER_TOKEN_BEDROCK: str = os.getenv("AWS_BEARER_TOKEN_BEDROCK")
     AWS_REGION: str = os.getenv("AWS_REGION")
     BEDROCK_MODEL_ID: str = os.getenv("BEDROCK_MODEL_ID")
+    # Faster, cheaper model for the stages in FAST_MODEL_STAGES; empty runs everything on BEDROCK_MODEL_ID
+    BEDROCK_FAST_MODEL_ID: str = os.getenv("BEDROCK_FAST_MODEL_ID", "amazon.nova-lite-v1:0")
+    FAST_MODEL_STAGES: List[str] = [stage.strip() for stage in os.getenv("FAST_MODEL_STAGES", "feed_calculation").split(",") if stage.strip()]
+    
+    # On-demand prices in USD per 1,000 tokens, for the per-tier cost report (Nova Pro and Nova Lite)
+    MODEL_INPUT_PRICE_PER_1K: float = float(os.getenv("MODEL_INPUT_PRICE_PER_1K", "0.0008"))
+    MODEL_OUTPUT_PRICE_PER_1K: float = float(os.getenv("MODEL_OUTPUT_PRICE_PER_1K", "0.0032"))
+    FAST_MODEL_INPUT_PRICE_PER_1K: float = float(os.getenv("FAST_MODEL_INPUT_PRICE_PER_1K", "0.00006"))
+    FAST_MODEL_OUTPUT_PRICE_PER_1K: float = float(os.getenv("FAST_MODEL_OUTPUT_PRICE_PER_1K", "0.00024"))
     
     # Bedrock Configuration
     BEDROCK_CONFIG = {
@@ -34,6 +52,61 @@ class Settings:
     MODEL_MAX_TOKENS: int = int(os.getenv("MODEL_MAX_TOKENS", "8000"))
     MODEL_TEMPERATURE: float = float(os.getenv("MODEL_TEMPERATURE", "0.3"))
     MODEL_TOP_P: float = float(os.getenv("MODEL_TOP_P", "0.9"))
+    # Ask for short keys and positional arrays, expanded server-side (see app/services/wire_format.py)
+    MODEL_COMPACT_OUTPUT: bool = os.getenv("MODEL_COMPACT_OUTPUT", "true").lower() == "true"
+    
+    # Pipeline Configuration
+    # Start the calculation and recipe stages from local estimates instead of waiting for the recommendation
+    SPECULATIVE_PIPELINE: bool = os.getenv("SPECULATIVE_PIPELINE", "true").lower() == "true"
+    # Relative difference between estimate and recommendation up to which a speculative stage is kept
+    SPECULATIVE_TOLERANCE: float = float(os.getenv("SPECULATIVE_TOLERANCE", "0.15"))
+    PIPELINE_WORKERS: int = int(os.getenv("PIPELINE_WORKERS", "16"))
+    # Seconds a pipeline waits for one model stage before giving up with a 504
+    PIPELINE_STAGE_TIMEOUT: float = float(os.getenv("PIPELINE_STAGE_TIMEOUT", "180"))
+    # Seconds a recommendation is reused for identical flock details, 0 to disable
+    PIPELINE_CACHE_SECONDS: float = float(os.getenv("PIPELINE_CACHE_SECONDS", "300"))
+    
+    # Hedging: send a duplicate call when one is slower than HEDGE_PERCENTILE of recent calls
+    HEDGE_REQUESTS: bool = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "95"))
+    # Calls per model tier needed before hedging starts, and how many recent calls the percentile uses
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_WINDOW: int = int(os.getenv("HEDGE_WINDOW", "200"))
+    # Most hedges allowed, as a percentage of all calls
+    HEDGE_BUDGET_PERCENT: float = float(os.getenv("HEDGE_BUDGET_PERCENT", "10"))
+    # Where the duplicate goes; empty uses AWS_REGION and the stage's own model
+    BEDROCK_HEDGE_REGION: str = os.getenv("BEDROCK_HEDGE_REGION", "")
+    BEDROCK_HEDGE_MODEL_ID: str = os.getenv("BEDROCK_HEDGE_MODEL_ID", "")
+    
+    # Circuit breaker: consecutive model call failures that open it, and seconds between recovery probes
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+    # Answer from local tables, flagged degraded, while the circuit is open instead of returning 503
+    DEGRADED_RESPONSES: bool = os.getenv("DEGRADED_RESPONSES", "true").lower() == "true"
+    
+    # Seconds between background checks of the bearer token after the one at startup; 0 checks only at startup
+    CREDENTIAL_RECHECK_SECONDS: float = float(os.getenv("CREDENTIAL_RECHECK_SECONDS", "900"))
+    
+    # Request deadlines: seconds a generation request may take, overridable per request up to the maximum
+    REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "120"))
+    REQUEST_TIMEOUT_MAX_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_MAX_SECONDS", "300"))
+    REQUEST_TIMEOUT_HEADER: str = os.getenv("REQUEST_TIMEOUT_HEADER", "X-Request-Timeout")
+    # How often a running request checks whether its client is still connected
+    DISCONNECT_POLL_SECONDS: float = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+    
+    # Model call scheduling: concurrent Bedrock calls, and how many of them only interactive calls may use
+    MODEL_CONCURRENCY: int = int(os.getenv("MODEL_CONCURRENCY", "8"))
+    INTERACTIVE_RESERVED_SLOTS: int = int(os.getenv("INTERACTIVE_RESERVED_SLOTS", "2"))
+    # Share of the slots per tenant ("tenant:weight,..."; others weigh 1), and tenants whose calls always take the batch lane
+    TENANT_WEIGHTS: Dict[str, float] = parse_weights(os.getenv("TENANT_WEIGHTS", ""))
+    BATCH_TENANTS: List[str] = [tenant.strip() for tenant in os.getenv("BATCH_TENANTS", "").split(",") if tenant.strip()]
+    # Further tenants accepted from the tenant header; any tenant not configured here or above is scheduled as "anonymous"
+    TENANTS: List[str] = [tenant.strip() for tenant in os.getenv("TENANTS", "").split(",") if tenant.strip()]
+    TENANT_HEADER: str = os.getenv("TENANT_HEADER", "X-Tenant-ID")
+    PRIORITY_HEADER: str = os.getenv("PRIORITY_HEADER", "X-Priority")
+    # Seconds a call may wait for a slot before it counts against the lane's queue-time SLO
+    INTERACTIVE_QUEUE_SLO_SECONDS: float = float(os.getenv("INTERACTIVE_QUEUE_SLO_SECONDS", "1"))
+    BATCH_QUEUE_SLO_SECONDS: float = float(os.getenv("BATCH_QUEUE_SLO_SECONDS", "60"))
     
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
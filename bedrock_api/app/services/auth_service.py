@@ -1,25 +1,33 @@
 """
 Simple AWS Bearer Token authentication service for Bedrock
 """
-from tabnanny import check
-import boto3
 import logging
-from botocore.config import Config
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, Optional
 from fastapi import HTTPException
-from botocore import config
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+
 logger = logging.getLogger(__name__)
 
-def get_bedrock_client():
+def get_bedrock_client(region: Optional[str] = None, read_timeout: Optional[float] = None, max_attempts: Optional[int] = None):
     """Create and return AWS Bedrock client with bearer token authentication"""
+    # boto3 takes a noticeable part of startup to import, so it waits for the first client
+    import boto3
+    from botocore.config import Config
 
+    client_config = Config(
+        connect_timeout=settings.BEDROCK_CONFIG["connect_timeout"],
+        read_timeout=read_timeout or settings.BEDROCK_CONFIG["read_timeout"],
+        retries={"max_attempts": max_attempts or settings.BEDROCK_CONFIG["max_attempts"]},
+    )
 
     return boto3.client(
         service_name="bedrock-runtime",
-        region_name=settings.AWS_REGION,
+        region_name=region or settings.AWS_REGION,
+        config=client_config,
     )
 
 class AWSAuthService:
@@ -29,8 +37,11 @@ class AWSAuthService:
         """Initialize without validation - validation happens at runtime"""
         logger.info("AWS Bearer Token authentication service initialized")
     
-    def create_bedrock_client(self) -> boto3.client:
-        """Create Bedrock client with bearer token"""
+    def create_bedrock_client(self, region: Optional[str] = None, read_timeout: Optional[float] = None, max_attempts: Optional[int] = None) -> "BaseClient":
+        """Create Bedrock client with bearer token, for AWS_REGION unless another region is given
+        
+        read_timeout and max_attempts override BEDROCK_CONFIG for this client.
+        """
         try:
             # Validate settings when actually needed
             if not settings.AWS_BEARER_TOKEN_BEDROCK:
@@ -46,8 +57,8 @@ class AWSAuthService:
                 )
             
             # Simply use the get_bedrock_client function - no credential manipulation
-            client = get_bedrock_client()
-            logger.info(f"Created Bedrock client for region: {settings.AWS_REGION}")
+            client = get_bedrock_client(region, read_timeout, max_attempts)
+            logger.info(f"Created Bedrock client for region: {region or settings.AWS_REGION}")
             return client
             
         except HTTPException:
@@ -70,7 +81,8 @@ class AWSAuthService:
             import json
             test_payload = {
                 "messages": [{"role": "user", "content": [{"text": "test"}]}],
-                "inferenceConfig": {"maxTokens": 500, "temperature": 0.8, "topP": 0.9}
+                # One token is enough to see whether the call is authorized, and keeps periodic rechecks cheap
+                "inferenceConfig": {"maxTokens": 1, "temperature": 0.8, "topP": 0.9}
             }
             headers = {
                 "Content-Type": "application/json",
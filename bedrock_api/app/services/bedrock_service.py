@@ -1,33 +1,73 @@
 """
 AWS Bedrock service for generating chicken feed recommendations
 """
-import boto3
 import json
 import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Callable, Dict, Any, Optional
 from fastapi import HTTPException
+from pydantic import ValidationError
 
 from app.core.config import settings
-from app.models.chicken import ChickenInfo, ChickenDiseaseInfo
+from app.models.chicken import ChickenInfo, ChickenDiseaseInfo, FeedCalculation
 from app.services.auth_service import AWSAuthService
+from app.services.recipe_quantities import fill_weekly_quantities
+from app.services import wire_format
+from app.services.feed_estimates import estimate_daily_feed, estimate_feed_composition, estimate_feeding_schedule, within_tolerance
+from app.services.pipeline import Pipeline, Stage
+from app.services.model_router import ModelTier, router_from_settings
+from app.services.hedging import hedger_from_settings
+from app.services.circuit_breaker import CircuitOpenError, breaker_from_settings
+from app.services import fallback_recommendations as fallback
+from app.services import deadline
+from app.services.scheduler import scheduler_from_settings
+from app.services.credential_check import VALID, credential_check_from_settings
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
 
 logger = logging.getLogger(__name__)
 
+# Threads for running pipeline stages side by side
+stage_pool = ThreadPoolExecutor(max_workers=settings.PIPELINE_WORKERS, thread_name_prefix="bedrock-stage")
+
+# Threads for model calls when hedging, kept apart from the stage threads that wait on them
+call_pool = ThreadPoolExecutor(max_workers=2 * settings.PIPELINE_WORKERS, thread_name_prefix="bedrock-call")
+
+# boto3 sessions are not thread-safe, so clients are created one at a time
+client_lock = threading.Lock()
+
 class BedrockService:
     """Service for interacting with AWS Bedrock Nova Pro model"""
     
     def __init__(self):
         try:
             self.auth_service = AWSAuthService()
+            self.compact_output = settings.MODEL_COMPACT_OUTPUT
+            self.speculative = settings.SPECULATIVE_PIPELINE
+            self.model_router = router_from_settings()
+            self.hedger = hedger_from_settings(call_pool)
+            self.breaker = breaker_from_settings(probe=self._probe_backend)
+            self.scheduler = scheduler_from_settings()
+            self.credential_check = credential_check_from_settings(self.auth_service.validate_credentials)
+            self.degraded_stats = Counter()
+            self.speculation_stats = Counter()
+            self._stats_lock = threading.Lock()
+            self._pipelines = {}
+            self._pipelines_lock = threading.Lock()
             logger.info(f"Initialized Bedrock service for region: {settings.AWS_REGION}")
         except Exception as e:
             logger.error(f"Failed to initialize Bedrock service: {e}")
             raise
     
-    def _get_bedrock_client(self) -> boto3.client:
+    def _get_bedrock_client(self, region: Optional[str] = None, read_timeout: Optional[float] = None, max_attempts: Optional[int] = None) -> "BaseClient":
         """Get Bedrock client with API key authentication"""
-        return self.auth_service.create_bedrock_client()
+        with client_lock:
+            return self.auth_service.create_bedrock_client(region, read_timeout, max_attempts)
 
     def get_current_season(self) -> str:
         """Determine current season based on date"""
@@ -55,40 +95,7 @@ Chicken Details:
 - Current season: {season}
 
 Please provide a comprehensive response in JSON format with the following structure. Return ONLY valid JSON without any markdown formatting or code blocks:
-{{
-    "feed_composition": {{
-        "crude_protein_percent": <percentage>,
-        "metabolizable_energy_kcal_per_kg": <value>,
-        "crude_fat_percent": <percentage>,
-        "crude_fiber_percent": <percentage>,
-        "calcium_percent": <percentage>,
-        "phosphorus_percent": <percentage>,
-        "lysine_percent": <percentage>,
-        "methionine_percent": <percentage>,
-        "vitamins": {{
-            "vitamin_a_iu_per_kg": <value>,
-            "vitamin_d3_iu_per_kg": <value>,
-            "vitamin_e_iu_per_kg": <value>
-        }},
-        "minerals": {{
-            "sodium_percent": <percentage>,
-            "chloride_percent": <percentage>,
-            "magnesium_percent": <percentage>
-        }}
-    }},
-    "daily_feed_amount_per_bird_kg": <amount in kg>,
-    "total_daily_feed_kg": <total for all birds>,
-    "seasonal_adjustments": {{
-        "energy_adjustment": "<explanation>",
-        "protein_adjustment": "<explanation>",
-        "water_considerations": "<explanation>"
-    }},
-    "additional_recommendations": [
-        "<recommendation 1>",
-        "<recommendation 2>",
-        "<recommendation 3>"
-    ]
-}}
+{self._response_format(wire_format.FEED_RECOMMENDATION_EXAMPLE, key_map=wire_format.FEED_RECOMMENDATION_KEYS)}
 
 Consider the bird's age, weight, breed characteristics, environment, purpose, and seasonal requirements:
 
@@ -105,32 +112,110 @@ Purpose considerations:
 
 Adjust energy requirements based on the season, environment activity levels, and production purpose. Provide practical feeding advice tailored to the specific environment and production goals."""
 
-    def _call_nova_pro(self, prompt: str) -> Dict[str, Any]:
-        """Call Nova Pro model with the given prompt using the Nova Converse API format"""
-        try:
-            # Build request payload for Nova Converse API (matching your example)
-            request_body = {
-                "messages": [
-                    {
-                        "role": "user", 
-                        "content": [{"text": prompt}]
-                    }
-                ],
-                "inferenceConfig": {
-                    "maxTokens": settings.MODEL_MAX_TOKENS,
-                    "temperature": settings.MODEL_TEMPERATURE,
-                    "topP": settings.MODEL_TOP_P,
-                },
-            }
-
-            # Get authenticated Bedrock client and call Nova Pro model
-            bedrock_client = self._get_bedrock_client()
-            response = bedrock_client.invoke_model(
-                modelId=settings.BEDROCK_MODEL_ID,
-                body=json.dumps(request_body)
-            )
+    def _response_format(self, example: Dict[str, Any], key_map: Optional[wire_format.KeyMap] = None, layout: Optional[Dict[str, Any]] = None) -> str:
+        """JSON skeleton for the model to fill in, in the compact wire format unless it is disabled"""
+        if layout is not None:
+            if not self.compact_output:
+                return wire_format.json_skeleton({"weekly_calendar": example})
+            compact = wire_format.compact_calendar(example, layout)
+            return f"{wire_format.json_skeleton(compact, compact=True)}\n\nLayout: {wire_format.calendar_legend(layout)}"
+
+        if not self.compact_output:
+            return wire_format.json_skeleton(example)
+        compact = wire_format.compact_keys(example, key_map)
+        return f"{wire_format.json_skeleton(compact, compact=True)}\n\nKeys: {wire_format.key_legend(key_map)}"
+
+    def _invoke_nova_pro(self, prompt: str, model_id: Optional[str] = None, region: Optional[str] = None) -> Dict[str, Any]:
+        """Send the prompt to Nova Pro, or another model id or region, and return the raw model response, usage included"""
+        # Build request payload for Nova Converse API (matching your example)
+        request_body = {
+            "messages": [
+                {
+                    "role": "user", 
+                    "content": [{"text": prompt}]
+                }
+            ],
+            "inferenceConfig": {
+                "maxTokens": settings.MODEL_MAX_TOKENS,
+                "temperature": settings.MODEL_TEMPERATURE,
+                "topP": settings.MODEL_TOP_P,
+            },
+        }
 
-            model_response = json.loads(response["body"].read())
+        # Within a request deadline the call may only wait as long as is left, and there is no time to retry
+        read_timeout, shortened = deadline.read_timeout(settings.BEDROCK_CONFIG["read_timeout"])
+        
+        # Get authenticated Bedrock client and call Nova Pro model
+        bedrock_client = self._get_bedrock_client(region, read_timeout, 1 if shortened else None)
+        response = bedrock_client.invoke_model(
+            modelId=model_id or settings.BEDROCK_MODEL_ID,
+            body=json.dumps(request_body)
+        )
+        return json.loads(response["body"].read())
+
+    def _call_nova_pro(self, prompt: str, stage: Optional[str] = None, validate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+        """Call the model tier routed for the stage
+        
+        An answer from the fast tier that does not parse or does not pass
+        `validate` is asked again from the standard tier.
+        """
+        tier = self.model_router.tier_for(stage)
+        if tier is not self.model_router.standard:
+            try:
+                result = self._call_model(prompt, tier)
+                if validate is None or validate(result):
+                    return result
+                reason = "schema validation failed"
+            except (CircuitOpenError, deadline.DeadlineExceeded):
+                raise
+            except HTTPException as e:
+                reason = e.detail
+            logger.warning(f"{tier.model_id} answer for {stage} rejected ({reason}), retrying on {self.model_router.standard.model_id}")
+            self.model_router.record_fallback(stage)
+        return self._call_model(prompt, self.model_router.standard)
+
+    def _invoke_guarded(self, prompt: str, tier: ModelTier) -> Dict[str, Any]:
+        """Invoke a model tier through the circuit breaker, failing fast while it is open
+        
+        Calls cut short by the request deadline say nothing about the backend and are not counted.
+        The call waits for a scheduler slot in its caller's lane; a hedge shares its call's slot.
+        """
+        deadline.check_deadline()
+        self.breaker.before_call()
+        try:
+            with self.scheduler.slot():
+                # The circuit may have opened while this call was queued
+                self.breaker.before_call()
+                # A slow call gets a duplicate to the hedge region once history allows it
+                model_response = self.hedger.run(
+                    tier.name,
+                    lambda: self._invoke_nova_pro(prompt, tier.model_id),
+                    lambda: self._invoke_nova_pro(prompt, settings.BEDROCK_HEDGE_MODEL_ID or tier.model_id, settings.BEDROCK_HEDGE_REGION or None),
+                )
+        except (CircuitOpenError, deadline.DeadlineExceeded):
+            raise
+        except Exception as e:
+            request_deadline = deadline.current_deadline()
+            if request_deadline is not None and request_deadline.expired:
+                raise request_deadline.error() from e
+            if self.breaker.record_failure():
+                raise CircuitOpenError(f"Model backend unavailable: {e}") from e
+            raise
+        self.breaker.record_success()
+        return model_response
+    
+    def _probe_backend(self):
+        """Smallest possible model call, used by the circuit breaker to see whether the backend is back"""
+        self._invoke_nova_pro('Reply with "ok".')
+    
+    def _call_model(self, prompt: str, tier: ModelTier) -> Dict[str, Any]:
+        """Call one model tier with the given prompt using the Nova Converse API format"""
+        started = time.perf_counter()
+        usage = {}
+        try:
+            model_response = self._invoke_guarded(prompt, tier)
+            usage = model_response.get("usage", {})
+            logger.info(f"{tier.model_id} token usage: {usage}")
             
             # Parse Nova response format (matching your example)
             output = model_response.get("output", {})
@@ -140,7 +225,9 @@ Adjust energy requirements based on the season, environment activity levels, and
             if content and len(content) > 0:
                 generated_text = content[0].get("text", "").strip()
                 if generated_text:
-                    return self._parse_response(generated_text)
+                    result = self._parse_response(generated_text)
+                    self.model_router.record_call(tier, time.perf_counter() - started, usage)
+                    return result
                 else:
                     raise HTTPException(
                         status_code=500,
@@ -153,8 +240,10 @@ Adjust energy requirements based on the season, environment activity levels, and
                 )
             
         except HTTPException:
+            self.model_router.record_call(tier, time.perf_counter() - started, usage, error=True)
             raise
         except Exception as e:
+            self.model_router.record_call(tier, time.perf_counter() - started, usage, error=True)
             error_msg = f"Error calling Nova Pro: {str(e)}"
             logger.error(error_msg)
             logger.error(f"Error type: {type(e).__name__}")
@@ -201,8 +290,8 @@ Adjust energy requirements based on the season, environment activity levels, and
             )
     
 
-    def generate_feed_recommendation(self, chicken_info: ChickenInfo) -> Dict[str, Any]:
-        """Generate nutritional feed recommendation using Nova Pro"""
+    def _recommend(self, chicken_info: ChickenInfo) -> Dict[str, Any]:
+        """Run the feed recommendation prompt"""
         
         # Use provided season or auto-detect
         season = chicken_info.season or self.get_current_season()
@@ -213,10 +302,15 @@ Adjust energy requirements based on the season, environment activity levels, and
         prompt = self._create_prompt(chicken_info, season)
         
         # Call Nova Pro
-        recommendation = self._call_nova_pro(prompt)
+        recommendation = wire_format.expand_keys(self._call_nova_pro(prompt, stage="recommendation"), wire_format.FEED_RECOMMENDATION_KEYS)
         
         # Add metadata
-        recommendation["request_info"] = {
+        recommendation["request_info"] = self._request_info(chicken_info, season)
+        
+        return recommendation
+    
+    def _request_info(self, chicken_info: ChickenInfo, season: str) -> Dict[str, Any]:
+        return {
             "processed_at": datetime.now().isoformat(),
             "chicken_count": chicken_info.count,
             "breed": chicken_info.breed,
@@ -226,8 +320,6 @@ Adjust energy requirements based on the season, environment activity levels, and
             "purpose": chicken_info.purpose,
             "season_used": season
         }
-        
-        return recommendation
     
     def _create_feed_calculation_prompt(self, feed_recommendation: Dict[str, Any], chicken_info: ChickenInfo) -> str:
         """Create prompt for detailed feed calculation based on existing recommendation"""
@@ -249,23 +341,7 @@ Current Feed Recommendation:
 - Feed per bird per day: {per_bird_feed} kg ({per_bird_feed * 1000} grams)
 
 Please provide a practical feeding calculation in JSON format with the following structure. Return ONLY valid JSON without any markdown formatting or code blocks:
-{{
-    "feed_calculation": {{
-        "total_quantity_per_day_kg": {total_daily_feed},
-        "quantity_per_chicken_g": {per_bird_feed * 1000},
-        "quantity_per_meal_g": <amount per meal in grams>,
-        "meals_per_day": <recommended number of meals>,
-        "feeding_schedule": [
-            "<time 1 (e.g., 7:00 AM)>",
-            "<time 2 (e.g., 4:00 PM)>"
-        ],
-        "storage_recommendations": [
-            "<storage tip 1>",
-            "<storage tip 2>",
-            "<storage tip 3>"
-        ]
-    }}
-}}
+{self._response_format(wire_format.FEED_CALCULATION_EXAMPLE, key_map=wire_format.FEED_CALCULATION_KEYS)}
 
 Consider the following guidelines based on environment and purpose:
 
@@ -289,23 +365,45 @@ General guidelines:
 
 Focus on practical implementation: How should the farmer divide the daily feed amount across meals? What times work best for this environment and purpose? How should they store the feed?"""
 
-    def generate_feed_calculation(self, chicken_info: ChickenInfo) -> Dict[str, Any]:
-        """Generate detailed feed calculations based on existing nutritional recommendation"""
-        
-        # First get the base nutritional recommendation
-        base_recommendation = self.generate_feed_recommendation(chicken_info)
-        
+    def _calculate_feed(self, base_recommendation: Dict[str, Any], chicken_info: ChickenInfo) -> Dict[str, Any]:
+        """Run the feed calculation prompt for a recommendation and return its feed_calculation block"""
         logger.info(f"Generating feed calculations for {chicken_info.count} {chicken_info.breed} chickens")
         
         # Create specific prompt for feed calculations
         prompt = self._create_feed_calculation_prompt(base_recommendation, chicken_info)
         
         # Call Nova Pro for feed calculations
-        calculation_result = self._call_nova_pro(prompt)
+        calculation_result = wire_format.expand_keys(
+            self._call_nova_pro(prompt, stage="feed_calculation", validate=self._valid_feed_calculation),
+            wire_format.FEED_CALCULATION_KEYS
+        )
+        return calculation_result.get("feed_calculation", {})
+    
+    def _valid_feed_calculation(self, result: Dict[str, Any]) -> bool:
+        """Whether a raw feed calculation answer has every field, typed, with one feeding time per meal"""
+        calculation = wire_format.expand_keys(result, wire_format.FEED_CALCULATION_KEYS).get("feed_calculation")
+        if not isinstance(calculation, dict):
+            return False
+        try:
+            # The totals are filled in locally afterwards
+            parsed = FeedCalculation(**{**calculation, "total_quantity_per_day_kg": 0, "quantity_per_chicken_g": 0})
+        except (ValidationError, TypeError):
+            return False
+        return len(parsed.feeding_schedule) == parsed.meals_per_day
+    
+    def _feed_calculation_response(self, base_recommendation: Dict[str, Any], calculation: Dict[str, Any]) -> Dict[str, Any]:
+        """Combine a feed calculation with the recommendation it belongs to"""
+        # The daily totals come from the recommendation rather than being echoed by the model
+        per_bird_feed = base_recommendation.get("daily_feed_amount_per_bird_kg", 0)
+        feed_calculation = {
+            **calculation,
+            "total_quantity_per_day_kg": base_recommendation.get("total_daily_feed_kg", 0),
+            "quantity_per_chicken_g": round(per_bird_feed * 1000, 2)
+        }
         
         # Combine results with nutritional context
         response = {
-            "feed_calculation": calculation_result.get("feed_calculation", {}),
+            "feed_calculation": feed_calculation,
             "nutritional_context": {
                 "feed_composition": base_recommendation.get("feed_composition", {}),
                 "seasonal_adjustments": base_recommendation.get("seasonal_adjustments", {}),
@@ -347,64 +445,12 @@ Nutritional Requirements:
 
 Create a comprehensive weekly feed recipe calendar. Return ONLY valid JSON without markdown formatting:
 
-{{
-    "weekly_calendar": {{
-        "week_start_date": "2024-01-15",
-        "total_weekly_kg": <total for 7 days>,
-        "daily_recipes": [
-            {{
-                "day": "Monday",
-                "feeding_recipes": [
-                    {{
-                        "feeding_time": "7:00 AM",
-                        "recipe": "Corn 40%, Soybean meal 25%, Wheat 15%, Calcium carbonate 8%, Salt 2%, Vitamins 10%",
-                        "quantity_kg": <amount for this feeding>,
-                        "quantity_grams": <amount for this feeding in grams>,
-                        "nutritional_focus": "High energy for morning activity",
-                        "ingredient_breakdown": [
-                            {{"ingredient_name": "Corn", "percentage": 40.0, "grams": <calculated>, "nutritional_contribution": "Primary energy source"}},
-                            {{"ingredient_name": "Soybean meal", "percentage": 25.0, "grams": <calculated>, "nutritional_contribution": "High-quality protein"}},
-                            {{"ingredient_name": "Wheat", "percentage": 15.0, "grams": <calculated>, "nutritional_contribution": "Additional energy"}},
-                            {{"ingredient_name": "Calcium carbonate", "percentage": 8.0, "grams": <calculated>, "nutritional_contribution": "Bone health"}},
-                            {{"ingredient_name": "Salt", "percentage": 2.0, "grams": <calculated>, "nutritional_contribution": "Electrolyte balance"}},
-                            {{"ingredient_name": "Vitamins", "percentage": 10.0, "grams": <calculated>, "nutritional_contribution": "Essential nutrients"}}
-                        ]
-                    }},
-                    {{
-                        "feeding_time": "4:00 PM",
-                        "recipe": "Barley 35%, Fish meal 20%, Oats 15%, Corn 15%, Oyster shell 8%, Salt 2%, Vitamins 5%",
-                        "quantity_kg": <amount for this feeding>,
-                        "quantity_grams": <amount for this feeding in grams>,
-                        "nutritional_focus": "Calcium-rich for evening egg formation",
-                        "ingredient_breakdown": [
-                            {{"ingredient_name": "Barley", "percentage": 35.0, "grams": <calculated>, "nutritional_contribution": "Energy source"}},
-                            {{"ingredient_name": "Fish meal", "percentage": 20.0, "grams": <calculated>, "nutritional_contribution": "High protein"}},
-                            {{"ingredient_name": "Oats", "percentage": 15.0, "grams": <calculated>, "nutritional_contribution": "Fiber and energy"}},
-                            {{"ingredient_name": "Corn", "percentage": 15.0, "grams": <calculated>, "nutritional_contribution": "Carbohydrates"}},
-                            {{"ingredient_name": "Oyster shell", "percentage": 8.0, "grams": <calculated>, "nutritional_contribution": "Calcium for eggshells"}},
-                            {{"ingredient_name": "Salt", "percentage": 2.0, "grams": <calculated>, "nutritional_contribution": "Electrolytes"}},
-                            {{"ingredient_name": "Vitamins", "percentage": 5.0, "grams": <calculated>, "nutritional_contribution": "Essential nutrients"}}
-                        ]
-                    }}
-                ],
-                "total_daily_kg": <daily amount>,
-                "nutritional_notes": "Balanced nutrition for {chicken_info.purpose}",
-                "special_considerations": ["Monitor water intake", "Check egg quality"]
-            }}
-        ],
-        "weekly_nutritional_goals": ["Optimize {chicken_info.purpose}", "Maintain bone health", "Support immune function"],
-        "preparation_notes": ["Mix ingredients thoroughly", "Store in dry place", "Use within 30 days"],
-        "seasonal_adjustments": ["Adjust for cooler weather", "Increase energy content"]
-    }}
-}}
-
-CRITICAL CALCULATION REQUIREMENTS:
-- The total_quantity_per_day_kg from feed_calculation is: {feed_calc.get('total_quantity_per_day_kg', 0)} kg
-- Each day's total_daily_kg MUST equal this exact amount
-- The sum of all feeding quantities in a day MUST equal total_daily_kg
-- All ingredient percentages in each feeding MUST add up to 100%
-- All ingredient grams in each feeding MUST add up to the feeding's quantity_grams
-- Convert kg to grams: 1 kg = 1000 grams
+{self._response_format(wire_format.WEEKLY_CALENDAR_EXAMPLE, layout=wire_format.WEEKLY_CALENDAR_LAYOUT)}
+
+QUANTITY RULES:
+- Do NOT write any kg or gram amounts, recipe strings or totals. They are calculated from the daily total of {feed_calc.get('total_quantity_per_day_kg', 0)} kg after you respond
+- share_percent is the feeding's share of the day's feed; the shares of one day MUST add up to 100
+- All ingredient percentages in each feeding MUST add up to 100
 
 Guidelines for recipe creation:
 1. Use common poultry feed ingredients (corn, soybean meal, wheat, barley, sorghum, millet, fish meal, etc.)
@@ -413,40 +459,39 @@ Guidelines for recipe creation:
 4. Vary ingredients between feeding times and across days while maintaining nutritional balance
 5. Consider the environment (free range may need different supplements)
 6. Adjust for purpose (eggs need more calcium, meat production needs more protein)
-7. Include specific proportions and mixing instructions for each feeding time
+7. Include specific proportions for each feeding time
 8. Account for seasonal factors and weather conditions
 9. Provide practical preparation and storage advice
 10. Consider the chicken's age and developmental stage
 11. Ensure recipes are practical for the farmer to prepare
 12. Match the feeding schedule exactly (if 2 meals per day, create 2 recipes per day)
 13. Each feeding time should have its own unique recipe with appropriate nutritional focus
+14. Use realistic ingredient percentages (typically 5-50% per ingredient) and a short nutritional contribution for each ingredient
 
-CALCULATION VALIDATION:
-- For each feeding: sum of all ingredient grams = quantity_grams
-- For each feeding: sum of all ingredient percentages = 100%
-- For each day: sum of all feeding quantities = total_daily_kg = {feed_calc.get('total_quantity_per_day_kg', 0)} kg
-- Use realistic ingredient percentages (typically 5-50% per ingredient)
-- Provide detailed nutritional contribution for each ingredient
-
-Create 7 days (Monday-Sunday) with varied, nutritious, and practical recipes for each specific feeding time that maintain the overall nutritional balance while providing variety throughout the day and week. Ensure all calculations are mathematically accurate and quantities add up correctly."""
+Create 7 days (Monday-Sunday) with varied, nutritious, and practical recipes for each specific feeding time that maintain the overall nutritional balance while providing variety throughout the day and week."""
 
-    def generate_weekly_recipes(self, chicken_info: ChickenInfo) -> Dict[str, Any]:
-        """Generate weekly feed recipes based on feed calculation"""
-        
-        # First get the feed calculation
-        feed_calculation = self.generate_feed_calculation(chicken_info)
-        
+    def _weekly_calendar(self, feed_calculation: Dict[str, Any], chicken_info: ChickenInfo) -> Dict[str, Any]:
+        """Run the weekly recipe prompt and return the expanded calendar, before quantities are filled in"""
         logger.info(f"Generating weekly recipes for {chicken_info.count} {chicken_info.breed} chickens")
         
         # Create specific prompt for weekly recipes
         prompt = self._create_weekly_recipe_prompt(feed_calculation, chicken_info)
         
         # Call Nova Pro for weekly recipes
-        recipe_result = self._call_nova_pro(prompt)
+        recipe_result = self._call_nova_pro(prompt, stage="weekly_recipes")
+        return wire_format.expand_calendar(recipe_result.get("weekly_calendar", recipe_result), wire_format.WEEKLY_CALENDAR_LAYOUT)
+    
+    def _weekly_response(self, feed_calculation: Dict[str, Any], calendar: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill in the calendar quantities and combine it with the feed calculation"""
+        # The model only returns recipes and percentages; fill in every quantity
+        weekly_calendar = fill_weekly_quantities(
+            calendar,
+            feed_calculation.get("feed_calculation", {}).get("total_quantity_per_day_kg", 0)
+        )
         
         # Combine results with feed calculation and nutritional context
         response = {
-            "weekly_calendar": recipe_result.get("weekly_calendar", {}),
+            "weekly_calendar": weekly_calendar,
             "feed_calculation": feed_calculation.get("feed_calculation", {}),
             "nutritional_context": feed_calculation.get("nutritional_context", {}),
             "request_info": feed_calculation.get("request_info", {})
@@ -469,71 +514,7 @@ Chicken Details:
 
 Please provide a comprehensive recovery response in JSON format with the following structure. Return ONLY valid JSON without any markdown formatting or code blocks:
 
-{{
-    "recovery_feed_composition": {{
-        "crude_protein_percent": <percentage>,
-        "metabolizable_energy_kcal_per_kg": <value>,
-        "crude_fat_percent": <percentage>,
-        "crude_fiber_percent": <percentage>,
-        "calcium_percent": <percentage>,
-        "phosphorus_percent": <percentage>,
-        "lysine_percent": <percentage>,
-        "methionine_percent": <percentage>,
-        "vitamins": {{
-            "vitamin_a_iu_per_kg": <value>,
-            "vitamin_d3_iu_per_kg": <value>,
-            "vitamin_e_iu_per_kg": <value>
-        }},
-        "minerals": {{
-            "sodium_percent": <percentage>,
-            "chloride_percent": <percentage>,
-            "magnesium_percent": <percentage>
-        }},
-        "immune_support_nutrients": {{
-            "vitamin_c_mg_per_kg": <value>,
-            "zinc_mg_per_kg": <value>,
-            "selenium_mg_per_kg": <value>,
-            "probiotics_cfu_per_kg": <value>,
-            "omega_3_fatty_acids_percent": <percentage>
-        }}
-    }},
-    "daily_feed_amount_per_bird_kg": <amount in kg>,
-    "total_daily_feed_kg": <total for all birds>,
-    "disease_treatment": {{
-        "treatment_approach": "<overall treatment strategy>",
-        "feed_modifications": [
-            "<modification 1>",
-            "<modification 2>",
-            "<modification 3>"
-        ],
-        "supplements": [
-            "<supplement 1>",
-            "<supplement 2>",
-            "<supplement 3>"
-        ],
-        "environmental_changes": [
-            "<environmental change 1>",
-            "<environmental change 2>",
-            "<environmental change 3>"
-        ],
-        "monitoring_points": [
-            "<monitoring point 1>",
-            "<monitoring point 2>",
-            "<monitoring point 3>"
-        ],
-        "recovery_timeline": "<expected recovery period>"
-    }},
-    "feeding_schedule": [
-        "<feeding time 1>",
-        "<feeding time 2>",
-        "<feeding time 3>"
-    ],
-    "special_considerations": [
-        "<consideration 1>",
-        "<consideration 2>",
-        "<consideration 3>"
-    ]
-}}
+{self._response_format(wire_format.DISEASE_RECOVERY_EXAMPLE, key_map=wire_format.DISEASE_RECOVERY_KEYS)}
 
 Consider the following disease-specific nutritional requirements:
 
@@ -570,8 +551,8 @@ Seasonal adjustments:
 
 Focus on providing practical, actionable recovery recommendations that address the specific disease, severity, and environmental conditions while ensuring optimal nutrition for healing and recovery."""
 
-    def generate_disease_recovery_recommendation(self, disease_info: ChickenDiseaseInfo) -> Dict[str, Any]:
-        """Generate disease recovery feed recommendations using Nova Pro"""
+    def _recover(self, disease_info: ChickenDiseaseInfo) -> Dict[str, Any]:
+        """Run the disease recovery recommendation prompt"""
         
         # Auto-detect season
         season = self.get_current_season()
@@ -582,10 +563,15 @@ Focus on providing practical, actionable recovery recommendations that address t
         prompt = self._create_disease_recovery_prompt(disease_info, season)
         
         # Call Nova Pro
-        recommendation = self._call_nova_pro(prompt)
+        recommendation = wire_format.expand_keys(self._call_nova_pro(prompt, stage="disease_recovery"), wire_format.DISEASE_RECOVERY_KEYS)
         
         # Add metadata
-        recommendation["request_info"] = {
+        recommendation["request_info"] = self._disease_request_info(disease_info, season)
+        
+        return recommendation
+    
+    def _disease_request_info(self, disease_info: ChickenDiseaseInfo, season: str) -> Dict[str, Any]:
+        return {
             "processed_at": datetime.now().isoformat(),
             "chicken_count": disease_info.count,
             "breed": disease_info.breed,
@@ -594,8 +580,6 @@ Focus on providing practical, actionable recovery recommendations that address t
             "disease": disease_info.disease,
             "season_used": season
         }
-        
-        return recommendation
     
     def _create_disease_weekly_recipe_prompt(self, disease_recovery: Dict[str, Any], disease_info: ChickenDiseaseInfo) -> str:
         """Create prompt for generating weekly feed recipes based on disease recovery recommendations"""
@@ -627,108 +611,12 @@ Feeding Schedule: {feeding_schedule}
 
 Create a comprehensive weekly recovery feed recipe calendar. Return ONLY valid JSON without markdown formatting:
 
-{{
-    "weekly_calendar": {{
-        "week_start_date": "2024-01-15",
-        "total_weekly_kg": <total for 7 days>,
-        "daily_recipes": [
-            {{
-                "day": "Monday",
-                "feeding_recipes": [
-                    {{
-                        "feeding_time": "7:00 AM",
-                        "recipe": "Corn 35%, Soybean meal 30%, Wheat 15%, Fish meal 8%, Calcium carbonate 6%, Salt 2%, Vitamins 4%",
-                        "quantity_kg": <60% of daily amount>,
-                        "quantity_grams": <60% of daily amount in grams>,
-                        "nutritional_focus": "High protein for tissue repair and immune support",
-                        "recovery_benefits": "Supports healing and immune function",
-                        "ingredient_breakdown": [
-                            {{"ingredient_name": "Corn", "percentage": 35.0, "grams": <calculated>, "nutritional_contribution": "Energy for recovery"}},
-                            {{"ingredient_name": "Soybean meal", "percentage": 30.0, "grams": <calculated>, "nutritional_contribution": "High-quality protein for healing"}},
-                            {{"ingredient_name": "Wheat", "percentage": 15.0, "grams": <calculated>, "nutritional_contribution": "Additional energy"}},
-                            {{"ingredient_name": "Fish meal", "percentage": 8.0, "grams": <calculated>, "nutritional_contribution": "Essential amino acids"}},
-                            {{"ingredient_name": "Calcium carbonate", "percentage": 6.0, "grams": <calculated>, "nutritional_contribution": "Bone health"}},
-                            {{"ingredient_name": "Salt", "percentage": 2.0, "grams": <calculated>, "nutritional_contribution": "Electrolyte balance"}},
-                            {{"ingredient_name": "Vitamins", "percentage": 4.0, "grams": <calculated>, "nutritional_contribution": "Immune support"}}
-                        ]
-                    }},
-                    {{
-                        "feeding_time": "4:00 PM",
-                        "recipe": "Barley 30%, Fish meal 25%, Oats 20%, Corn 15%, Oyster shell 5%, Salt 2%, Vitamins 3%",
-                        "quantity_kg": <40% of daily amount>,
-                        "quantity_grams": <40% of daily amount in grams>,
-                        "nutritional_focus": "Enhanced protein and minerals for evening recovery",
-                        "recovery_benefits": "Supports overnight healing processes",
-                        "ingredient_breakdown": [
-                            {{"ingredient_name": "Barley", "percentage": 30.0, "grams": <calculated>, "nutritional_contribution": "Sustained energy"}},
-                            {{"ingredient_name": "Fish meal", "percentage": 25.0, "grams": <calculated>, "nutritional_contribution": "High protein for recovery"}},
-                            {{"ingredient_name": "Oats", "percentage": 20.0, "grams": <calculated>, "nutritional_contribution": "Fiber and energy"}},
-                            {{"ingredient_name": "Corn", "percentage": 15.0, "grams": <calculated>, "nutritional_contribution": "Carbohydrates"}},
-                            {{"ingredient_name": "Oyster shell", "percentage": 5.0, "grams": <calculated>, "nutritional_contribution": "Calcium for bone health"}},
-                            {{"ingredient_name": "Salt", "percentage": 2.0, "grams": <calculated>, "nutritional_contribution": "Electrolytes"}},
-                            {{"ingredient_name": "Vitamins", "percentage": 3.0, "grams": <calculated>, "nutritional_contribution": "Essential nutrients"}}
-                        ]
-                    }}
-                ],
-                "total_daily_kg": <daily amount>,
-                "recovery_notes": "High-protein diet for {disease_info.disease} recovery",
-                "special_considerations": ["Monitor appetite closely", "Ensure clean water access", "Watch for improvement signs"]
-            }},
-            {{
-                "day": "Tuesday",
-                "feeding_recipes": [
-                    {{
-                        "feeding_time": "8:00 AM",
-                        "recipe": "Different ingredient combination for variety",
-                        "quantity_kg": <50% of daily amount>,
-                        "quantity_grams": <50% of daily amount in grams>,
-                        "nutritional_focus": "Different focus for Tuesday",
-                        "recovery_benefits": "Different recovery benefits",
-                        "ingredient_breakdown": [
-                            {{"ingredient_name": "Different ingredient", "percentage": 40.0, "grams": <calculated>, "nutritional_contribution": "Different contribution"}}
-                        ]
-                    }},
-                    {{
-                        "feeding_time": "1:00 PM",
-                        "recipe": "Afternoon feeding with different ingredients",
-                        "quantity_kg": <30% of daily amount>,
-                        "quantity_grams": <30% of daily amount in grams>,
-                        "nutritional_focus": "Afternoon nutritional focus",
-                        "recovery_benefits": "Afternoon recovery benefits",
-                        "ingredient_breakdown": [
-                            {{"ingredient_name": "Another ingredient", "percentage": 45.0, "grams": <calculated>, "nutritional_contribution": "Another contribution"}}
-                        ]
-                    }},
-                    {{
-                        "feeding_time": "6:00 PM",
-                        "recipe": "Evening feeding with different ingredients",
-                        "quantity_kg": <20% of daily amount>,
-                        "quantity_grams": <20% of daily amount in grams>,
-                        "nutritional_focus": "Evening nutritional focus",
-                        "recovery_benefits": "Evening recovery benefits",
-                        "ingredient_breakdown": [
-                            {{"ingredient_name": "Evening ingredient", "percentage": 35.0, "grams": <calculated>, "nutritional_contribution": "Evening contribution"}}
-                        ]
-                    }}
-                ],
-                "total_daily_kg": <daily amount>,
-                "recovery_notes": "Different recovery approach for Tuesday",
-                "special_considerations": ["Different considerations for Tuesday"]
-            }}
-        ],
-        "weekly_recovery_goals": ["Support healing from {disease_info.disease}", "Boost immune function", "Maintain nutritional status"],
-        "preparation_notes": ["Mix ingredients thoroughly", "Store in cool, dry place", "Use within 15 days for freshness"],
-        "disease_specific_notes": ["Monitor for {disease_info.disease} symptoms", "Adjust feeding if appetite changes", "Consult veterinarian if no improvement"]
-    }}
-}}
-
-CRITICAL CALCULATION REQUIREMENTS:
-- The total_daily_feed_kg from disease recovery is: {disease_recovery.get('total_daily_feed_kg', 0)} kg
-- Each day's total_daily_kg MUST equal this exact amount
-- The sum of all feeding quantities in a day MUST equal total_daily_kg
-- All ingredient percentages in each feeding MUST add up to 100%
-- All ingredient grams in each feeding MUST add up to the feeding's quantity_grams
-- Convert kg to grams: 1 kg = 1000 grams
+{self._response_format(wire_format.DISEASE_WEEKLY_CALENDAR_EXAMPLE, layout=wire_format.DISEASE_WEEKLY_CALENDAR_LAYOUT)}
+
+QUANTITY RULES:
+- Do NOT write any kg or gram amounts, recipe strings or totals. They are calculated from the daily total of {disease_recovery.get('total_daily_feed_kg', 0)} kg after you respond
+- share_percent is the feeding's share of the day's feed; the shares of one day MUST add up to 100
+- All ingredient percentages in each feeding MUST add up to 100
 
 DAILY VARIATION REQUIREMENTS:
 - Create 7 completely different daily recipes (Monday through Sunday)
@@ -736,7 +624,7 @@ DAILY VARIATION REQUIREMENTS:
 - Vary the feeding times (morning, afternoon, evening combinations)
 - Each day should have unique ingredient combinations while maintaining nutritional balance
 - Progress recovery focus: early days more supportive, later days more restorative
-- Ensure each day's total equals the daily amount but distribute differently across meals
+- Distribute each day differently across meals through share_percent
 
 Disease-specific recipe guidelines:
 1. **{disease_info.disease}**: Focus on ingredients that support recovery from this specific disease
@@ -748,9 +636,8 @@ Disease-specific recipe guidelines:
 7. Vary recipes daily while maintaining recovery focus
 
 CRITICAL: Create 7 DIFFERENT daily recipes with VARIED feeding patterns:
-- Each day should have different ingredient combinations and quantities
+- Each day should have different ingredient combinations and meal shares
 - Vary the feeding times and meal distribution (some days 2 meals, some 3 meals)
-- Each day's total should equal the daily amount, but distribute differently across meals
 - Example: Monday might be 60% morning, 40% evening. Tuesday might be 50% morning, 30% afternoon, 20% evening
 - Make each day unique in both ingredients and feeding schedule
 - Progress the recovery focus throughout the week (early days more supportive, later days more restorative)
@@ -758,38 +645,341 @@ CRITICAL: Create 7 DIFFERENT daily recipes with VARIED feeding patterns:
 9. Ensure recipes are gentle on the digestive system
 10. Provide adequate energy for healing processes
 
-CALCULATION VALIDATION:
-- For each feeding: sum of all ingredient grams = quantity_grams
-- For each feeding: sum of all ingredient percentages = 100%
-- For each day: sum of all feeding quantities = total_daily_kg = {disease_recovery.get('total_daily_feed_kg', 0)} kg
-- Use realistic ingredient percentages (typically 5-50% per ingredient)
-- Provide detailed nutritional contribution for each ingredient
+Use realistic ingredient percentages (typically 5-50% per ingredient) and a short nutritional contribution for each ingredient.
 
-Create 7 days (Monday-Sunday) with varied, recovery-focused recipes that support healing from {disease_info.disease} while maintaining nutritional balance. Ensure all calculations are mathematically accurate and quantities add up correctly."""
+Create 7 days (Monday-Sunday) with varied, recovery-focused recipes that support healing from {disease_info.disease} while maintaining nutritional balance."""
 
-    def generate_disease_weekly_recipes(self, disease_info: ChickenDiseaseInfo) -> Dict[str, Any]:
-        """Generate weekly feed recipes for disease recovery"""
-        
-        # First get the disease recovery recommendation
-        disease_recovery = self.generate_disease_recovery_recommendation(disease_info)
-        
+    def _disease_weekly_calendar(self, disease_recovery: Dict[str, Any], disease_info: ChickenDiseaseInfo) -> Dict[str, Any]:
+        """Run the weekly recovery recipe prompt and return the expanded calendar, before quantities are filled in"""
         logger.info(f"Generating weekly recovery recipes for {disease_info.count} {disease_info.breed} chickens with {disease_info.disease}")
         
         # Create specific prompt for weekly recovery recipes
         prompt = self._create_disease_weekly_recipe_prompt(disease_recovery, disease_info)
         
         # Call Nova Pro for weekly recovery recipes
-        recipe_result = self._call_nova_pro(prompt)
+        recipe_result = self._call_nova_pro(prompt, stage="disease_weekly_recipes")
+        return wire_format.expand_calendar(recipe_result.get("weekly_calendar", recipe_result), wire_format.DISEASE_WEEKLY_CALENDAR_LAYOUT)
+    
+    def _disease_weekly_response(self, disease_recovery: Dict[str, Any], calendar: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill in the calendar quantities and combine it with the disease recovery recommendation"""
+        # The model only returns recipes and percentages; fill in every quantity
+        weekly_calendar = fill_weekly_quantities(calendar, disease_recovery.get("total_daily_feed_kg", 0))
         
         # Combine results with disease recovery context
         response = {
-            "weekly_calendar": recipe_result.get("weekly_calendar", {}),
+            "weekly_calendar": weekly_calendar,
             "disease_recovery": disease_recovery,
             "request_info": disease_recovery.get("request_info", {})
         }
         
         return response
     
+    # Speculative stages
+    
+    def _estimated_recommendation(self, chicken_info: ChickenInfo) -> Dict[str, Any]:
+        """Local stand-in for a recommendation, with just what the calculation and recipe prompts use"""
+        season = chicken_info.season or self.get_current_season()
+        return {
+            "feed_composition": estimate_feed_composition(chicken_info.age_weeks, chicken_info.purpose),
+            **estimate_daily_feed(
+                chicken_info.count, chicken_info.average_weight_kg, chicken_info.age_weeks,
+                chicken_info.purpose, chicken_info.environment, season
+            )
+        }
+    
+    def _estimated_feed_calculation(self, estimate: Dict[str, Any], chicken_info: ChickenInfo) -> Dict[str, Any]:
+        """Local stand-in for a feed calculation response, for the weekly recipe prompt"""
+        schedule = estimate_feeding_schedule(chicken_info.age_weeks, chicken_info.environment)
+        per_bird_g = estimate["daily_feed_amount_per_bird_kg"] * 1000
+        return {
+            "feed_calculation": {
+                "total_quantity_per_day_kg": estimate["total_daily_feed_kg"],
+                "quantity_per_chicken_g": round(per_bird_g, 2),
+                "quantity_per_meal_g": round(per_bird_g / len(schedule), 2),
+                "meals_per_day": len(schedule),
+                "feeding_schedule": schedule
+            },
+            "nutritional_context": {"feed_composition": estimate["feed_composition"]}
+        }
+    
+    def _record_speculation(self, stage: str, hit: bool):
+        with self._stats_lock:
+            self.speculation_stats[f"{stage}_{'hits' if hit else 'misses'}"] += 1
+        if not hit:
+            logger.info(f"Speculative {stage} missed, re-running it with the real recommendation")
+    
+    def _check_calculation(self, recommendation: Dict[str, Any], speculative_calculation: Optional[Dict[str, Any]], estimate: Dict[str, Any], chicken_info: ChickenInfo) -> Dict[str, Any]:
+        """Keep the speculative feed calculation if the estimated daily total was close enough, else re-run it
+        
+        The calculation only depends on the daily totals. When it is kept, the meal size is scaled to the real total.
+        """
+        if speculative_calculation is None:
+            return self._feed_calculation_response(recommendation, self._calculate_feed(recommendation, chicken_info))
+        calculation = speculative_calculation
+        hit = within_tolerance(
+            {"total_daily_feed_kg": estimate["total_daily_feed_kg"]}, recommendation, settings.SPECULATIVE_TOLERANCE
+        )
+        self._record_speculation("feed_calculation", hit)
+        if hit:
+            actual_total = recommendation.get("total_daily_feed_kg")
+            meal_g = calculation.get("quantity_per_meal_g")
+            if isinstance(actual_total, (int, float)) and isinstance(meal_g, (int, float)) and estimate["total_daily_feed_kg"]:
+                calculation["quantity_per_meal_g"] = round(meal_g * actual_total / estimate["total_daily_feed_kg"], 2)
+        else:
+            calculation = self._calculate_feed(recommendation, chicken_info)
+        return self._feed_calculation_response(recommendation, calculation)
+    
+    def _check_calendar(self, recommendation: Dict[str, Any], feed_calculation: Dict[str, Any], speculative_calendar: Optional[Dict[str, Any]], estimate: Dict[str, Any], chicken_info: ChickenInfo) -> Dict[str, Any]:
+        """Keep the speculative weekly calendar if its nutrient levels and meal count hold, else re-run it
+        
+        Recipe quantities are filled in from the real total later, so the recipes
+        only depend on the nutrient levels and on the number of meals.
+        """
+        if speculative_calendar is None:
+            return self._weekly_calendar(feed_calculation, chicken_info)
+        calendar = speculative_calendar
+        schedule = feed_calculation.get("feed_calculation", {}).get("feeding_schedule") or []
+        hit = (
+            within_tolerance(estimate["feed_composition"], recommendation.get("feed_composition", {}), settings.SPECULATIVE_TOLERANCE)
+            and all(len(day.get("feeding_recipes", [])) == len(schedule) for day in calendar.get("daily_recipes", []))
+        )
+        self._record_speculation("weekly_recipes", hit)
+        if not hit:
+            return self._weekly_calendar(feed_calculation, chicken_info)
+        for day in calendar.get("daily_recipes", []):
+            for feeding, feeding_time in zip(day["feeding_recipes"], schedule):
+                feeding["feeding_time"] = feeding_time
+        return calendar
+    
+    def _estimated_disease_recovery(self, disease_info: ChickenDiseaseInfo) -> Dict[str, Any]:
+        """Local stand-in for a disease recovery recommendation, for the weekly recovery recipe prompt"""
+        return {
+            "recovery_feed_composition": estimate_feed_composition(disease_info.age_weeks, diseased=True),
+            **estimate_daily_feed(
+                disease_info.count, disease_info.average_weight_kg, disease_info.age_weeks,
+                season=self.get_current_season(), diseased=True
+            ),
+            "feeding_schedule": estimate_feeding_schedule(disease_info.age_weeks)
+        }
+    
+    def _check_disease_calendar(self, disease_recovery: Dict[str, Any], speculative_calendar: Optional[Dict[str, Any]], estimate: Dict[str, Any], disease_info: ChickenDiseaseInfo) -> Dict[str, Any]:
+        """Keep the speculative recovery calendar if its nutrient levels hold, else re-run it
+        
+        Recovery recipes vary their meals from day to day, so only the nutrient levels are checked.
+        """
+        if speculative_calendar is None:
+            return self._disease_weekly_calendar(disease_recovery, disease_info)
+        hit = within_tolerance(
+            estimate["recovery_feed_composition"], disease_recovery.get("recovery_feed_composition", {}), settings.SPECULATIVE_TOLERANCE
+        )
+        self._record_speculation("disease_weekly_recipes", hit)
+        return speculative_calendar if hit else self._disease_weekly_calendar(disease_recovery, disease_info)
+    
+    # Degraded responses
+    
+    def _local_recommendation(self, chicken_info: ChickenInfo) -> Dict[str, Any]:
+        """A recommendation from local tables, in the same shape as the model's"""
+        season = chicken_info.season or self.get_current_season()
+        return {
+            "feed_composition": fallback.local_feed_composition(chicken_info.age_weeks, chicken_info.purpose),
+            **estimate_daily_feed(
+                chicken_info.count, chicken_info.average_weight_kg, chicken_info.age_weeks,
+                chicken_info.purpose, chicken_info.environment, season
+            ),
+            "seasonal_adjustments": dict(fallback.SEASONAL_ADJUSTMENTS),
+            "additional_recommendations": list(fallback.GENERAL_ADVICE),
+            "request_info": self._request_info(chicken_info, season)
+        }
+    
+    def _local_feed_calculation(self, recommendation: Dict[str, Any], chicken_info: ChickenInfo) -> Dict[str, Any]:
+        schedule = estimate_feeding_schedule(chicken_info.age_weeks, chicken_info.environment)
+        calculation = {
+            "quantity_per_meal_g": round(recommendation["daily_feed_amount_per_bird_kg"] * 1000 / len(schedule), 2),
+            "meals_per_day": len(schedule),
+            "feeding_schedule": schedule,
+            "storage_recommendations": list(fallback.PREPARATION_NOTES)
+        }
+        return self._feed_calculation_response(recommendation, calculation)
+    
+    def _local_disease_recovery(self, disease_info: ChickenDiseaseInfo) -> Dict[str, Any]:
+        season = self.get_current_season()
+        return {
+            "recovery_feed_composition": fallback.local_feed_composition(disease_info.age_weeks, diseased=True),
+            **estimate_daily_feed(
+                disease_info.count, disease_info.average_weight_kg, disease_info.age_weeks,
+                season=season, diseased=True
+            ),
+            "disease_treatment": fallback.local_disease_treatment(disease_info.disease),
+            "feeding_schedule": estimate_feeding_schedule(disease_info.age_weeks),
+            "special_considerations": list(fallback.GENERAL_ADVICE),
+            "request_info": self._disease_request_info(disease_info, season)
+        }
+    
+    def _degraded_response(self, name: str, chicken_info: Optional[ChickenInfo] = None, disease_info: Optional[ChickenDiseaseInfo] = None) -> Dict[str, Any]:
+        """What a pipeline answers from local tables while the model backend is down"""
+        if name in ("disease_recovery", "disease_weekly_recipes"):
+            recovery = self._local_disease_recovery(disease_info)
+            if name == "disease_recovery":
+                return recovery
+            ration = fallback.local_ration(disease_info.age_weeks, diseased=True)
+            calendar = fallback.local_calendar(
+                recovery["feeding_schedule"], ration, wire_format.DISEASE_WEEKLY_CALENDAR_LAYOUT, fallback.PREPARATION_NOTES
+            )
+            return self._disease_weekly_response(recovery, calendar)
+        
+        recommendation = self._local_recommendation(chicken_info)
+        if name == "feed_recommendation":
+            return recommendation
+        feed_calculation = self._local_feed_calculation(recommendation, chicken_info)
+        if name == "feed_calculation":
+            return feed_calculation
+        ration = fallback.local_ration(chicken_info.age_weeks, chicken_info.purpose)
+        calendar = fallback.local_calendar(
+            feed_calculation["feed_calculation"]["feeding_schedule"], ration, wire_format.WEEKLY_CALENDAR_LAYOUT, fallback.PREPARATION_NOTES
+        )
+        return self._weekly_response(feed_calculation, calendar)
+    
+    # Generation pipelines
+    
+    def _build_pipelines(self, speculative: bool) -> Dict[str, Pipeline]:
+        """The generation flows as stage graphs
+        
+        Sequential: recommendation -> feed_calculation -> calendar -> response.
+        Speculative: the calculation and calendar also start right away from local
+        estimates, and check nodes keep or re-run them once the recommendation is in.
+        A cached recommendation skips the speculative stages, as the real ones can
+        start at once.
+        """
+        model = {"timeout": settings.PIPELINE_STAGE_TIMEOUT}
+        cached = {**model, "cache_seconds": settings.PIPELINE_CACHE_SECONDS}
+        recommendation = Stage("recommendation", self._recommend, inputs=["chicken_info"], **cached)
+        disease_recovery = Stage("disease_recovery", self._recover, inputs=["disease_info"], **cached)
+        
+        if speculative:
+            calculation_stages = [
+                Stage("estimate", self._estimated_recommendation, inputs=["chicken_info"], inline=True),
+                recommendation,
+                Stage("speculative_calculation", lambda estimate, chicken_info: self._calculate_feed(estimate, chicken_info),
+                      inputs=["estimate", "chicken_info"], optional=True, speculates_on="recommendation", **model),
+                Stage("feed_calculation", self._check_calculation,
+                      inputs=["recommendation", "speculative_calculation", "estimate", "chicken_info"], **model)
+            ]
+            calendar_stages = [
+                Stage("estimated_calculation", self._estimated_feed_calculation, inputs=["estimate", "chicken_info"], inline=True),
+                Stage("speculative_calendar", lambda estimated_calculation, chicken_info: self._weekly_calendar(estimated_calculation, chicken_info),
+                      inputs=["estimated_calculation", "chicken_info"], optional=True, speculates_on="recommendation", **model),
+                Stage("calendar", self._check_calendar,
+                      inputs=["recommendation", "feed_calculation", "speculative_calendar", "estimate", "chicken_info"], **model)
+            ]
+            disease_stages = [
+                Stage("estimate", self._estimated_disease_recovery, inputs=["disease_info"], inline=True),
+                disease_recovery,
+                Stage("speculative_calendar", lambda estimate, disease_info: self._disease_weekly_calendar(estimate, disease_info),
+                      inputs=["estimate", "disease_info"], optional=True, speculates_on="disease_recovery", **model),
+                Stage("calendar", self._check_disease_calendar,
+                      inputs=["disease_recovery", "speculative_calendar", "estimate", "disease_info"], **model)
+            ]
+        else:
+            calculation_stages = [
+                recommendation,
+                Stage("feed_calculation", lambda recommendation, chicken_info: self._feed_calculation_response(recommendation, self._calculate_feed(recommendation, chicken_info)),
+                      inputs=["recommendation", "chicken_info"], **model)
+            ]
+            calendar_stages = [
+                Stage("calendar", self._weekly_calendar, inputs=["feed_calculation", "chicken_info"], **model)
+            ]
+            disease_stages = [
+                disease_recovery,
+                Stage("calendar", self._disease_weekly_calendar, inputs=["disease_recovery", "disease_info"], **model)
+            ]
+        
+        weekly_response = Stage("response", self._weekly_response, inputs=["feed_calculation", "calendar"], inline=True)
+        disease_response = Stage("response", self._disease_weekly_response, inputs=["disease_recovery", "calendar"], inline=True)
+        pipelines = [
+            Pipeline("feed_recommendation", ["chicken_info"], [recommendation], "recommendation", stage_pool),
+            Pipeline("feed_calculation", ["chicken_info"], calculation_stages, "feed_calculation", stage_pool),
+            Pipeline("weekly_recipes", ["chicken_info"], calculation_stages + calendar_stages + [weekly_response], "response", stage_pool),
+            Pipeline("disease_recovery", ["disease_info"], [disease_recovery], "disease_recovery", stage_pool),
+            Pipeline("disease_weekly_recipes", ["disease_info"], disease_stages + [disease_response], "response", stage_pool)
+        ]
+        return {pipeline.name: pipeline for pipeline in pipelines}
+    
+    def _pipeline(self, name: str) -> Pipeline:
+        with self._pipelines_lock:
+            if self.speculative not in self._pipelines:
+                self._pipelines[self.speculative] = self._build_pipelines(self.speculative)
+            return self._pipelines[self.speculative][name]
+    
+    def _run_pipeline(self, name: str, **inputs: Any) -> Dict[str, Any]:
+        """Run a generation pipeline and attach its per-stage timings to the response
+        
+        While the circuit breaker is open the answer comes from local tables instead, flagged degraded.
+        """
+        try:
+            response, timings = self._pipeline(name).run(**inputs)
+        except CircuitOpenError as e:
+            if not settings.DEGRADED_RESPONSES:
+                raise
+            logger.warning(f"Answering {name} from local tables: {e.detail}")
+            with self._stats_lock:
+                self.degraded_stats[name] += 1
+            response = self._degraded_response(name, **inputs)
+            response["degraded"] = True
+            return response
+        response["pipeline"] = timings
+        response["degraded"] = False
+        return response
+    
+    def model_stats(self) -> Dict[str, Any]:
+        """Calls, latency, tokens and cost per model tier, fallbacks per stage, hedging, circuit state and degraded responses"""
+        with self._stats_lock:
+            degraded = dict(self.degraded_stats)
+        return {
+            **self.model_router.stats(),
+            "hedging": self.hedger.stats(),
+            "circuit": self.breaker.stats(),
+            "degraded_responses": degraded
+        }
+    
+    def scheduler_stats(self) -> Dict[str, Any]:
+        """Slots in use, queue lengths, queue times against their SLOs per lane, and per-tenant counters"""
+        return self.scheduler.stats()
+    
+    def pipeline_stats(self) -> Dict[str, Any]:
+        """Per-stage run, cache, failure and timing counters of every pipeline built so far"""
+        with self._pipelines_lock:
+            pipelines = {
+                f"{name}{'' if speculative else '_sequential'}": pipeline.stats()
+                for speculative, built in self._pipelines.items()
+                for name, pipeline in built.items()
+            }
+        with self._stats_lock:
+            speculation = dict(self.speculation_stats)
+        return {"pipelines": pipelines, "speculation": speculation}
+    
+    def generate_feed_recommendation(self, chicken_info: ChickenInfo) -> Dict[str, Any]:
+        """Generate nutritional feed recommendation using Nova Pro"""
+        return self._run_pipeline("feed_recommendation", chicken_info=chicken_info)
+    
+    def generate_feed_calculation(self, chicken_info: ChickenInfo) -> Dict[str, Any]:
+        """Generate detailed feed calculations based on existing nutritional recommendation"""
+        return self._run_pipeline("feed_calculation", chicken_info=chicken_info)
+    
+    def generate_weekly_recipes(self, chicken_info: ChickenInfo) -> Dict[str, Any]:
+        """Generate weekly feed recipes based on feed calculation"""
+        return self._run_pipeline("weekly_recipes", chicken_info=chicken_info)
+    
+    def generate_disease_recovery_recommendation(self, disease_info: ChickenDiseaseInfo) -> Dict[str, Any]:
+        """Generate disease recovery feed recommendations using Nova Pro"""
+        return self._run_pipeline("disease_recovery", disease_info=disease_info)
+    
+    def generate_disease_weekly_recipes(self, disease_info: ChickenDiseaseInfo) -> Dict[str, Any]:
+        """Generate weekly feed recipes for disease recovery"""
+        return self._run_pipeline("disease_weekly_recipes", disease_info=disease_info)
+    
     def validate_credentials(self) -> bool:
-        """Validate current AWS credentials"""
-        return self.auth_service.validate_credentials()
+        """Validate current AWS credentials and refresh the cached result readiness reads"""
+        return self.credential_check.run() == VALID
+
+    def get_auth_info(self) -> Dict[str, Any]:
+        return {**self.auth_service.get_auth_info(), "credentials": self.credential_check.stats()}
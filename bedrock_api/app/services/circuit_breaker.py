@@ -0,0 +1,118 @@
+"""
+Circuit breaker around the model backend
+
+After `failure_threshold` consecutive failed calls the circuit opens, and
+calls fail at once with CircuitOpenError instead of each waiting out the
+Bedrock timeouts. While it is open a background thread probes the backend
+every `reset_seconds` (half-open) and closes the circuit on the first probe
+that succeeds.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(HTTPException):
+    """The model backend is considered down and was not called"""
+
+    def __init__(self, detail: str = "Model backend unavailable, circuit breaker is open"):
+        super().__init__(status_code=503, detail=detail)
+
+class CircuitBreaker:
+    """Counts consecutive backend failures and fails fast while the backend is down
+
+    `probe` is a cheap call to the backend that raises when it is still down.
+    Without a probe the circuit never closes by itself, only with reset().
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30, probe: Optional[Callable[[], Any]] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.probe = probe
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._closed = threading.Event()
+        self._closed.set()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless the circuit is closed"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            self._stats["rejected"] += 1
+        raise CircuitOpenError()
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> bool:
+        """Count a failed call; True when this failure opened the circuit"""
+        with self._lock:
+            self._stats["failures"] += 1
+            self.consecutive_failures += 1
+            if self.state != CLOSED or self.consecutive_failures < self.failure_threshold:
+                return False
+            self.state = OPEN
+            self.opened_at = datetime.now()
+            self._stats["opened"] += 1
+            self._closed.clear()
+        logger.error(f"Model backend circuit opened after {self.consecutive_failures} consecutive failures")
+        if self.probe is not None:
+            threading.Thread(target=self._probe_until_closed, name="bedrock-circuit-probe", daemon=True).start()
+        return True
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._closed.set()
+
+    def _probe_until_closed(self):
+        while not self._closed.wait(self.reset_seconds):
+            with self._lock:
+                self.state = HALF_OPEN
+                self._stats["probes"] += 1
+            try:
+                self.probe()
+            except Exception as e:
+                logger.warning(f"Model backend probe failed, circuit stays open: {e}")
+                with self._lock:
+                    self.state = OPEN
+                continue
+            logger.info("Model backend probe succeeded, circuit closed")
+            self.reset()
+
+    def wait_closed(self, timeout: Optional[float] = None) -> bool:
+        return self._closed.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "opened_at": self.opened_at.isoformat() if self.opened_at else None,
+                "failures": self._stats["failures"],
+                "opened": self._stats["opened"],
+                "rejected": self._stats["rejected"],
+                "probes": self._stats["probes"],
+            }
+
+def breaker_from_settings(probe: Optional[Callable[[], Any]] = None) -> CircuitBreaker:
+    return CircuitBreaker(settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS, probe)
@@ -0,0 +1,114 @@
+"""
+Background validation of the Bedrock credentials
+
+Validating the bearer token takes a real model call, so it does not run on
+the startup or request path. start() runs it on a daemon thread right after
+startup and again every `recheck_seconds`, and readiness reads the cached
+result. Until the first check finishes the status is pending, which counts as
+ready: requests are served, and a backend that is down is handled by the
+circuit breaker. Only a missing or rejected token makes the service not ready.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+VALID = "valid"
+INVALID = "invalid"
+UNCONFIGURED = "unconfigured"
+
+def missing_settings() -> list:
+    """Settings a Bedrock call needs that are not set"""
+    return [name for name in ("AWS_BEARER_TOKEN_BEDROCK", "AWS_REGION") if not getattr(settings, name)]
+
+class CredentialCheck:
+    """Runs `validate` off the request path and caches whether the credentials work
+
+    `validate` returns False for rejected credentials; an exception counts as
+    a failed check and leaves the previous status in place.
+    """
+
+    def __init__(self, validate: Callable[[], bool], recheck_seconds: float = 0):
+        self.validate = validate
+        self.recheck_seconds = recheck_seconds
+        self.status = PENDING
+        self.checked_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.checks = 0
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._checked = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status not in (INVALID, UNCONFIGURED)
+
+    def run(self) -> str:
+        """Validate now and return the new status"""
+        with self._run_lock:
+            missing = missing_settings()
+            error = None
+            if missing:
+                status = UNCONFIGURED
+                error = f"Missing {', '.join(missing)}"
+            else:
+                try:
+                    status = VALID if self.validate() else INVALID
+                except Exception as e:
+                    logger.warning(f"Credential check failed: {e}")
+                    status = self.status
+                    error = str(e)
+            with self._lock:
+                changed = status != self.status
+                self.status = status
+                self.error = error
+                self.checked_at = datetime.now()
+                self.checks += 1
+            self._checked.set()
+        if status == VALID and changed:
+            logger.info("🚀 AWS credentials validated")
+        elif status == INVALID:
+            logger.warning("⚠️  AWS credentials are invalid, the bearer token might be expired or incorrect")
+        return status
+
+    def start(self):
+        """Check on a background thread, and again every recheck_seconds if set"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run_until_stopped, name="bedrock-credential-check", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run_until_stopped(self):
+        while True:
+            self.run()
+            if self.recheck_seconds <= 0 or self._stopped.wait(self.recheck_seconds):
+                return
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the first check to finish; False on timeout"""
+        return self._checked.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": self.status,
+                "ready": self.ready,
+                "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+                "checks": self.checks,
+                "error": self.error,
+            }
+
+def credential_check_from_settings(validate: Callable[[], bool]) -> CredentialCheck:
+    return CredentialCheck(validate, settings.CREDENTIAL_RECHECK_SECONDS)
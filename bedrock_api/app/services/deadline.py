@@ -0,0 +1,80 @@
+"""
+Request deadlines for the generation pipelines
+
+A route creates a Deadline for each request and runs the service inside it.
+The deadline lives in a context variable, which the pipeline and hedging
+threads copy, so every stage and model call sees the request's deadline
+without it being passed through each method. Model calls shrink their read
+timeout to the time left, and the pipeline stops starting and waiting for
+stages once the deadline has passed or the client has gone away.
+"""
+import contextvars
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException
+
+class DeadlineExceeded(HTTPException):
+    """The request ran out of time, or its client disconnected"""
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=504, detail=detail)
+
+class Deadline:
+    """A point in time a request has to be answered by, which can also be cancelled"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.cancel_reason: Optional[str] = None
+        # Resolved on cancel, so threads waiting on futures can wait on this too
+        self.cancelled = Future()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.cancel_reason is not None or self.remaining() <= 0
+
+    def cancel(self, reason: str):
+        if self.cancel_reason is None:
+            self.cancel_reason = reason
+            self.cancelled.set_result(reason)
+
+    def error(self) -> DeadlineExceeded:
+        if self.cancel_reason is not None:
+            return DeadlineExceeded(f"Request abandoned: {self.cancel_reason}")
+        return DeadlineExceeded(f"Request deadline of {self.seconds:g}s exceeded")
+
+    def check(self):
+        """Raise DeadlineExceeded once the deadline has passed or was cancelled"""
+        if self.expired:
+            raise self.error()
+
+    def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call fn with this deadline as the current one"""
+        token = _current.set(self)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+_current: "contextvars.ContextVar[Optional[Deadline]]" = contextvars.ContextVar("request_deadline", default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+def check_deadline():
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.check()
+
+def read_timeout(configured: float) -> Tuple[float, bool]:
+    """The read timeout for a model call, and whether the deadline shortened it"""
+    deadline = current_deadline()
+    if deadline is None or deadline.remaining() >= configured:
+        return configured, False
+    # botocore needs a positive timeout; an expired deadline is caught before the call
+    return max(deadline.remaining(), 0.1), True
@@ -0,0 +1,167 @@
+"""
+Rule-based recommendations for when the model backend is unavailable
+
+While the circuit breaker is open the endpoints answer from these tables
+instead of the model: standard rations and nutrient levels by diet (see
+feed_estimates.feed_group), with the daily amounts from feed_estimates. They
+are conservative textbook values rather than advice for the particular flock,
+and every response built from them is flagged degraded.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.feed_estimates import estimate_feed_composition, feed_group
+from app.services.wire_format import WEEKDAYS
+
+# Nutrient levels besides the headline ones in feed_estimates, by diet
+COMPOSITION_DETAILS = {
+    "starter": {"crude_fat_percent": 4.0, "crude_fiber_percent": 4.0, "lysine_percent": 1.2, "methionine_percent": 0.5},
+    "grower": {"crude_fat_percent": 3.5, "crude_fiber_percent": 4.5, "lysine_percent": 0.9, "methionine_percent": 0.4},
+    "eggs": {"crude_fat_percent": 3.5, "crude_fiber_percent": 5.0, "lysine_percent": 0.8, "methionine_percent": 0.38},
+    "breeding": {"crude_fat_percent": 3.5, "crude_fiber_percent": 5.0, "lysine_percent": 0.8, "methionine_percent": 0.38},
+    "meat production": {"crude_fat_percent": 5.0, "crude_fiber_percent": 3.5, "lysine_percent": 1.1, "methionine_percent": 0.48},
+    "recovery": {"crude_fat_percent": 4.0, "crude_fiber_percent": 4.0, "lysine_percent": 1.0, "methionine_percent": 0.45},
+}
+VITAMINS = {"vitamin_a_iu_per_kg": 10000, "vitamin_d3_iu_per_kg": 3000, "vitamin_e_iu_per_kg": 30}
+MINERALS = {"sodium_percent": 0.18, "chloride_percent": 0.2, "magnesium_percent": 0.06}
+IMMUNE_SUPPORT = {
+    "vitamin_c_mg_per_kg": 200, "zinc_mg_per_kg": 100, "selenium_mg_per_kg": 0.3,
+    "probiotics_cfu_per_kg": 1e9, "omega_3_fatty_acids_percent": 0.5,
+}
+
+INGREDIENT_ROLES = {
+    "Corn": "Primary energy source",
+    "Soybean meal": "Protein and amino acids",
+    "Fish meal": "Essential amino acids",
+    "Wheat bran": "Fiber",
+    "Oats": "Gentle fiber and energy",
+    "Vegetable oil": "Concentrated energy",
+    "Oyster shell": "Calcium for eggshells",
+    "Limestone": "Calcium for bones",
+    "Dicalcium phosphate": "Phosphorus and calcium",
+    "Vitamin-mineral premix": "Vitamins and trace minerals",
+    "Vitamin-mineral premix with probiotics": "Vitamins, trace minerals and gut support",
+    "Salt": "Electrolyte balance",
+}
+
+# Standard rations by diet, in percent of the mix
+RATIONS: Dict[str, List[Tuple[str, float]]] = {
+    "starter": [("Corn", 55), ("Soybean meal", 33), ("Fish meal", 4), ("Vegetable oil", 3), ("Dicalcium phosphate", 2), ("Limestone", 1.5), ("Vitamin-mineral premix", 1), ("Salt", 0.5)],
+    "grower": [("Corn", 60), ("Soybean meal", 25), ("Wheat bran", 8), ("Vegetable oil", 2), ("Limestone", 2), ("Dicalcium phosphate", 1.5), ("Vitamin-mineral premix", 1), ("Salt", 0.5)],
+    "eggs": [("Corn", 56), ("Soybean meal", 24), ("Oyster shell", 9), ("Wheat bran", 5), ("Vegetable oil", 2.5), ("Dicalcium phosphate", 1.5), ("Vitamin-mineral premix", 1.5), ("Salt", 0.5)],
+    "breeding": [("Corn", 57), ("Soybean meal", 22), ("Wheat bran", 8), ("Oyster shell", 7), ("Vegetable oil", 2), ("Vitamin-mineral premix", 2), ("Dicalcium phosphate", 1.5), ("Salt", 0.5)],
+    "meat production": [("Corn", 58), ("Soybean meal", 30), ("Vegetable oil", 5), ("Fish meal", 3), ("Dicalcium phosphate", 1.5), ("Limestone", 1), ("Vitamin-mineral premix", 1), ("Salt", 0.5)],
+    "recovery": [("Corn", 50), ("Soybean meal", 28), ("Oats", 8), ("Oyster shell", 6), ("Vegetable oil", 3), ("Vitamin-mineral premix with probiotics", 3), ("Dicalcium phosphate", 1.5), ("Salt", 0.5)],
+}
+
+FEEDING_FOCUS = ["Energy for the day's activity", "Protein and minerals", "Energy and calcium for the night"]
+
+GENERAL_ADVICE = [
+    "This is a standard ration from local tables because the nutrition model is unavailable; request a tailored plan later",
+    "Provide clean, fresh water at all times",
+    "Adjust amounts if birds leave feed or clean the feeders very quickly",
+]
+PREPARATION_NOTES = [
+    "Mix dry ingredients thoroughly before adding oil",
+    "Store feed in a cool, dry, rodent-proof place",
+    "Use mixed feed within two weeks",
+]
+SEASONAL_ADJUSTMENTS = {
+    "energy_adjustment": "Standard energy level; feed up to 5% more in cold weather",
+    "protein_adjustment": "Standard protein level for the diet",
+    "water_considerations": "Check waterers twice a day, more often in hot weather",
+}
+
+DISEASE_TREATMENT = {
+    "respiratory_infection": {
+        "treatment_approach": "Support the respiratory and immune systems and keep dust down",
+        "feed_modifications": ["Moisten feed slightly to reduce dust", "Keep vitamin A and E levels up"],
+        "supplements": ["Vitamin A", "Vitamin E", "Electrolytes in water"],
+        "environmental_changes": ["Improve ventilation without drafts", "Keep litter dry"],
+        "recovery_timeline": "2-3 weeks",
+    },
+    "coccidiosis": {
+        "treatment_approach": "Easily digested feed with gut support alongside veterinary treatment",
+        "feed_modifications": ["Use finely ground, easily digested ingredients", "Avoid sudden ration changes"],
+        "supplements": ["Probiotics", "Vitamin K", "Electrolytes in water"],
+        "environmental_changes": ["Replace wet litter", "Clean feeders and waterers daily"],
+        "recovery_timeline": "1-2 weeks",
+    },
+    "mites_lice": {
+        "treatment_approach": "Extra protein and B vitamins for skin and feather repair alongside parasite control",
+        "feed_modifications": ["Keep protein at the upper end of the range"],
+        "supplements": ["B-complex vitamins", "Zinc"],
+        "environmental_changes": ["Treat perches and nest boxes", "Provide a dust bath"],
+        "recovery_timeline": "2-4 weeks",
+    },
+    "egg_binding": {
+        "treatment_approach": "Calcium and vitamin D3 for muscle function, without excess energy",
+        "feed_modifications": ["Offer oyster shell free choice", "Avoid energy-dense treats"],
+        "supplements": ["Calcium", "Vitamin D3"],
+        "environmental_changes": ["Provide a quiet, warm nest area"],
+        "recovery_timeline": "1-2 weeks",
+    },
+    "marek_disease": {
+        "treatment_approach": "Immune and antioxidant support with low stress; consult a veterinarian",
+        "feed_modifications": ["Keep the ration palatable and consistent"],
+        "supplements": ["Vitamin E", "Selenium", "Vitamin C"],
+        "environmental_changes": ["Isolate affected birds", "Reduce handling and noise"],
+        "recovery_timeline": "Ongoing management",
+    },
+    "newcastle_disease": {
+        "treatment_approach": "Energy-dense, palatable feed and immune support; report to the veterinary authority",
+        "feed_modifications": ["Offer small, frequent meals of palatable feed"],
+        "supplements": ["Vitamin C", "Electrolytes in water"],
+        "environmental_changes": ["Isolate the flock", "Disinfect equipment and restrict visitors"],
+        "recovery_timeline": "2-4 weeks for survivors",
+    },
+}
+MONITORING_POINTS = ["Feed and water intake", "Droppings", "Weight and activity", "Mortality"]
+
+def local_feed_composition(age_weeks: int, purpose: Optional[str] = None, diseased: bool = False) -> Dict[str, Any]:
+    """A full feed composition for the flock's diet"""
+    group = feed_group(age_weeks, purpose, diseased)
+    composition = {
+        **estimate_feed_composition(age_weeks, purpose, diseased),
+        **COMPOSITION_DETAILS[group],
+        "vitamins": dict(VITAMINS),
+        "minerals": dict(MINERALS),
+    }
+    if diseased:
+        composition["immune_support_nutrients"] = dict(IMMUNE_SUPPORT)
+    return composition
+
+def local_ration(age_weeks: int, purpose: Optional[str] = None, diseased: bool = False) -> List[Dict[str, Any]]:
+    return [
+        {"ingredient_name": name, "percentage": percentage, "nutritional_contribution": INGREDIENT_ROLES[name]}
+        for name, percentage in RATIONS[feed_group(age_weeks, purpose, diseased)]
+    ]
+
+def local_disease_treatment(disease: str) -> Dict[str, Any]:
+    treatment = DISEASE_TREATMENT.get(disease, DISEASE_TREATMENT["respiratory_infection"])
+    return {**treatment, "monitoring_points": list(MONITORING_POINTS)}
+
+def local_calendar(schedule: List[str], ration: List[Dict[str, Any]], layout: Dict[str, Any], notes: List[str]) -> Dict[str, Any]:
+    """A week of the same ration at every feeding, in the expanded calendar shape before quantities
+
+    `notes` fill the calendar's lists; the feedings split the day evenly.
+    """
+    def feeding(index: int, feeding_time: str) -> Dict[str, Any]:
+        recipe = {"feeding_time": feeding_time}
+        recipe["nutritional_focus"] = FEEDING_FOCUS[min(index, len(FEEDING_FOCUS) - 1)]
+        if "recovery_benefits" in layout["feeding_fields"]:
+            recipe["recovery_benefits"] = "Steady, easily digested nutrition for recovery"
+        recipe["ingredient_breakdown"] = [dict(ingredient) for ingredient in ration]
+        return recipe
+
+    return {
+        "daily_recipes": [
+            {
+                "day": day,
+                "feeding_recipes": [feeding(index, feeding_time) for index, feeding_time in enumerate(schedule)],
+                layout["day_notes"]: "Standard ration from local tables",
+                "special_considerations": ["Check water", "Watch appetite"],
+            }
+            for day in WEEKDAYS
+        ],
+        **{name: list(notes) for name in layout["lists"].values()},
+    }
@@ -0,0 +1,82 @@
+"""
+Local estimates of what the later pipeline stages need from a recommendation
+
+The feed calculation and weekly recipe prompts only use a few numbers from the
+recommendation: the daily feed totals, the headline nutrient levels and the
+feeding schedule. These rules of thumb predict them from the flock details, so
+the later stages can start before the recommendation arrives and be checked
+against it afterwards.
+"""
+from typing import Any, Dict, List, Optional
+
+# Daily feed intake as a fraction of body weight, by age in weeks (upper bound)
+FEED_INTAKE_BY_AGE = [(4, 0.10), (8, 0.085), (18, 0.065), (None, 0.055)]
+
+PURPOSE_INTAKE = {"meat production": 1.10, "breeding": 1.0, "eggs": 1.0}
+ENVIRONMENT_INTAKE = {"free range": 1.10, "organic": 1.05, "barn": 1.0, "battery cage": 0.95}
+SEASON_INTAKE = {"winter": 1.05, "summer": 0.95}
+# Sick birds eat less
+DISEASE_INTAKE = 0.90
+
+# Headline nutrient levels by stage: (max age in weeks, purpose) -> composition
+STARTER = {"crude_protein_percent": 21.0, "metabolizable_energy_kcal_per_kg": 2950, "calcium_percent": 1.0, "phosphorus_percent": 0.45}
+GROWER = {"crude_protein_percent": 17.0, "metabolizable_energy_kcal_per_kg": 2900, "calcium_percent": 0.9, "phosphorus_percent": 0.40}
+ADULT_COMPOSITION = {
+    "eggs": {"crude_protein_percent": 16.5, "metabolizable_energy_kcal_per_kg": 2750, "calcium_percent": 3.8, "phosphorus_percent": 0.40},
+    "breeding": {"crude_protein_percent": 16.0, "metabolizable_energy_kcal_per_kg": 2800, "calcium_percent": 3.2, "phosphorus_percent": 0.40},
+    "meat production": {"crude_protein_percent": 19.0, "metabolizable_energy_kcal_per_kg": 3150, "calcium_percent": 0.85, "phosphorus_percent": 0.42},
+}
+# Recovery diets carry more protein; the purpose of a sick flock is not known
+RECOVERY_COMPOSITION = {"crude_protein_percent": 18.0, "metabolizable_energy_kcal_per_kg": 2850, "calcium_percent": 2.5, "phosphorus_percent": 0.42}
+
+TWO_MEALS = ["7:00 AM", "4:00 PM"]
+THREE_MEALS = ["7:00 AM", "12:00 PM", "5:00 PM"]
+
+def estimate_daily_feed(
+    count: int,
+    average_weight_kg: float,
+    age_weeks: int,
+    purpose: Optional[str] = None,
+    environment: Optional[str] = None,
+    season: Optional[str] = None,
+    diseased: bool = False,
+) -> Dict[str, float]:
+    """Per-bird and flock daily feed in kg"""
+    fraction = next(share for max_age, share in FEED_INTAKE_BY_AGE if max_age is None or age_weeks <= max_age)
+    fraction *= PURPOSE_INTAKE.get(purpose, 1.0) * ENVIRONMENT_INTAKE.get(environment, 1.0) * SEASON_INTAKE.get(season, 1.0)
+    if diseased:
+        fraction *= DISEASE_INTAKE
+
+    per_bird = round(average_weight_kg * fraction, 3)
+    return {"daily_feed_amount_per_bird_kg": per_bird, "total_daily_feed_kg": round(per_bird * count, 2)}
+
+def feed_group(age_weeks: int, purpose: Optional[str] = None, diseased: bool = False) -> str:
+    """Which diet a flock is on: starter, grower, recovery or its adult purpose"""
+    if age_weeks <= 6:
+        return "starter"
+    if age_weeks <= 18:
+        return "grower"
+    if diseased:
+        return "recovery"
+    return purpose if purpose in ADULT_COMPOSITION else "eggs"
+
+def estimate_feed_composition(age_weeks: int, purpose: Optional[str] = None, diseased: bool = False) -> Dict[str, float]:
+    group = feed_group(age_weeks, purpose, diseased)
+    return dict({"starter": STARTER, "grower": GROWER, "recovery": RECOVERY_COMPOSITION}.get(group) or ADULT_COMPOSITION[group])
+
+def estimate_feeding_schedule(age_weeks: int, environment: Optional[str] = None) -> List[str]:
+    """Young birds and caged birds get three meals, everyone else two"""
+    return list(THREE_MEALS if age_weeks <= 8 or environment == "battery cage" else TWO_MEALS)
+
+def within_tolerance(estimate: Dict[str, Any], actual: Dict[str, Any], tolerance: float) -> bool:
+    """Whether every estimated number is within a relative tolerance of the actual one
+
+    Values the actual side does not give as numbers cannot disagree and are skipped.
+    """
+    for key, estimated in estimate.items():
+        value = actual.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        if abs(value - estimated) > tolerance * max(abs(value), 1e-9):
+            return False
+    return True
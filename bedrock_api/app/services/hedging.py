@@ -0,0 +1,178 @@
+"""
+Hedged model calls for tail latency
+
+A call that has not answered by a percentile of recent latency gets a
+duplicate, usually to a secondary region, and whichever answers first wins.
+Hedges are capped at a share of all calls so the extra spend stays bounded.
+boto3 cannot abort a request in flight, so the losing call is abandoned: its
+answer is discarded when it arrives.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class LatencyWindow:
+    """The most recent successful call durations, in seconds"""
+
+    def __init__(self, size: int):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, round(percent / 100 * len(samples)) - 1))
+        return samples[index]
+
+class Hedger:
+    """Runs a call and, when it is slow and the budget allows, a duplicate of it
+
+    Latency is tracked per key (the model tier), since tiers answer at
+    different speeds. No hedge is sent until a key has `min_samples` calls.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        enabled: bool = True,
+        percentile: float = 95,
+        min_samples: int = 20,
+        window: int = 200,
+        budget_percent: float = 10,
+    ):
+        self.executor = executor
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.budget_percent = budget_percent
+        self._latency: Dict[str, LatencyWindow] = {}
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    def _window(self, key: str) -> LatencyWindow:
+        with self._lock:
+            if key not in self._latency:
+                self._latency[key] = LatencyWindow(self.window)
+            return self._latency[key]
+
+    def delay(self, key: str) -> Optional[float]:
+        """Seconds to wait before hedging a call, None while there is too little history"""
+        window = self._window(key)
+        if len(window) < self.min_samples:
+            return None
+        return window.percentile(self.percentile)
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self._stats["hedged"] + 1 > self.budget_percent / 100 * self._stats["calls"]:
+                self._stats["budget_denied"] += 1
+                return False
+            self._stats["hedged"] += 1
+            return True
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _submit(self, key: str, call: Callable[[], T]) -> Future:
+        started = time.perf_counter()
+
+        def timed() -> T:
+            result = call()
+            self._window(key).add(time.perf_counter() - started)
+            return result
+
+        # The call sees the caller's context, and so its request deadline
+        return self.executor.submit(contextvars.copy_context().run, timed)
+
+    def run(self, key: str, primary: Callable[[], T], hedge: Callable[[], T]) -> T:
+        """Return the first successful answer of `primary` and, if sent, `hedge`
+
+        A failure before the hedge delay is raised as is; hedging is for slow
+        calls, not a retry. Once both are in flight, one failing leaves the
+        other to answer, and if both fail the primary's error is raised.
+        """
+        if not self.enabled:
+            return primary()
+
+        self._count("calls")
+        delay = self.delay(key)
+        if delay is None:
+            started = time.perf_counter()
+            result = primary()
+            self._window(key).add(time.perf_counter() - started)
+            return result
+
+        first = self._submit(key, primary)
+        done, _ = wait([first], timeout=delay)
+        if done or not self._take_budget():
+            return first.result()
+
+        logger.info(f"Hedging {key} call after {delay:.2f}s")
+        second = self._submit(key, hedge)
+        running = {first: "primary", second: "hedge"}
+        errors: Dict[str, BaseException] = {}
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors[name] = e
+                    continue
+                for loser in running:
+                    loser.cancel()
+                self._count(f"{name}_wins")
+                return result
+        self._count("both_failed")
+        raise errors["primary"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            keys = list(self._latency)
+        delays = {key: self.delay(key) for key in keys}
+        hedged = stats.get("hedged", 0)
+        return {
+            "enabled": self.enabled,
+            "calls": stats.get("calls", 0),
+            "hedged": hedged,
+            "hedge_wins": stats.get("hedge_wins", 0),
+            "primary_wins": stats.get("primary_wins", 0),
+            "both_failed": stats.get("both_failed", 0),
+            "budget_denied": stats.get("budget_denied", 0),
+            "hedge_win_rate": round(stats.get("hedge_wins", 0) / hedged, 3) if hedged else None,
+            "hedge_delay_seconds": {key: None if delay is None else round(delay, 3) for key, delay in delays.items()},
+        }
+
+def hedger_from_settings(executor: Executor) -> Hedger:
+    return Hedger(
+        executor,
+        enabled=settings.HEDGE_REQUESTS,
+        percentile=settings.HEDGE_PERCENTILE,
+        min_samples=settings.HEDGE_MIN_SAMPLES,
+        window=settings.HEDGE_WINDOW,
+        budget_percent=settings.HEDGE_BUDGET_PERCENT,
+    )
@@ -0,0 +1,88 @@
+"""
+Per-stage model routing for the generation pipelines
+
+Stages that only reshape numbers they are given run on a faster, cheaper
+model tier, while composition and disease stages stay on the standard model.
+A fast answer that does not validate is retried on the standard tier. Calls,
+latency, tokens and cost are counted per tier.
+"""
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.config import settings
+
+class ModelTier:
+    """A Bedrock model id with its on-demand prices in USD per 1,000 tokens"""
+
+    def __init__(self, name: str, model_id: str, input_price_per_1k: float, output_price_per_1k: float):
+        self.name = name
+        self.model_id = model_id
+        self.input_price_per_1k = input_price_per_1k
+        self.output_price_per_1k = output_price_per_1k
+
+    def cost(self, usage: Dict[str, Any]) -> float:
+        return (
+            usage.get("inputTokens", 0) / 1000 * self.input_price_per_1k
+            + usage.get("outputTokens", 0) / 1000 * self.output_price_per_1k
+        )
+
+class ModelRouter:
+    """Picks the tier for each stage and keeps per-tier counters"""
+
+    def __init__(self, standard: ModelTier, fast: Optional[ModelTier] = None, fast_stages: Iterable[str] = ()):
+        self.standard = standard
+        # Without a distinct fast model every stage runs on the standard tier
+        self.fast = fast if fast and fast.model_id and fast.model_id != standard.model_id else None
+        self.fast_stages = set(fast_stages)
+        self._lock = threading.Lock()
+        self._stats = {
+            tier.name: {"model_id": tier.model_id, "calls": 0, "errors": 0, "seconds_total": 0.0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+            for tier in (standard, self.fast) if tier
+        }
+        self._fallbacks = Counter()
+
+    def tier_for(self, stage: Optional[str]) -> ModelTier:
+        if self.fast and stage in self.fast_stages:
+            return self.fast
+        return self.standard
+
+    def record_call(self, tier: ModelTier, seconds: float, usage: Optional[Dict[str, Any]] = None, error: bool = False):
+        usage = usage or {}
+        with self._lock:
+            stats = self._stats[tier.name]
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["seconds_total"] += seconds
+            stats["input_tokens"] += usage.get("inputTokens", 0)
+            stats["output_tokens"] += usage.get("outputTokens", 0)
+            stats["cost_usd"] += tier.cost(usage)
+
+    def record_fallback(self, stage: str):
+        with self._lock:
+            self._fallbacks[stage] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tiers = {
+                name: {
+                    **stats,
+                    "seconds_total": round(stats["seconds_total"], 3),
+                    "seconds_mean": round(stats["seconds_total"] / stats["calls"], 3) if stats["calls"] else None,
+                    "cost_usd": round(stats["cost_usd"], 6),
+                    "cost_per_call_usd": round(stats["cost_usd"] / stats["calls"], 6) if stats["calls"] else None,
+                }
+                for name, stats in self._stats.items()
+            }
+            return {
+                "tiers": tiers,
+                "fast_stages": sorted(self.fast_stages) if self.fast else [],
+                "fallbacks": dict(self._fallbacks),
+            }
+
+def router_from_settings() -> ModelRouter:
+    return ModelRouter(
+        standard=ModelTier("standard", settings.BEDROCK_MODEL_ID, settings.MODEL_INPUT_PRICE_PER_1K, settings.MODEL_OUTPUT_PRICE_PER_1K),
+        fast=ModelTier("fast", settings.BEDROCK_FAST_MODEL_ID, settings.FAST_MODEL_INPUT_PRICE_PER_1K, settings.FAST_MODEL_OUTPUT_PRICE_PER_1K),
+        fast_stages=settings.FAST_MODEL_STAGES,
+    )
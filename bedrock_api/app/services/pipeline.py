@@ -0,0 +1,295 @@
+"""
+Small DAG executor for the Bedrock generation pipelines
+
+A pipeline is a set of named stages. Each stage names the values it takes,
+which are request inputs or the outputs of other stages, and the type it
+returns. Stages run on a thread pool as soon as their inputs are ready, so
+independent stages run at the same time. A stage can cache its output by
+input, have a timeout, and be optional, in which case a failure hands None to
+the stages that depend on it. A speculative stage names the stage it stands in
+for, and is skipped when that stage's value is already known, e.g. from cache. Every run records how long each stage took.
+A run inside a request deadline (see deadline.py) stops starting and waiting
+for stages once the deadline has passed or was cancelled.
+"""
+import contextvars
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.services.deadline import current_deadline
+
+logger = logging.getLogger(__name__)
+
+class Stage:
+    """One node of a pipeline
+
+    `fn` is called with the named inputs as keyword arguments. Inline stages
+    run on the calling thread, which suits cheap local computations. A stage
+    with `speculates_on` is skipped, handing None to its dependents, when the
+    named stage is already done by the time this one could start.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        inputs: Sequence[str] = (),
+        output: type = dict,
+        timeout: Optional[float] = None,
+        cache_seconds: float = 0,
+        optional: bool = False,
+        inline: bool = False,
+        cache_size: int = 256,
+        speculates_on: Optional[str] = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.output = output
+        self.timeout = timeout
+        self.cache_seconds = cache_seconds
+        self.optional = optional
+        self.inline = inline
+        self.cache_size = cache_size
+        self.speculates_on = speculates_on
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def cache_key(self, values: Dict[str, Any]) -> str:
+        def default(value):
+            return value.model_dump() if isinstance(value, BaseModel) else str(value)
+
+        payload = json.dumps({name: values[name] for name in self.inputs}, sort_keys=True, default=default)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def cached(self, key: str) -> Tuple[bool, Any]:
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return False, None
+            if time.monotonic() - entry[0] > self.cache_seconds:
+                del self._cache[key]
+                return False, None
+            self._cache.move_to_end(key)
+            # Callers may modify what they get, so every reader gets its own copy
+            return True, copy.deepcopy(entry[1])
+
+    def store(self, key: str, value: Any):
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), copy.deepcopy(value))
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+class Pipeline:
+    """A DAG of stages with named request inputs and one output stage"""
+
+    def __init__(self, name: str, inputs: Iterable[str], stages: List[Stage], output: str, executor: Executor):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages or stage.name in self.inputs:
+                raise ValueError(f"Pipeline {name}: duplicate name {stage.name}")
+            self.stages[stage.name] = stage
+        if output not in self.stages:
+            raise ValueError(f"Pipeline {name}: unknown output stage {output}")
+        for stage in stages:
+            if stage.speculates_on is not None and stage.speculates_on not in self.stages:
+                raise ValueError(f"Pipeline {name}: stage {stage.name} speculates on unknown stage {stage.speculates_on}")
+        self.output = output
+        self.executor = executor
+        self.order = self._topological_order()
+        self.metrics = {stage: {"runs": 0, "cache_hits": 0, "skips": 0, "failures": 0, "timeouts": 0, "seconds_total": 0.0, "seconds_max": 0.0} for stage in self.stages}
+        self._metrics_lock = threading.Lock()
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str, path: Tuple[str, ...]):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Pipeline {self.name}: cycle {' -> '.join(path + (name,))}")
+            state[name] = "visiting"
+            for dependency in self.stages[name].inputs:
+                if dependency in self.stages:
+                    visit(dependency, path + (name,))
+                elif dependency not in self.inputs:
+                    raise ValueError(f"Pipeline {self.name}: stage {name} needs unknown input {dependency}")
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, ())
+        return order
+
+    def _record(self, name: str, seconds: float, status: str):
+        with self._metrics_lock:
+            metrics = self.metrics[name]
+            if status == "cached":
+                metrics["cache_hits"] += 1
+                return
+            if status == "skipped":
+                metrics["skips"] += 1
+                return
+            metrics["runs"] += 1
+            metrics["seconds_total"] += seconds
+            metrics["seconds_max"] = max(metrics["seconds_max"], seconds)
+            if status == "failed":
+                metrics["failures"] += 1
+            elif status == "timed_out":
+                metrics["timeouts"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            return {
+                name: {
+                    **metrics,
+                    "seconds_total": round(metrics["seconds_total"], 4),
+                    "seconds_max": round(metrics["seconds_max"], 4),
+                    "seconds_mean": round(metrics["seconds_total"] / metrics["runs"], 4) if metrics["runs"] else None,
+                }
+                for name, metrics in self.metrics.items()
+            }
+
+    def _call(self, stage: Stage, values: Dict[str, Any]) -> Any:
+        result = stage.fn(**{name: values[name] for name in stage.inputs})
+        if result is not None and not isinstance(result, stage.output):
+            raise TypeError(f"Stage {stage.name} returned {type(result).__name__}, expected {stage.output.__name__}")
+        return result
+
+    def run(self, **inputs: Any) -> Tuple[Any, Dict[str, Any]]:
+        """Run every stage and return (output, timings)
+
+        Raises HTTPException 504 when a required stage times out or the
+        request deadline passes with stages left. Exceptions from a required
+        stage are re-raised; stages that have not started yet are cancelled.
+        """
+        missing = set(self.inputs) - set(inputs)
+        if missing:
+            raise ValueError(f"Pipeline {self.name}: missing inputs {sorted(missing)}")
+
+        values: Dict[str, Any] = dict(inputs)
+        timings: Dict[str, Dict[str, Any]] = {}
+        pending = list(self.order)
+        running: Dict[Future, Tuple[Stage, float, Optional[str]]] = {}
+        started = time.perf_counter()
+        deadline = current_deadline()
+
+        def finish(stage: Stage, stage_started: float, status: str, value: Any = None, key: Optional[str] = None):
+            seconds = time.perf_counter() - stage_started
+            values[stage.name] = value
+            timings[stage.name] = {
+                "start_ms": round((stage_started - started) * 1000, 1),
+                "duration_ms": round(seconds * 1000, 1),
+                "status": status,
+            }
+            self._record(stage.name, seconds, status)
+            if key is not None and status == "ok":
+                stage.store(key, value)
+
+        def fail(stage: Stage, stage_started: float, status: str, error: BaseException):
+            finish(stage, stage_started, status)
+            if stage.optional:
+                logger.warning(f"Optional stage {self.name}.{stage.name} {status}: {error}")
+                return
+            for future in running:
+                future.cancel()
+            if status == "timed_out":
+                raise HTTPException(status_code=504, detail=f"Stage {stage.name} of {self.name} timed out after {stage.timeout}s")
+            raise error
+
+        def check_deadline():
+            if deadline is not None and deadline.expired and (pending or running):
+                for future in running:
+                    future.cancel()
+                logger.warning(f"Pipeline {self.name} abandoned with {sorted(pending) + sorted(stage.name for stage, _, _ in running.values())} left: {deadline.error().detail}")
+                raise deadline.error()
+
+        try:
+            while pending or running:
+                check_deadline()
+                # Start everything whose inputs are ready; inline and cached stages may make more ready.
+                # Speculative stages come last, so a cache hit in the same pass can skip them.
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for name in sorted(pending, key=lambda name: self.stages[name].speculates_on is not None):
+                        stage = self.stages[name]
+                        if not all(dependency in values for dependency in stage.inputs):
+                            continue
+                        pending.remove(name)
+                        progressed = True
+                        stage_started = time.perf_counter()
+                        if stage.speculates_on is not None and stage.speculates_on in values:
+                            finish(stage, stage_started, "skipped")
+                            continue
+                        key = stage.cache_key(values) if stage.cache_seconds > 0 else None
+                        if key is not None:
+                            hit, value = stage.cached(key)
+                            if hit:
+                                finish(stage, stage_started, "cached", value)
+                                continue
+                        if stage.inline:
+                            try:
+                                value = self._call(stage, values)
+                            except Exception as e:
+                                fail(stage, stage_started, "failed", e)
+                                continue
+                            finish(stage, stage_started, "ok", value, key)
+                            continue
+                        # Stage threads see the caller's context, and so its deadline
+                        context = contextvars.copy_context()
+                        running[self.executor.submit(context.run, self._call, stage, dict(values))] = (stage, stage_started, key)
+
+                if not running:
+                    break
+
+                now = time.perf_counter()
+                deadlines = [stage_started + stage.timeout for stage, stage_started, _ in running.values() if stage.timeout]
+                waiting = list(running)
+                if deadline is not None:
+                    deadlines.append(now + deadline.remaining())
+                    waiting.append(deadline.cancelled)
+                done, _ = wait(waiting, timeout=max(0.0, min(deadlines) - now) if deadlines else None, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if future not in running:
+                        continue
+                    stage, stage_started, key = running.pop(future)
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        fail(stage, stage_started, "failed", e)
+                        continue
+                    finish(stage, stage_started, "ok", value, key)
+
+                # Stop waiting for stages past their timeout; their threads finish in the background
+                now = time.perf_counter()
+                for future, (stage, stage_started, _) in list(running.items()):
+                    if stage.timeout and now - stage_started >= stage.timeout:
+                        del running[future]
+                        future.cancel()
+                        fail(stage, stage_started, "timed_out", TimeoutError(f"{stage.name} timed out"))
+                check_deadline()
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+
+        return values[self.output], {
+            "pipeline": self.name,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            "stages": {name: timings[name] for name in self.order if name in timings},
+        }
@@ -0,0 +1,82 @@
+"""
+Exact feed quantities for model-generated weekly recipes
+
+The model only picks ingredients, percentages, each feeding's share of the
+day and the nutritional focus. Every kg and gram figure is computed here from
+the daily total, so the numbers always add up.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+# Quantities are apportioned in tenths of a gram and percentages in tenths of a percent
+GRAM_UNITS = 10
+PERCENT_UNITS = 10
+
+def apportion(total: int, weights: Sequence[float]) -> List[int]:
+    """Split an integer total in proportion to the weights, using the largest remainder method
+
+    The parts always add up to exactly `total`. Missing or negative weights
+    count as zero, and if no weight is positive the total is split evenly.
+    """
+    if not weights:
+        return []
+    weights = [max(0.0, float(weight or 0)) for weight in weights]
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        weights = [1.0] * len(weights)
+        weight_sum = float(len(weights))
+
+    exact = [total * weight / weight_sum for weight in weights]
+    parts = [int(value) for value in exact]
+    leftover = total - sum(parts)
+    by_remainder = sorted(range(len(exact)), key=lambda i: exact[i] - parts[i], reverse=True)
+    for i in by_remainder[:leftover]:
+        parts[i] += 1
+    return parts
+
+def format_recipe(ingredients: List[Dict[str, Any]]) -> str:
+    """Recipe line such as 'Corn 40%, Soybean meal 25%' from an ingredient breakdown"""
+    return ", ".join(f"{ingredient.get('ingredient_name', '')} {ingredient['percentage']:g}%" for ingredient in ingredients)
+
+def week_start(today: Optional[date] = None) -> date:
+    """Monday of the current week"""
+    today = today or date.today()
+    return today - timedelta(days=today.weekday())
+
+def fill_feeding_quantities(feeding: Dict[str, Any], grams_units: int) -> Dict[str, Any]:
+    """Set a feeding's kg, grams and per-ingredient grams from its share of the day"""
+    ingredients = feeding.get("ingredient_breakdown") or []
+    percents = apportion(100 * PERCENT_UNITS, [ingredient.get("percentage") for ingredient in ingredients])
+    grams = apportion(grams_units, percents)
+    for ingredient, percent, ingredient_grams in zip(ingredients, percents, grams):
+        ingredient["percentage"] = percent / PERCENT_UNITS
+        ingredient["grams"] = ingredient_grams / GRAM_UNITS
+
+    feeding["quantity_grams"] = grams_units / GRAM_UNITS
+    feeding["quantity_kg"] = round(grams_units / GRAM_UNITS / 1000, 4)
+    if ingredients:
+        feeding["recipe"] = format_recipe(ingredients)
+    else:
+        feeding.setdefault("recipe", "")
+    return feeding
+
+def fill_daily_quantities(day: Dict[str, Any], daily_units: int) -> Dict[str, Any]:
+    """Split the daily total over a day's feedings by their share_percent, or evenly"""
+    feedings = day.get("feeding_recipes") or []
+    shares = [feeding.pop("share_percent", None) for feeding in feedings]
+    if any(share is None for share in shares):
+        shares = [1] * len(feedings)
+    for feeding, units in zip(feedings, apportion(daily_units, shares)):
+        fill_feeding_quantities(feeding, units)
+    day["total_daily_kg"] = round(daily_units / GRAM_UNITS / 1000, 4)
+    return day
+
+def fill_weekly_quantities(calendar: Dict[str, Any], total_daily_kg: float, start: Optional[date] = None) -> Dict[str, Any]:
+    """Fill every quantity of a weekly calendar from the daily feed total"""
+    daily_units = round(float(total_daily_kg or 0) * 1000 * GRAM_UNITS)
+    days = calendar.get("daily_recipes") or []
+    for day in days:
+        fill_daily_quantities(day, daily_units)
+    calendar["week_start_date"] = (start or week_start()).isoformat()
+    calendar["total_weekly_kg"] = round(daily_units * len(days) / GRAM_UNITS / 1000, 4)
+    return calendar
@@ -0,0 +1,236 @@
+"""
+Fair scheduling of model calls across tenants and priority lanes
+
+At most `capacity` model calls run at once. Calls wait in one of two lanes.
+The interactive lane is always served first, and `reserved_interactive` slots
+are kept free for it, so a long batch run never holds every slot. Within a
+lane, tenants share the slots by weight through start-time fair queuing: each
+call gets a virtual start tag of max(lane virtual time, the tenant's previous
+finish tag), its finish tag is the start plus 1 / weight, and the smallest
+start tag runs next. A tenant's finish tag is dropped once it has no calls
+queued or running and the lane's virtual time has passed it, as it would no
+longer change the tenant's next start tag. Queue time is measured against a
+per-lane SLO.
+"""
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from app.core.config import settings
+from app.services.deadline import current_deadline
+from app.services.hedging import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+class Caller:
+    """Who a model call is made for: a tenant and a lane"""
+
+    def __init__(self, tenant: str = "anonymous", lane: str = INTERACTIVE):
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane {lane}, expected one of {', '.join(LANES)}")
+        self.tenant = tenant
+        self.lane = lane
+
+    def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call fn with this caller as the current one"""
+        token = _current.set(self)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+_current: "contextvars.ContextVar[Optional[Caller]]" = contextvars.ContextVar("model_caller", default=None)
+
+def current_caller() -> Caller:
+    # Calls outside a request, like the circuit breaker probe, are interactive
+    return _current.get() or Caller()
+
+class _Waiter:
+    def __init__(self, tenant: str, lane: str, start_tag: float):
+        self.tenant = tenant
+        self.lane = lane
+        self.start_tag = start_tag
+        self.enqueued_at = time.perf_counter()
+        self.granted = False
+        self.abandoned = False
+
+class ModelScheduler:
+    """Admits model calls by lane priority and weighted fairness between tenants"""
+
+    def __init__(
+        self,
+        capacity: int,
+        reserved_interactive: int = 0,
+        weights: Optional[Dict[str, float]] = None,
+        slo_seconds: Optional[Dict[str, float]] = None,
+        window: int = 1000,
+    ):
+        if not 0 <= reserved_interactive < capacity:
+            raise ValueError("reserved_interactive must leave at least one slot for batch calls")
+        self.capacity = capacity
+        self.reserved_interactive = reserved_interactive
+        self.weights = dict(weights or {})
+        self.slo_seconds = {INTERACTIVE: 1.0, BATCH: 60.0, **(slo_seconds or {})}
+        self._cond = threading.Condition()
+        self._sequence = itertools.count()
+        self._queues: Dict[str, list] = {lane: [] for lane in LANES}
+        self._virtual_time = {lane: 0.0 for lane in LANES}
+        self._finish_tags: Dict[tuple, float] = {}
+        # Calls queued or running per (lane, tenant); idle keys keep their finish tag until virtual time passes it
+        self._active: Dict[tuple, int] = {}
+        self._idle: Dict[str, set] = {lane: set() for lane in LANES}
+        self._running = {lane: 0 for lane in LANES}
+        self._waiting = {lane: 0 for lane in LANES}
+        self._queue_times = {lane: LatencyWindow(window) for lane in LANES}
+        self._lane_stats = {lane: {"served": 0, "abandoned": 0, "slo_violations": 0} for lane in LANES}
+        self._tenant_stats: Dict[str, Dict[str, Any]] = {}
+
+    def weight(self, tenant: str) -> float:
+        return self.weights.get(tenant, 1.0)
+
+    def _limit(self, lane: str) -> int:
+        return self.capacity if lane == INTERACTIVE else self.capacity - self.reserved_interactive
+
+    def _dispatch(self):
+        """Grant free slots, interactive lane first; called with the lock held"""
+        for lane in LANES:
+            queue = self._queues[lane]
+            while queue and sum(self._running.values()) < self._limit(lane):
+                _, _, waiter = heapq.heappop(queue)
+                if waiter.abandoned:
+                    continue
+                waiter.granted = True
+                self._virtual_time[lane] = waiter.start_tag
+                self._waiting[lane] -= 1
+                self._running[lane] += 1
+                self._cond.notify_all()
+            self._prune(lane)
+
+    def _prune(self, lane: str):
+        """Drop finish tags of idle tenants that virtual time has passed; called with the lock held"""
+        for key in [key for key in self._idle[lane] if self._finish_tags[key] <= self._virtual_time[lane]]:
+            self._idle[lane].discard(key)
+            del self._finish_tags[key]
+
+    def _leave(self, lane: str, tenant: str):
+        """A call of the tenant stopped waiting or running; called with the lock held"""
+        key = (lane, tenant)
+        self._active[key] -= 1
+        if self._active[key] == 0:
+            del self._active[key]
+            self._idle[lane].add(key)
+
+    def _tenant(self, tenant: str) -> Dict[str, Any]:
+        if tenant not in self._tenant_stats:
+            self._tenant_stats[tenant] = {"served": 0, "waiting": 0, "queue_seconds_total": 0.0}
+        return self._tenant_stats[tenant]
+
+    def acquire(self, caller: Caller) -> _Waiter:
+        """Wait for a slot; raises DeadlineExceeded if the request's deadline passes first"""
+        deadline = current_deadline()
+        with self._cond:
+            key = (caller.lane, caller.tenant)
+            start_tag = max(self._virtual_time[caller.lane], self._finish_tags.get(key, 0.0))
+            self._finish_tags[key] = start_tag + 1 / self.weight(caller.tenant)
+            self._idle[caller.lane].discard(key)
+            self._active[key] = self._active.get(key, 0) + 1
+            waiter = _Waiter(caller.tenant, caller.lane, start_tag)
+            heapq.heappush(self._queues[caller.lane], (start_tag, next(self._sequence), waiter))
+            self._waiting[caller.lane] += 1
+            self._tenant(caller.tenant)["waiting"] += 1
+            self._dispatch()
+
+            if not waiter.granted and deadline is not None:
+                # A disconnect has to wake the wait up as well
+                deadline.cancelled.add_done_callback(lambda _: self._notify())
+            while not waiter.granted:
+                if deadline is not None and deadline.expired:
+                    waiter.abandoned = True
+                    self._waiting[caller.lane] -= 1
+                    self._tenant(caller.tenant)["waiting"] -= 1
+                    self._lane_stats[caller.lane]["abandoned"] += 1
+                    self._leave(caller.lane, caller.tenant)
+                    raise deadline.error()
+                self._cond.wait(deadline.remaining() if deadline is not None else None)
+
+            queued = time.perf_counter() - waiter.enqueued_at
+            tenant = self._tenant(caller.tenant)
+            tenant["waiting"] -= 1
+            tenant["served"] += 1
+            tenant["queue_seconds_total"] += queued
+            self._lane_stats[caller.lane]["served"] += 1
+            if queued > self.slo_seconds[caller.lane]:
+                self._lane_stats[caller.lane]["slo_violations"] += 1
+        self._queue_times[caller.lane].add(queued)
+        if queued > self.slo_seconds[caller.lane]:
+            logger.warning(f"{caller.lane} call for {caller.tenant} queued {queued:.2f}s, over its {self.slo_seconds[caller.lane]}s SLO")
+        return waiter
+
+    def _notify(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def release(self, waiter: _Waiter):
+        with self._cond:
+            self._running[waiter.lane] -= 1
+            self._leave(waiter.lane, waiter.tenant)
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, caller: Optional[Caller] = None) -> Iterator[None]:
+        """Hold a model call slot for the current caller while the block runs"""
+        waiter = self.acquire(caller or current_caller())
+        try:
+            yield
+        finally:
+            self.release(waiter)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            lanes = {
+                lane: {
+                    **self._lane_stats[lane],
+                    "running": self._running[lane],
+                    "waiting": self._waiting[lane],
+                    "slo_seconds": self.slo_seconds[lane],
+                }
+                for lane in LANES
+            }
+            tenants = {
+                name: {
+                    "weight": self.weight(name),
+                    "served": stats["served"],
+                    "waiting": stats["waiting"],
+                    "queue_seconds_mean": round(stats["queue_seconds_total"] / stats["served"], 3) if stats["served"] else None,
+                }
+                for name, stats in self._tenant_stats.items()
+            }
+        for lane, stats in lanes.items():
+            window = self._queue_times[lane]
+            for percent in (50, 95, 99):
+                value = window.percentile(percent)
+                stats[f"queue_seconds_p{percent}"] = None if value is None else round(value, 3)
+            stats["slo_attainment"] = round(1 - stats["slo_violations"] / stats["served"], 4) if stats["served"] else None
+        return {
+            "capacity": self.capacity,
+            "reserved_interactive": self.reserved_interactive,
+            "lanes": lanes,
+            "tenants": tenants,
+        }
+
+def scheduler_from_settings() -> ModelScheduler:
+    return ModelScheduler(
+        settings.MODEL_CONCURRENCY,
+        settings.INTERACTIVE_RESERVED_SLOTS,
+        settings.TENANT_WEIGHTS,
+        {INTERACTIVE: settings.INTERACTIVE_QUEUE_SLO_SECONDS, BATCH: settings.BATCH_QUEUE_SLO_SECONDS},
+    )
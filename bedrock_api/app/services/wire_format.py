@@ -0,0 +1,416 @@
+"""
+Compact wire format for Nova Pro responses
+
+Every key the model writes is a generated output token, and the public
+response shapes repeat long keys such as `nutritional_contribution` dozens of
+times per calendar. The prompts therefore ask for short keys, and for weekly
+calendars for positional arrays with an ingredient dictionary. The expanders
+here turn that back into the public response shapes deterministically.
+Long keys are passed through unchanged, so a verbose answer expands to itself.
+"""
+import json
+import re
+from typing import Any, Dict, List, Tuple, Union
+
+KeyMap = Dict[str, Union[str, Tuple[str, "KeyMap"]]]
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+def number(label: str) -> str:
+    """Placeholder for a numeric value, written unquoted in prompt skeletons"""
+    return f"\x00<{label}>"
+
+# Short keys for the object-shaped responses, short key -> long key or (long key, nested map)
+VITAMIN_KEYS: KeyMap = {"a": "vitamin_a_iu_per_kg", "d3": "vitamin_d3_iu_per_kg", "e": "vitamin_e_iu_per_kg"}
+MINERAL_KEYS: KeyMap = {"na": "sodium_percent", "cl": "chloride_percent", "mg": "magnesium_percent"}
+
+FEED_COMPOSITION_KEYS: KeyMap = {
+    "cp": "crude_protein_percent",
+    "me": "metabolizable_energy_kcal_per_kg",
+    "fat": "crude_fat_percent",
+    "fib": "crude_fiber_percent",
+    "ca": "calcium_percent",
+    "p": "phosphorus_percent",
+    "lys": "lysine_percent",
+    "met": "methionine_percent",
+    "vit": ("vitamins", VITAMIN_KEYS),
+    "min": ("minerals", MINERAL_KEYS),
+}
+
+FEED_RECOMMENDATION_KEYS: KeyMap = {
+    "fc": ("feed_composition", FEED_COMPOSITION_KEYS),
+    "bird_kg": "daily_feed_amount_per_bird_kg",
+    "total_kg": "total_daily_feed_kg",
+    "adj": ("seasonal_adjustments", {"energy": "energy_adjustment", "protein": "protein_adjustment", "water": "water_considerations"}),
+    "recs": "additional_recommendations",
+}
+
+FEED_CALCULATION_KEYS: KeyMap = {
+    "calc": ("feed_calculation", {
+        "meal_g": "quantity_per_meal_g",
+        "meals": "meals_per_day",
+        "times": "feeding_schedule",
+        "storage": "storage_recommendations",
+    }),
+}
+
+DISEASE_RECOVERY_KEYS: KeyMap = {
+    "fc": ("recovery_feed_composition", {
+        **FEED_COMPOSITION_KEYS,
+        "imm": ("immune_support_nutrients", {
+            "c": "vitamin_c_mg_per_kg",
+            "zn": "zinc_mg_per_kg",
+            "se": "selenium_mg_per_kg",
+            "pro": "probiotics_cfu_per_kg",
+            "o3": "omega_3_fatty_acids_percent",
+        }),
+    }),
+    "bird_kg": "daily_feed_amount_per_bird_kg",
+    "total_kg": "total_daily_feed_kg",
+    "tx": ("disease_treatment", {
+        "approach": "treatment_approach",
+        "mods": "feed_modifications",
+        "supp": "supplements",
+        "env": "environmental_changes",
+        "watch": "monitoring_points",
+        "timeline": "recovery_timeline",
+    }),
+    "times": "feeding_schedule",
+    "notes": "special_considerations",
+}
+
+# Positional layouts for the weekly calendars
+WEEKLY_CALENDAR_LAYOUT = {
+    "feeding_fields": ["nutritional_focus"],
+    "day_notes": "nutritional_notes",
+    "lists": {"g": "weekly_nutritional_goals", "p": "preparation_notes", "s": "seasonal_adjustments"},
+}
+
+DISEASE_WEEKLY_CALENDAR_LAYOUT = {
+    "feeding_fields": ["nutritional_focus", "recovery_benefits"],
+    "day_notes": "recovery_notes",
+    "lists": {"g": "weekly_recovery_goals", "p": "preparation_notes", "n": "disease_specific_notes"},
+}
+
+# Verbose examples that the prompt skeletons are generated from
+FEED_COMPOSITION_EXAMPLE = {
+    "crude_protein_percent": number("percentage"),
+    "metabolizable_energy_kcal_per_kg": number("value"),
+    "crude_fat_percent": number("percentage"),
+    "crude_fiber_percent": number("percentage"),
+    "calcium_percent": number("percentage"),
+    "phosphorus_percent": number("percentage"),
+    "lysine_percent": number("percentage"),
+    "methionine_percent": number("percentage"),
+    "vitamins": {
+        "vitamin_a_iu_per_kg": number("value"),
+        "vitamin_d3_iu_per_kg": number("value"),
+        "vitamin_e_iu_per_kg": number("value"),
+    },
+    "minerals": {
+        "sodium_percent": number("percentage"),
+        "chloride_percent": number("percentage"),
+        "magnesium_percent": number("percentage"),
+    },
+}
+
+FEED_RECOMMENDATION_EXAMPLE = {
+    "feed_composition": FEED_COMPOSITION_EXAMPLE,
+    "daily_feed_amount_per_bird_kg": number("amount in kg"),
+    "total_daily_feed_kg": number("total for all birds"),
+    "seasonal_adjustments": {
+        "energy_adjustment": "<explanation>",
+        "protein_adjustment": "<explanation>",
+        "water_considerations": "<explanation>",
+    },
+    "additional_recommendations": ["<recommendation 1>", "<recommendation 2>", "<recommendation 3>"],
+}
+
+FEED_CALCULATION_EXAMPLE = {
+    "feed_calculation": {
+        "quantity_per_meal_g": number("amount per meal in grams"),
+        "meals_per_day": number("recommended number of meals"),
+        "feeding_schedule": ["<time 1 (e.g., 7:00 AM)>", "<time 2 (e.g., 4:00 PM)>"],
+        "storage_recommendations": ["<storage tip 1>", "<storage tip 2>", "<storage tip 3>"],
+    }
+}
+
+DISEASE_RECOVERY_EXAMPLE = {
+    "recovery_feed_composition": {
+        **FEED_COMPOSITION_EXAMPLE,
+        "immune_support_nutrients": {
+            "vitamin_c_mg_per_kg": number("value"),
+            "zinc_mg_per_kg": number("value"),
+            "selenium_mg_per_kg": number("value"),
+            "probiotics_cfu_per_kg": number("value"),
+            "omega_3_fatty_acids_percent": number("percentage"),
+        },
+    },
+    "daily_feed_amount_per_bird_kg": number("amount in kg"),
+    "total_daily_feed_kg": number("total for all birds"),
+    "disease_treatment": {
+        "treatment_approach": "<overall treatment strategy>",
+        "feed_modifications": ["<modification 1>", "<modification 2>", "<modification 3>"],
+        "supplements": ["<supplement 1>", "<supplement 2>", "<supplement 3>"],
+        "environmental_changes": ["<environmental change 1>", "<environmental change 2>", "<environmental change 3>"],
+        "monitoring_points": ["<monitoring point 1>", "<monitoring point 2>", "<monitoring point 3>"],
+        "recovery_timeline": "<expected recovery period>",
+    },
+    "feeding_schedule": ["<feeding time 1>", "<feeding time 2>", "<feeding time 3>"],
+    "special_considerations": ["<consideration 1>", "<consideration 2>", "<consideration 3>"],
+}
+
+def _ingredients(*rows: Tuple[str, float, str]) -> List[Dict[str, Any]]:
+    return [{"ingredient_name": name, "percentage": percentage, "nutritional_contribution": contribution} for name, percentage, contribution in rows]
+
+WEEKLY_CALENDAR_EXAMPLE = {
+    "daily_recipes": [
+        {
+            "day": "Monday",
+            "feeding_recipes": [
+                {
+                    "feeding_time": "7:00 AM",
+                    "share_percent": 50,
+                    "nutritional_focus": "High energy for morning activity",
+                    "ingredient_breakdown": _ingredients(
+                        ("Corn", 40.0, "Primary energy source"),
+                        ("Soybean meal", 25.0, "High-quality protein"),
+                        ("Wheat", 15.0, "Additional energy"),
+                        ("Calcium carbonate", 8.0, "Bone health"),
+                        ("Salt", 2.0, "Electrolyte balance"),
+                        ("Vitamins", 10.0, "Essential nutrients"),
+                    ),
+                },
+                {
+                    "feeding_time": "4:00 PM",
+                    "share_percent": 50,
+                    "nutritional_focus": "Calcium-rich for evening egg formation",
+                    "ingredient_breakdown": _ingredients(
+                        ("Barley", 35.0, "Energy source"),
+                        ("Fish meal", 20.0, "High protein"),
+                        ("Oats", 15.0, "Fiber and energy"),
+                        ("Corn", 15.0, "Primary energy source"),
+                        ("Oyster shell", 8.0, "Calcium for eggshells"),
+                        ("Salt", 2.0, "Electrolyte balance"),
+                        ("Vitamins", 5.0, "Essential nutrients"),
+                    ),
+                },
+            ],
+            "nutritional_notes": "Balanced nutrition for the production purpose",
+            "special_considerations": ["Monitor water intake", "Check egg quality"],
+        }
+    ],
+    "weekly_nutritional_goals": ["Optimize production", "Maintain bone health", "Support immune function"],
+    "preparation_notes": ["Mix ingredients thoroughly", "Store in dry place", "Use within 30 days"],
+    "seasonal_adjustments": ["Adjust for cooler weather", "Increase energy content"],
+}
+
+DISEASE_WEEKLY_CALENDAR_EXAMPLE = {
+    "daily_recipes": [
+        {
+            "day": "Monday",
+            "feeding_recipes": [
+                {
+                    "feeding_time": "7:00 AM",
+                    "share_percent": 60,
+                    "nutritional_focus": "High protein for tissue repair and immune support",
+                    "recovery_benefits": "Supports healing and immune function",
+                    "ingredient_breakdown": _ingredients(
+                        ("Corn", 35.0, "Energy for recovery"),
+                        ("Soybean meal", 30.0, "High-quality protein for healing"),
+                        ("Wheat", 15.0, "Additional energy"),
+                        ("Fish meal", 8.0, "Essential amino acids"),
+                        ("Calcium carbonate", 6.0, "Bone health"),
+                        ("Salt", 2.0, "Electrolyte balance"),
+                        ("Vitamins", 4.0, "Immune support"),
+                    ),
+                },
+                {
+                    "feeding_time": "4:00 PM",
+                    "share_percent": 40,
+                    "nutritional_focus": "Enhanced protein and minerals for evening recovery",
+                    "recovery_benefits": "Supports overnight healing processes",
+                    "ingredient_breakdown": _ingredients(
+                        ("Barley", 30.0, "Sustained energy"),
+                        ("Fish meal", 25.0, "Essential amino acids"),
+                        ("Oats", 20.0, "Fiber and energy"),
+                        ("Corn", 15.0, "Energy for recovery"),
+                        ("Oyster shell", 5.0, "Calcium for bone health"),
+                        ("Salt", 2.0, "Electrolyte balance"),
+                        ("Vitamins", 3.0, "Immune support"),
+                    ),
+                },
+            ],
+            "recovery_notes": "High-protein diet for recovery",
+            "special_considerations": ["Monitor appetite closely", "Ensure clean water access", "Watch for improvement signs"],
+        },
+        {
+            "day": "Tuesday",
+            "feeding_recipes": [
+                {
+                    "feeding_time": "8:00 AM",
+                    "share_percent": 50,
+                    "nutritional_focus": "Different focus for Tuesday",
+                    "recovery_benefits": "Different recovery benefits",
+                    "ingredient_breakdown": _ingredients(("Different ingredient", 40.0, "Different contribution")),
+                },
+                {
+                    "feeding_time": "1:00 PM",
+                    "share_percent": 30,
+                    "nutritional_focus": "Afternoon nutritional focus",
+                    "recovery_benefits": "Afternoon recovery benefits",
+                    "ingredient_breakdown": _ingredients(("Another ingredient", 45.0, "Another contribution")),
+                },
+                {
+                    "feeding_time": "6:00 PM",
+                    "share_percent": 20,
+                    "nutritional_focus": "Evening nutritional focus",
+                    "recovery_benefits": "Evening recovery benefits",
+                    "ingredient_breakdown": _ingredients(("Evening ingredient", 35.0, "Evening contribution")),
+                },
+            ],
+            "recovery_notes": "Different recovery approach for Tuesday",
+            "special_considerations": ["Different considerations for Tuesday"],
+        },
+    ],
+    "weekly_recovery_goals": ["Support healing", "Boost immune function", "Maintain nutritional status"],
+    "preparation_notes": ["Mix ingredients thoroughly", "Store in cool, dry place", "Use within 15 days for freshness"],
+    "disease_specific_notes": ["Monitor for disease symptoms", "Adjust feeding if appetite changes", "Consult veterinarian if no improvement"],
+}
+
+def expand_keys(data: Any, key_map: KeyMap) -> Any:
+    """Replace short keys with the public long keys, recursively"""
+    if isinstance(data, list):
+        return [expand_keys(item, key_map) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    expanded = {}
+    for key, value in data.items():
+        spec = key_map.get(key, key)
+        if isinstance(spec, tuple):
+            long_key, nested = spec
+            expanded[long_key] = expand_keys(value, nested)
+        else:
+            expanded[spec] = value
+    return expanded
+
+def compact_keys(data: Any, key_map: KeyMap) -> Any:
+    """Inverse of expand_keys"""
+    if isinstance(data, list):
+        return [compact_keys(item, key_map) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    short_keys = {(spec[0] if isinstance(spec, tuple) else spec): (short, spec) for short, spec in key_map.items()}
+    compacted = {}
+    for key, value in data.items():
+        short, spec = short_keys.get(key, (key, key))
+        compacted[short] = compact_keys(value, spec[1]) if isinstance(spec, tuple) else value
+    return compacted
+
+def key_legend(key_map: KeyMap) -> str:
+    """'cp=crude_protein_percent, ...' for every short key, nested maps included"""
+    entries: Dict[str, str] = {}
+
+    def collect(current: KeyMap):
+        for short, spec in current.items():
+            if isinstance(spec, tuple):
+                entries.setdefault(short, spec[0])
+                collect(spec[1])
+            else:
+                entries.setdefault(short, spec)
+
+    collect(key_map)
+    return ", ".join(f"{short}={long_key}" for short, long_key in entries.items())
+
+def expand_calendar(data: Dict[str, Any], layout: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a positional weekly calendar into the public weekly_calendar shape
+
+    Compact layout:
+        {"i": [[ingredient name, nutritional contribution], ...],
+         "d": [[[feeding, ...], day notes, [special considerations]], ...],   Monday first
+         <list key>: [...], ...}
+    with each feeding as [feeding_time, share_percent, <feeding fields>..., [[ingredient index, percentage], ...]].
+    """
+    if "daily_recipes" in data or "d" not in data:
+        return data
+
+    ingredients = data.get("i") or []
+    feeding_fields = layout["feeding_fields"]
+
+    def ingredient(ref) -> Dict[str, Any]:
+        index, percentage = (list(ref) + [None, 0])[:2] if isinstance(ref, list) else (ref, 0)
+        if isinstance(index, int) and 0 <= index < len(ingredients):
+            name, contribution = (list(ingredients[index]) + ["", ""])[:2]
+        else:
+            name, contribution = str(index), ""
+        return {"ingredient_name": name, "percentage": percentage, "nutritional_contribution": contribution}
+
+    def feeding(row) -> Dict[str, Any]:
+        row = list(row)
+        refs = row.pop() if row and isinstance(row[-1], list) else []
+        row += [""] * (2 + len(feeding_fields) - len(row))
+        expanded = {"feeding_time": row[0]}
+        if row[1] != "":
+            expanded["share_percent"] = row[1]
+        for name, value in zip(feeding_fields, row[2:]):
+            expanded[name] = value
+        expanded["ingredient_breakdown"] = [ingredient(ref) for ref in refs]
+        return expanded
+
+    daily_recipes = []
+    for index, row in enumerate(data.get("d") or []):
+        feedings, notes, considerations = (list(row) + [[], "", []])[:3]
+        daily_recipes.append({
+            "day": WEEKDAYS[index % len(WEEKDAYS)],
+            "feeding_recipes": [feeding(item) for item in feedings],
+            layout["day_notes"]: notes,
+            "special_considerations": considerations,
+        })
+
+    calendar = {"daily_recipes": daily_recipes}
+    for short, long_key in layout["lists"].items():
+        calendar[long_key] = data.get(short, [])
+    return calendar
+
+def compact_calendar(calendar: Dict[str, Any], layout: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of expand_calendar, used for prompt skeletons and benchmarks"""
+    ingredients: List[List[str]] = []
+    index_of: Dict[Tuple[str, str], int] = {}
+
+    def ref(item: Dict[str, Any]) -> List[Any]:
+        key = (item.get("ingredient_name", ""), item.get("nutritional_contribution", ""))
+        if key not in index_of:
+            index_of[key] = len(ingredients)
+            ingredients.append(list(key))
+        return [index_of[key], item.get("percentage", 0)]
+
+    days = []
+    for day in calendar.get("daily_recipes", []):
+        feedings = [
+            [item.get("feeding_time", ""), item.get("share_percent", "")]
+            + [item.get(name, "") for name in layout["feeding_fields"]]
+            + [[ref(ingredient) for ingredient in item.get("ingredient_breakdown", [])]]
+            for item in day.get("feeding_recipes", [])
+        ]
+        days.append([feedings, day.get(layout["day_notes"], ""), day.get("special_considerations", [])])
+
+    compact = {"i": ingredients, "d": days}
+    for short, long_key in layout["lists"].items():
+        compact[short] = calendar.get(long_key, [])
+    return compact
+
+def calendar_legend(layout: Dict[str, Any]) -> str:
+    feeding = ", ".join(["feeding_time", "share_percent", *layout["feeding_fields"], "[[ingredient index in i, percentage], ...]"])
+    lists = ", ".join(f"{short}={long_key}" for short, long_key in layout["lists"].items())
+    return (
+        "i lists every ingredient once as [ingredient_name, nutritional_contribution]. "
+        f"d has one entry per day, Monday first, as [[feeding, ...], {layout['day_notes']}, special_considerations]. "
+        f"Each feeding is [{feeding}]. {lists}."
+    )
+
+def json_skeleton(example: Any, compact: bool = False) -> str:
+    """JSON text of a prompt example, with numeric placeholders left unquoted"""
+    text = json.dumps(example, separators=(",", ":")) if compact else json.dumps(example, indent=4)
+    return re.sub(r'"\\u0000(<[^"]*>)"', r"\1", text)
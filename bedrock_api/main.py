@@ -2,13 +2,12 @@
 Main entry point for the Chicken Feed Nutritional Advisor API
 """
 import logging
-import uvicorn
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.api.routes import router
+from app.api.routes import get_bedrock_service, router
 
 # Configure logging
 logging.basicConfig(
@@ -48,27 +47,16 @@ async def lifespan(app: FastAPI):
         logger.warning("⚡ Server will start but API calls will fail until credentials are set.")
     else:
         logger.info("✅ Environment variables are set!")
-        
-        # Test actual AWS credentials
-        try:
-            from app.services.auth_service import AWSAuthService
-            auth_service = AWSAuthService()
-            if auth_service.validate_credentials():
-                logger.info("🚀 AWS credentials validated! API is ready to receive requests")
-            else:
-                logger.warning("⚠️  AWS credentials are invalid!")
-                logger.info(f"AWS_BEARER_TOKEN_BEDROCK: {settings.AWS_BEARER_TOKEN_BEDROCK}")
-                logger.info(f"AWS_REGION: {settings.AWS_REGION}")
-                logger.info(f"BEDROCK_MODEL_ID: {settings.BEDROCK_MODEL_ID}")
-                logger.warning("   Your bearer token might be expired or incorrect.")
-                logger.warning("   API will start but calls to Bedrock will fail.")
-        except Exception as e:
-            logger.warning(f"⚠️  Could not validate AWS credentials: {e}")
-            logger.warning("   API will start but calls to Bedrock might fail.")
+    
+    # Validating the token is a real model call; it runs in the background and /ready reports the result
+    credential_check = get_bedrock_service().credential_check
+    credential_check.start()
+    logger.info("Checking AWS credentials in the background, see /ready")
     
     yield
     
     # Shutdown
+    credential_check.stop()
     logger.info(f"Shutting down {settings.API_TITLE}")
 
 # Create FastAPI app with lifespan
@@ -94,6 +82,8 @@ app.add_middleware(
 app.include_router(router)
 
 if __name__ == "__main__":
+    import uvicorn
+    
     logger.info(f"Starting server on {settings.API_HOST}:{settings.API_PORT}")
     uvicorn.run(
         "main:app",
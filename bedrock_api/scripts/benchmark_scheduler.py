@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Interactive queue time while a batch run floods the model backend
+
+Simulates model calls as sleeps. A batch tenant queues a few hundred calls at
+once while interactive calls arrive at a steady rate. The interactive queue
+time is reported for three setups with the same number of slots: one FIFO
+queue, fair queuing between the two tenants in one lane, and separate lanes
+with reserved interactive slots.
+
+Usage:
+    python scripts/benchmark_scheduler.py
+    python scripts/benchmark_scheduler.py --batch 400 --capacity 8 --reserved 2
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.scheduler import BATCH, INTERACTIVE, Caller, ModelScheduler
+
+def run(scheduler: ModelScheduler, batch: Caller, interactive: Caller, args) -> list:
+    waits = []
+    lock = threading.Lock()
+
+    def call(caller: Caller, seconds: float, record: bool):
+        started = time.perf_counter()
+        with scheduler.slot(caller):
+            if record:
+                with lock:
+                    waits.append(time.perf_counter() - started)
+            time.sleep(seconds)
+
+    threads = [threading.Thread(target=call, args=(batch, args.call_seconds, False)) for _ in range(args.batch)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    for _ in range(args.interactive):
+        thread = threading.Thread(target=call, args=(interactive, args.call_seconds, True))
+        thread.start()
+        threads.append(thread)
+        time.sleep(args.interval)
+    for thread in threads:
+        thread.join()
+    return waits
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--interactive", type=int, default=40)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--call-seconds", type=float, default=0.2)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--reserved", type=int, default=2)
+    args = parser.parse_args()
+    # Every batch call misses its SLO here; keep the report readable
+    logging.disable(logging.WARNING)
+
+    print(f"🐔 Scheduler benchmark: {args.batch} batch calls, {args.interactive} interactive calls, {args.capacity} slots, {args.call_seconds}s per call")
+    cases = [
+        # One tenant in one lane is a plain FIFO queue
+        ("FIFO", ModelScheduler(args.capacity), Caller("all", INTERACTIVE), Caller("all", INTERACTIVE)),
+        ("fair queuing", ModelScheduler(args.capacity), Caller("nightly", INTERACTIVE), Caller("farm", INTERACTIVE)),
+        ("lanes", ModelScheduler(args.capacity, args.reserved), Caller("nightly", BATCH), Caller("farm", INTERACTIVE)),
+    ]
+    for name, scheduler, batch, interactive in cases:
+        waits = sorted(run(scheduler, batch, interactive, args))
+        p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))]
+        print(f"{name:>12}: interactive queue time median {statistics.median(waits) * 1000:8.1f} ms  p95 {p95 * 1000:8.1f} ms  max {waits[-1] * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Startup time of the API: importing the app, and time to the first answered request
+
+Each run starts a fresh interpreter. The import time is how long `import main`
+takes and whether boto3 got loaded with it. Time to first request starts the
+server with uvicorn and polls GET /health until it answers. With
+--fake-credentials the server gets a made-up bearer token, so the credential
+check runs at startup the way it does in production; it must not delay the
+first request.
+
+Usage:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --runs 10 --fake-credentials
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = (
+    "import sys, time\n"
+    "started = time.perf_counter()\n"
+    "import main\n"
+    "print(time.perf_counter() - started, 'boto3' in sys.modules)\n"
+)
+
+def environment(args) -> dict:
+    env = dict(os.environ)
+    if args.fake_credentials:
+        env["AWS_BEARER_TOKEN_BEDROCK"] = "benchmark-token"
+        env.setdefault("AWS_REGION", "us-east-1")
+    return env
+
+def time_import(env: dict):
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    seconds, boto3_loaded = output.split()
+    return float(seconds), boto3_loaded == "True"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def answered(port: int) -> bool:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+    try:
+        connection.request("GET", "/health")
+        return connection.getresponse().status == 200
+    except OSError:
+        return False
+    finally:
+        connection.close()
+
+def time_to_first_request(env: dict, timeout: float) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while not answered(port):
+            if server.poll() is not None:
+                raise RuntimeError("Server exited before answering; run it by hand to see why")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"No answer from /health within {timeout}s")
+            time.sleep(0.01)
+        return time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+def report(name: str, values: list):
+    print(f"{name:>22}: median {statistics.median(values) * 1000:7.0f} ms  min {min(values) * 1000:7.0f} ms  max {max(values) * 1000:7.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--fake-credentials", action="store_true", help="set a made-up bearer token so the credential check runs")
+    args = parser.parse_args()
+    env = environment(args)
+
+    print(f"🐔 Startup benchmark: {args.runs} runs")
+    imports = [time_import(env) for _ in range(args.runs)]
+    report("import main", [seconds for seconds, _ in imports])
+    print(f"{'boto3 loaded at import':>22}: {'yes' if any(loaded for _, loaded in imports) else 'no'}")
+    report("time to first request", [time_to_first_request(env, args.timeout) for _ in range(args.runs)])
+
+if __name__ == "__main__":
+    main()
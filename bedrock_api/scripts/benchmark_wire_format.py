@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Output size benchmark for the compact and verbose model response formats
+
+Offline (default): builds a realistic response for every prompt, writes it in
+both forms and reports the characters, the estimated output tokens and the
+cost of expanding the compact form. The token estimate counts words in 4
+character pieces plus every number and punctuation mark, which is close to
+what BPE tokenizers do with JSON.
+
+Live (--live): sends the weekly recipe prompt in both forms to Nova Pro and
+reports the output tokens from the Bedrock usage block and the latency.
+Needs the usual AWS_BEARER_TOKEN_BEDROCK, AWS_REGION and BEDROCK_MODEL_ID.
+
+Usage:
+    python scripts/benchmark_wire_format.py
+    python scripts/benchmark_wire_format.py --live --repeat 3
+"""
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import time
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import wire_format
+
+INGREDIENTS = [
+    ("Corn", "Primary energy source"), ("Soybean meal", "High-quality protein"), ("Wheat", "Additional energy"),
+    ("Barley", "Energy and fiber"), ("Fish meal", "Essential amino acids"), ("Oats", "Fiber and energy"),
+    ("Sorghum", "Energy source"), ("Oyster shell", "Calcium for eggshells"), ("Calcium carbonate", "Bone health"),
+    ("Salt", "Electrolyte balance"), ("Vitamin premix", "Essential nutrients"), ("Sunflower meal", "Protein and fat"),
+]
+
+def sample_calendar(layout, feedings_per_day=(2, 3), ingredients_per_feeding=7):
+    """A full week in the verbose shape, deterministic and as long as a real answer"""
+    days = []
+    for day_index, day in enumerate(wire_format.WEEKDAYS):
+        count = feedings_per_day[day_index % len(feedings_per_day)]
+        feedings = []
+        for meal in range(count):
+            picks = [INGREDIENTS[(day_index + meal * 3 + i) % len(INGREDIENTS)] for i in range(ingredients_per_feeding)]
+            feeding = {
+                "feeding_time": ["7:00 AM", "12:00 PM", "5:00 PM"][meal],
+                "share_percent": round(100 / count, 1),
+                "nutritional_focus": "Energy and protein balance for the time of day",
+            }
+            for name in layout["feeding_fields"][1:]:
+                feeding[name] = "Supports healing and immune function"
+            feeding["ingredient_breakdown"] = [
+                {"ingredient_name": name, "percentage": [30.0, 20.0, 15.0, 12.0, 10.0, 8.0, 5.0][i], "nutritional_contribution": contribution}
+                for i, (name, contribution) in enumerate(picks)
+            ]
+            feedings.append(feeding)
+        days.append({
+            "day": day,
+            "feeding_recipes": feedings,
+            layout["day_notes"]: f"Balanced rotation for {day}",
+            "special_considerations": ["Monitor water intake", "Check droppings"],
+        })
+    calendar = {"daily_recipes": days}
+    for long_key in layout["lists"].values():
+        calendar[long_key] = ["Keep feed dry", "Adjust for weather", "Watch appetite"]
+    return calendar
+
+def sample_object(example):
+    """Fill a prompt example with plausible values"""
+    if isinstance(example, dict):
+        return {key: sample_object(value) for key, value in example.items()}
+    if isinstance(example, list):
+        return [sample_object(value) for value in example]
+    if isinstance(example, str) and example.startswith("\x00"):
+        return 12.5
+    return "A practical sentence of advice for the farmer"
+
+def estimate_tokens(text: str) -> int:
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in re.findall(r"[A-Za-z]+|\d|[^\sA-Za-z\d]", text))
+
+def offline(repeat: int):
+    cases = [
+        ("recommendation", sample_object(wire_format.FEED_RECOMMENDATION_EXAMPLE), wire_format.FEED_RECOMMENDATION_KEYS, None),
+        ("calculation", sample_object(wire_format.FEED_CALCULATION_EXAMPLE), wire_format.FEED_CALCULATION_KEYS, None),
+        ("disease", sample_object(wire_format.DISEASE_RECOVERY_EXAMPLE), wire_format.DISEASE_RECOVERY_KEYS, None),
+        ("weekly", sample_calendar(wire_format.WEEKLY_CALENDAR_LAYOUT), None, wire_format.WEEKLY_CALENDAR_LAYOUT),
+        ("disease weekly", sample_calendar(wire_format.DISEASE_WEEKLY_CALENDAR_LAYOUT), None, wire_format.DISEASE_WEEKLY_CALENDAR_LAYOUT),
+    ]
+
+    print(f"🐔 Wire format benchmark (offline, estimated tokens, expansion best of {repeat})")
+    print(f"{'response':>15} {'verbose tok':>12} {'compact tok':>12} {'saved':>7} {'expand us':>10}")
+    for name, verbose, key_map, layout in cases:
+        if layout:
+            compact = wire_format.compact_calendar(verbose, layout)
+            expand = lambda data: wire_format.expand_calendar(data, layout)
+        else:
+            compact = wire_format.compact_keys(verbose, key_map)
+            expand = lambda data: wire_format.expand_keys(data, key_map)
+        if expand(compact) != verbose:
+            sys.exit(f"The {name} compact form does not expand to the verbose form")
+
+        # Models answer in the spacing the prompt shows: indented for verbose, minified for compact
+        verbose_tokens = estimate_tokens(json.dumps(verbose, indent=4))
+        compact_tokens = estimate_tokens(json.dumps(compact, separators=(",", ":")))
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            expand(compact)
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:>15} {verbose_tokens:>12} {compact_tokens:>12} {1 - compact_tokens / verbose_tokens:>6.0%} {best * 1e6:>10.1f}")
+
+def live(repeat: int):
+    from app.models.chicken import ChickenInfo
+    from app.services.bedrock_service import BedrockService
+
+    service = BedrockService()
+    chicken_info = ChickenInfo(count=150, breed="laying hen", average_weight_kg=2.0, age_weeks=30, environment="barn", purpose="eggs")
+    feed_calculation = {
+        "feed_calculation": {"total_quantity_per_day_kg": 18.0, "quantity_per_chicken_g": 120, "quantity_per_meal_g": 60, "meals_per_day": 2, "feeding_schedule": ["7:00 AM", "4:00 PM"]},
+        "nutritional_context": {"feed_composition": {"crude_protein_percent": 16.5, "metabolizable_energy_kcal_per_kg": 2750, "calcium_percent": 3.8, "phosphorus_percent": 0.45}},
+    }
+
+    print(f"🐔 Wire format benchmark (live weekly recipes, {repeat} calls per form)")
+    for compact in (False, True):
+        service.compact_output = compact
+        prompt = service._create_weekly_recipe_prompt(feed_calculation, chicken_info)
+        tokens, latencies = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            model_response = service._invoke_nova_pro(prompt)
+            latencies.append(time.perf_counter() - started)
+            tokens.append(model_response.get("usage", {}).get("outputTokens", 0))
+        print(f"{'compact' if compact else 'verbose':>8}: {statistics.median(tokens):8.0f} output tokens  {statistics.median(latencies):6.2f} s median latency")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--live", action="store_true", help="Call Nova Pro instead of estimating offline")
+    parser.add_argument("--repeat", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.live:
+        live(args.repeat or 3)
+    else:
+        offline(args.repeat or 1000)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Tests for the model backend circuit breaker and degraded local responses
+"""
+import sys
+import os
+
+import pytest
+from fastapi import HTTPException
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.chicken import (
+    ChickenInfo, ChickenDiseaseInfo, DiseaseRecoveryFeedComposition, DiseaseTreatment, FeedCalculationResponse, WeeklyRecipeResponse
+)
+from app.services.bedrock_service import BedrockService
+from app.services.circuit_breaker import CLOSED, OPEN, CircuitBreaker, CircuitOpenError
+from app.services.fallback_recommendations import RATIONS
+
+class DownBedrockService(BedrockService):
+    """A backend that fails every call until it is brought back up"""
+
+    def __init__(self):
+        super().__init__()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05, probe=self._probe_backend)
+        self.up = False
+        self.invocations = 0
+
+    def _invoke_nova_pro(self, prompt, model_id=None, region=None):
+        self.invocations += 1
+        if not self.up:
+            raise ConnectionError("Read timeout on endpoint URL")
+        return {"output": {"message": {"content": [{"text": "{}"}]}}, "usage": {}}
+
+def chicken_info():
+    return ChickenInfo(count=150, breed="laying hen", average_weight_kg=2.0, age_weeks=30, environment="barn", purpose="eggs")
+
+def disease_info():
+    return ChickenDiseaseInfo(count=40, breed="laying hen", average_weight_kg=1.8, age_weeks=40, disease="coccidiosis")
+
+class TestCircuitBreaker:
+    """Test opening, failing fast and closing"""
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3)
+        assert not breaker.record_failure()
+        breaker.record_success()
+        assert not breaker.record_failure()
+        assert not breaker.record_failure()
+        assert breaker.record_failure()
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        assert breaker.stats()["rejected"] == 1
+
+    def test_probe_closes_circuit(self):
+        attempts = []
+
+        def probe():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ConnectionError("still down")
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.01, probe=probe)
+        breaker.record_failure()
+        assert breaker.wait_closed(2)
+        assert breaker.state == CLOSED
+        assert len(attempts) == 2
+        breaker.before_call()
+
+class TestDegradedResponses:
+    """Test the service answering from local tables while the backend is down"""
+
+    def test_fails_fast_with_degraded_recommendation(self):
+        service = DownBedrockService()
+        with pytest.raises(HTTPException) as error:
+            service.generate_feed_recommendation(chicken_info())
+        assert error.value.status_code == 500
+
+        # The second failure opens the circuit, so this request is already degraded
+        response = service.generate_feed_recommendation(chicken_info())
+        assert response["degraded"] is True
+        assert response["total_daily_feed_kg"] > 0
+        invocations = service.invocations
+
+        response = service.generate_feed_recommendation(chicken_info())
+        assert response["degraded"] is True
+        assert service.invocations == invocations
+        assert service.model_stats()["degraded_responses"] == {"feed_recommendation": 2}
+        service.breaker.reset()
+
+    def test_degraded_responses_match_models(self):
+        service = DownBedrockService()
+        service.breaker.record_failure()
+        service.breaker.record_failure()
+
+        FeedCalculationResponse(**service.generate_feed_calculation(chicken_info()))
+        weekly = service.generate_weekly_recipes(chicken_info())
+        WeeklyRecipeResponse(**weekly)
+        assert len(weekly["weekly_calendar"]["daily_recipes"]) == 7
+        feeding = weekly["weekly_calendar"]["daily_recipes"][0]["feeding_recipes"][0]
+        assert [item["ingredient_name"] for item in feeding["ingredient_breakdown"]] == [name for name, _ in RATIONS["eggs"]]
+        assert weekly["weekly_calendar"]["total_weekly_kg"] == pytest.approx(weekly["feed_calculation"]["total_quantity_per_day_kg"] * 7)
+
+        recovery = service.generate_disease_recovery_recommendation(disease_info())
+        DiseaseRecoveryFeedComposition(**recovery["recovery_feed_composition"])
+        DiseaseTreatment(**recovery["disease_treatment"])
+        disease_weekly = service.generate_disease_weekly_recipes(disease_info())
+        assert disease_weekly["degraded"] is True
+        assert disease_weekly["weekly_calendar"]["daily_recipes"][0]["recovery_notes"]
+        service.breaker.reset()
+
+    def test_recovers_after_probe(self):
+        service = DownBedrockService()
+        service.breaker.record_failure()
+        service.breaker.record_failure()
+        service.up = True
+        assert service.breaker.wait_closed(2)
+        assert service.breaker.stats()["probes"] >= 1
@@ -0,0 +1,120 @@
+"""
+Tests for request deadlines through the pipelines and model calls
+"""
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.chicken import ChickenInfo
+from app.services import deadline as deadlines
+from app.services.bedrock_service import BedrockService
+from app.services.deadline import Deadline, DeadlineExceeded, current_deadline
+from app.services.pipeline import Pipeline, Stage
+from app.api.routes import deadline_from_request
+
+pool = ThreadPoolExecutor(max_workers=4)
+
+def sleep_then(seconds, value):
+    def fn(**_):
+        time.sleep(seconds)
+        return value
+    return fn
+
+def chain(started):
+    def second(first):
+        started.append("second")
+        return {}
+    return Pipeline("chain", ["x"], [
+        Stage("first", sleep_then(1.0, {}), inputs=["x"]),
+        Stage("second", second, inputs=["first"]),
+    ], "second", pool)
+
+class SlowFailingService(BedrockService):
+    """A backend that times out on its own after a while"""
+
+    def _invoke_nova_pro(self, prompt, model_id=None, region=None):
+        time.sleep(0.3)
+        raise ConnectionError("Read timeout on endpoint URL")
+
+class TestDeadline:
+    """Test the deadline itself and the read timeouts it gives"""
+
+    def test_read_timeout_shrinks_to_remaining(self):
+        assert deadlines.read_timeout(60) == (60, False)
+        timeout, shortened = Deadline(5).run(deadlines.read_timeout, 60)
+        assert shortened
+        assert 4 < timeout <= 5
+
+    def test_cancel(self):
+        deadline = Deadline(60)
+        deadline.check()
+        deadline.cancel("client disconnected")
+        with pytest.raises(DeadlineExceeded) as error:
+            deadline.check()
+        assert "client disconnected" in error.value.detail
+
+class TestPipelineDeadline:
+    """Test pipelines stopping at the request deadline"""
+
+    def test_stages_see_the_deadline(self):
+        pipeline = Pipeline("seen", ["x"], [Stage("stage", lambda x: {"deadline": current_deadline()}, inputs=["x"])], "stage", pool)
+        deadline = Deadline(10)
+        output, _ = deadline.run(pipeline.run, x=1)
+        assert output["deadline"] is deadline
+
+    def test_expired_deadline_skips_remaining_stages(self):
+        started = []
+        pipeline = chain(started)
+        began = time.perf_counter()
+        with pytest.raises(DeadlineExceeded):
+            Deadline(0.2).run(pipeline.run, x=1)
+        assert time.perf_counter() - began < 0.6
+        time.sleep(1.0)
+        assert started == []
+
+    def test_disconnect_wakes_the_pipeline(self):
+        deadline = Deadline(60)
+        threading.Timer(0.1, deadline.cancel, args=["client disconnected"]).start()
+        began = time.perf_counter()
+        with pytest.raises(DeadlineExceeded) as error:
+            deadline.run(chain([]).run, x=1)
+        assert time.perf_counter() - began < 0.6
+        assert "client disconnected" in error.value.detail
+
+class TestServiceDeadline:
+    """Test model calls cut short by the deadline"""
+
+    def test_deadline_failures_do_not_open_the_circuit(self):
+        service = SlowFailingService()
+        info = ChickenInfo(count=150, breed="laying hen", average_weight_kg=2.0, age_weeks=30, environment="barn", purpose="eggs")
+        with pytest.raises(DeadlineExceeded):
+            Deadline(0.1).run(service.generate_feed_recommendation, info)
+        time.sleep(0.4)
+        assert service.breaker.stats()["failures"] == 0
+
+class TestDeadlineHeader:
+    """Test reading the deadline from the request"""
+
+    @staticmethod
+    def request(headers):
+        return Request({"type": "http", "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()]})
+
+    def test_default_and_cap(self):
+        assert deadline_from_request(self.request({})).seconds == 120
+        assert deadline_from_request(self.request({"X-Request-Timeout": "30"})).seconds == 30
+        assert deadline_from_request(self.request({"X-Request-Timeout": "9999"})).seconds == 300
+
+    def test_invalid_header(self):
+        for value in ["soon", "0"]:
+            with pytest.raises(HTTPException) as error:
+                deadline_from_request(self.request({"X-Request-Timeout": value}))
+            assert error.value.status_code == 400
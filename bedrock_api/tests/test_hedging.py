@@ -0,0 +1,101 @@
+"""
+Tests for hedged model calls
+"""
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.hedging import Hedger, LatencyWindow
+
+pool = ThreadPoolExecutor(max_workers=8)
+
+def answer(value, seconds=0.0):
+    def call():
+        time.sleep(seconds)
+        return value
+    return call
+
+def fail(seconds=0.0):
+    def call():
+        time.sleep(seconds)
+        raise RuntimeError("throttled")
+    return call
+
+def warmed(min_samples=5, budget_percent=100, seconds=0.01, percentile=95):
+    """A hedger that has seen `min_samples` calls of about `seconds` each"""
+    hedger = Hedger(pool, percentile=percentile, min_samples=min_samples, budget_percent=budget_percent)
+    for _ in range(min_samples):
+        hedger.run("standard", answer("warm", seconds), answer("hedge"))
+    return hedger
+
+class TestLatencyWindow:
+    """Test the rolling latency percentile"""
+
+    def test_percentile(self):
+        window = LatencyWindow(100)
+        for value in range(1, 101):
+            window.add(value / 100)
+        assert window.percentile(95) == 0.95
+        assert window.percentile(50) == 0.5
+
+    def test_keeps_recent_samples(self):
+        window = LatencyWindow(3)
+        for value in [9.0, 1.0, 1.0, 1.0]:
+            window.add(value)
+        assert window.percentile(100) == 1.0
+
+class TestHedger:
+    """Test when duplicates are sent and which answer wins"""
+
+    def test_no_hedge_without_history(self):
+        hedger = Hedger(pool, min_samples=5)
+        hedge_calls = []
+        assert hedger.run("standard", answer("primary", 0.05), lambda: hedge_calls.append(1)) == "primary"
+        assert hedge_calls == []
+        assert hedger.delay("standard") is None
+
+    def test_slow_call_is_hedged(self):
+        hedger = warmed()
+        started = time.perf_counter()
+        assert hedger.run("standard", answer("primary", 1.0), answer("hedge")) == "hedge"
+        assert time.perf_counter() - started < 0.5
+        stats = hedger.stats()
+        assert stats["hedged"] == 1
+        assert stats["hedge_wins"] == 1
+        assert stats["hedge_win_rate"] == 1.0
+
+    def test_fast_call_is_not_hedged(self):
+        hedger = warmed(seconds=0.2)
+        assert hedger.run("standard", answer("primary", 0.01), answer("hedge")) == "primary"
+        assert hedger.stats()["hedged"] == 0
+
+    def test_budget_caps_hedges(self):
+        # 5 warm-up calls plus 5 slow ones at 20% allow 2 hedges; the median keeps
+        # the slow primaries that finish later from raising the hedge delay
+        hedger = warmed(budget_percent=20, percentile=50)
+        results = [hedger.run("standard", answer("primary", 0.3), answer("hedge")) for _ in range(5)]
+        stats = hedger.stats()
+        assert stats["hedged"] == 2
+        assert stats["budget_denied"] == 3
+        assert results.count("primary") == 3
+
+    def test_failed_primary_leaves_hedge_to_answer(self):
+        hedger = warmed()
+        assert hedger.run("standard", fail(0.1), answer("hedge", 0.2)) == "hedge"
+
+    def test_both_failing_raises(self):
+        hedger = warmed()
+        with pytest.raises(RuntimeError):
+            hedger.run("standard", fail(0.1), fail(0.1))
+        assert hedger.stats()["both_failed"] == 1
+
+    def test_disabled_runs_primary_only(self):
+        hedger = Hedger(pool, enabled=False)
+        assert hedger.run("standard", answer("primary"), answer("hedge")) == "primary"
+        assert hedger.stats()["calls"] == 0
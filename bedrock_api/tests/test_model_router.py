@@ -0,0 +1,105 @@
+"""
+Tests for routing pipeline stages between the standard and fast model tiers
+"""
+import sys
+import os
+import json
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.chicken import ChickenInfo
+from app.services.bedrock_service import BedrockService
+from app.services.model_router import ModelRouter, ModelTier
+
+STANDARD = ModelTier("standard", "amazon.nova-pro-v1:0", 0.0008, 0.0032)
+FAST = ModelTier("fast", "amazon.nova-lite-v1:0", 0.00006, 0.00024)
+
+VALID_CALCULATION = {"calc": {"meal_g": 60, "meals": 2, "times": ["7:00 AM", "4:00 PM"], "storage": ["Keep dry"]}}
+
+class FakeBedrockService(BedrockService):
+    """Answers from canned Nova responses per model id instead of calling Bedrock"""
+
+    def __init__(self, answers):
+        super().__init__()
+        self.model_router = ModelRouter(STANDARD, FAST, ["feed_calculation"])
+        self.answers = answers
+        self.models = []
+
+    def _invoke_nova_pro(self, prompt, model_id=None, region=None):
+        self.models.append(model_id)
+        return {
+            "output": {"message": {"content": [{"text": json.dumps(self.answers[model_id])}]}},
+            "usage": {"inputTokens": 1000, "outputTokens": 500},
+        }
+
+def base_recommendation():
+    return {
+        "feed_recommendation": {"daily_feed_amount_per_bird_kg": 0.12, "total_daily_feed_kg": 18.0, "feeding_schedule": ["7:00 AM", "4:00 PM"]},
+        "feed_composition": {"crude_protein_percent": 16.5},
+    }
+
+def chicken_info():
+    return ChickenInfo(count=150, breed="laying hen", average_weight_kg=2.0, age_weeks=30, environment="barn", purpose="eggs")
+
+class TestModelRouter:
+    """Test tier selection and accounting"""
+
+    def test_routes_listed_stages_to_fast_tier(self):
+        router = ModelRouter(STANDARD, FAST, ["feed_calculation"])
+        assert router.tier_for("feed_calculation") is FAST
+        assert router.tier_for("recommendation") is STANDARD
+        assert router.tier_for(None) is STANDARD
+
+    def test_same_model_disables_fast_tier(self):
+        router = ModelRouter(STANDARD, ModelTier("fast", STANDARD.model_id, 0, 0), ["feed_calculation"])
+        assert router.tier_for("feed_calculation") is STANDARD
+        assert list(router.stats()["tiers"]) == ["standard"]
+
+    def test_cost_accounting(self):
+        router = ModelRouter(STANDARD, FAST, ["feed_calculation"])
+        router.record_call(FAST, 0.5, {"inputTokens": 2000, "outputTokens": 1000})
+        router.record_call(FAST, 1.5, {}, error=True)
+        fast = router.stats()["tiers"]["fast"]
+        assert fast["calls"] == 2
+        assert fast["errors"] == 1
+        assert fast["seconds_mean"] == 1.0
+        assert fast["cost_usd"] == round(2 * 0.00006 + 1 * 0.00024, 6)
+
+class TestTieredCalls:
+    """Test the service routing stages and falling back to the standard tier"""
+
+    def test_calculation_runs_on_fast_tier(self):
+        service = FakeBedrockService({FAST.model_id: VALID_CALCULATION})
+        result = service._calculate_feed(base_recommendation(), chicken_info())
+        assert service.models == [FAST.model_id]
+        assert result["meals_per_day"] == 2
+        stats = service.model_stats()
+        assert stats["tiers"]["fast"]["calls"] == 1
+        assert stats["fallbacks"] == {}
+
+    def test_invalid_fast_answer_falls_back(self):
+        # Three feeding times for two meals does not validate
+        invalid = {"calc": {**VALID_CALCULATION["calc"], "times": ["7:00 AM", "12:00 PM", "5:00 PM"]}}
+        service = FakeBedrockService({FAST.model_id: invalid, STANDARD.model_id: VALID_CALCULATION})
+        result = service._calculate_feed(base_recommendation(), chicken_info())
+        assert service.models == [FAST.model_id, STANDARD.model_id]
+        assert result["feeding_schedule"] == ["7:00 AM", "4:00 PM"]
+        assert service.model_stats()["fallbacks"] == {"feed_calculation": 1}
+
+    def test_unparseable_fast_answer_falls_back(self):
+        service = FakeBedrockService({FAST.model_id: VALID_CALCULATION, STANDARD.model_id: VALID_CALCULATION})
+        original = service._invoke_nova_pro
+
+        def invoke(prompt, model_id=None, region=None):
+            response = original(prompt, model_id, region)
+            if model_id == FAST.model_id:
+                response["output"]["message"]["content"][0]["text"] = "no json here"
+            return response
+
+        service._invoke_nova_pro = invoke
+        service._calculate_feed(base_recommendation(), chicken_info())
+        assert service.models == [FAST.model_id, STANDARD.model_id]
+        stats = service.model_stats()
+        assert stats["tiers"]["fast"]["errors"] == 1
+        assert stats["tiers"]["standard"]["calls"] == 1
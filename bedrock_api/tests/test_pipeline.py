@@ -0,0 +1,124 @@
+"""
+Tests for the DAG stage executor
+"""
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from app.services.pipeline import Pipeline, Stage
+
+executor = ThreadPoolExecutor(max_workers=8)
+
+def sleeper(seconds, value):
+    def run(**_):
+        time.sleep(seconds)
+        return value
+    return run
+
+class TestPipelineGraph:
+    """Test graph validation"""
+
+    def test_cycle_rejected(self):
+        stages = [Stage("a", dict, inputs=["b"]), Stage("b", dict, inputs=["a"])]
+        with pytest.raises(ValueError, match="cycle"):
+            Pipeline("p", [], stages, "a", executor)
+
+    def test_unknown_input_rejected(self):
+        with pytest.raises(ValueError, match="unknown input"):
+            Pipeline("p", ["x"], [Stage("a", dict, inputs=["y"])], "a", executor)
+
+    def test_topological_order(self):
+        stages = [Stage("c", dict, inputs=["a", "b"]), Stage("b", dict, inputs=["a"]), Stage("a", dict, inputs=["x"])]
+        assert Pipeline("p", ["x"], stages, "c", executor).order == ["a", "b", "c"]
+
+class TestPipelineRun:
+    """Test concurrent execution, caching, optional stages and timeouts"""
+
+    def test_independent_stages_run_concurrently(self):
+        stages = [
+            Stage("a", sleeper(0.2, {"a": 1}), inputs=["x"]),
+            Stage("b", sleeper(0.2, {"b": 2}), inputs=["x"]),
+            Stage("c", lambda a, b: {**a, **b}, inputs=["a", "b"], inline=True),
+        ]
+        pipeline = Pipeline("p", ["x"], stages, "c", executor)
+        started = time.perf_counter()
+        output, timings = pipeline.run(x=1)
+        assert time.perf_counter() - started < 0.35
+        assert output == {"a": 1, "b": 2}
+        assert list(timings["stages"]) == ["a", "b", "c"]
+        assert timings["stages"]["c"]["start_ms"] >= 200
+        assert all(stage["status"] == "ok" for stage in timings["stages"].values())
+
+    def test_cache_by_input(self):
+        calls = []
+        stage = Stage("a", lambda x: calls.append(x) or {"x": x}, inputs=["x"], cache_seconds=60)
+        pipeline = Pipeline("p", ["x"], [stage], "a", executor)
+        first, _ = pipeline.run(x=1)
+        first["changed"] = True
+        second, timings = pipeline.run(x=1)
+        pipeline.run(x=2)
+        assert calls == [1, 2]
+        assert second == {"x": 1}
+        assert timings["stages"]["a"]["status"] == "cached"
+        assert pipeline.stats()["a"]["cache_hits"] == 1
+
+    def test_speculative_stage_skipped_after_cache_hit(self):
+        calls = []
+        stages = [
+            Stage("real", lambda x: calls.append("real") or {"x": x}, inputs=["x"], cache_seconds=60),
+            Stage("guess", lambda x: calls.append("guess") or {"x": x}, inputs=["x"], optional=True, speculates_on="real"),
+            Stage("check", lambda real, guess: {"guessed": guess is not None}, inputs=["real", "guess"], inline=True),
+        ]
+        pipeline = Pipeline("p", ["x"], stages, "check", executor)
+        assert pipeline.run(x=1)[0] == {"guessed": True}
+        output, timings = pipeline.run(x=1)
+        assert output == {"guessed": False}
+        assert sorted(calls) == ["guess", "real"]
+        assert timings["stages"]["guess"]["status"] == "skipped"
+        assert pipeline.stats()["guess"]["skips"] == 1
+
+    def test_unknown_speculation_target_rejected(self):
+        with pytest.raises(ValueError, match="speculates on unknown"):
+            Pipeline("p", ["x"], [Stage("a", dict, inputs=["x"], speculates_on="b")], "a", executor)
+
+    def test_optional_failure_passes_none(self):
+        def broken(x):
+            raise RuntimeError("boom")
+        stages = [
+            Stage("a", broken, inputs=["x"], optional=True),
+            Stage("b", lambda a: {"a": a}, inputs=["a"], inline=True),
+        ]
+        pipeline = Pipeline("p", ["x"], stages, "b", executor)
+        output, timings = pipeline.run(x=1)
+        assert output == {"a": None}
+        assert timings["stages"]["a"]["status"] == "failed"
+        assert pipeline.stats()["a"]["failures"] == 1
+
+    def test_required_failure_raises(self):
+        def broken(x):
+            raise HTTPException(status_code=502, detail="bad gateway")
+        pipeline = Pipeline("p", ["x"], [Stage("a", broken, inputs=["x"])], "a", executor)
+        with pytest.raises(HTTPException) as error:
+            pipeline.run(x=1)
+        assert error.value.status_code == 502
+
+    def test_timeout(self):
+        pipeline = Pipeline("p", ["x"], [Stage("a", sleeper(1.0, {}), inputs=["x"], timeout=0.1)], "a", executor)
+        started = time.perf_counter()
+        with pytest.raises(HTTPException) as error:
+            pipeline.run(x=1)
+        assert error.value.status_code == 504
+        assert time.perf_counter() - started < 0.5
+        assert pipeline.stats()["a"]["timeouts"] == 1
+
+    def test_output_type_checked(self):
+        pipeline = Pipeline("p", ["x"], [Stage("a", lambda x: [x], inputs=["x"])], "a", executor)
+        with pytest.raises(TypeError, match="expected dict"):
+            pipeline.run(x=1)
@@ -0,0 +1,115 @@
+"""
+Tests for the local weekly recipe quantity calculation
+"""
+import sys
+import os
+from datetime import date
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.chicken import WeeklyFeedCalendar
+from app.services.recipe_quantities import apportion, fill_weekly_quantities, week_start
+
+def model_calendar():
+    """Weekly calendar shaped like the model's percentage-only output"""
+    return {
+        "daily_recipes": [
+            {
+                "day": "Monday",
+                "feeding_recipes": [
+                    {
+                        "feeding_time": "7:00 AM",
+                        "share_percent": 60,
+                        "nutritional_focus": "Energy",
+                        "ingredient_breakdown": [
+                            {"ingredient_name": "Corn", "percentage": 33.3, "nutritional_contribution": "Energy"},
+                            {"ingredient_name": "Soybean meal", "percentage": 33.3, "nutritional_contribution": "Protein"},
+                            {"ingredient_name": "Wheat", "percentage": 33.3, "nutritional_contribution": "Energy"},
+                        ],
+                    },
+                    {
+                        "feeding_time": "4:00 PM",
+                        "share_percent": 40,
+                        "nutritional_focus": "Calcium",
+                        "ingredient_breakdown": [
+                            {"ingredient_name": "Barley", "percentage": 70, "nutritional_contribution": "Energy"},
+                            {"ingredient_name": "Oyster shell", "percentage": 30, "nutritional_contribution": "Calcium"},
+                        ],
+                    },
+                ],
+            },
+            {
+                "day": "Tuesday",
+                "feeding_recipes": [
+                    {"feeding_time": "8:00 AM", "nutritional_focus": "Protein", "ingredient_breakdown": [
+                        {"ingredient_name": "Fish meal", "percentage": 100, "nutritional_contribution": "Protein"},
+                    ]},
+                    {"feeding_time": "1:00 PM", "nutritional_focus": "Energy", "ingredient_breakdown": [
+                        {"ingredient_name": "Corn", "percentage": 100, "nutritional_contribution": "Energy"},
+                    ]},
+                    {"feeding_time": "6:00 PM", "nutritional_focus": "Energy", "ingredient_breakdown": [
+                        {"ingredient_name": "Oats", "percentage": 100, "nutritional_contribution": "Fiber"},
+                    ]},
+                ],
+            },
+        ]
+    }
+
+class TestApportion:
+    """Test the largest remainder split"""
+
+    def test_parts_sum_to_total(self):
+        for total in (0, 1, 7, 1000, 12345):
+            parts = apportion(total, [1, 1, 1])
+            assert sum(parts) == total
+            assert max(parts) - min(parts) <= 1
+
+    def test_proportional(self):
+        assert apportion(1000, [60, 40]) == [600, 400]
+        assert apportion(10, [3, 3, 3]) == [4, 3, 3]
+
+    def test_zero_and_missing_weights_split_evenly(self):
+        assert apportion(9, [0, None, 0]) == [3, 3, 3]
+        assert apportion(5, []) == []
+
+class TestFillWeeklyQuantities:
+    """Test that every quantity is derived from the daily total"""
+
+    def test_quantities_add_up(self):
+        calendar = fill_weekly_quantities(model_calendar(), 1.2345, date(2026, 10, 19))
+
+        assert calendar["week_start_date"] == "2026-10-19"
+        assert calendar["total_weekly_kg"] == round(1.2345 * 2, 4)
+        for day in calendar["daily_recipes"]:
+            assert day["total_daily_kg"] == 1.2345
+            assert round(sum(f["quantity_grams"] for f in day["feeding_recipes"]), 1) == 1234.5
+            for feeding in day["feeding_recipes"]:
+                assert "share_percent" not in feeding
+                ingredients = feeding["ingredient_breakdown"]
+                assert round(sum(i["percentage"] for i in ingredients), 1) == 100
+                assert round(sum(i["grams"] for i in ingredients), 1) == feeding["quantity_grams"]
+                assert feeding["quantity_kg"] == round(feeding["quantity_grams"] / 1000, 4)
+
+    def test_meal_shares(self):
+        monday, tuesday = fill_weekly_quantities(model_calendar(), 1.0)["daily_recipes"]
+        assert [f["quantity_grams"] for f in monday["feeding_recipes"]] == [600.0, 400.0]
+        # Without shares the day is split evenly
+        assert [f["quantity_grams"] for f in tuesday["feeding_recipes"]] == [333.4, 333.3, 333.3]
+
+    def test_percentages_normalized_and_recipe_written(self):
+        monday = fill_weekly_quantities(model_calendar(), 1.0)["daily_recipes"][0]
+        feeding = monday["feeding_recipes"][0]
+        assert [i["percentage"] for i in feeding["ingredient_breakdown"]] == [33.4, 33.3, 33.3]
+        assert feeding["recipe"] == "Corn 33.4%, Soybean meal 33.3%, Wheat 33.3%"
+
+    def test_matches_response_model(self):
+        calendar = model_calendar()
+        calendar.update(weekly_nutritional_goals=[], preparation_notes=[], seasonal_adjustments=[])
+        for day in calendar["daily_recipes"]:
+            day.update(nutritional_notes="", special_considerations=[])
+        fill_weekly_quantities(calendar, 0.85)
+        WeeklyFeedCalendar(**calendar)
+
+    def test_week_start_is_monday(self):
+        assert week_start(date(2026, 10, 22)) == date(2026, 10, 19)
@@ -0,0 +1,174 @@
+"""
+Tests for fair scheduling of model calls across tenants and lanes
+"""
+import sys
+import os
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import parse_weights, settings
+from app.services.deadline import Deadline, DeadlineExceeded
+from app.services.scheduler import BATCH, INTERACTIVE, Caller, ModelScheduler
+from app.api.routes import caller_from_request
+
+def wait_for(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.005)
+
+def queue_calls(scheduler, callers, served):
+    """Start a thread per caller that takes a slot, records its tenant and lane, and lets go"""
+    threads = []
+    for caller in callers:
+        def call(caller=caller):
+            with scheduler.slot(caller):
+                served.append((caller.tenant, caller.lane))
+        thread = threading.Thread(target=call)
+        thread.start()
+        threads.append(thread)
+        # Enqueue in a known order
+        wait_for(lambda: sum(lane["waiting"] for lane in scheduler.stats()["lanes"].values()) >= len(threads))
+    return threads
+
+class TestModelScheduler:
+    """Test lane priority, reserved slots and weighted fairness"""
+
+    def test_interactive_served_before_queued_batch(self):
+        scheduler = ModelScheduler(capacity=1)
+        served = []
+        blocker = scheduler.acquire(Caller("nightly", BATCH))
+        threads = queue_calls(scheduler, [Caller("nightly", BATCH), Caller("nightly", BATCH), Caller("farm", INTERACTIVE)], served)
+        scheduler.release(blocker)
+        for thread in threads:
+            thread.join()
+        assert served[0] == ("farm", INTERACTIVE)
+
+    def test_reserved_slots_keep_interactive_flat(self):
+        scheduler = ModelScheduler(capacity=3, reserved_interactive=1)
+        held = [scheduler.acquire(Caller("nightly", BATCH)) for _ in range(2)]
+        served = []
+        # A third batch call has to wait even though a slot is free
+        threads = queue_calls(scheduler, [Caller("nightly", BATCH)], served)
+        assert served == []
+
+        started = time.perf_counter()
+        with scheduler.slot(Caller("farm", INTERACTIVE)):
+            assert time.perf_counter() - started < 0.1
+        assert served == []
+
+        for waiter in held:
+            scheduler.release(waiter)
+        for thread in threads:
+            thread.join()
+        assert served == [("nightly", BATCH)]
+
+    def test_weighted_fair_share(self):
+        scheduler = ModelScheduler(capacity=1, weights={"acme": 3})
+        blocker = scheduler.acquire(Caller("other", BATCH))
+        served = []
+        threads = queue_calls(scheduler, [Caller("acme", BATCH)] * 8 + [Caller("nightly", BATCH)] * 8, served)
+        scheduler.release(blocker)
+        for thread in threads:
+            thread.join()
+        first = [tenant for tenant, _ in served[:8]]
+        assert first.count("acme") == 6
+        assert first.count("nightly") == 2
+
+    def test_deadline_abandons_the_wait(self):
+        scheduler = ModelScheduler(capacity=1)
+        blocker = scheduler.acquire(Caller("nightly", BATCH))
+        with pytest.raises(DeadlineExceeded):
+            Deadline(0.1).run(scheduler.acquire, Caller("farm", INTERACTIVE))
+        scheduler.release(blocker)
+        stats = scheduler.stats()["lanes"][INTERACTIVE]
+        assert stats["abandoned"] == 1
+        assert stats["waiting"] == 0
+        # The abandoned place in the queue does not take the slot
+        with scheduler.slot(Caller("farm", INTERACTIVE)):
+            pass
+
+    def test_queue_time_slo(self):
+        scheduler = ModelScheduler(capacity=1, slo_seconds={INTERACTIVE: 0.05})
+        blocker = scheduler.acquire(Caller("farm", INTERACTIVE))
+        threading.Timer(0.2, scheduler.release, args=[blocker]).start()
+        with scheduler.slot(Caller("farm", INTERACTIVE)):
+            pass
+        stats = scheduler.stats()
+        lane = stats["lanes"][INTERACTIVE]
+        assert lane["served"] == 2
+        assert lane["slo_violations"] == 1
+        assert lane["slo_attainment"] == 0.5
+        assert lane["queue_seconds_p99"] >= 0.15
+        assert stats["tenants"]["farm"]["served"] == 2
+
+    def test_idle_tenants_are_forgotten(self):
+        scheduler = ModelScheduler(capacity=1)
+        for tenant in ("a", "b", "c"):
+            with scheduler.slot(Caller(tenant, BATCH)):
+                pass
+        # Each finish tag stays until the lane's virtual time passes it
+        assert len(scheduler._finish_tags) == 3
+        blocker = scheduler.acquire(Caller("d", BATCH))
+        served = []
+        threads = queue_calls(scheduler, [Caller("d", BATCH)] * 2, served)
+        scheduler.release(blocker)
+        for thread in threads:
+            thread.join()
+        # d's last call has not been passed yet, everyone else is gone
+        assert list(scheduler._finish_tags) == [(BATCH, "d")]
+        assert scheduler._active == {}
+
+    def test_idle_tenant_keeps_its_place_until_passed(self):
+        scheduler = ModelScheduler(capacity=1)
+        blocker = scheduler.acquire(Caller("other", BATCH))
+        served = []
+        threads = queue_calls(scheduler, [Caller("nightly", BATCH)] * 3, served)
+        scheduler.release(blocker)
+        for thread in threads:
+            thread.join()
+        # Calling again right away does not jump back to the lane's virtual time
+        assert scheduler._finish_tags[(BATCH, "nightly")] > scheduler._virtual_time[BATCH]
+
+class TestCallerFromRequest:
+    """Test reading the tenant and lane from the request"""
+
+    @staticmethod
+    def request(headers):
+        return Request({"type": "http", "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()]})
+
+    def test_defaults(self, monkeypatch):
+        monkeypatch.setattr(settings, "BATCH_TENANTS", ["nightly"])
+        monkeypatch.setattr(settings, "TENANTS", ["farm"])
+        caller = caller_from_request(self.request({}))
+        assert (caller.tenant, caller.lane) == ("anonymous", INTERACTIVE)
+        caller = caller_from_request(self.request({"X-Tenant-ID": "nightly"}))
+        assert caller.lane == BATCH
+        caller = caller_from_request(self.request({"X-Tenant-ID": "farm", "X-Priority": "batch"}))
+        assert (caller.tenant, caller.lane) == ("farm", BATCH)
+
+    def test_batch_tenant_cannot_raise_its_lane(self, monkeypatch):
+        monkeypatch.setattr(settings, "BATCH_TENANTS", ["nightly"])
+        caller = caller_from_request(self.request({"X-Tenant-ID": "nightly", "X-Priority": "interactive"}))
+        assert (caller.tenant, caller.lane) == ("nightly", BATCH)
+
+    def test_unknown_tenant_is_anonymous(self, monkeypatch):
+        monkeypatch.setattr(settings, "TENANT_WEIGHTS", {"acme": 3.0})
+        assert caller_from_request(self.request({"X-Tenant-ID": "acme"})).tenant == "acme"
+        assert caller_from_request(self.request({"X-Tenant-ID": "made-up-1234"})).tenant == "anonymous"
+
+    def test_invalid_priority(self):
+        with pytest.raises(HTTPException) as error:
+            caller_from_request(self.request({"X-Priority": "urgent"}))
+        assert error.value.status_code == 400
+
+def test_parse_weights():
+    assert parse_weights("acme:3, nightly:0.5,solo") == {"acme": 3.0, "nightly": 0.5, "solo": 1.0}
+    assert parse_weights("") == {}
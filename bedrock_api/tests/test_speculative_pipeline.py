@@ -0,0 +1,132 @@
+"""
+Tests for the speculative recommendation -> calculation -> recipe pipeline
+"""
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.chicken import ChickenInfo, ChickenDiseaseInfo
+from app.services.bedrock_service import BedrockService
+from app.services.feed_estimates import RECOVERY_COMPOSITION, estimate_daily_feed, within_tolerance
+
+STAGE_SECONDS = 0.2
+
+class FakeBedrockService(BedrockService):
+    """Answers each prompt with a canned response after a fixed delay instead of calling Bedrock"""
+
+    def __init__(self, total_daily_feed_kg, composition, meals=2):
+        super().__init__()
+        self.total_daily_feed_kg = total_daily_feed_kg
+        self.composition = composition
+        self.meals = meals
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def _call_nova_pro(self, prompt, **_):
+        with self._lock:
+            self.prompts.append(prompt)
+        time.sleep(STAGE_SECONDS)
+        if "weekly" in prompt:
+            feeding = {"feeding_time": "9:00 AM", "nutritional_focus": "Energy", "ingredient_breakdown": [
+                {"ingredient_name": "Corn", "percentage": 100, "nutritional_contribution": "Energy"}
+            ]}
+            return {"weekly_calendar": {"daily_recipes": [{"day": "Monday", "feeding_recipes": [dict(feeding) for _ in range(self.meals)]}]}}
+        if "feeding calculation" in prompt:
+            return {"calc": {"meal_g": 60, "meals": self.meals, "times": ["6:00 AM", "6:00 PM"][:self.meals], "storage": []}}
+        return {
+            "feed_composition": self.composition, "recovery_feed_composition": self.composition,
+            "daily_feed_amount_per_bird_kg": self.total_daily_feed_kg / 100, "total_daily_feed_kg": self.total_daily_feed_kg
+        }
+
+CHICKENS = ChickenInfo(count=100, breed="laying hen", average_weight_kg=2.0, age_weeks=30, environment="barn", purpose="eggs", season="spring")
+
+def service_for(total_factor=1.0, protein=16.5, meals=2):
+    estimate = estimate_daily_feed(100, 2.0, 30, "eggs", "barn", "spring")
+    composition = {"crude_protein_percent": protein, "metabolizable_energy_kcal_per_kg": 2750, "calcium_percent": 3.8, "phosphorus_percent": 0.4}
+    return FakeBedrockService(estimate["total_daily_feed_kg"] * total_factor, composition, meals)
+
+class TestFeedEstimates:
+    """Test the local estimates the speculative stages start from"""
+
+    def test_daily_feed(self):
+        layer = estimate_daily_feed(100, 2.0, 30, "eggs", "barn")
+        assert layer == {"daily_feed_amount_per_bird_kg": 0.11, "total_daily_feed_kg": 11.0}
+        chick = estimate_daily_feed(100, 0.3, 2)
+        assert chick["daily_feed_amount_per_bird_kg"] == 0.03
+
+    def test_within_tolerance(self):
+        assert within_tolerance({"a": 10.0}, {"a": 11.0}, 0.15)
+        assert not within_tolerance({"a": 10.0}, {"a": 12.0}, 0.15)
+        assert within_tolerance({"a": 10.0}, {"a": "N/A"}, 0.15)
+
+class TestSpeculativePipeline:
+    """Test that stages run in parallel and are only re-run when the estimate was off"""
+
+    def test_weekly_recipes_hit_runs_stages_in_parallel(self):
+        service = service_for(total_factor=1.05)
+        started = time.perf_counter()
+        result = service.generate_weekly_recipes(CHICKENS)
+        elapsed = time.perf_counter() - started
+
+        assert len(service.prompts) == 3
+        assert elapsed < 2 * STAGE_SECONDS
+        assert service.speculation_stats == {"feed_calculation_hits": 1, "weekly_recipes_hits": 1}
+        # Real totals win, meal size is rescaled and the recipe follows the real schedule
+        calculation = result["feed_calculation"]
+        assert calculation["total_quantity_per_day_kg"] == service.total_daily_feed_kg
+        assert calculation["quantity_per_meal_g"] == 63.0
+        monday = result["weekly_calendar"]["daily_recipes"][0]
+        assert [f["feeding_time"] for f in monday["feeding_recipes"]] == ["6:00 AM", "6:00 PM"]
+        assert monday["total_daily_kg"] == round(service.total_daily_feed_kg, 4)
+
+        stages = result["pipeline"]["stages"]
+        assert result["pipeline"]["pipeline"] == "weekly_recipes"
+        assert {"recommendation", "speculative_calculation", "speculative_calendar", "response"} <= set(stages)
+        for name in ("speculative_calculation", "speculative_calendar"):
+            assert stages[name]["start_ms"] < STAGE_SECONDS * 1000 / 2
+
+    def test_recommendation_reused_across_endpoints(self):
+        service = service_for()
+        service.generate_feed_calculation(CHICKENS)
+        result = service.generate_weekly_recipes(CHICKENS)
+        stages = result["pipeline"]["stages"]
+        assert stages["recommendation"]["status"] == "cached"
+        # With the real recommendation at hand there is nothing to speculate on
+        assert stages["speculative_calculation"]["status"] == stages["speculative_calendar"]["status"] == "skipped"
+        assert len(service.prompts) == 4
+        assert f"Total daily feed needed: {service.total_daily_feed_kg} kg" in service.prompts[2]
+        assert service.speculation_stats == {"feed_calculation_hits": 1}
+
+    def test_totals_miss_reruns_calculation(self):
+        service = service_for(total_factor=1.5)
+        result = service.generate_feed_calculation(CHICKENS)
+        assert len(service.prompts) == 3
+        assert service.speculation_stats == {"feed_calculation_misses": 1}
+        assert f"Total daily feed needed: {service.total_daily_feed_kg} kg" in service.prompts[-1]
+        assert result["feed_calculation"]["quantity_per_meal_g"] == 60
+
+    def test_composition_or_meal_miss_reruns_recipes(self):
+        for service in (service_for(protein=22.0), service_for(meals=3)):
+            service.generate_weekly_recipes(CHICKENS)
+            assert service.speculation_stats["weekly_recipes_misses"] == 1
+            assert len(service.prompts) == 4
+
+    def test_disease_weekly_recipes(self):
+        service = service_for()
+        service.composition = {**RECOVERY_COMPOSITION, "crude_protein_percent": 19.0}
+        disease_info = ChickenDiseaseInfo(count=100, breed="laying hen", average_weight_kg=2.0, age_weeks=30, disease="coccidiosis")
+        result = service.generate_disease_weekly_recipes(disease_info)
+        assert len(service.prompts) == 2
+        assert service.speculation_stats == {"disease_weekly_recipes_hits": 1}
+        assert result["weekly_calendar"]["daily_recipes"][0]["total_daily_kg"] == round(service.total_daily_feed_kg, 4)
+
+    def test_sequential_mode(self):
+        service = service_for()
+        service.speculative = False
+        service.generate_weekly_recipes(CHICKENS)
+        assert len(service.prompts) == 3
+        assert not service.speculation_stats
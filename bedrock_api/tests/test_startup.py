@@ -0,0 +1,121 @@
+"""
+Tests for lazy startup and the background credential check behind readiness
+"""
+import sys
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path so we can import from app
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from app.core.config import settings
+from app.services.credential_check import INVALID, PENDING, UNCONFIGURED, VALID, CredentialCheck
+
+@pytest.fixture
+def configured(monkeypatch):
+    monkeypatch.setattr(settings, "AWS_BEARER_TOKEN_BEDROCK", "test-token")
+    monkeypatch.setattr(settings, "AWS_REGION", "us-east-1")
+
+class TestCredentialCheck:
+    """The cached result of validating the bearer token"""
+
+    def test_pending_counts_as_ready(self, configured):
+        check = CredentialCheck(lambda: True)
+        assert check.status == PENDING
+        assert check.ready
+
+    def test_valid_and_invalid(self, configured):
+        answers = [True, False]
+        check = CredentialCheck(lambda: answers.pop(0))
+        assert check.run() == VALID and check.ready
+        assert check.run() == INVALID and not check.ready
+        assert check.stats()["checks"] == 2
+
+    def test_missing_settings_skip_the_call(self, monkeypatch):
+        monkeypatch.setattr(settings, "AWS_BEARER_TOKEN_BEDROCK", "")
+        calls = []
+        check = CredentialCheck(lambda: calls.append(1) or True)
+        assert check.run() == UNCONFIGURED
+        assert not check.ready
+        assert calls == []
+        assert "AWS_BEARER_TOKEN_BEDROCK" in check.stats()["error"]
+
+    def test_error_keeps_the_previous_status(self, configured):
+        def validate():
+            raise ConnectionError("Could not connect to the endpoint URL")
+        check = CredentialCheck(validate)
+        assert check.run() == PENDING
+        assert check.ready
+        assert "endpoint" in check.stats()["error"]
+
+    def test_start_runs_in_the_background_and_rechecks(self, configured):
+        release = threading.Event()
+        calls = []
+
+        def validate():
+            calls.append(1)
+            release.wait(5)
+            return True
+
+        check = CredentialCheck(validate, recheck_seconds=0.01)
+        started = time.perf_counter()
+        check.start()
+        assert time.perf_counter() - started < 0.5
+        assert check.status == PENDING
+        release.set()
+        assert check.wait(5)
+        assert check.status == VALID
+        deadline = time.perf_counter() + 5
+        while len(calls) < 2 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        check.stop()
+        assert len(calls) >= 2
+
+class TestStartup:
+    """The app serves before the credentials are validated, and imports boto3 only when needed"""
+
+    def test_boto3_not_imported_with_the_app(self):
+        output = subprocess.run(
+            [sys.executable, "-c", "import sys, main; print('boto3' in sys.modules)"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        assert output.strip() == "False"
+
+    def test_serves_while_credentials_are_checked(self, configured, monkeypatch):
+        import main
+        from app.api.routes import get_bedrock_service
+
+        release = threading.Event()
+        service = get_bedrock_service()
+        # A fresh check, so state from other tests does not leak in
+        check = CredentialCheck(lambda: release.wait(5))
+        monkeypatch.setattr(service, "credential_check", check)
+
+        with TestClient(main.app) as client:
+            assert client.get("/health").status_code == 200
+            response = client.get("/ready")
+            assert response.status_code == 200
+            assert response.json()["credentials"]["status"] == PENDING
+            release.set()
+            assert check.wait(5)
+            assert client.get("/ready").json()["credentials"]["status"] == VALID
+
+    def test_not_ready_with_invalid_credentials(self, configured, monkeypatch):
+        import main
+        from app.api.routes import get_bedrock_service
+
+        check = CredentialCheck(lambda: False)
+        monkeypatch.setattr(get_bedrock_service(), "credential_check", check)
+
+        with TestClient(main.app) as client:
+            assert check.wait(5)
+            response = client.get("/ready")
+            assert response.status_code == 503
+            assert response.json()["ready"] is False
+            assert client.get("/auth/info").json()["auth_info"]["credentials"]["status"] == INVALID
@@ -0,0 +1,88 @@
+"""
+Tests for the compact model response format and its expanders
+"""
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import wire_format
+from app.services.recipe_quantities import fill_weekly_quantities
+from app.models.chicken import WeeklyFeedCalendar
+
+class TestExpandKeys:
+    """Test short key expansion for the object-shaped responses"""
+
+    def test_nested_keys_expanded(self):
+        compact = {"fc": {"cp": 16.5, "me": 2750, "vit": {"d3": 3000}}, "total_kg": 18.0, "recs": ["Clean water"]}
+        assert wire_format.expand_keys(compact, wire_format.FEED_RECOMMENDATION_KEYS) == {
+            "feed_composition": {"crude_protein_percent": 16.5, "metabolizable_energy_kcal_per_kg": 2750, "vitamins": {"vitamin_d3_iu_per_kg": 3000}},
+            "total_daily_feed_kg": 18.0,
+            "additional_recommendations": ["Clean water"],
+        }
+
+    def test_verbose_passes_through(self):
+        for example, key_map in (
+            (wire_format.FEED_RECOMMENDATION_EXAMPLE, wire_format.FEED_RECOMMENDATION_KEYS),
+            (wire_format.FEED_CALCULATION_EXAMPLE, wire_format.FEED_CALCULATION_KEYS),
+            (wire_format.DISEASE_RECOVERY_EXAMPLE, wire_format.DISEASE_RECOVERY_KEYS),
+        ):
+            assert wire_format.expand_keys(example, key_map) == example
+
+    def test_round_trip(self):
+        example = wire_format.DISEASE_RECOVERY_EXAMPLE
+        compact = wire_format.compact_keys(example, wire_format.DISEASE_RECOVERY_KEYS)
+        assert "fc" in compact and "imm" in compact["fc"]
+        assert wire_format.expand_keys(compact, wire_format.DISEASE_RECOVERY_KEYS) == example
+
+    def test_short_keys_unique(self):
+        legend = wire_format.key_legend(wire_format.DISEASE_RECOVERY_KEYS)
+        shorts = [entry.split("=")[0] for entry in legend.split(", ")]
+        assert len(shorts) == len(set(shorts))
+
+class TestExpandCalendar:
+    """Test the positional weekly calendar layout"""
+
+    def test_round_trip(self):
+        for example, layout in (
+            (wire_format.WEEKLY_CALENDAR_EXAMPLE, wire_format.WEEKLY_CALENDAR_LAYOUT),
+            (wire_format.DISEASE_WEEKLY_CALENDAR_EXAMPLE, wire_format.DISEASE_WEEKLY_CALENDAR_LAYOUT),
+        ):
+            compact = wire_format.compact_calendar(example, layout)
+            assert wire_format.expand_calendar(compact, layout) == example
+
+    def test_ingredient_dictionary(self):
+        compact = {
+            "i": [["Corn", "Energy"], ["Fish meal", "Protein"]],
+            "d": [[[["7:00 AM", 70, "Energy", [[0, 60], [1, 40]]], ["5:00 PM", 30, "Protein", [[1, 100]]]], "Notes", ["Water"]]],
+            "g": ["Goal"], "p": ["Prep"], "s": ["Season"],
+        }
+        calendar = wire_format.expand_calendar(compact, wire_format.WEEKLY_CALENDAR_LAYOUT)
+        monday = calendar["daily_recipes"][0]
+        assert monday["day"] == "Monday"
+        assert monday["nutritional_notes"] == "Notes"
+        assert monday["feeding_recipes"][0]["ingredient_breakdown"][1] == {
+            "ingredient_name": "Fish meal", "percentage": 40, "nutritional_contribution": "Protein"
+        }
+        assert calendar["weekly_nutritional_goals"] == ["Goal"]
+
+        filled = fill_weekly_quantities(calendar, 1.0)
+        WeeklyFeedCalendar(**filled)
+        assert [f["quantity_grams"] for f in filled["daily_recipes"][0]["feeding_recipes"]] == [700.0, 300.0]
+
+    def test_tolerates_short_rows(self):
+        compact = {"i": [["Corn", "Energy"]], "d": [[[["7:00 AM", [[0, 100], [5, 0]]]]]]}
+        calendar = wire_format.expand_calendar(compact, wire_format.DISEASE_WEEKLY_CALENDAR_LAYOUT)
+        feeding = calendar["daily_recipes"][0]["feeding_recipes"][0]
+        assert feeding["recovery_benefits"] == ""
+        assert "share_percent" not in feeding
+        assert [i["ingredient_name"] for i in feeding["ingredient_breakdown"]] == ["Corn", "5"]
+        assert calendar["disease_specific_notes"] == []
+
+class TestJsonSkeleton:
+    """Test prompt skeleton rendering"""
+
+    def test_numbers_unquoted(self):
+        text = wire_format.json_skeleton({"a": wire_format.number("percentage"), "b": "<explanation>"}, compact=True)
+        assert text == '{"a":<percentage>,"b":"<explanation>"}'
@@ -174,15 +174,13 @@ class ApiService {
 
       if (response.ok) {
         const data = await response.json();
-        // Generate a simple session token since our API doesn't provide JWT tokens
-        const sessionToken = `session_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
-        this.setToken(sessionToken);
+        // The API issues a short-lived access token and a refresh token
+        this.setToken(data.access_token, data.refresh_token);
         return { 
           success: true, 
           data: {
             ...data,
-            user: userCheck.user,
-            access_token: sessionToken
+            user: userCheck.user
           }
         };
       } else {